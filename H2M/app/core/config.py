@@ -22,6 +22,16 @@ class IgniteConfig(BaseModel):
     addresses: List[str]
     cache_name: str
 
+class HistoryConfig(BaseModel):
+    # Prompts include at most this many of the newest turns...
+    max_turns: int = 20
+    # ...within roughly this many tokens
+    token_budget: int = 3000
+    # Every this many turns, older turns are folded into the summary...
+    compact_every_turns: int = 50
+    # ...except the newest this many
+    keep_turns: int = 20
+
 class RagConfig(BaseModel):
     default_top_k: int
     collection_name: str
@@ -46,6 +56,7 @@ class AppConfig(BaseModel):
     api: ApiConfig
     services: ServicesConfig
     ignite: IgniteConfig
+    history: HistoryConfig = HistoryConfig()
     rag: RagConfig
     otel: OtelConfig
     pulsar: PulsarConfig
@@ -2,6 +2,8 @@ import logging
 from typing import List, Dict, Optional
 import uuid
 
+from app.core.config import get_config
+from app.core.history import Summarizer, truncating_summarizer
 from app.services.ignite_client import ignite_client
 
 # Configure logging
@@ -11,15 +13,25 @@ logger = logging.getLogger(__name__)
 class ContextManager:
     """
     Manages the context and history of conversations, scoped by user.
+
+    Each turn is appended to the conversation's history on its own, and
+    only the newest turns (within the configured turn and token limits) are
+    read back for a prompt. Every `compact_every_turns` turns, older turns
+    are folded into a summary by `summarizer`.
     """
 
+    def __init__(self):
+        self.history_config = get_config().history
+        # Replaced by a model-backed summarizer where one is available
+        self.summarizer: Summarizer = truncating_summarizer
+
     def _get_cache_key(self, user_id: str, conversation_id: str) -> str:
         """Creates a composite key for the cache."""
         return f"{user_id}:{conversation_id}"
 
     async def get_or_create_conversation_history(self, user_id: str, conversation_id: Optional[str]) -> (str, List[Dict]):
         """
-        Retrieves the history for a user's conversation, or creates a new one.
+        Retrieves the recent history for a user's conversation, or creates a new one.
         """
         if not conversation_id:
             conversation_id = str(uuid.uuid4())
@@ -27,26 +39,34 @@ class ContextManager:
             return conversation_id, []
 
         cache_key = self._get_cache_key(user_id, conversation_id)
-        history = await ignite_client.get_history(cache_key)
-        
-        if history is None:
+        history = await ignite_client.get_history(
+            cache_key,
+            max_turns=self.history_config.max_turns,
+            token_budget=self.history_config.token_budget
+        )
+
+        if not history:
             logger.warning(f"No history found for key {cache_key}. Starting new history.")
-            return conversation_id, []
-        
+
         return conversation_id, history
 
     async def add_message_to_history(self, user_id: str, conversation_id: str, user_message: str, ai_message: str):
         """
-        Adds a new turn to a user's conversation history.
+        Appends a new turn to a user's conversation history, compacting it when due.
         """
-        _id, history = await self.get_or_create_conversation_history(user_id, conversation_id)
-
-        history.append({"role": "user", "content": user_message})
-        history.append({"role": "assistant", "content": ai_message})
-
         cache_key = self._get_cache_key(user_id, conversation_id)
-        await ignite_client.save_history(cache_key, history)
+        seq = await ignite_client.append_turn(cache_key, [
+            {"role": "user", "content": user_message},
+            {"role": "assistant", "content": ai_message},
+        ])
         logger.info(f"Appended messages to history for cache key {cache_key}.")
 
+        if (seq + 1) % self.history_config.compact_every_turns == 0:
+            try:
+                await ignite_client.compact_history(cache_key, self.history_config.keep_turns, self.summarizer)
+            except Exception as e:
+                # The turns stay as they are; the next compaction folds them
+                logger.warning(f"Failed to compact history for cache key {cache_key}: {e}", exc_info=True)
+
 # Global instance for the application
 context_manager = ContextManager() 
\ No newline at end of file
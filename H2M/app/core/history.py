@@ -0,0 +1,201 @@
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+# How many times an append or compaction retries a head update that raced another
+MAX_HEAD_ATTEMPTS = 16
+# Turns fetched per cache round trip when reading back from the newest
+READ_BATCH_TURNS = 16
+
+Summarizer = Callable[[str, List[Dict]], Awaitable[str]]
+
+
+class HistoryConflictError(RuntimeError):
+    """Raised when a conversation's head keeps changing under an update."""
+    pass
+
+
+class HistoryHead(BaseModel):
+    """The small per-conversation record every append updates."""
+    turns: int = Field(0, description="Turns appended so far; the next turn's sequence number.")
+    compacted: int = Field(0, description="Turns before this one are folded into the summary.")
+
+
+class HistorySummary(BaseModel):
+    through: int = Field(..., description="The summary covers turns before this one.")
+    text: str
+
+
+class HistoryTurn(BaseModel):
+    messages: List[Dict[str, str]]
+    tokens: int
+
+
+def estimate_tokens(text: str) -> int:
+    """A rough token count (about four characters per token), good enough for budgeting prompts."""
+    return len(text) // 4 + 1
+
+
+async def truncating_summarizer(summary: str, messages: List[Dict]) -> str:
+    """Folds messages into a summary without a model: keeps the start of each message."""
+    lines = [summary] if summary else []
+    lines.extend(f"{m['role']}: {m['content'][:200]}" for m in messages)
+    return "\n".join(lines)[-4000:]
+
+
+class SegmentedHistoryStore:
+    """
+    Stores conversation history in a key-value cache as an append-only log,
+    so a turn costs the same however long the conversation is.
+
+    A conversation `key` has a head record (`<key>:head`) with its turn
+    count, one record per turn (`<key>:turn:<seq>`) and, once compacted, a
+    summary of its older turns (`<key>:summary`). Appending claims the next
+    sequence number by compare-and-swap on the head and then writes the
+    turn, so concurrent turns never overwrite each other. Reads fetch only
+    the newest turns, back to a turn limit or token budget. Compaction folds
+    the oldest turns into the summary and deletes them.
+
+    `cache` is an Ignite cache (or anything with the same get, put,
+    put_if_absent, replace_if_equals, get_all and remove_keys). Records are
+    JSON strings, so compare-and-swap compares them exactly. Conversations
+    saved as a single list under `key` are migrated on first use.
+    """
+
+    def __init__(self, cache: Any):
+        self.cache = cache
+
+    @staticmethod
+    def _head_key(key: str) -> str:
+        return f"{key}:head"
+
+    @staticmethod
+    def _summary_key(key: str) -> str:
+        return f"{key}:summary"
+
+    @staticmethod
+    def _turn_key(key: str, seq: int) -> str:
+        return f"{key}:turn:{seq}"
+
+    async def append(self, key: str, messages: List[Dict[str, str]]) -> int:
+        """Appends one turn (e.g. a user message and its reply). Returns its sequence number."""
+        turn = HistoryTurn(messages=messages, tokens=sum(estimate_tokens(m["content"]) for m in messages))
+        head_key = self._head_key(key)
+        for _ in range(MAX_HEAD_ATTEMPTS):
+            raw = self._load_head(key)
+            head = HistoryHead.model_validate_json(raw)
+            claimed = head.model_copy(update={"turns": head.turns + 1})
+            if self.cache.replace_if_equals(head_key, raw, claimed.model_dump_json()):
+                break
+        else:
+            raise HistoryConflictError(f"Could not append to conversation {key}: its head kept changing.")
+        # A reader that sees the claimed number before the turn is written skips it
+        self.cache.put(self._turn_key(key, head.turns), turn.model_dump_json())
+        return head.turns
+
+    async def read(self, key: str, max_turns: Optional[int] = None, token_budget: Optional[int] = None) -> List[Dict[str, str]]:
+        """
+        Returns the conversation's newest messages, oldest first: at most
+        `max_turns` turns whose estimated tokens fit `token_budget` (the
+        newest turn is always included). The summary of compacted turns
+        comes first, as a system message, if it fits too.
+        """
+        head = HistoryHead.model_validate_json(self._load_head(key))
+        summary = self._load_summary(key)
+        first = max(head.compacted, summary.through if summary else 0)
+
+        turns: List[HistoryTurn] = []
+        tokens = 0
+        seq = head.turns - 1
+        full = False
+        while seq >= first and not full:
+            window = range(seq, max(first, seq - READ_BATCH_TURNS + 1) - 1, -1)
+            records = self.cache.get_all([self._turn_key(key, s) for s in window])
+            for s in window:
+                raw = records.get(self._turn_key(key, s))
+                if raw is None:
+                    continue
+                turn = HistoryTurn.model_validate_json(raw)
+                if turns and token_budget is not None and tokens + turn.tokens > token_budget:
+                    full = True
+                    break
+                turns.append(turn)
+                tokens += turn.tokens
+                if max_turns is not None and len(turns) >= max_turns:
+                    full = True
+                    break
+            seq = window[-1] - 1
+
+        messages = [m for turn in reversed(turns) for m in turn.messages]
+        if summary and (token_budget is None or tokens + estimate_tokens(summary.text) <= token_budget):
+            messages.insert(0, {"role": "system", "content": f"Summary of the earlier conversation:\n{summary.text}"})
+        return messages
+
+    async def compact(self, key: str, keep_turns: int, summarize: Summarizer = truncating_summarizer) -> int:
+        """
+        Folds all but the newest `keep_turns` turns into the summary, with
+        `summarize(previous summary, messages)`, and deletes them. Returns
+        how many turns were folded; 0 if there was nothing to fold or a
+        concurrent compaction won.
+        """
+        head = HistoryHead.model_validate_json(self._load_head(key))
+        summary_key = self._summary_key(key)
+        raw_summary = self.cache.get(summary_key)
+        summary = HistorySummary.model_validate_json(raw_summary) if raw_summary else None
+        start = max(head.compacted, summary.through if summary else 0)
+        end = head.turns - keep_turns
+        if end <= start:
+            return 0
+
+        keys = [self._turn_key(key, s) for s in range(start, end)]
+        records = self.cache.get_all(keys)
+        messages = [m for k in keys if k in records for m in HistoryTurn.model_validate_json(records[k]).messages]
+        folded = HistorySummary(through=end, text=await summarize(summary.text if summary else "", messages))
+
+        if raw_summary:
+            won = self.cache.replace_if_equals(summary_key, raw_summary, folded.model_dump_json())
+        else:
+            won = self.cache.put_if_absent(summary_key, folded.model_dump_json())
+        if not won:
+            return 0
+        # Readers skip turns the summary covers, so they can go once it is saved
+        self._advance_compacted(key, end)
+        self.cache.remove_keys(keys)
+        logger.info(f"Compacted turns {start}-{end - 1} of conversation {key} into its summary.")
+        return end - start
+
+    def _advance_compacted(self, key: str, through: int):
+        head_key = self._head_key(key)
+        for _ in range(MAX_HEAD_ATTEMPTS):
+            raw = self._load_head(key)
+            head = HistoryHead.model_validate_json(raw)
+            if head.compacted >= through:
+                return
+            if self.cache.replace_if_equals(head_key, raw, head.model_copy(update={"compacted": through}).model_dump_json()):
+                return
+        raise HistoryConflictError(f"Could not record the compaction of conversation {key}: its head kept changing.")
+
+    def _load_summary(self, key: str) -> Optional[HistorySummary]:
+        raw = self.cache.get(self._summary_key(key))
+        return HistorySummary.model_validate_json(raw) if raw else None
+
+    def _load_head(self, key: str) -> str:
+        """The raw head record, created (from a legacy whole-list history, if any) when missing."""
+        head_key = self._head_key(key)
+        raw = self.cache.get(head_key)
+        if raw is not None:
+            return raw
+
+        legacy = self.cache.get(key) or []
+        turns = [legacy[i:i + 2] for i in range(0, len(legacy), 2)]
+        for seq, messages in enumerate(turns):
+            turn = HistoryTurn(messages=messages, tokens=sum(estimate_tokens(m["content"]) for m in messages))
+            self.cache.put(self._turn_key(key, seq), turn.model_dump_json())
+        self.cache.put_if_absent(head_key, HistoryHead(turns=len(turns)).model_dump_json())
+        if legacy:
+            self.cache.remove_keys([key])
+            logger.info(f"Migrated {len(turns)} turns of conversation {key} to the segmented history layout.")
+        return self.cache.get(head_key)
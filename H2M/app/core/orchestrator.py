@@ -31,8 +31,23 @@ System: You are a helpful and professional AI assistant. Answer the user's quest
 User: {{ user_query }}
 Assistant:
 """
+SUMMARY_PROMPT = """
+System: Summarize the conversation below for an assistant that will continue it. Keep the user's goals, facts they stated, decisions made and open questions. Be concise.
+
+{% if summary %}
+--- SUMMARY SO FAR ---
+{{ summary }}
+--- END SUMMARY ---
+{% endif %}
+
+--- CONVERSATION ---
+{{ transcript }}
+--- END CONVERSATION ---
+Summary:
+"""
 jinja_env = Environment()
 prompt_template = jinja_env.from_string(PROMPT_TEMPLATE)
+summary_prompt_template = jinja_env.from_string(SUMMARY_PROMPT)
 
 
 class ConversationOrchestrator:
@@ -43,6 +58,7 @@ class ConversationOrchestrator:
     def __init__(self):
         services_config = get_config().services
         self.qp_client = QuantumPulseClient(base_url=services_config.quantumpulse_url)
+        context_manager.summarizer = self._summarize_history
 
     async def handle_message_stream(self, user_id: str, text: str, conversation_id: str = None) -> AsyncGenerator[Dict[str, Any], None]:
         """
@@ -103,6 +119,20 @@ class ConversationOrchestrator:
             await context_manager.add_message_to_history(user_id, conv_id, text, full_response_text)
             logger.info(f"Orchestrator: Successfully handled and saved message stream for conversation {conv_id}")
 
+    async def _summarize_history(self, summary: str, messages: List[Dict]) -> str:
+        """
+        Folds older conversation turns into the running summary of a conversation.
+        """
+        transcript = "\n".join(f"{m['role'].title()}: {m['content']}" for m in messages)
+        prompt = summary_prompt_template.render(summary=summary, transcript=transcript)
+        response = await self.qp_client.get_chat_completion(QPChatRequest(
+            model="gpt-4-turbo", # This should be configurable
+            messages=[QPChatMessage(role="user", content=prompt)],
+            temperature=0.0,
+            max_tokens=500
+        ))
+        return response.choices[0].message.content
+
     def _build_prompt(self, user_query: str, history: List[Dict], rag_context: str) -> str:
         """
         Builds the final prompt to be sent to the language model using Jinja2.
@@ -15,6 +15,8 @@ from app.services.h2m_pulsar import h2m_pulsar_client
 from app.core.thought_listener import thought_listener
 from shared.observability.logging_config import setup_logging
 from shared.observability.metrics import setup_metrics
+from shared.q_service_client import DeadlineMiddleware, close_pooled_clients
+from shared.q_auth_parser.parser import start_revocation_feed, stop_revocation_feed
 
 # --- Logging and Metrics Setup ---
 setup_logging()
@@ -30,10 +32,14 @@ app = FastAPI(
 # Setup Prometheus metrics
 setup_metrics(app, app_name=config.service_name)
 
+# Calls made while handling a request share the caller's remaining deadline
+app.add_middleware(DeadlineMiddleware)
+
 @app.on_event("startup")
 async def startup_event():
     """Initializes and starts all background services."""
     logger.info("H2M starting up...")
+    start_revocation_feed()
     try:
         await ignite_client.connect()
         h2m_pulsar_client.start_producers()
@@ -48,6 +54,8 @@ async def shutdown_event():
     await ignite_client.disconnect()
     h2m_pulsar_client.close()
     thought_listener.stop()
+    stop_revocation_feed()
+    await close_pooled_clients()
 
 # Include the API routers
 app.include_router(chat.router, prefix="/api/v1/chat", tags=["Chat"])
@@ -4,6 +4,7 @@ from pyignite.exceptions import CacheError
 from typing import List, Dict, Optional
 
 from app.core.config import get_config
+from app.core.history import SegmentedHistoryStore, Summarizer, truncating_summarizer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -20,6 +21,7 @@ class IgniteClient:
         self.addresses = ignite_config.addresses
         self.cache_name = ignite_config.cache_name
         self._cache = None
+        self._history: Optional[SegmentedHistoryStore] = None
 
     async def connect(self):
         """
@@ -30,6 +32,7 @@ class IgniteClient:
         try:
             self.client.connect(self.addresses)
             self._cache = self.client.get_or_create_cache(self.cache_name)
+            self._history = SegmentedHistoryStore(self._cache)
             logger.info(f"Connected to Ignite and got cache '{self.cache_name}'.")
         except Exception as e:
             logger.error(f"Failed to connect to Ignite: {e}", exc_info=True)
@@ -43,39 +46,66 @@ class IgniteClient:
             self.client.close()
             logger.info("Disconnected from Ignite.")
 
-    async def get_history(self, conversation_id: str) -> Optional[List[Dict]]:
+    @property
+    def history(self) -> SegmentedHistoryStore:
+        """Conversation histories, stored in the history cache (see SegmentedHistoryStore)."""
+        if self._history is None:
+            raise ConnectionError("Ignite client is not connected.")
+        return self._history
+
+    async def append_turn(self, conversation_id: str, messages: List[Dict]) -> int:
+        """
+        Atomically appends one turn to a conversation's history.
+
+        Args:
+            conversation_id: The unique ID of the conversation.
+            messages: The turn's message dictionaries.
+
+        Returns:
+            The turn's sequence number.
         """
-        Retrieves the conversation history for a given ID.
+        try:
+            seq = await self.history.append(conversation_id, messages)
+            logger.info(f"Appended turn {seq} for conversation_id: {conversation_id}")
+            return seq
+        except CacheError as e:
+            logger.error(f"Error appending to history for {conversation_id}: {e}", exc_info=True)
+            raise
+
+    async def get_history(self, conversation_id: str, max_turns: Optional[int] = None, token_budget: Optional[int] = None) -> List[Dict]:
+        """
+        Retrieves the newest part of the conversation history for a given ID.
 
         Args:
             conversation_id: The unique ID of the conversation.
+            max_turns: The most turns to return.
+            token_budget: The most (estimated) tokens to return.
 
         Returns:
-            A list of message dictionaries, or None if not found.
+            A list of message dictionaries, oldest first; empty if not found.
         """
         try:
-            history = self._cache.get(conversation_id)
-            if history:
-                logger.info(f"Retrieved history for conversation_id: {conversation_id}")
-                return history
-            return None
+            return await self.history.read(conversation_id, max_turns=max_turns, token_budget=token_budget)
         except CacheError as e:
             logger.error(f"Error retrieving history for {conversation_id}: {e}", exc_info=True)
-            return None
+            return []
 
-    async def save_history(self, conversation_id: str, history: List[Dict]) -> None:
+    async def compact_history(self, conversation_id: str, keep_turns: int, summarize: Summarizer = truncating_summarizer) -> int:
         """
-        Saves or updates the conversation history for a given ID.
+        Folds all but the newest turns of a conversation into its summary.
 
         Args:
             conversation_id: The unique ID of the conversation.
-            history: The full list of message dictionaries to save.
+            keep_turns: How many of the newest turns to keep as they are.
+            summarize: Folds messages into the previous summary.
+
+        Returns:
+            The number of turns folded.
         """
         try:
-            self._cache.put(conversation_id, history)
-            logger.info(f"Saved history for conversation_id: {conversation_id}")
+            return await self.history.compact(conversation_id, keep_turns, summarize)
         except CacheError as e:
-            logger.error(f"Error saving history for {conversation_id}: {e}", exc_info=True)
+            logger.error(f"Error compacting history for {conversation_id}: {e}", exc_info=True)
             raise
 
 # Global instance to be used by the application
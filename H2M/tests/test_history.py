@@ -0,0 +1,115 @@
+import asyncio
+
+from app.core.history import HistoryTurn, SegmentedHistoryStore
+
+class FakeCache:
+    """An in-memory stand-in for an Ignite cache, counting the records read."""
+
+    def __init__(self, data=None):
+        self.data = dict(data or {})
+        self.reads = 0
+
+    def get(self, key):
+        self.reads += 1
+        return self.data.get(key)
+
+    def get_all(self, keys):
+        self.reads += len(keys)
+        return {key: self.data[key] for key in keys if key in self.data}
+
+    def put(self, key, value):
+        self.data[key] = value
+
+    def put_if_absent(self, key, value):
+        if key in self.data:
+            return False
+        self.data[key] = value
+        return True
+
+    def replace_if_equals(self, key, sample, value):
+        if self.data.get(key) != sample:
+            return False
+        self.data[key] = value
+        return True
+
+    def remove_keys(self, keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+def turn(i):
+    return [{"role": "user", "content": f"question {i}"}, {"role": "assistant", "content": f"answer {i} " + "word " * 10}]
+
+def test_turns_are_appended_without_rewriting_the_history():
+    cache = FakeCache()
+    store = SegmentedHistoryStore(cache)
+
+    async def scenario():
+        for i in range(200):
+            await store.append("u1:c1", turn(i))
+        cache.reads = 0
+        return await store.read("u1:c1", max_turns=3)
+
+    recent = asyncio.run(scenario())
+    assert recent == turn(197) + turn(198) + turn(199)
+    # The head, the summary and one batch of turns, however long the conversation
+    assert cache.reads <= 20
+    assert max(len(value) for value in cache.data.values()) < 200
+
+def test_concurrent_appends_keep_every_turn():
+    cache = FakeCache()
+    store = SegmentedHistoryStore(cache)
+    original = cache.replace_if_equals
+
+    def racing_replace(key, sample, value):
+        # Another replica appends first, once, so this compare-and-swap must retry
+        if not racing_replace.raced:
+            racing_replace.raced = True
+            original(key, sample, value)
+            cache.put("u1:c1:turn:1", HistoryTurn(messages=turn("other"), tokens=10).model_dump_json())
+        return original(key, sample, value)
+    racing_replace.raced = False
+
+    async def scenario():
+        await store.append("u1:c1", turn(0))
+        cache.replace_if_equals = racing_replace
+        seq = await store.append("u1:c1", turn(1))
+        return seq, await store.read("u1:c1")
+
+    seq, history = asyncio.run(scenario())
+    assert seq == 2 and history == turn(0) + turn("other") + turn(1)
+
+def test_reads_fit_a_token_budget_and_old_turns_are_compacted():
+    cache = FakeCache()
+    store = SegmentedHistoryStore(cache)
+
+    async def summarize(summary, messages):
+        return (summary + " " if summary else "") + f"{len(messages)} messages"
+
+    async def scenario():
+        for i in range(30):
+            await store.append("u1:c1", turn(i))
+        budgeted = await store.read("u1:c1", token_budget=60)
+        folded = await store.compact("u1:c1", keep_turns=5, summarize=summarize)
+        for i in range(30, 40):
+            await store.append("u1:c1", turn(i))
+        folded += await store.compact("u1:c1", keep_turns=5, summarize=summarize)
+        return budgeted, folded, await store.read("u1:c1")
+
+    budgeted, folded, history = asyncio.run(scenario())
+    assert budgeted == turn(27) + turn(28) + turn(29)
+    assert folded == 35
+    assert history[0] == {"role": "system", "content": "Summary of the earlier conversation:\n50 messages 20 messages"}
+    assert history[1:] == [m for i in range(35, 40) for m in turn(i)]
+    assert len([key for key in cache.data if ":turn:" in key]) == 5
+
+def test_whole_list_histories_are_migrated():
+    legacy = turn(0) + turn(1) + [{"role": "user", "content": "unanswered"}]
+    cache = FakeCache({"u1:c1": legacy})
+    store = SegmentedHistoryStore(cache)
+
+    async def scenario():
+        await store.append("u1:c1", turn(2))
+        return await store.read("u1:c1")
+
+    assert asyncio.run(scenario()) == legacy + turn(2)
+    assert "u1:c1" not in cache.data
@@ -10,6 +10,7 @@ from app.core.pulsar_client import close_pulsar_producers
 from shared.observability.logging_config import setup_logging
 from shared.observability.metrics import setup_metrics
 from shared.pulsar_client import shared_pulsar_client
+from shared.q_auth_parser.parser import start_revocation_feed, stop_revocation_feed
 
 # --- Logging and Metrics Setup ---
 # Pass the service name to enable Pulsar log streaming if configured
@@ -29,15 +30,14 @@ setup_metrics(app, app_name="IntegrationHub")
 @app.on_event("startup")
 async def startup_event():
     logger.info("IntegrationHub starting up...")
-    # In a real scenario, you might initialize connections or start background tasks here.
-    pass
+    start_revocation_feed()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("IntegrationHub shutting down...")
     close_pulsar_producers()
     shared_pulsar_client.close() # Close the shared client as well
-    pass
+    stop_revocation_feed()
 
 # --- API Routers ---
 app.include_router(connectors.router, prefix="/connectors", tags=["Connectors"])
@@ -0,0 +1,94 @@
+# KnowledgeGraphQ/app/api/insights.py
+from fastapi import APIRouter, HTTPException, status, Depends
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, List, Optional
+import logging
+import os
+
+from ..core.gremlin_client import gremlin_client
+from ..core.gremlin_pool import GremlinPoolExhaustedError, GremlinQueryTimeoutError
+from ..core.insight_index import InsightIndex
+from ..core.insights import InsightStore, SimilarInsight
+from shared.q_auth_parser.parser import get_current_user
+from shared.q_auth_parser.models import UserClaims
+from shared.q_vectorstore_client.client import VectorStoreClient
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Embeddings come from VectorStoreQ, so insights and queries share one model
+vector_store_client = VectorStoreClient(base_url=os.getenv("VECTORSTORE_Q_URL", "http://vectorstoreq:8000"))
+insight_index = InsightIndex(path=os.getenv("INSIGHT_INDEX_PATH", "data/insight_index.log"))
+insight_store = InsightStore(insight_index, gremlin_client.execute_template, gremlin_client.upsert_batch, vector_store_client.embed)
+
+class RecordInsightRequest(BaseModel):
+    workflow_id: str
+    lesson: str = Field(..., description="The lesson learned from the workflow.")
+    original_prompt: str = ""
+    final_status: str = ""
+    services: List[str] = Field(default_factory=list, description="Services the insight affects.")
+    embedding: Optional[List[float]] = Field(default=None, description="The lesson's embedding. Computed by VectorStoreQ if omitted.")
+
+class RecordInsightResponse(BaseModel):
+    id: Any = Field(..., description="The Insight vertex ID.")
+
+class SimilarInsightsRequest(BaseModel):
+    text: Optional[str] = None
+    vector: Optional[List[float]] = None
+    service: Optional[str] = Field(default=None, description="Only insights affecting this service.")
+    k: int = Field(default=5, ge=1, le=100)
+
+    @model_validator(mode="after")
+    def _check_query(self):
+        if not self.text and not self.vector:
+            raise ValueError("Either text or vector is required.")
+        return self
+
+def _graph_error(e: Exception, action: str) -> HTTPException:
+    if isinstance(e, GremlinPoolExhaustedError):
+        logger.warning(f"Rejecting {action}: {e}")
+        return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "1"})
+    if isinstance(e, GremlinQueryTimeoutError):
+        return HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(e))
+    if isinstance(e, ConnectionError):
+        logger.error(f"{action} failed due to connection error: {e}", exc_info=True)
+        return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Could not connect to graph database.")
+    logger.error(f"An unexpected error occurred during {action}: {e}", exc_info=True)
+    return HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An internal error occurred.")
+
+@router.post("", response_model=RecordInsightResponse)
+async def record_insight(
+    request: RecordInsightRequest,
+    user: UserClaims = Depends(get_current_user)
+):
+    """
+    Stores a workflow's lesson learned as an Insight linked to the workflow
+    and the services it affects, and indexes it for similarity search.
+    """
+    try:
+        vertex_id = await insight_store.record(
+            request.workflow_id, request.lesson, original_prompt=request.original_prompt,
+            final_status=request.final_status, services=request.services, embedding=request.embedding
+        )
+        return RecordInsightResponse(id=vertex_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise _graph_error(e, "insight ingestion")
+
+@router.post("/similar", response_model=List[SimilarInsight])
+async def similar_insights(
+    request: SimilarInsightsRequest,
+    user: UserClaims = Depends(get_current_user)
+):
+    """
+    Returns the `k` insights most similar to a text or an embedding,
+    optionally only those affecting `service`. Nearest neighbors come from
+    the insight index; the graph is only queried for their details.
+    """
+    try:
+        return await insight_store.similar(k=request.k, service=request.service, text=request.text, vector=request.vector)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise _graph_error(e, "insight search")
@@ -1,9 +1,14 @@
 # KnowledgeGraphQ/app/api/query.py
 from fastapi import APIRouter, HTTPException, status, Depends
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
 import logging
 
 from ..core.gremlin_client import gremlin_client
+from ..core.gremlin_pool import GremlinPoolExhaustedError, GremlinQueryTimeoutError
+from ..core.neighborhood import Neighborhood, NeighborhoodRequest, UnknownNodeError
+from ..core.query_cache import mutates
+from ..core.query_templates import QueryTemplate, UnknownTemplateError, query_templates, to_json_compatible
 from shared.q_auth_parser.parser import get_current_user
 from shared.q_auth_parser.models import UserClaims
 
@@ -12,6 +17,8 @@ router = APIRouter()
 
 class GremlinQueryRequest(BaseModel):
     query: str
+    bindings: Optional[Dict[str, Any]] = Field(default=None, description="Parameter bindings referenced by the query.")
+    timeout: Optional[float] = Field(default=None, gt=0, le=300, description="Query timeout in seconds. Defaults to the server setting.")
 
 @router.post("")
 async def execute_gremlin_query(
@@ -23,11 +30,97 @@ async def execute_gremlin_query(
     """
     try:
         logger.info(f"Executing Gremlin query from user '{user.username}': {request.query}")
-        result = gremlin_client.execute_query(request.query)
-        return {"result": result}
+        writes = mutates(request.query)
+        try:
+            # Writes count against the pool's write limit, which keeps connections free for reads
+            result = await gremlin_client.execute_query(request.query, request.bindings, timeout=request.timeout, write=writes)
+        finally:
+            if writes:
+                # The labels a raw script writes aren't known
+                gremlin_client.invalidate_cache()
+        return {"result": to_json_compatible(result)}
+    except GremlinPoolExhaustedError as e:
+        logger.warning(f"Rejecting query: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "1"})
+    except GremlinQueryTimeoutError as e:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(e))
     except ConnectionError as e:
         logger.error(f"Query failed due to connection error: {e}", exc_info=True)
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Could not connect to graph database.")
     except Exception as e:
         logger.error(f"An unexpected error occurred during query execution: {e}", exc_info=True)
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An internal error occurred.") 
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An internal error occurred.")
+
+class TemplateQueryRequest(BaseModel):
+    params: Dict[str, Any] = Field(default_factory=dict, description="Values for the template's parameters.")
+    timeout: Optional[float] = Field(default=None, gt=0, le=300, description="Query timeout in seconds. Defaults to the server setting.")
+
+@router.get("/cache")
+async def get_cache_stats(user: UserClaims = Depends(get_current_user)):
+    """Size and hit rate of the query result cache."""
+    if gremlin_client.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **gremlin_client.cache.stats()}
+
+@router.get("/templates", response_model=List[QueryTemplate])
+async def list_query_templates(user: UserClaims = Depends(get_current_user)):
+    """Lists the named query templates and their parameters."""
+    return query_templates.list_templates()
+
+@router.post("/templates/{name}")
+async def execute_query_template(
+    name: str,
+    request: TemplateQueryRequest,
+    user: UserClaims = Depends(get_current_user)
+):
+    """
+    Executes a named query template. Its parameters are sent to the graph as
+    bindings, so the server compiles each template once.
+    """
+    try:
+        result = await gremlin_client.execute_template(name, request.params, timeout=request.timeout)
+        return {"result": result}
+    except UnknownTemplateError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except GremlinPoolExhaustedError as e:
+        logger.warning(f"Rejecting template query '{name}': {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "1"})
+    except GremlinQueryTimeoutError as e:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(e))
+    except ConnectionError as e:
+        logger.error(f"Template query '{name}' failed due to connection error: {e}", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Could not connect to graph database.")
+    except Exception as e:
+        logger.error(f"An unexpected error occurred during template query '{name}': {e}", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An internal error occurred.")
+
+@router.post("/neighborhood", response_model=Neighborhood)
+async def get_neighborhood(
+    request: NeighborhoodRequest,
+    user: UserClaims = Depends(get_current_user)
+):
+    """
+    Returns the vertices and edges around a vertex, up to `hops` away.
+    Every vertex follows at most `fan_out` edges and a page holds at most
+    `max_nodes` vertices, so hub vertices stay cheap. When `truncated`,
+    pass `next_cursor` back to continue.
+    """
+    try:
+        return await gremlin_client.get_neighborhood(request)
+    except UnknownNodeError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except GremlinPoolExhaustedError as e:
+        logger.warning(f"Rejecting neighborhood query for '{request.node_id}': {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "1"})
+    except GremlinQueryTimeoutError as e:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(e))
+    except ConnectionError as e:
+        logger.error(f"Neighborhood query failed due to connection error: {e}", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Could not connect to graph database.")
+    except Exception as e:
+        logger.error(f"An unexpected error occurred during neighborhood query: {e}", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An internal error occurred.")
@@ -0,0 +1,211 @@
+# KnowledgeGraphQ/app/core/batch_upsert.py
+import logging
+import time
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Literal, Optional, Tuple, Union
+
+from pydantic import BaseModel, Field
+
+from shared.observability.metrics import (
+    KNOWLEDGEGRAPH_UPSERT_OPERATIONS,
+    KNOWLEDGEGRAPH_UPSERT_ROUND_TRIP_LATENCY,
+)
+
+logger = logging.getLogger(__name__)
+
+# --- Operation Models ---
+
+class UpsertVertex(BaseModel):
+    operation: Literal["upsert_vertex"]
+    label: str = Field(..., description="The label of the vertex (e.g., 'Service', 'Flow', 'PullRequest').")
+    id_key: str = Field(default="uid", description="The property key to use as a unique identifier.")
+    properties: Dict[str, Any] = Field(..., description="A dictionary of properties for the vertex. Must include the id_key.")
+
+class UpsertEdge(BaseModel):
+    operation: Literal["upsert_edge"]
+    label: str = Field(..., description="The label for the edge (e.g., 'TRIGGERS', 'CONTAINS', 'SUBMITTED_BY').")
+    from_vertex_id: str = Field(..., description="The unique ID of the source vertex.")
+    to_vertex_id: str = Field(..., description="The unique ID of the destination vertex.")
+    from_vertex_label: str = Field(..., description="The label of the source vertex.")
+    to_vertex_label: str = Field(..., description="The label of the destination vertex.")
+    id_key: str = Field(default="uid", description="The property key used to look up the vertices.")
+
+GraphOperation = Union[UpsertVertex, UpsertEdge]
+
+class UpsertStatus(str, Enum):
+    CREATED = "created"
+    UPDATED = "updated"          # the vertex existed; its properties were overwritten
+    EXISTS = "exists"            # the edge was already there
+    MISSING_VERTEX = "missing_vertex"  # an edge endpoint does not exist
+    FAILED = "failed"            # the chunk holding the operation was rolled back
+
+class UpsertResult(BaseModel):
+    index: int = Field(..., description="Position of the operation in the submitted list.")
+    operation: str
+    label: str
+    status: UpsertStatus
+    error: Optional[str] = None
+
+
+# A function that submits a Gremlin script with its bindings and returns the result list
+# (or, for BatchUpserter.upsert_async, an awaitable of it)
+ScriptExecutor = Callable[[str, Dict[str, Any]], Union[List[Any], Awaitable[List[Any]]]]
+
+
+def plan_operations(operations: Iterable[GraphOperation]) -> List[Tuple[GraphOperation, List[int]]]:
+    """
+    Orders operations so every vertex comes before every edge (an edge in
+    the same batch as its endpoints then always finds them), and merges
+    repeated upserts of the same vertex or edge. Each planned operation comes
+    with the indices of the submitted operations it stands for.
+
+    Raises ValueError if a vertex lacks its id_key, before anything is written.
+    """
+    vertices: Dict[Tuple[str, str, Any], Tuple[UpsertVertex, List[int]]] = {}
+    edges: Dict[Tuple, Tuple[UpsertEdge, List[int]]] = {}
+    for index, op in enumerate(operations):
+        if op.operation == "upsert_vertex":
+            if op.id_key not in op.properties:
+                raise ValueError(f"Vertex properties must contain the id_key '{op.id_key}' (operation {index})")
+            key = (op.label, op.id_key, op.properties[op.id_key])
+            if key in vertices:
+                # Later properties win, as they would if the upserts ran one after another
+                merged, indices = vertices[key]
+                vertices[key] = (merged.model_copy(update={"properties": {**merged.properties, **op.properties}}), indices + [index])
+            else:
+                vertices[key] = (op, [index])
+        else:
+            key = (op.label, op.from_vertex_label, op.from_vertex_id, op.to_vertex_label, op.to_vertex_id, op.id_key)
+            if key in edges:
+                edges[key][1].append(index)
+            else:
+                edges[key] = (op, [index])
+    return list(vertices.values()) + list(edges.values())
+
+
+def compile_chunk(operations: List[GraphOperation]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Compiles operations into one Gremlin script plus its bindings, i.e. one
+    round trip. Each operation is a `sideEffect` on a single injected
+    traverser, so they run in order within the request's transaction. Each
+    aggregates a "<slot>:<status>" marker into 'r', and the script returns
+    those markers.
+
+    Every value is passed as a binding, so chunks of the same shape produce
+    the same script text and reuse the server's compiled script.
+    """
+    bindings: Dict[str, Any] = {}
+    steps = []
+    for slot, op in enumerate(operations):
+        if op.operation == "upsert_vertex":
+            bindings.update({f"l{slot}": op.label, f"k{slot}": op.id_key, f"v{slot}": op.properties[op.id_key]})
+            props = ""
+            for n, (key, value) in enumerate(
+                (k, v) for k, v in op.properties.items() if k != op.id_key and v is not None
+            ):
+                bindings[f"pk{slot}_{n}"] = key
+                bindings[f"pv{slot}_{n}"] = value
+                props += f".property(pk{slot}_{n}, pv{slot}_{n})"
+            steps.append(
+                f"sideEffect(V().has(l{slot}, k{slot}, v{slot}).fold().coalesce("
+                f"unfold().sideEffect(constant('{slot}:updated').aggregate(local, 'r')), "
+                f"addV(l{slot}).property(k{slot}, v{slot}).sideEffect(constant('{slot}:created').aggregate(local, 'r'))"
+                f"){props})"
+            )
+        else:
+            bindings.update({
+                f"e{slot}": op.label, f"k{slot}": op.id_key,
+                f"fl{slot}": op.from_vertex_label, f"fv{slot}": op.from_vertex_id,
+                f"tl{slot}": op.to_vertex_label, f"tv{slot}": op.to_vertex_id,
+            })
+            steps.append(
+                f"sideEffect(V().has(fl{slot}, k{slot}, fv{slot}).as('f').V().has(tl{slot}, k{slot}, tv{slot}).coalesce("
+                f"inE(e{slot}).where(outV().as('f')).constant('{slot}:exists'), "
+                f"addE(e{slot}).from('f').constant('{slot}:created')"
+                f").aggregate(local, 'r'))"
+            )
+    script = "g.inject(0)." + ".".join(steps) + ".cap('r')"
+    return script, bindings
+
+
+def _parse_markers(result: List[Any]) -> Dict[int, UpsertStatus]:
+    # cap() returns one collection, which drivers may or may not unwrap
+    markers = []
+    for item in result or []:
+        markers.extend(item if isinstance(item, (list, tuple, set)) else [item])
+    statuses = {}
+    for marker in markers:
+        slot, status = str(marker).split(":", 1)
+        statuses[int(slot)] = UpsertStatus(status)
+    return statuses
+
+
+class BatchUpserter:
+    """
+    Applies vertex and edge upserts in chunks of `chunk_size`. Each chunk is
+    one script, so a chunk costs one round trip instead of two or three per
+    operation. A chunk is a single transaction. If it fails, its operations
+    are reported as failed and the remaining chunks still run. A
+    ConnectionError aborts the whole batch.
+    """
+
+    def __init__(self, execute: ScriptExecutor, chunk_size: int = 100):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self._execute = execute
+        self.chunk_size = chunk_size
+
+    def upsert(self, operations: List[GraphOperation]) -> List[UpsertResult]:
+        """Applies the operations with a synchronous executor."""
+        planned = plan_operations(operations)
+        results: List[Optional[UpsertResult]] = [None] * len(operations)
+        for chunk in self._chunks(planned):
+            script, bindings = compile_chunk([op for op, _ in chunk])
+            start = time.monotonic()
+            try:
+                self._record(chunk, results, start, self._execute(script, bindings))
+            except ConnectionError:
+                raise
+            except Exception as e:
+                self._record(chunk, results, start, error=e)
+        self._log(operations, planned)
+        return results
+
+    async def upsert_async(self, operations: List[GraphOperation]) -> List[UpsertResult]:
+        """Applies the operations with an executor that returns an awaitable."""
+        planned = plan_operations(operations)
+        results: List[Optional[UpsertResult]] = [None] * len(operations)
+        for chunk in self._chunks(planned):
+            script, bindings = compile_chunk([op for op, _ in chunk])
+            start = time.monotonic()
+            try:
+                self._record(chunk, results, start, await self._execute(script, bindings))
+            except ConnectionError:
+                raise
+            except Exception as e:
+                self._record(chunk, results, start, error=e)
+        self._log(operations, planned)
+        return results
+
+    def _chunks(self, planned):
+        for start in range(0, len(planned), self.chunk_size):
+            yield planned[start:start + self.chunk_size]
+
+    def _record(self, chunk, results: List[Optional[UpsertResult]], start: float, result: Optional[List[Any]] = None, error: Optional[Exception] = None):
+        KNOWLEDGEGRAPH_UPSERT_ROUND_TRIP_LATENCY.observe(time.monotonic() - start)
+        if error is not None:
+            logger.error(f"Upsert chunk of {len(chunk)} operations failed: {error}", exc_info=error)
+        statuses = _parse_markers(result) if error is None else {}
+        for slot, (op, indices) in enumerate(chunk):
+            status = statuses.get(slot)
+            if status is None:
+                status = UpsertStatus.FAILED if error or op.operation == "upsert_vertex" else UpsertStatus.MISSING_VERTEX
+            KNOWLEDGEGRAPH_UPSERT_OPERATIONS.labels(operation=op.operation, status=status.value).inc(len(indices))
+            for index in indices:
+                results[index] = UpsertResult(
+                    index=index, operation=op.operation, label=op.label, status=status,
+                    error=str(error) if error is not None and status == UpsertStatus.FAILED else None
+                )
+
+    def _log(self, operations, planned):
+        logger.info(f"Upserted {len(operations)} operations in {-(-len(planned) // self.chunk_size)} round trips.")
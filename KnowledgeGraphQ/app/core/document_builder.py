@@ -0,0 +1,318 @@
+# KnowledgeGraphQ/app/core/document_builder.py
+import functools
+import hashlib
+import json
+import logging
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from shared.q_vectorstore_client.models import Vector
+
+from .batch_upsert import GraphOperation, UpsertEdge, UpsertResult, UpsertStatus, UpsertVertex
+
+logger = logging.getLogger(__name__)
+
+# Characters per chunk; paragraphs are packed up to this size
+CHUNK_SIZE = 500
+# Chunks embedded and written per checkpoint
+BATCH_SIZE = 64
+# Most uids per delete_vertices query (see the template)
+DELETE_BATCH_SIZE = 1000
+
+# Chunk IDs are UUIDs derived from the source and content, so they fit the
+# vector store's 36 character primary key and are the same on every run
+_CHUNK_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "q-platform/knowledgegraphq/chunk")
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def chunk_text(text: str, chunk_size: int = CHUNK_SIZE) -> List[str]:
+    """
+    Splits text into chunks of whole paragraphs of at most `chunk_size`
+    characters. A paragraph longer than that is split between words.
+    Editing a paragraph only changes the chunk holding it.
+    """
+    pieces = []
+    for paragraph in text.split("\n\n"):
+        paragraph = paragraph.strip()
+        while len(paragraph) > chunk_size:
+            cut = paragraph.rfind(" ", 0, chunk_size + 1)
+            if cut <= 0:
+                cut = chunk_size
+            pieces.append(paragraph[:cut].rstrip())
+            paragraph = paragraph[cut:].lstrip()
+        if paragraph:
+            pieces.append(paragraph)
+
+    chunks: List[str] = []
+    for piece in pieces:
+        if chunks and len(chunks[-1]) + 2 + len(piece) <= chunk_size:
+            chunks[-1] = f"{chunks[-1]}\n\n{piece}"
+        else:
+            chunks.append(piece)
+    return chunks
+
+
+class DocumentChunk(BaseModel):
+    id: str
+    source: str = Field(..., description="The document's path relative to the data directory.")
+    position: int
+    text: str
+    hash: str
+
+
+def chunk_document(source: str, text: str, chunk_size: int = CHUNK_SIZE) -> List[DocumentChunk]:
+    """Chunks a document. A chunk's ID depends only on its source, content and repeat count."""
+    chunks = []
+    seen: Dict[str, int] = {}
+    for position, chunk in enumerate(chunk_text(text, chunk_size)):
+        digest = content_hash(chunk.encode("utf-8"))
+        occurrence = seen.get(digest, 0)
+        seen[digest] = occurrence + 1
+        chunk_id = str(uuid.uuid5(_CHUNK_NAMESPACE, f"{source}\n{digest}\n{occurrence}"))
+        chunks.append(DocumentChunk(id=chunk_id, source=source, position=position, text=chunk, hash=digest))
+    return chunks
+
+
+def document_id(source: str) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_DNS, source))
+
+
+def vector_store_writers(vs_client: Any, collection_name: str) -> Dict[str, Callable]:
+    """
+    The embed, upsert_vectors and delete_vectors callbacks that write chunks
+    to a VectorStoreQ collection through `vs_client`. Upserts wait until the
+    vectors are written (read_your_writes) rather than leaving them in the
+    service's write buffer, since the manifest records them as written as
+    soon as the upsert returns.
+    """
+    return {
+        "embed": vs_client.embed,
+        "upsert_vectors": functools.partial(vs_client.upsert, collection_name, read_your_writes=True),
+        "delete_vectors": functools.partial(vs_client.delete, collection_name),
+    }
+
+
+class ManifestEntry(BaseModel):
+    hash: str = Field(..., description="Content hash of the file when it was last built.")
+    chunks: Dict[str, str] = Field(default_factory=dict, description="Chunk ID -> chunk hash, as written.")
+    pending: List[str] = Field(default_factory=list, description="Chunk IDs of a write that has not completed.")
+
+
+class Manifest:
+    """
+    What has been written for each document, kept in a local JSON file.
+
+    The file is replaced atomically on `save`, so it always holds the last
+    checkpoint. Before a document's new chunks are written their IDs are
+    saved as `pending`, so a run interrupted partway through can clean them
+    up, even if the document changes again before the next run.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.files: Dict[str, ManifestEntry] = {}
+
+    def load(self) -> "Manifest":
+        if self.path and os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.files = {source: ManifestEntry(**entry) for source, entry in data.get("files", {}).items()}
+            logger.info(f"Loaded manifest of {len(self.files)} documents from {self.path}")
+        return self
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"files": {source: entry.model_dump() for source, entry in sorted(self.files.items())}}, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+class BuildReport(BaseModel):
+    documents_unchanged: int = 0
+    documents_built: int = 0
+    documents_removed: int = 0
+    chunks_embedded: int = 0
+    chunks_deleted: int = 0
+
+
+class _Change(BaseModel):
+    source: str
+    hash: str
+    chunks: List[DocumentChunk]
+    new: List[DocumentChunk] = Field(..., description="Chunks not written by an earlier run.")
+    stale: List[str] = Field(..., description="IDs of chunks written earlier that are gone.")
+
+
+class DocumentGraphBuilder:
+    """
+    Builds Document and Chunk vertices (linked by has_chunk edges) and chunk
+    embeddings from a directory of documents, incrementally.
+
+    Only documents whose content hash differs from the manifest are
+    re-chunked, and of those only new chunks are embedded. Chunks that are
+    gone, and the documents of deleted files, are removed from the graph and
+    the vector store. Whole documents are written in batches of about
+    `batch_size` chunks, and the manifest is saved after each batch, so an
+    interrupted build resumes where it stopped.
+
+    `upsert` applies graph operations and `run_template` runs a named query
+    template (see GremlinClient). Without `upsert_vectors` only the graph is
+    built; otherwise `embed` embeds texts and `delete_vectors` deletes
+    vectors by ID. `upsert_vectors` must only return once the vectors are
+    durably written (see vector_store_writers).
+    """
+
+    def __init__(
+        self,
+        manifest: Manifest,
+        upsert: Callable[[List[GraphOperation]], Awaitable[List[UpsertResult]]],
+        run_template: Callable[..., Awaitable[list]],
+        embed: Optional[Callable[[List[str]], Awaitable[List[List[float]]]]] = None,
+        upsert_vectors: Optional[Callable[[List[Vector]], Awaitable[Any]]] = None,
+        delete_vectors: Optional[Callable[[List[str]], Awaitable[Any]]] = None,
+        batch_size: int = BATCH_SIZE,
+        chunk_size: int = CHUNK_SIZE
+    ):
+        if upsert_vectors is not None and (embed is None or delete_vectors is None):
+            raise ValueError("Writing vectors needs both embed and delete_vectors.")
+        self.manifest = manifest
+        self._upsert = upsert
+        self._run_template = run_template
+        self._embed = embed
+        self._upsert_vectors = upsert_vectors
+        self._delete_vectors = delete_vectors
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+
+    async def build(self, data_dir: str, pattern: str = "**/*.md") -> BuildReport:
+        report = BuildReport()
+        sources = {path.relative_to(data_dir).as_posix(): path for path in sorted(Path(data_dir).glob(pattern)) if path.is_file()}
+
+        batch: List[_Change] = []
+        for source, path in sources.items():
+            change = self._diff(source, path.read_bytes())
+            if change is None:
+                report.documents_unchanged += 1
+                continue
+            batch.append(change)
+            if sum(len(c.chunks) for c in batch) >= self.batch_size:
+                await self._write(batch, report)
+                batch = []
+        if batch:
+            await self._write(batch, report)
+
+        for source in sorted(set(self.manifest.files) - set(sources)):
+            await self._remove(source, report)
+
+        logger.info(f"Document graph build finished: {report.model_dump()}")
+        return report
+
+    def _diff(self, source: str, data: bytes) -> Optional[_Change]:
+        digest = content_hash(data)
+        entry = self.manifest.files.get(source)
+        if entry is not None and entry.hash == digest and not entry.pending:
+            return None
+        chunks = chunk_document(source, data.decode("utf-8"), self.chunk_size)
+        written = entry.chunks if entry else {}
+        current = {chunk.id for chunk in chunks}
+        earlier = set(written) | set(entry.pending if entry else ())
+        return _Change(
+            source=source,
+            hash=digest,
+            chunks=chunks,
+            new=[chunk for chunk in chunks if chunk.id not in written],
+            stale=sorted(earlier - current),
+        )
+
+    async def _write(self, batch: List[_Change], report: BuildReport):
+        # Checkpoint what is about to be written, so an interrupted batch can be undone
+        for change in batch:
+            entry = self.manifest.files.get(change.source)
+            if change.new:
+                pending = [chunk.id for chunk in change.new]
+                if entry is None:
+                    self.manifest.files[change.source] = ManifestEntry(hash="", pending=pending)
+                else:
+                    entry.pending = sorted(set(entry.pending) | set(pending))
+        self.manifest.save()
+
+        new_chunks = [chunk for change in batch for chunk in change.new]
+        if self._upsert_vectors is not None and new_chunks:
+            embeddings = []
+            for start in range(0, len(new_chunks), self.batch_size):
+                embeddings.extend(await self._embed([chunk.text for chunk in new_chunks[start:start + self.batch_size]]))
+            await self._upsert_vectors([_to_vector(chunk, embedding) for chunk, embedding in zip(new_chunks, embeddings)])
+
+        operations: List[GraphOperation] = []
+        for change in batch:
+            operations.extend(_graph_operations(change))
+        failed = [r for r in await self._upsert(operations) if r.status in (UpsertStatus.FAILED, UpsertStatus.MISSING_VERTEX)]
+        if failed:
+            raise RuntimeError(f"Failed to write document chunks: {failed[0].error or failed[0].status.value}")
+
+        stale = [chunk_id for change in batch for chunk_id in change.stale]
+        await self._delete_chunks(stale)
+
+        for change in batch:
+            self.manifest.files[change.source] = ManifestEntry(hash=change.hash, chunks={chunk.id: chunk.hash for chunk in change.chunks})
+        self.manifest.save()
+        report.documents_built += len(batch)
+        if self._upsert_vectors is not None:
+            report.chunks_embedded += len(new_chunks)
+        report.chunks_deleted += len(stale)
+        logger.info(f"Built {len(batch)} documents: {len(new_chunks)} new chunks, {len(stale)} removed")
+
+    async def _remove(self, source: str, report: BuildReport):
+        entry = self.manifest.files[source]
+        chunk_ids = sorted(set(entry.chunks) | set(entry.pending))
+        await self._delete_chunks(chunk_ids)
+        await self._run_template("delete_vertices", {"vertex_label": "Document", "uids": [source]})
+        del self.manifest.files[source]
+        self.manifest.save()
+        report.documents_removed += 1
+        report.chunks_deleted += len(chunk_ids)
+        logger.info(f"Removed document '{source}' and its {len(chunk_ids)} chunks")
+
+    async def _delete_chunks(self, chunk_ids: List[str]):
+        for start in range(0, len(chunk_ids), DELETE_BATCH_SIZE):
+            ids = chunk_ids[start:start + DELETE_BATCH_SIZE]
+            if self._delete_vectors is not None:
+                await self._delete_vectors(ids)
+            await self._run_template("delete_vertices", {"vertex_label": "Chunk", "uids": ids})
+
+
+def _graph_operations(change: _Change) -> List[GraphOperation]:
+    operations: List[GraphOperation] = [UpsertVertex(operation="upsert_vertex", label="Document", properties={
+        "uid": change.source, "name": os.path.basename(change.source), "content_hash": change.hash
+    })]
+    for chunk in change.chunks:
+        # Unchanged chunks are rewritten too: their positions may have moved
+        operations.append(UpsertVertex(operation="upsert_vertex", label="Chunk", properties={
+            "uid": chunk.id, "chunk_id": chunk.id, "text": chunk.text, "position": chunk.position, "content_hash": chunk.hash
+        }))
+        operations.append(UpsertEdge(
+            operation="upsert_edge", label="has_chunk", from_vertex_id=change.source, to_vertex_id=chunk.id,
+            from_vertex_label="Document", to_vertex_label="Chunk"
+        ))
+    return operations
+
+
+def _to_vector(chunk: DocumentChunk, embedding: List[float]) -> Vector:
+    return Vector(id=chunk.id, values=embedding, metadata={
+        "chunk_id": chunk.id,
+        "document_id": document_id(chunk.source),
+        "source_name": chunk.source,
+        "text_chunk": chunk.text,
+    })
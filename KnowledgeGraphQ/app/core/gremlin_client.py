@@ -1,120 +1,231 @@
 # KnowledgeGraphQ/app/core/gremlin_client.py
+import asyncio
+import json
 import logging
-from typing import Dict, Any, List
+import os
+from typing import Dict, Any, AsyncIterator, List, Optional, Set
 from gremlin_python.driver import client, serializer
-from gremlin_python.process.anonymous_traversal import traversal
-from gremlin_python.process.graph_traversal import __
-from gremlin_python.process.strategies import *
+
+from .batch_upsert import BatchUpserter, GraphOperation, UpsertEdge, UpsertResult, UpsertVertex
+from .gremlin_pool import GremlinPool
+from .neighborhood import Neighborhood, NeighborhoodRequest, explore
+from .query_cache import QueryResultCache
+from .query_templates import query_templates
 
 logger = logging.getLogger(__name__)
 
 class GremlinClient:
-    """A client for interacting with a Gremlin-compatible graph database."""
+    """
+    A client for interacting with a Gremlin-compatible graph database.
+
+    Queries run on a GremlinPool of `pool_size` connections and are awaited
+    without blocking the event loop. Ingest writes may hold at most
+    `write_connections` of those connections.
+
+    With a `cache`, read templates and neighborhood queries are answered
+    from it, and every write through this client invalidates the labels it
+    touches (see QueryResultCache).
+    """
 
-    def __init__(self, host: str, port: int):
-        self._connection = None
-        self.g = None
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        pool_size: int = 8,
+        write_connections: Optional[int] = None,
+        max_waiting: int = 64,
+        query_timeout: float = 30.0,
+        cache: Optional[QueryResultCache] = None
+    ):
         self.host = host
         self.port = port
         # In a containerized setup, janusgraph is the service name
         self.uri = f"ws://{self.host}:{self.port}/gremlin"
+        self.pool_size = pool_size
+        self.write_connections = write_connections
+        self.max_waiting = max_waiting
+        self.query_timeout = query_timeout
+        self.cache = cache
+        self._pool: Optional[GremlinPool] = None
+
+    def _open_connection(self):
+        return client.Client(
+            self.uri,
+            'g',
+            pool_size=1,
+            message_serializer=serializer.GraphSONSerializersV2d0()
+        )
 
     def connect(self):
-        """Establishes the connection to the Gremlin server."""
-        if self._connection and not self._connection.closed:
+        """Opens the connection pool to the Gremlin server."""
+        if self._pool is not None:
             logger.info("Gremlin client already connected.")
             return
 
+        pool = GremlinPool(
+            self._open_connection,
+            size=self.pool_size,
+            write_limit=self.write_connections,
+            max_waiting=self.max_waiting,
+            timeout=self.query_timeout
+        )
         try:
-            self._connection = client.DriverRemoteConnection(
-                self.uri,
-                'g',
-                message_serializer=serializer.GraphSONSerializersV2d0()
-            )
-            self.g = traversal().withRemote(self._connection)
+            pool.open()
+            self._pool = pool
             logger.info(f"Successfully connected to Gremlin server at {self.uri}")
         except Exception as e:
+            pool.close()
             logger.error(f"Failed to connect to Gremlin server: {e}", exc_info=True)
             # Re-raise the exception to be handled by the caller
             raise ConnectionError(f"Failed to connect to Gremlin at {self.uri}") from e
 
     def close(self):
-        """Closes the connection."""
-        if self._connection and not self._connection.closed:
-            self._connection.close()
-            self.g = None
+        """Closes the connection pool."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
             logger.info("Gremlin connection closed.")
 
-    def _ensure_connected(self):
-        if not self.g:
-            self.connect()
+    async def _ensure_connected(self) -> GremlinPool:
+        if self._pool is None:
+            # Connecting blocks; keep it off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, self.connect)
+        return self._pool
 
-    def execute_query(self, query: str) -> list:
-        """Executes a raw Gremlin query. Note: Use with caution."""
-        self._ensure_connected()
+    async def execute_query(
+        self,
+        query: str,
+        bindings: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        write: bool = False
+    ) -> list:
+        """
+        Executes a raw Gremlin query, with optional parameter bindings. Note: Use with caution.
+        Raises GremlinQueryTimeoutError past `timeout`, and GremlinPoolExhaustedError
+        when too many queries are already waiting for a connection.
+        """
+        pool = await self._ensure_connected()
         logger.debug(f"Executing raw Gremlin query: {query}")
         try:
-            # This relies on the server supporting string-based script execution
-            result_set = self._connection.client.submit(query)
-            # The future result needs to be iterated to get all results
-            items = result_set.all().result()
-            return items
+            return await pool.submit(query, bindings, timeout=timeout, write=write)
         except Exception as e:
             logger.error(f"Failed to execute Gremlin query '{query}': {e}", exc_info=True)
             raise
 
-    def upsert_vertex(self, label: str, properties: Dict[str, Any], id_key: str = "uid"):
+    async def stream_query(
+        self,
+        query: str,
+        bindings: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[list]:
+        """
+        Runs a raw read query and yields its results in batches as they
+        arrive, for results too large to hold at once. Not cached.
+        """
+        pool = await self._ensure_connected()
+        logger.debug(f"Streaming raw Gremlin query: {query}")
+        async for batch in pool.stream(query, bindings, timeout=timeout, batch_size=batch_size):
+            yield batch
+
+    async def execute_template(self, name: str, params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None) -> list:
+        """
+        Runs a named query template (see query_templates) with `params` as
+        bindings. Raises UnknownTemplateError or, for invalid params, ValueError.
+        """
+        template, bindings = query_templates.bind(name, params)
+        labels = template.touched_labels(bindings)
+
+        async def run() -> list:
+            return await query_templates.run(self.execute_query, name, params, timeout=timeout)
+
+        if template.write:
+            try:
+                return await run()
+            finally:
+                self.invalidate_cache(labels)
+        if self.cache is None:
+            return await run()
+        return await self.cache.get_or_load(name, json.dumps(bindings, sort_keys=True, default=str), run, labels)
+
+    async def get_neighborhood(self, request: NeighborhoodRequest) -> Neighborhood:
+        """
+        Explores the vertices around `request.node_id` hop by hop, within the
+        request's fan-out caps and node budget (see neighborhood.explore).
+        """
+        if self.cache is None:
+            return await explore(self.execute_query, request)
+        # Every edge that could change the result has an endpoint whose label is in it
+        return await self.cache.get_or_load(
+            "neighborhood", request.model_dump_json(exclude={"timeout"}),
+            lambda: explore(self.execute_query, request), request.edge_labels or []
+        )
+
+    async def upsert_batch(self, operations: List[GraphOperation], chunk_size: int = 100) -> List[UpsertResult]:
+        """
+        Upserts vertices and edges with one round trip per `chunk_size`
+        operations. Vertices are written before edges. Returns one result
+        per operation, in the order given.
+        """
+        async def execute(script: str, bindings: Dict[str, Any]) -> list:
+            return await self.execute_query(script, bindings, write=True)
+
+        try:
+            return await BatchUpserter(execute, chunk_size=chunk_size).upsert_async(operations)
+        finally:
+            # Even a failed batch may have partly landed
+            self.invalidate_cache(_operation_labels(operations))
+
+    def invalidate_cache(self, labels: Optional[Set[str]] = None):
+        """Drops cached results that depend on `labels` (None: all of them), e.g. after a write."""
+        if self.cache is not None:
+            self.cache.invalidate(labels)
+
+    async def upsert_vertex(self, label: str, properties: Dict[str, Any], id_key: str = "uid") -> UpsertResult:
         """
         Creates a vertex with a given label and properties, or updates it if it already exists.
         The vertex is identified by the `id_key` in its properties.
         """
-        self._ensure_connected()
-        if id_key not in properties:
-            raise ValueError(f"Vertex properties must contain the id_key '{id_key}'")
-
-        id_val = properties[id_key]
-        
-        # Start a traversal
-        t = self.g.V().has(label, id_key, id_val)
-        
-        # Check if the vertex exists.
-        if t.hasNext():
-            # Vertex exists, update properties
-            v_update = t.next()
-            props_to_update = self.g.V(v_update)
-            for key, value in properties.items():
-                if key != id_key: # Don't update the ID property itself
-                    props_to_update = props_to_update.property(key, value)
-            props_to_update.iterate()
-            logger.info(f"Updated vertex '{label}' with {id_key} '{id_val}'")
-        else:
-            # Vertex does not exist, create it
-            v_create = self.g.addV(label)
-            for key, value in properties.items():
-                v_create = v_create.property(key, value)
-            v_create.iterate()
-            logger.info(f"Created vertex '{label}' with {id_key} '{id_val}'")
-
-    def upsert_edge(self, label: str, from_vertex_id: str, to_vertex_id: str, from_vertex_label: str, to_vertex_label: str, id_key: str = "uid"):
+        result = (await self.upsert_batch([
+            UpsertVertex(operation="upsert_vertex", label=label, properties=properties, id_key=id_key)
+        ]))[0]
+        logger.info(f"Upserted vertex '{label}' with {id_key} '{properties[id_key]}': {result.status.value}")
+        return result
+
+    async def upsert_edge(self, label: str, from_vertex_id: str, to_vertex_id: str, from_vertex_label: str, to_vertex_label: str, id_key: str = "uid") -> UpsertResult:
         """
         Creates a directed edge between two vertices if it does not already exist.
         """
-        self._ensure_connected()
+        result = (await self.upsert_batch([UpsertEdge(
+            operation="upsert_edge", label=label, from_vertex_id=from_vertex_id, to_vertex_id=to_vertex_id,
+            from_vertex_label=from_vertex_label, to_vertex_label=to_vertex_label, id_key=id_key
+        )]))[0]
+        logger.info(f"Ensured edge '{label}' exists from '{from_vertex_id}' to '{to_vertex_id}': {result.status.value}")
+        return result
 
-        # Find the source and destination vertices
-        from_v = self.g.V().has(from_vertex_label, id_key, from_vertex_id)
-        to_v = self.g.V().has(to_vertex_label, id_key, to_vertex_id)
 
-        # Check if edge already exists. If not, create it.
-        # Coalesce pattern: if the first traversal returns a result, use it. Otherwise, run the second traversal.
-        self.g.V(from_v).outE(label).where(__.inV().is_(to_v)).fold().coalesce(
-            __.unfold(), # Edge exists, do nothing
-            __.addE(label).from_(from_v).to(to_v) # Edge does not exist, create it
-        ).iterate()
-        
-        logger.info(f"Ensured edge '{label}' exists from '{from_vertex_id}' to '{to_vertex_id}'")
+def _operation_labels(operations: List[GraphOperation]) -> Set[str]:
+    labels = set()
+    for op in operations:
+        labels.add(op.label)
+        if op.operation == "upsert_edge":
+            labels.update((op.from_vertex_label, op.to_vertex_label))
+    return labels
 
 
 # In a real app, this would be configured and managed in the main app.
 # The host 'janusgraph' is the service name in Docker Compose/Kubernetes.
-gremlin_client = GremlinClient(host="janusgraph", port=8182) 
\ No newline at end of file
+gremlin_client = GremlinClient(
+    host=os.getenv("GREMLIN_HOST", "janusgraph"),
+    port=int(os.getenv("GREMLIN_PORT", "8182")),
+    pool_size=int(os.getenv("GREMLIN_POOL_SIZE", "8")),
+    write_connections=int(os.environ["GREMLIN_WRITE_CONNECTIONS"]) if os.getenv("GREMLIN_WRITE_CONNECTIONS") else None,
+    max_waiting=int(os.getenv("GREMLIN_MAX_WAITING", "64")),
+    query_timeout=float(os.getenv("GREMLIN_QUERY_TIMEOUT_SECONDS", "30")),
+    cache=QueryResultCache(
+        max_bytes=int(os.getenv("KG_QUERY_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+        ttl_seconds=float(os.getenv("KG_QUERY_CACHE_TTL_SECONDS", "30")),
+        stale_seconds=float(os.getenv("KG_QUERY_CACHE_STALE_SECONDS", "30")),
+        hot_hits=int(os.getenv("KG_QUERY_CACHE_HOT_HITS", "3"))
+    ) if os.getenv("KG_QUERY_CACHE_ENABLED", "true").lower() == "true" else None
+)
@@ -0,0 +1,292 @@
+# KnowledgeGraphQ/app/core/gremlin_pool.py
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from shared.observability.metrics import (
+    KNOWLEDGEGRAPH_GREMLIN_POOL_WAIT,
+    KNOWLEDGEGRAPH_GREMLIN_POOL_IN_USE,
+    KNOWLEDGEGRAPH_GREMLIN_QUERIES,
+    KNOWLEDGEGRAPH_GREMLIN_QUERY_LATENCY,
+)
+
+logger = logging.getLogger(__name__)
+
+# Result batches a stream reads ahead of its consumer
+_STREAM_BUFFER = 4
+_END = object()
+
+
+class GremlinPoolExhaustedError(ConnectionError):
+    """Raised when too many queries are already waiting for a connection."""
+    pass
+
+class GremlinQueryTimeoutError(TimeoutError):
+    """Raised when a query (including its wait for a connection) exceeds its timeout."""
+    pass
+
+
+class _Slot:
+    """One connection of the pool. The driver client is (re)created lazily."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.client: Any = None
+
+
+class GremlinPool:
+    """
+    A fixed set of Gremlin connections shared by async callers.
+
+    The gremlinpython driver blocks its calling thread, and it can't run
+    inside a running event loop. So each query holds one connection slot and
+    runs on a worker thread, and the caller awaits it as an asyncio future.
+    Concurrent queries spread over `size` connections instead of
+    serializing on one websocket.
+
+    *   **Writes** (e.g. ingest batches) may hold at most `write_limit`
+        connections, so reads always have the rest.
+    *   **Timeouts**: each query's timeout covers its wait for a slot plus its
+        execution. The remaining budget is also sent to the server as
+        `evaluationTimeout`.
+    *   **Cancellation**: a timed out or cancelled query's connection is
+        closed and replaced. Its late response can then never reach the
+        next caller.
+    *   **Backpressure**: at most `max_waiting` callers queue for a slot.
+        Beyond that, GremlinPoolExhaustedError is raised.
+
+    `connect` creates one driver client, with the interface of
+    `gremlin_python.driver.client.Client`.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        size: int = 8,
+        write_limit: Optional[int] = None,
+        max_waiting: int = 64,
+        timeout: float = 30.0
+    ):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self._connect = connect
+        self.size = size
+        self.write_limit = min(write_limit if write_limit is not None else max(1, size // 2), size)
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self._slots: "asyncio.Queue[_Slot]" = asyncio.Queue()
+        self._writers = asyncio.Semaphore(self.write_limit)
+        self._all_slots: List[_Slot] = []
+        self._waiting = 0
+        # Threads of abandoned queries linger until the server gives up on them, hence the headroom
+        self._executor = ThreadPoolExecutor(max_workers=size * 2, thread_name_prefix="gremlin")
+        self._opened = False
+
+    def open(self):
+        """Opens the first connection, so an unreachable server is reported at startup."""
+        if self._opened:
+            return
+        self._all_slots = [_Slot(i) for i in range(self.size)]
+        self._all_slots[0].client = self._connect()
+        for slot in self._all_slots:
+            self._slots.put_nowait(slot)
+        self._opened = True
+        logger.info(f"Gremlin pool opened with {self.size} connections ({self.write_limit} for writes).")
+
+    def close(self):
+        for slot in self._all_slots:
+            self._close_client(slot.client)
+            slot.client = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._opened = False
+
+    @property
+    def in_use(self) -> int:
+        return len(self._all_slots) - self._slots.qsize()
+
+    async def submit(
+        self,
+        script: str,
+        bindings: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        write: bool = False
+    ) -> list:
+        """Runs a script on a pooled connection and returns all its results."""
+        kind = "write" if write else "read"
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        slot = await self._acquire(kind, write, timeout)
+        loop = asyncio.get_running_loop()
+        start = time.monotonic()
+        outcome = "error"
+        try:
+            if slot.client is None:
+                slot.client = await loop.run_in_executor(self._executor, self._connect)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            work = loop.run_in_executor(self._executor, self._run, slot.client, script, bindings, remaining)
+            result = await asyncio.wait_for(work, remaining)
+            outcome = "ok"
+            return result
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            self._discard(slot)
+            raise GremlinQueryTimeoutError(f"Gremlin query exceeded its {timeout:.1f}s timeout.") from None
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            self._discard(slot)
+            raise
+        finally:
+            KNOWLEDGEGRAPH_GREMLIN_QUERY_LATENCY.labels(kind=kind).observe(time.monotonic() - start)
+            KNOWLEDGEGRAPH_GREMLIN_QUERIES.labels(kind=kind, outcome=outcome).inc()
+            self._slots.put_nowait(slot)
+            if write:
+                self._writers.release()
+            KNOWLEDGEGRAPH_GREMLIN_POOL_IN_USE.set(self.in_use)
+
+    async def stream(
+        self,
+        script: str,
+        bindings: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[list]:
+        """
+        Runs a read script on a pooled connection and yields its results in
+        batches of up to `batch_size`, as the server sends them. At most a
+        few batches are read ahead, so a result far larger than memory can
+        be consumed. The timeout covers the whole stream. Close a stream
+        abandoned early (`aclose()`); its connection is replaced.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        slot = await self._acquire("stream", False, timeout)
+        loop = asyncio.get_running_loop()
+        batches: "asyncio.Queue[Any]" = asyncio.Queue()
+        credits = threading.Semaphore(_STREAM_BUFFER)
+        stop = threading.Event()
+        start = time.monotonic()
+        outcome = "error"
+        finished = False
+        try:
+            if slot.client is None:
+                slot.client = await loop.run_in_executor(self._executor, self._connect)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            work = loop.run_in_executor(
+                self._executor, self._produce, slot.client, script, bindings, remaining, batch_size, loop, batches, credits, stop
+            )
+            while True:
+                batch = await asyncio.wait_for(batches.get(), max(deadline - time.monotonic(), 0))
+                if batch is _END:
+                    break
+                credits.release()
+                yield batch
+            # Raises the driver's error, if the stream ended with one
+            await work
+            finished = True
+            outcome = "ok"
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise GremlinQueryTimeoutError(f"Gremlin stream exceeded its {timeout:.1f}s timeout.") from None
+        except (asyncio.CancelledError, GeneratorExit):
+            outcome = "cancelled"
+            raise
+        finally:
+            stop.set()
+            if not finished:
+                self._discard(slot)
+            KNOWLEDGEGRAPH_GREMLIN_QUERY_LATENCY.labels(kind="stream").observe(time.monotonic() - start)
+            KNOWLEDGEGRAPH_GREMLIN_QUERIES.labels(kind="stream", outcome=outcome).inc()
+            self._slots.put_nowait(slot)
+            KNOWLEDGEGRAPH_GREMLIN_POOL_IN_USE.set(self.in_use)
+
+    async def _acquire(self, kind: str, write: bool, timeout: float) -> _Slot:
+        if not self._opened:
+            raise ConnectionError("Gremlin pool is not open.")
+        # Callers that already passed this check may not have taken their slot yet
+        if self._waiting - self._slots.qsize() >= self.max_waiting:
+            KNOWLEDGEGRAPH_GREMLIN_QUERIES.labels(kind=kind, outcome="rejected").inc()
+            raise GremlinPoolExhaustedError(f"{self._waiting} queries are already waiting for a Gremlin connection.")
+
+        wait_start = time.monotonic()
+        self._waiting += 1
+        writer_acquired = False
+        try:
+            if write:
+                await asyncio.wait_for(self._writers.acquire(), timeout)
+                writer_acquired = True
+            slot = await asyncio.wait_for(self._slots.get(), max(timeout - (time.monotonic() - wait_start), 0))
+        except asyncio.TimeoutError:
+            if writer_acquired:
+                self._writers.release()
+            KNOWLEDGEGRAPH_GREMLIN_QUERIES.labels(kind=kind, outcome="timeout").inc()
+            raise GremlinQueryTimeoutError(f"No Gremlin connection became free within {timeout:.1f}s.") from None
+        except asyncio.CancelledError:
+            if writer_acquired:
+                self._writers.release()
+            raise
+        finally:
+            self._waiting -= 1
+            KNOWLEDGEGRAPH_GREMLIN_POOL_WAIT.labels(kind=kind).observe(time.monotonic() - wait_start)
+        KNOWLEDGEGRAPH_GREMLIN_POOL_IN_USE.set(self.in_use)
+        return slot
+
+    @staticmethod
+    def _run(client: Any, script: str, bindings: Optional[Dict[str, Any]], timeout: float) -> list:
+        request_options = {"evaluationTimeout": max(int(timeout * 1000), 1)}
+        return client.submit(script, bindings, request_options=request_options).all().result()
+
+    @staticmethod
+    def _produce(client: Any, script: str, bindings: Optional[Dict[str, Any]], timeout: float, batch_size: int,
+                 loop: asyncio.AbstractEventLoop, batches: "asyncio.Queue[Any]", credits: threading.Semaphore,
+                 stop: threading.Event):
+        """Hands a stream's result batches to the event loop, one per credit the consumer gives back."""
+        def send(item: Any) -> bool:
+            if stop.is_set():
+                return False
+            try:
+                loop.call_soon_threadsafe(batches.put_nowait, item)
+            except RuntimeError:
+                # The event loop has closed
+                return False
+            return True
+
+        request_options = {"evaluationTimeout": max(int(timeout * 1000), 1), "batchSize": batch_size}
+        try:
+            for batch in client.submit(script, bindings, request_options=request_options):
+                while not credits.acquire(timeout=0.5):
+                    if stop.is_set():
+                        return
+                if not send(batch):
+                    return
+        except Exception:
+            # A stream given up on has its connection closed under it
+            if stop.is_set():
+                return
+            raise
+        finally:
+            send(_END)
+
+    def _discard(self, slot: _Slot):
+        # The connection may still receive the abandoned query's response; never reuse it
+        client, slot.client = slot.client, None
+        if client is not None:
+            logger.warning(f"Discarding Gremlin connection {slot.index} after an abandoned query.")
+            self._executor.submit(self._close_client, client)
+
+    @staticmethod
+    def _close_client(client: Any):
+        if client is None:
+            return
+        try:
+            client.close()
+        except Exception as e:
+            logger.warning(f"Error closing Gremlin connection: {e}")
@@ -0,0 +1,199 @@
+# KnowledgeGraphQ/app/core/insight_index.py
+import base64
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from shared.observability.metrics import (
+    KNOWLEDGEGRAPH_INSIGHT_INDEX_SIZE,
+    KNOWLEDGEGRAPH_INSIGHT_SEARCH_LATENCY,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class InsightIndex:
+    """
+    Embeddings of Insight vertices, keyed by vertex ID, for similarity
+    lookups that don't scan the graph.
+
+    Vectors are L2-normalized rows of one contiguous float32 matrix, so a
+    lookup is a single matrix-vector product. That is exact, and well under a
+    millisecond for a few thousand insights. An approximate index wouldn't be
+    faster at this size.
+
+    With a `path`, every change is appended to a log file that is replayed
+    on `open`. Writes are incremental, and a torn last line from a crash is
+    dropped. The log is rewritten once superseded records outnumber live ones.
+    """
+
+    def __init__(self, path: Optional[str] = None, dimension: Optional[int] = None, initial_capacity: int = 1024):
+        self.path = path
+        self.dimension = dimension
+        self._capacity = initial_capacity
+        self._matrix: Optional[np.ndarray] = None
+        self._ids: List[Any] = []
+        self._rows: Dict[Any, int] = {}
+        self._log = None
+        self._log_records = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, vertex_id: Any) -> bool:
+        return vertex_id in self._rows
+
+    def open(self):
+        """Loads the log, if any, and opens it for appending."""
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        if os.path.exists(self.path):
+            self._replay()
+        self._log = open(self.path, "a", encoding="utf-8")
+        logger.info(f"Insight index opened with {len(self)} insights from {self.path}")
+
+    def close(self):
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def upsert(self, entries: Iterable[Tuple[Any, Sequence[float]]]):
+        """Adds or replaces the vectors of the given vertex IDs."""
+        with self._lock:
+            # Validate every vector before changing anything
+            normalized = [(vertex_id, self._normalize(vector)) for vertex_id, vector in entries]
+            records = []
+            for vertex_id, vector in normalized:
+                self._set(vertex_id, vector)
+                records.append({"op": "upsert", "id": vertex_id, "vector": base64.b64encode(vector.tobytes()).decode()})
+            self._append(records)
+
+    def remove(self, vertex_ids: Iterable[Any]):
+        with self._lock:
+            records = []
+            for vertex_id in vertex_ids:
+                if self._delete(vertex_id):
+                    records.append({"op": "delete", "id": vertex_id})
+            self._append(records)
+
+    def search(self, vector: Sequence[float], k: int) -> List[Tuple[Any, float]]:
+        """The `k` nearest vertex IDs by cosine similarity, most similar first."""
+        start = time.perf_counter()
+        if not self._ids or k <= 0:
+            return []
+        query = self._normalize(vector)
+        with self._lock:
+            count = len(self._ids)
+            scores = self._matrix[:count] @ query
+            if k < count:
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top])]
+            else:
+                top = np.argsort(-scores)
+            result = [(self._ids[row], float(scores[row])) for row in top]
+        KNOWLEDGEGRAPH_INSIGHT_SEARCH_LATENCY.observe(time.perf_counter() - start)
+        return result
+
+    def compact(self):
+        """Rewrites the log with one record per live insight."""
+        with self._lock:
+            self._compact()
+
+    def _normalize(self, vector: Sequence[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if self.dimension is None:
+            self.dimension = array.shape[0]
+        elif array.shape[0] != self.dimension:
+            raise ValueError(f"Expected an embedding of dimension {self.dimension}, got {array.shape[0]}.")
+        norm = float(np.linalg.norm(array))
+        if norm == 0.0:
+            raise ValueError("Cannot index a zero vector.")
+        return array / norm
+
+    def _set(self, vertex_id: Any, normalized: np.ndarray):
+        row = self._rows.get(vertex_id)
+        if row is None:
+            if self._matrix is None:
+                self._matrix = np.empty((self._capacity, self.dimension), dtype=np.float32)
+            elif len(self._ids) == self._matrix.shape[0]:
+                grown = np.empty((self._matrix.shape[0] * 2, self.dimension), dtype=np.float32)
+                grown[:len(self._ids)] = self._matrix[:len(self._ids)]
+                self._matrix = grown
+            row = len(self._ids)
+            self._ids.append(vertex_id)
+            self._rows[vertex_id] = row
+        self._matrix[row] = normalized
+        KNOWLEDGEGRAPH_INSIGHT_INDEX_SIZE.set(len(self._ids))
+
+    def _delete(self, vertex_id: Any) -> bool:
+        row = self._rows.pop(vertex_id, None)
+        if row is None:
+            return False
+        # Move the last row into the gap, so the live rows stay contiguous
+        last = len(self._ids) - 1
+        if row != last:
+            self._matrix[row] = self._matrix[last]
+            self._ids[row] = self._ids[last]
+            self._rows[self._ids[row]] = row
+        self._ids.pop()
+        KNOWLEDGEGRAPH_INSIGHT_INDEX_SIZE.set(len(self._ids))
+        return True
+
+    def _append(self, records: List[Dict[str, Any]]):
+        if self._log is None or not records:
+            return
+        self._log.write("".join(json.dumps(record) + "\n" for record in records))
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._log_records += len(records)
+        if self._log_records > 2 * max(len(self._ids), 512):
+            self._compact()
+
+    def _replay(self):
+        valid_bytes = 0
+        with open(self.path, "rb") as log:
+            for line in log:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("unterminated record")
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Ignoring a torn record at byte {valid_bytes} of {self.path}")
+                    break
+                if record["op"] == "upsert":
+                    vector = np.frombuffer(base64.b64decode(record["vector"]), dtype=np.float32)
+                    if self.dimension is None:
+                        self.dimension = vector.shape[0]
+                    self._set(record["id"], vector)
+                else:
+                    self._delete(record["id"])
+                valid_bytes += len(line)
+                self._log_records += 1
+        if valid_bytes < os.path.getsize(self.path):
+            with open(self.path, "r+b") as log:
+                log.truncate(valid_bytes)
+
+    def _compact(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as tmp:
+            for row, vertex_id in enumerate(self._ids):
+                vector = base64.b64encode(self._matrix[row].tobytes()).decode()
+                tmp.write(json.dumps({"op": "upsert", "id": vertex_id, "vector": vector}) + "\n")
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        if self._log is not None:
+            self._log.close()
+        os.replace(tmp_path, self.path)
+        self._log = open(self.path, "a", encoding="utf-8")
+        self._log_records = len(self._ids)
+        logger.info(f"Compacted insight index log to {len(self._ids)} records")
@@ -0,0 +1,166 @@
+# KnowledgeGraphQ/app/core/insights.py
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from pydantic import BaseModel, Field
+
+from .batch_upsert import GraphOperation, UpsertEdge, UpsertResult, UpsertStatus, UpsertVertex
+from .insight_index import InsightIndex
+
+logger = logging.getLogger(__name__)
+
+# How many nearest neighbors to fetch per requested result when filtering by service
+SERVICE_FILTER_OVERSAMPLING = 10
+# Most candidates joined with the graph in one query (see the insight_details template)
+MAX_CANDIDATES = 1000
+
+
+class SimilarInsight(BaseModel):
+    id: Any = Field(..., description="The Insight vertex ID.")
+    lesson: str
+    workflow_id: str = ""
+    services: List[str] = Field(default_factory=list, description="Services the insight affects.")
+    score: float = Field(..., description="Cosine similarity to the query.")
+
+
+class InsightStore:
+    """
+    Insights (lessons learned from workflows) in the graph, with their
+    embeddings in an InsightIndex keyed by vertex ID.
+
+    `similar` is nearest-neighbor search in the index, followed by one graph
+    query for the matches' lessons and affected services. It never scans
+    Insight vertices. Embeddings are also kept on the vertices, so the index
+    can be rebuilt from the graph.
+
+    `run_template` runs a named query template, `upsert` applies graph
+    operations (see GremlinClient) and `embed` embeds texts.
+    """
+
+    def __init__(
+        self,
+        index: InsightIndex,
+        run_template: Callable[..., Awaitable[list]],
+        upsert: Callable[[List[GraphOperation]], Awaitable[List[UpsertResult]]],
+        embed: Callable[[List[str]], Awaitable[List[List[float]]]]
+    ):
+        self.index = index
+        self._run_template = run_template
+        self._upsert = upsert
+        self._embed = embed
+
+    async def record(
+        self,
+        workflow_id: str,
+        lesson: str,
+        original_prompt: str = "",
+        final_status: str = "",
+        services: Sequence[str] = (),
+        embedding: Optional[List[float]] = None
+    ) -> Any:
+        """
+        Creates or updates a workflow's Insight, links it to the workflow and
+        the services it affects, and indexes its embedding. Idempotent: there
+        is one Insight per workflow. Returns the Insight's vertex ID.
+        """
+        if embedding is None:
+            embedding = (await self._embed([lesson]))[0]
+        uid = f"insight-{workflow_id}"
+        operations: List[GraphOperation] = [
+            UpsertVertex(operation="upsert_vertex", label="Workflow", properties={
+                "uid": workflow_id, "workflow_id": workflow_id, "original_prompt": original_prompt, "final_status": final_status
+            }),
+            UpsertVertex(operation="upsert_vertex", label="Insight", properties={
+                "uid": uid, "lesson": lesson, "source_workflow": workflow_id, "embedding": json.dumps(embedding)
+            }),
+            UpsertEdge(
+                operation="upsert_edge", label="generated_insight", from_vertex_id=workflow_id, to_vertex_id=uid,
+                from_vertex_label="Workflow", to_vertex_label="Insight"
+            ),
+        ]
+        for service in services:
+            operations.append(UpsertVertex(operation="upsert_vertex", label="Service", properties={"uid": service, "name": service}))
+            operations.append(UpsertEdge(
+                operation="upsert_edge", label="AFFECTS", from_vertex_id=uid, to_vertex_id=service,
+                from_vertex_label="Insight", to_vertex_label="Service"
+            ))
+
+        failed = [r for r in await self._upsert(operations) if r.status in (UpsertStatus.FAILED, UpsertStatus.MISSING_VERTEX)]
+        if failed:
+            raise RuntimeError(f"Failed to store insight for workflow '{workflow_id}': {failed[0].error or failed[0].status.value}")
+
+        rows = await self._run_template("insight_vertex_ids", {"uids": [uid]})
+        if not rows:
+            raise RuntimeError(f"Insight '{uid}' was written but could not be read back.")
+        vertex_id = rows[0]["id"]
+        self.index.upsert([(vertex_id, embedding)])
+        logger.info(f"Recorded insight {vertex_id} for workflow '{workflow_id}'")
+        return vertex_id
+
+    async def similar(
+        self,
+        k: int = 5,
+        service: Optional[str] = None,
+        text: Optional[str] = None,
+        vector: Optional[List[float]] = None
+    ) -> List[SimilarInsight]:
+        """
+        The `k` insights most similar to `text` or `vector`, optionally only
+        those affecting `service`. Raises ValueError without a query.
+        """
+        if vector is None:
+            if not text:
+                raise ValueError("Either text or vector is required.")
+            vector = (await self._embed([text]))[0]
+
+        fetch = min(k * SERVICE_FILTER_OVERSAMPLING if service else k, MAX_CANDIDATES)
+        while True:
+            candidates = self.index.search(vector, fetch)
+            results = await self._join(candidates, k, service)
+            # Short of k only because filtered or stale candidates took the places: look further
+            if len(results) == k or len(candidates) < fetch or fetch == MAX_CANDIDATES:
+                return results
+            fetch = min(fetch * 4, MAX_CANDIDATES)
+
+    async def _join(self, candidates, k: int, service: Optional[str]) -> List[SimilarInsight]:
+        if not candidates:
+            return []
+        rows = await self._run_template("insight_details", {"ids": [vertex_id for vertex_id, _ in candidates]})
+        details = {row["id"]: row for row in rows}
+
+        # Insights deleted from the graph since they were indexed
+        stale = [vertex_id for vertex_id, _ in candidates if vertex_id not in details]
+        if stale:
+            self.index.remove(stale)
+
+        results = []
+        for vertex_id, score in candidates:
+            row = details.get(vertex_id)
+            if row is None or (service and service not in row["services"]):
+                continue
+            results.append(SimilarInsight(score=score, **row))
+            if len(results) == k:
+                break
+        return results
+
+    async def rebuild_index(self, page_size: int = 500) -> int:
+        """Indexes the embeddings stored on Insight vertices. Returns how many were indexed."""
+        offset = indexed = 0
+        while True:
+            rows = await self._run_template("insight_embeddings", {"offset": offset, "max_results": page_size})
+            entries = []
+            for row in rows:
+                try:
+                    entries.append((row["id"], json.loads(row["embedding"])))
+                except (TypeError, ValueError):
+                    logger.warning(f"Skipping Insight {row['id']} with an unreadable embedding")
+            try:
+                self.index.upsert(entries)
+                indexed += len(entries)
+            except ValueError as e:
+                # e.g. embeddings from an older model, with another dimension
+                logger.warning(f"Skipping {len(entries)} insights that can't be indexed: {e}")
+            if len(rows) < page_size:
+                return indexed
+            offset += page_size
@@ -0,0 +1,221 @@
+# KnowledgeGraphQ/app/core/neighborhood.py
+import base64
+import binascii
+import json
+import logging
+from enum import Enum
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+from .query_templates import TemplateExecutor, to_json_compatible
+from shared.observability.metrics import (
+    KNOWLEDGEGRAPH_NEIGHBORHOOD_NODES,
+    KNOWLEDGEGRAPH_NEIGHBORHOOD_TRUNCATED,
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_FAN_OUT = 500
+
+
+class UnknownNodeError(LookupError):
+    pass
+
+
+class Direction(str, Enum):
+    OUT = "out"
+    IN = "in"
+    BOTH = "both"
+
+
+class NeighborhoodRequest(BaseModel):
+    node_id: Union[int, str] = Field(..., description="The vertex to explore from.")
+    hops: int = Field(default=1, ge=1, le=4)
+    direction: Direction = Direction.BOTH
+    edge_labels: List[str] = Field(default_factory=list, description="Only follow edges with these labels. Empty follows all.")
+    fan_out: Union[int, List[int]] = Field(
+        default=25,
+        description="Most edges followed from each vertex, for every hop or as a list per hop (the last value repeats)."
+    )
+    max_nodes: int = Field(default=200, ge=1, le=5000, description="Most vertices returned in one page.")
+    cursor: Optional[str] = Field(default=None, description="`next_cursor` of the previous page, to continue exploring.")
+    timeout: Optional[float] = Field(default=None, gt=0, le=300, description="Timeout per graph query in seconds.")
+
+    @field_validator("fan_out")
+    @classmethod
+    def _check_fan_out(cls, value):
+        caps = value if isinstance(value, list) else [value]
+        if not caps or any(cap < 1 or cap > MAX_FAN_OUT for cap in caps):
+            raise ValueError(f"fan_out must be between 1 and {MAX_FAN_OUT}.")
+        return value
+
+    def fan_out_for(self, hop: int) -> int:
+        if isinstance(self.fan_out, int):
+            return self.fan_out
+        return self.fan_out[min(hop, len(self.fan_out)) - 1]
+
+
+class NeighborhoodNode(BaseModel):
+    id: Any
+    label: str
+    properties: Dict[str, Any] = Field(default_factory=dict)
+    hop: int = Field(..., description="Distance from the starting vertex.")
+
+
+class NeighborhoodEdge(BaseModel):
+    id: Any
+    label: str
+    source: Any
+    target: Any
+    properties: Dict[str, Any] = Field(default_factory=dict)
+
+
+class Neighborhood(BaseModel):
+    nodes: List[NeighborhoodNode] = Field(default_factory=list)
+    edges: List[NeighborhoodEdge] = Field(default_factory=list)
+    capped_nodes: List[Any] = Field(default_factory=list, description="Expanded vertices with more edges than the fan-out cap.")
+    truncated: bool = Field(default=False, description="Whether the node budget ran out before the traversal finished.")
+    next_cursor: Optional[str] = None
+
+
+class _Cursor(BaseModel):
+    """Where a truncated traversal stopped: the rest of the current hop's frontier, the next hop's, and every vertex already returned."""
+    hop: int
+    frontier: List[Any]
+    next_frontier: List[Any]
+    visited: List[Any]
+
+    def encode(self) -> str:
+        return base64.urlsafe_b64encode(self.model_dump_json().encode()).decode()
+
+    @classmethod
+    def decode(cls, cursor: str) -> "_Cursor":
+        try:
+            return cls.model_validate_json(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, ValueError, ValidationError):
+            raise ValueError("Invalid cursor.")
+
+
+_EDGE_STEPS = {Direction.OUT: "outE()", Direction.IN: "inE()", Direction.BOTH: "bothE()"}
+
+# One script per direction and filter, so each is compiled once by the server.
+# The limit inside by() applies per vertex: that is the fan-out cap.
+_EXPAND_SCRIPTS = {
+    (direction, filtered): (
+        "g.V(frontier).project('source', 'edges').by(id())"
+        f".by({step}{'.hasLabel(within(edge_labels))' if filtered else ''}.limit(fetch).elementMap().fold())"
+    )
+    for direction, step in _EDGE_STEPS.items()
+    for filtered in (False, True)
+}
+
+_NODES_SCRIPT = "g.V(ids).elementMap()"
+
+
+def _other_end(edge: Dict[str, Any], source: Any, direction: Direction) -> Any:
+    if direction == Direction.OUT:
+        return edge["IN"]["id"]
+    if direction == Direction.IN:
+        return edge["OUT"]["id"]
+    return edge["IN"]["id"] if edge["OUT"]["id"] == source else edge["OUT"]["id"]
+
+
+def _to_node(element: Dict[str, Any], hop: int) -> NeighborhoodNode:
+    properties = {k: v for k, v in element.items() if k not in ("id", "label")}
+    return NeighborhoodNode(id=element["id"], label=element.get("label", "Unknown"), properties=properties, hop=hop)
+
+
+def _to_edge(element: Dict[str, Any]) -> NeighborhoodEdge:
+    properties = {k: v for k, v in element.items() if k not in ("id", "label", "IN", "OUT")}
+    return NeighborhoodEdge(
+        id=element["id"], label=element.get("label", "related"),
+        source=element["OUT"]["id"], target=element["IN"]["id"], properties=properties
+    )
+
+
+async def explore(execute: TemplateExecutor, request: NeighborhoodRequest) -> Neighborhood:
+    """
+    Breadth-first exploration from `request.node_id`, one graph query per hop
+    for the whole frontier. Each vertex contributes at most its hop's
+    fan-out of edges. Vertices are deduplicated here, and a page stops at
+    `max_nodes` vertices. The next page then continues the same traversal
+    from `next_cursor`. Clients merge pages by node and edge ID.
+
+    Raises UnknownNodeError if the starting vertex doesn't exist, and
+    ValueError for an invalid cursor.
+    """
+    hops: Dict[Any, int] = {}
+    elements: Dict[Any, Dict[str, Any]] = {}
+    if request.cursor:
+        state = _Cursor.decode(request.cursor)
+    else:
+        start = to_json_compatible(await execute(_NODES_SCRIPT, {"ids": [request.node_id]}, timeout=request.timeout))
+        if not start:
+            raise UnknownNodeError(f"Node '{request.node_id}' not found.")
+        # The graph's own ID (e.g. an integer) from here on, whatever type the caller sent
+        start_id = start[0]["id"]
+        elements[start_id], hops[start_id] = start[0], 0
+        state = _Cursor(hop=1, frontier=[start_id], next_frontier=[], visited=[start_id])
+
+    visited = set(state.visited)
+    budget = request.max_nodes - len(hops)
+    edges: Dict[str, Dict[str, Any]] = {}
+    capped: List[Any] = []
+    truncated = False
+
+    while state.hop <= request.hops and state.frontier and not truncated:
+        cap = request.fan_out_for(state.hop)
+        bindings = {"frontier": state.frontier, "fetch": cap + 1}
+        if request.edge_labels:
+            bindings["edge_labels"] = request.edge_labels
+        rows = to_json_compatible(await execute(
+            _EXPAND_SCRIPTS[(request.direction, bool(request.edge_labels))], bindings, timeout=request.timeout
+        ))
+        edges_by_source = {row["source"]: row["edges"] for row in rows}
+
+        for i, source in enumerate(state.frontier):
+            source_edges = edges_by_source.get(source, [])
+            if len(source_edges) > cap:
+                capped.append(source)
+                source_edges = source_edges[:cap]
+            for edge in source_edges:
+                other = _other_end(edge, source, request.direction)
+                if other not in visited:
+                    if budget == 0:
+                        truncated = True
+                        break
+                    visited.add(other)
+                    hops[other] = state.hop
+                    state.next_frontier.append(other)
+                    budget -= 1
+                edges.setdefault(str(edge["id"]), edge)
+            if truncated:
+                # This vertex is expanded again on the next page; its edges to returned vertices repeat
+                state.frontier = state.frontier[i:]
+                break
+        else:
+            state = _Cursor(hop=state.hop + 1, frontier=state.next_frontier, next_frontier=[], visited=state.visited)
+        state.visited = list(visited)
+
+    new_ids = [node_id for node_id in hops if node_id not in elements]
+    if new_ids:
+        for element in to_json_compatible(await execute(_NODES_SCRIPT, {"ids": new_ids}, timeout=request.timeout)):
+            elements[element["id"]] = element
+
+    # A vertex deleted mid-traversal has no element map; leave it out
+    nodes = [_to_node(elements[node_id], hop) for node_id, hop in hops.items() if node_id in elements]
+    KNOWLEDGEGRAPH_NEIGHBORHOOD_NODES.observe(len(nodes))
+    if capped:
+        KNOWLEDGEGRAPH_NEIGHBORHOOD_TRUNCATED.labels(reason="fan_out").inc()
+    if truncated:
+        KNOWLEDGEGRAPH_NEIGHBORHOOD_TRUNCATED.labels(reason="max_nodes").inc()
+        logger.info(f"Neighborhood of '{request.node_id}' truncated at {request.max_nodes} nodes in hop {state.hop}")
+
+    return Neighborhood(
+        nodes=nodes,
+        edges=[_to_edge(edge) for edge in edges.values()],
+        capped_nodes=capped,
+        truncated=truncated,
+        next_cursor=state.encode() if truncated else None,
+    )
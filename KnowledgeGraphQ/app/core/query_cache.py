@@ -0,0 +1,253 @@
+# KnowledgeGraphQ/app/core/query_cache.py
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Set
+
+from pydantic import BaseModel
+
+from shared.observability.metrics import (
+    KNOWLEDGEGRAPH_QUERY_CACHE_BYTES,
+    KNOWLEDGEGRAPH_QUERY_CACHE_EVICTIONS,
+    KNOWLEDGEGRAPH_QUERY_CACHE_LOOKUPS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rough fixed cost of an entry's key, bookkeeping and Python objects
+_ENTRY_OVERHEAD_BYTES = 512
+
+# Steps that modify the graph, for telling whether a raw script writes
+_MUTATING_STEP = re.compile(r"\b(?:addV|addE|property|drop|mergeV|mergeE)\s*\(")
+
+
+def mutates(script: str) -> bool:
+    return bool(_MUTATING_STEP.search(script))
+
+
+def result_labels(value: Any) -> Set[str]:
+    """The `label` of every vertex and edge in a (JSON-compatible) query result."""
+    labels: Set[str] = set()
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            label = item.get("label")
+            if isinstance(label, str):
+                labels.add(label)
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+    return labels
+
+
+class _Entry:
+    __slots__ = ("value", "labels", "size", "fresh_until", "stale_until", "hits")
+
+    def __init__(self, value, labels, size, fresh_until, stale_until, hits):
+        self.value = value
+        self.labels = labels
+        self.size = size
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+        self.hits = hits
+
+
+class QueryResultCache:
+    """
+    Caches read query results so the same traversal, asked for again and
+    again (e.g. the neighbors of a service during an incident), is answered
+    without going to the graph.
+
+    Entries are keyed by the query and its bindings, and tagged with the
+    vertex and edge labels they depend on: those the query declares plus
+    those in the result. `invalidate(labels)` drops every entry tagged with
+    one of the labels; the write paths call it after each write. Results
+    of queries that could touch any label are dropped by every write. A
+    load that overlaps a write to its labels is not stored, so an
+    invalidated result can't be put back.
+
+    Entries are fresh for `ttl_seconds`, which bounds staleness from writes
+    that other replicas accept. Entries hit at least `hot_hits` times are
+    then served for up to `stale_seconds` more while one background load
+    refreshes them. Concurrent misses on one key share a single load. The
+    cache stays under `max_bytes` (estimated) by evicting the least recently
+    used entries. Used from the event loop; it is not thread-safe.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 32 * 1024 * 1024,
+        ttl_seconds: float = 30.0,
+        stale_seconds: float = 30.0,
+        hot_hits: int = 3,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.hot_hits = hot_hits
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._by_label: Dict[str, Set[Hashable]] = {}
+        self._any_label: Set[Hashable] = set()
+        self._loading: Dict[Hashable, asyncio.Future] = {}
+        self._bytes = 0
+        # Write sequence numbers, so a load can tell whether a write overlapped it
+        self._sequence = 0
+        self._last_write: Dict[str, int] = {}
+        self._last_write_any = 0
+        self._lookups = {"hit": 0, "stale": 0, "coalesced": 0, "miss": 0}
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = sum(self._lookups.values())
+        served = self._lookups["hit"] + self._lookups["stale"] + self._lookups["coalesced"]
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "lookups": dict(self._lookups),
+            "hit_rate": served / lookups if lookups else 0.0,
+        }
+
+    async def get_or_load(
+        self,
+        kind: str,
+        key: Hashable,
+        load: Callable[[], Awaitable[Any]],
+        labels: Optional[Iterable[str]] = None
+    ) -> Any:
+        """
+        Returns the cached result for `key`, or awaits `load()` and caches
+        what it returns. `labels` are the labels the query reads; None means
+        it could read any label. `kind` names the query in metrics.
+        """
+        key = (kind, key)
+        labels = set(labels) if labels is not None else None
+        entry = self._entries.get(key)
+        if entry is not None:
+            now = self._clock()
+            if now < entry.fresh_until:
+                return self._hit(kind, key, entry, "hit")
+            if now < entry.stale_until and entry.hits >= self.hot_hits:
+                if key not in self._loading:
+                    self._start_load(key, load, labels, refresh=True)
+                return self._hit(kind, key, entry, "stale")
+            self._remove(key)
+            KNOWLEDGEGRAPH_QUERY_CACHE_EVICTIONS.labels(reason="expired").inc()
+            KNOWLEDGEGRAPH_QUERY_CACHE_BYTES.set(self._bytes)
+
+        pending = self._loading.get(key)
+        self._count(kind, "miss" if pending is None else "coalesced")
+        if pending is None:
+            pending = self._start_load(key, load, labels)
+        # Shielded, so one caller giving up doesn't cancel the load for the others
+        return await asyncio.shield(pending)
+
+    def invalidate(self, labels: Optional[Iterable[str]] = None):
+        """Drops the entries that depend on any of `labels`; with None, every entry."""
+        self._sequence += 1
+        if labels is None:
+            self._last_write_any = self._sequence
+            keys = list(self._entries)
+        else:
+            keys = set(self._any_label)
+            for label in labels:
+                self._last_write[label] = self._sequence
+                keys.update(self._by_label.get(label, ()))
+        for key in keys:
+            self._remove(key)
+        if keys:
+            KNOWLEDGEGRAPH_QUERY_CACHE_EVICTIONS.labels(reason="invalidated").inc(len(keys))
+            KNOWLEDGEGRAPH_QUERY_CACHE_BYTES.set(self._bytes)
+
+    def _hit(self, kind: str, key: Hashable, entry: _Entry, outcome: str) -> Any:
+        entry.hits += 1
+        self._entries.move_to_end(key)
+        self._count(kind, outcome)
+        return entry.value
+
+    def _count(self, kind: str, outcome: str):
+        self._lookups[outcome] += 1
+        KNOWLEDGEGRAPH_QUERY_CACHE_LOOKUPS.labels(kind=kind, result=outcome).inc()
+
+    def _start_load(self, key: Hashable, load: Callable[[], Awaitable[Any]], labels: Optional[Set[str]], refresh: bool = False) -> asyncio.Future:
+        future = asyncio.ensure_future(self._load(key, load, labels, self._sequence))
+        future.add_done_callback(self._log_refresh_error if refresh else self._consume_error)
+        self._loading[key] = future
+        return future
+
+    async def _load(self, key: Hashable, load: Callable[[], Awaitable[Any]], labels: Optional[Set[str]], started: int) -> Any:
+        try:
+            value = await load()
+        finally:
+            self._loading.pop(key, None)
+        self._store(key, value, labels, started)
+        return value
+
+    def _store(self, key: Hashable, value: Any, labels: Optional[Set[str]], started: int):
+        data = value.model_dump(mode="json") if isinstance(value, BaseModel) else value
+        if labels is not None:
+            labels = labels | result_labels(data)
+        # Don't store a result that may predate a write it depends on
+        if self._last_write_any > started:
+            return
+        if labels is None:
+            if self._sequence > started:
+                return
+        elif any(self._last_write.get(label, 0) > started for label in labels):
+            return
+
+        size = len(json.dumps(data, default=str)) + _ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        previous = self._entries.get(key)
+        hits = previous.hits if previous is not None else 0
+        self._remove(key)
+        now = self._clock()
+        self._entries[key] = _Entry(value, labels, size, now + self.ttl_seconds, now + self.ttl_seconds + self.stale_seconds, hits)
+        if labels is None:
+            self._any_label.add(key)
+        else:
+            for label in labels:
+                self._by_label.setdefault(label, set()).add(key)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            KNOWLEDGEGRAPH_QUERY_CACHE_EVICTIONS.labels(reason="memory").inc()
+        KNOWLEDGEGRAPH_QUERY_CACHE_BYTES.set(self._bytes)
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        if entry.labels is None:
+            self._any_label.discard(key)
+            return
+        for label in entry.labels:
+            keys = self._by_label[label]
+            keys.discard(key)
+            if not keys:
+                del self._by_label[label]
+
+    @staticmethod
+    def _log_refresh_error(future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            # The stale entry stays until it expires; the next lookup tries again
+            logger.warning(f"Background refresh of a cached query failed: {future.exception()}")
+
+    @staticmethod
+    def _consume_error(future: asyncio.Future):
+        # Waiters get the error; this only keeps asyncio from logging it when all of them gave up
+        if not future.cancelled():
+            future.exception()
@@ -0,0 +1,274 @@
+# KnowledgeGraphQ/app/core/query_templates.py
+import logging
+import re
+import time
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel, Field
+
+from shared.observability.metrics import (
+    KNOWLEDGEGRAPH_TEMPLATE_QUERIES,
+    KNOWLEDGEGRAPH_TEMPLATE_LATENCY,
+)
+
+logger = logging.getLogger(__name__)
+
+_PARAMETER_NAME = re.compile(r"^[a-z][a-z0-9_]*$")
+
+
+class UnknownTemplateError(LookupError):
+    pass
+
+
+class ParameterType(str, Enum):
+    STRING = "string"
+    INTEGER = "integer"
+    NUMBER = "number"
+    BOOLEAN = "boolean"
+    ID = "id"  # a vertex or edge ID: string or integer, depending on the graph
+    LIST = "list"  # e.g. of IDs, for within() or g.V(ids)
+
+
+class TemplateParameter(BaseModel):
+    type: ParameterType = ParameterType.STRING
+    description: str = ""
+    default: Any = None
+    required: bool = True
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+
+
+class QueryTemplate(BaseModel):
+    """
+    A named Gremlin script whose variable parts are parameters, sent to the
+    server as bindings. The script text never changes, so Gremlin Server
+    compiles it once and serves every later call from its script cache.
+    Values can't be injected into the query.
+    """
+    name: str
+    description: str
+    script: str
+    parameters: Dict[str, TemplateParameter] = Field(default_factory=dict)
+    write: bool = Field(default=False, description="Whether the template modifies the graph.")
+    labels: List[str] = Field(
+        default_factory=list,
+        description="Vertex and edge labels the template reads or writes, for cache invalidation. None listed means any label."
+    )
+    label_parameters: List[str] = Field(default_factory=list, description="Parameters whose values are labels the template reads or writes.")
+
+    def touched_labels(self, bindings: Dict[str, Any]) -> Optional[Set[str]]:
+        """The labels this call reads or writes, or None if that could be any label."""
+        labels = set(self.labels) | {bindings[name] for name in self.label_parameters if bindings.get(name)}
+        return labels or None
+
+
+# A function that runs a script with bindings, e.g. GremlinClient.execute_query
+TemplateExecutor = Callable[..., Awaitable[list]]
+
+
+def _coerce(name: str, spec: TemplateParameter, value: Any) -> Any:
+    expected = {
+        ParameterType.STRING: (str,),
+        ParameterType.INTEGER: (int,),
+        ParameterType.NUMBER: (int, float),
+        ParameterType.BOOLEAN: (bool,),
+        ParameterType.ID: (str, int),
+        ParameterType.LIST: (list,),
+    }[spec.type]
+    # bool is an int in Python, but never a valid integer parameter
+    if not isinstance(value, expected) or (isinstance(value, bool) and spec.type != ParameterType.BOOLEAN):
+        raise ValueError(f"Parameter '{name}' must be of type {spec.type.value}.")
+    if spec.type == ParameterType.LIST:
+        if spec.maximum is not None and len(value) > spec.maximum:
+            raise ValueError(f"Parameter '{name}' must have at most {spec.maximum:g} items.")
+        return value
+    if spec.minimum is not None and value < spec.minimum:
+        raise ValueError(f"Parameter '{name}' must be at least {spec.minimum:g}.")
+    if spec.maximum is not None and value > spec.maximum:
+        raise ValueError(f"Parameter '{name}' must be at most {spec.maximum:g}.")
+    return value
+
+
+def to_json_compatible(value: Any) -> Any:
+    """
+    Converts driver results to plain JSON types. elementMap() and valueMap(true)
+    key ids and labels with the T enum, which JSON can't represent.
+    """
+    if isinstance(value, dict):
+        return {(k.name if isinstance(k, Enum) else k): to_json_compatible(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [to_json_compatible(v) for v in value]
+    if isinstance(value, Enum):
+        return value.name
+    if hasattr(value, "objects") and hasattr(value, "labels"):
+        # A Path: only its objects matter to callers
+        return {"objects": to_json_compatible(list(value.objects))}
+    return value
+
+
+class QueryTemplateRegistry:
+    """Holds the named query templates and binds and runs them."""
+
+    def __init__(self):
+        self._templates: Dict[str, QueryTemplate] = {}
+
+    def register(self, template: QueryTemplate) -> QueryTemplate:
+        if template.name in self._templates:
+            raise ValueError(f"Query template '{template.name}' is already registered.")
+        for name in template.parameters:
+            if not _PARAMETER_NAME.match(name):
+                raise ValueError(f"Invalid parameter name '{name}' in template '{template.name}'.")
+        self._templates[template.name] = template
+        return template
+
+    def get(self, name: str) -> QueryTemplate:
+        try:
+            return self._templates[name]
+        except KeyError:
+            raise UnknownTemplateError(f"Query template '{name}' not found.")
+
+    def list_templates(self) -> List[QueryTemplate]:
+        return sorted(self._templates.values(), key=lambda t: t.name)
+
+    def bind(self, name: str, params: Optional[Dict[str, Any]] = None) -> Tuple[QueryTemplate, Dict[str, Any]]:
+        """Validates `params` against the template and returns it with its bindings."""
+        template = self.get(name)
+        params = params or {}
+        unknown = set(params) - set(template.parameters)
+        if unknown:
+            raise ValueError(f"Unknown parameters for template '{name}': {', '.join(sorted(unknown))}.")
+        bindings = {}
+        for param_name, spec in template.parameters.items():
+            if param_name in params and params[param_name] is not None:
+                bindings[param_name] = _coerce(param_name, spec, params[param_name])
+            elif spec.default is not None:
+                bindings[param_name] = spec.default
+            elif spec.required:
+                raise ValueError(f"Missing required parameter '{param_name}' for template '{name}'.")
+            else:
+                bindings[param_name] = None
+        return template, bindings
+
+    async def run(self, execute: TemplateExecutor, name: str, params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None) -> list:
+        """Binds and runs a template through `execute`, recording its latency."""
+        template, bindings = self.bind(name, params)
+        start = time.monotonic()
+        outcome = "error"
+        try:
+            result = await execute(template.script, bindings, timeout=timeout, write=template.write)
+            outcome = "ok"
+            return to_json_compatible(result)
+        finally:
+            KNOWLEDGEGRAPH_TEMPLATE_LATENCY.labels(template=name).observe(time.monotonic() - start)
+            KNOWLEDGEGRAPH_TEMPLATE_QUERIES.labels(template=name, outcome=outcome).inc()
+
+
+def _limit(default: int, maximum: int) -> TemplateParameter:
+    return TemplateParameter(type=ParameterType.INTEGER, description="Maximum number of results.", default=default, minimum=1, maximum=maximum)
+
+_SERVICE_NAME = TemplateParameter(description="The service's name.")
+
+# --- Built-in Templates ---
+query_templates = QueryTemplateRegistry()
+
+query_templates.register(QueryTemplate(
+    name="search_by_name",
+    description="Vertices whose name contains the given text.",
+    script="g.V().has('name', textContains(text)).limit(max_results).elementMap()",
+    parameters={"text": TemplateParameter(description="Text to look for in names."), "max_results": _limit(10, 100)},
+))
+
+query_templates.register(QueryTemplate(
+    name="insights_for_service",
+    description="Reports and RCA reports linked to a service.",
+    script="g.V().has('Service', 'name', service_name).in('DOCUMENTS', 'REPORT_FOR').limit(max_results).elementMap()",
+    parameters={"service_name": _SERVICE_NAME, "max_results": _limit(10, 100)},
+    labels=["Service", "DOCUMENTS", "REPORT_FOR"],
+))
+
+query_templates.register(QueryTemplate(
+    name="service_dependents",
+    description="Services that depend on a service.",
+    script="g.V().has('Service', 'name', service_name).in('DEPENDS_ON').hasLabel('Service').elementMap()",
+    parameters={"service_name": _SERVICE_NAME},
+    labels=["Service", "DEPENDS_ON"],
+))
+
+query_templates.register(QueryTemplate(
+    name="service_dependencies",
+    description="Both directions of a service's relationships, as [service, edge label, service] paths.",
+    script="g.V().has('Service', 'name', service_name).union(outE().inV(), inE().outV()).path().by('name').by(label())",
+    parameters={"service_name": _SERVICE_NAME},
+))
+
+query_templates.register(QueryTemplate(
+    name="service_deployments",
+    description="Deployments of a service.",
+    script="g.V().has('Service', 'name', service_name).in('DEPLOYED_TO').limit(max_results).elementMap()",
+    parameters={"service_name": _SERVICE_NAME, "max_results": _limit(5, 100)},
+    labels=["Service", "DEPLOYED_TO"],
+))
+
+query_templates.register(QueryTemplate(
+    name="record_report",
+    description="Creates a Report and links it to its service and originating event, where those exist.",
+    script=(
+        "g.addV('Report').property('source', source).property('content', content).property('createdAt', created_at).as('r')"
+        ".sideEffect(V().has('Service', 'name', service_name).addE('REPORT_FOR').from('r'))"
+        ".sideEffect(V().has('Event', 'eventId', event_id).addE('GENERATED_FROM').from('r'))"
+        ".elementMap()"
+    ),
+    parameters={
+        "source": TemplateParameter(),
+        "content": TemplateParameter(),
+        "created_at": TemplateParameter(description="ISO 8601 timestamp."),
+        "service_name": _SERVICE_NAME,
+        "event_id": TemplateParameter(default=""),
+    },
+    write=True,
+    labels=["Report", "Service", "Event", "REPORT_FOR", "GENERATED_FROM"],
+))
+
+query_templates.register(QueryTemplate(
+    name="insight_details",
+    description="Lessons of Insight vertices by vertex ID, with their workflow and the services they affect.",
+    script=(
+        "g.V(ids).hasLabel('Insight').project('id', 'lesson', 'workflow_id', 'services')"
+        ".by(id()).by(values('lesson')).by(coalesce(values('source_workflow'), constant('')))"
+        ".by(out('AFFECTS').values('name').fold())"
+    ),
+    parameters={"ids": TemplateParameter(type=ParameterType.LIST, description="Insight vertex IDs.", maximum=1000)},
+    labels=["Insight", "AFFECTS", "Service"],
+))
+
+query_templates.register(QueryTemplate(
+    name="insight_vertex_ids",
+    description="Vertex IDs of Insight vertices by uid.",
+    script="g.V().has('Insight', 'uid', within(uids)).project('uid', 'id').by(values('uid')).by(id())",
+    parameters={"uids": TemplateParameter(type=ParameterType.LIST, maximum=1000)},
+    labels=["Insight"],
+))
+
+query_templates.register(QueryTemplate(
+    name="insight_embeddings",
+    description="Stored embeddings (JSON strings) of Insight vertices, for rebuilding the insight index.",
+    script="g.V().hasLabel('Insight').has('embedding').range(offset, offset + max_results).project('id', 'embedding').by(id()).by(values('embedding'))",
+    parameters={
+        "offset": TemplateParameter(type=ParameterType.INTEGER, default=0, minimum=0),
+        "max_results": _limit(500, 5000),
+    },
+    labels=["Insight"],
+))
+
+query_templates.register(QueryTemplate(
+    name="delete_vertices",
+    description="Drops vertices, with their edges, by label and uid.",
+    script="g.V().has(vertex_label, 'uid', within(uids)).drop()",
+    parameters={
+        "vertex_label": TemplateParameter(description="The vertices' label."),
+        "uids": TemplateParameter(type=ParameterType.LIST, maximum=1000),
+    },
+    write=True,
+    label_parameters=["vertex_label"],
+))
@@ -0,0 +1,412 @@
+# KnowledgeGraphQ/app/core/snapshot.py
+import asyncio
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+from enum import Enum
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+# Elements per streamed query result batch on export
+READ_BATCH_SIZE = 1000
+# Elements created per import transaction
+WRITE_BATCH_SIZE = 500
+# Partitions exported or imported at once
+PARALLELISM = 4
+
+# Every vertex (or edge) of one label is one partition. Property values are
+# exported as valueMap() gives them: a list per vertex property, to keep
+# multi-valued properties, and a single value per edge property.
+_VERTEX_QUERY = (
+    "g.V().hasLabel(partition_label)"
+    ".project('id', 'label', 'properties').by(id()).by(label()).by(valueMap())"
+)
+_EDGE_QUERY = (
+    "g.E().hasLabel(partition_label){endpoints}"
+    ".project('label', 'outV', 'inV', 'properties').by(label()).by(outV().id()).by(inV().id()).by(valueMap())"
+)
+# A subgraph only keeps the edges between its vertices
+_EDGE_ENDPOINTS = ".filter(outV().hasLabel(within(vertex_labels))).filter(inV().hasLabel(within(vertex_labels)))"
+
+# Imports go through the Graph API in a script per batch: one request, and
+# so one transaction, per batch. Each returns the [old, new] vertex ids.
+_ADD_VERTICES = """
+rows.collect { r ->
+    def v = graph.addVertex(r.label)
+    r.properties.each { k, values -> (values instanceof List ? values : [values]).each { x -> v.property(k, x) } }
+    [r.id, v.id()]
+}
+"""
+# With the graph's graph.set-vertex-id enabled, vertices keep their ids
+_ADD_VERTICES_WITH_IDS = """
+rows.collect { r ->
+    def v = graph.addVertex(T.label, r.label, T.id, r.id)
+    r.properties.each { k, values -> (values instanceof List ? values : [values]).each { x -> v.property(k, x) } }
+    [r.id, v.id()]
+}
+"""
+_ADD_EDGES = """
+rows.each { r ->
+    def e = graph.vertices(r.outV).next().addEdge(r.label, graph.vertices(r.inV).next())
+    r.properties.each { k, x -> e.property(k, x) }
+}
+rows.size()
+"""
+
+StreamQuery = Callable[..., AsyncIterator[list]]
+ExecuteQuery = Callable[..., Awaitable[list]]
+
+
+class SnapshotError(Exception):
+    """Raised for a snapshot that can't be written or read."""
+    pass
+
+
+class SnapshotFormat(str, Enum):
+    JSONL = "jsonl"
+    PARQUET = "parquet"
+
+
+class SnapshotPartition(BaseModel):
+    kind: str = Field(..., description="'vertex' or 'edge'.")
+    label: str
+    file: str
+    count: int = 0
+
+
+class SnapshotManifest(BaseModel):
+    version: int = 1
+    format: SnapshotFormat
+    created_at: float
+    vertex_labels: Optional[List[str]] = Field(None, description="The label filter the snapshot was exported with, if any.")
+    partitions: List[SnapshotPartition] = []
+
+    @property
+    def vertices(self) -> int:
+        return sum(p.count for p in self.partitions if p.kind == "vertex")
+
+    @property
+    def edges(self) -> int:
+        return sum(p.count for p in self.partitions if p.kind == "edge")
+
+
+class SnapshotProgress(BaseModel):
+    operation: str = Field(..., description="'export' or 'import'.")
+    kind: str
+    label: str
+    done: int = Field(..., description="Elements of the partition done so far.")
+    total: Optional[int] = Field(None, description="Elements in the partition, when known.")
+
+
+class ImportReport(BaseModel):
+    vertices: int = 0
+    edges: int = 0
+    skipped_edges: int = Field(0, description="Edges whose endpoints aren't in the snapshot.")
+
+
+# --- File formats ---
+
+class _JsonLinesFile:
+    """Gzipped JSON lines, one element per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def write(self, rows: List[Dict[str, Any]]):
+        if self._file is None:
+            self._file = gzip.open(self.path, "wt", encoding="utf-8")
+        self._file.writelines(json.dumps(row, separators=(",", ":"), default=str) + "\n" for row in rows)
+
+    def close(self):
+        if self._file is None:
+            # An empty partition is still an (empty) file
+            self._file = gzip.open(self.path, "wt", encoding="utf-8")
+        self._file.close()
+
+    def read(self, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+        batch = []
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                batch.append(json.loads(line))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+
+class _ParquetFile:
+    """
+    A Parquet table with a row group per written batch. Ids and properties
+    are JSON encoded, since their types vary by label and by key.
+    """
+
+    _JSON_COLUMNS = ("id", "outV", "inV", "properties")
+
+    def __init__(self, path: str, kind: str):
+        self.path = path
+        self.columns = ["id", "label", "properties"] if kind == "vertex" else ["label", "outV", "inV", "properties"]
+        self._writer = None
+
+    @staticmethod
+    def _pyarrow():
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SnapshotError("Parquet snapshots need pyarrow installed in KnowledgeGraphQ.")
+        return pa, pq
+
+    def _schema(self, pa):
+        return pa.schema([(column, pa.string()) for column in self.columns])
+
+    def write(self, rows: List[Dict[str, Any]]):
+        pa, pq = self._pyarrow()
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, self._schema(pa), compression="zstd")
+        columns = {
+            column: [json.dumps(row[column], default=str) if column in self._JSON_COLUMNS else row[column] for row in rows]
+            for column in self.columns
+        }
+        self._writer.write_table(pa.table(columns, schema=self._schema(pa)))
+
+    def close(self):
+        if self._writer is None:
+            pa, pq = self._pyarrow()
+            self._writer = pq.ParquetWriter(self.path, self._schema(pa), compression="zstd")
+        self._writer.close()
+
+    def read(self, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+        _, pq = self._pyarrow()
+        for record_batch in pq.ParquetFile(self.path).iter_batches(batch_size=batch_size):
+            yield [
+                {column: json.loads(value) if column in self._JSON_COLUMNS else value for column, value in row.items()}
+                for row in record_batch.to_pylist()
+            ]
+
+
+_EXTENSIONS = {SnapshotFormat.JSONL: ".jsonl.gz", SnapshotFormat.PARQUET: ".parquet"}
+
+
+def _open_file(snapshot_format: SnapshotFormat, path: str, kind: str):
+    if snapshot_format == SnapshotFormat.PARQUET:
+        return _ParquetFile(path, kind)
+    return _JsonLinesFile(path)
+
+
+class _IdMap:
+    """Maps exported vertex ids to imported ones, on disk so a graph of any size fits."""
+
+    def __init__(self, path: str):
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode = OFF")
+        self._db.execute("PRAGMA synchronous = OFF")
+        self._db.execute("CREATE TABLE IF NOT EXISTS ids (old TEXT PRIMARY KEY, new TEXT NOT NULL)")
+
+    def add(self, pairs: List[List[Any]]):
+        self._db.executemany(
+            "INSERT OR REPLACE INTO ids VALUES (?, ?)", ((json.dumps(old), json.dumps(new)) for old, new in pairs)
+        )
+        self._db.commit()
+
+    def lookup(self, old_ids: List[Any]) -> Dict[str, Any]:
+        """New ids by the JSON encoding of the old ones; ids not imported are missing."""
+        keys = list({json.dumps(old) for old in old_ids})
+        found = {}
+        # SQLite binds at most 999 parameters per statement
+        for start in range(0, len(keys), 900):
+            part = keys[start:start + 900]
+            rows = self._db.execute(f"SELECT old, new FROM ids WHERE old IN ({','.join('?' * len(part))})", part)
+            found.update((old, json.loads(new)) for old, new in rows)
+        return found
+
+    def close(self):
+        self._db.close()
+
+
+# --- Export and import ---
+
+class GraphSnapshotter:
+    """
+    Exports the graph, or the subgraph of some vertex labels, to a snapshot
+    directory and imports a snapshot into another graph, so an environment
+    or test fixture is loaded in one pass instead of by replaying ingestion.
+
+    A snapshot holds a file per vertex and edge label (a partition) and a
+    manifest of them. Partitions are exported and imported `parallelism` at
+    a time. Exports stream query results straight to the files; imports
+    read the files in batches and write each batch as one transaction,
+    keeping the old-to-new vertex id map on disk. Both use memory bounded
+    by the batch sizes, not the graph size, and report each batch to
+    `progress`.
+
+    `stream(script, bindings)` and `execute(script, bindings, write=...)`
+    run Gremlin scripts, e.g. GremlinClient.stream_query and execute_query.
+    Imports into JanusGraph are fastest with storage.batch-loading enabled
+    and the schema defined up front.
+    """
+
+    def __init__(
+        self,
+        stream: StreamQuery,
+        execute: ExecuteQuery,
+        parallelism: int = PARALLELISM,
+        read_batch_size: int = READ_BATCH_SIZE,
+        write_batch_size: int = WRITE_BATCH_SIZE,
+        progress: Optional[Callable[[SnapshotProgress], None]] = None
+    ):
+        self.stream = stream
+        self.execute = execute
+        self.parallelism = parallelism
+        self.read_batch_size = read_batch_size
+        self.write_batch_size = write_batch_size
+        self.progress = progress
+
+    async def export(
+        self,
+        directory: str,
+        snapshot_format: SnapshotFormat = SnapshotFormat.JSONL,
+        vertex_labels: Optional[List[str]] = None
+    ) -> SnapshotManifest:
+        """
+        Writes a snapshot of the graph to `directory`. With `vertex_labels`,
+        only those vertices and the edges between them are exported.
+        """
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(os.path.join(directory, MANIFEST_FILE)):
+            raise SnapshotError(f"{directory} already holds a snapshot.")
+
+        if vertex_labels is None:
+            labels = sorted(await self.execute("g.V().label().dedup()", {}))
+        else:
+            labels = sorted(set(vertex_labels))
+        edge_labels = sorted(await self.execute("g.E().label().dedup()", {}))
+
+        extension = _EXTENSIONS[snapshot_format]
+        partitions = [
+            SnapshotPartition(kind="vertex", label=label, file=f"vertices-{i:04d}{extension}")
+            for i, label in enumerate(labels)
+        ] + [
+            SnapshotPartition(kind="edge", label=label, file=f"edges-{i:04d}{extension}")
+            for i, label in enumerate(edge_labels)
+        ]
+        manifest = SnapshotManifest(format=snapshot_format, created_at=time.time(), vertex_labels=vertex_labels, partitions=partitions)
+
+        endpoints = _EDGE_ENDPOINTS if vertex_labels is not None else ""
+        limit = asyncio.Semaphore(self.parallelism)
+
+        async def export_partition(partition: SnapshotPartition):
+            async with limit:
+                if partition.kind == "vertex":
+                    script, bindings = _VERTEX_QUERY, {"partition_label": partition.label}
+                else:
+                    script = _EDGE_QUERY.format(endpoints=endpoints)
+                    bindings = {"partition_label": partition.label}
+                    if vertex_labels is not None:
+                        bindings["vertex_labels"] = labels
+                out = _open_file(snapshot_format, os.path.join(directory, partition.file), partition.kind)
+                try:
+                    async for rows in self.stream(script, bindings, batch_size=self.read_batch_size):
+                        await asyncio.to_thread(out.write, rows)
+                        partition.count += len(rows)
+                        self._report("export", partition, partition.count)
+                finally:
+                    await asyncio.to_thread(out.close)
+                logger.info(f"Exported {partition.count} {partition.kind} elements labeled '{partition.label}'")
+
+        await asyncio.gather(*(export_partition(p) for p in partitions))
+        # The manifest is written last, so a snapshot with one is complete
+        tmp_path = os.path.join(directory, f"{MANIFEST_FILE}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(manifest.model_dump_json(indent=1))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(directory, MANIFEST_FILE))
+        logger.info(f"Exported {manifest.vertices} vertices and {manifest.edges} edges to {directory}")
+        return manifest
+
+    async def import_(self, directory: str, preserve_ids: bool = False, id_map_path: Optional[str] = None) -> ImportReport:
+        """
+        Loads a snapshot into the graph: all vertices, then the edges between
+        them. New vertices get new ids unless `preserve_ids`. The id map is
+        kept at `id_map_path`, or in a temporary file.
+        """
+        manifest = read_manifest(directory)
+        report = ImportReport()
+        vertex_script = _ADD_VERTICES_WITH_IDS if preserve_ids else _ADD_VERTICES
+
+        owns_id_map = id_map_path is None
+        if owns_id_map:
+            fd, id_map_path = tempfile.mkstemp(prefix="kg-snapshot-ids-", suffix=".db")
+            os.close(fd)
+        id_map = _IdMap(id_map_path)
+        limit = asyncio.Semaphore(self.parallelism)
+
+        async def import_vertices(partition: SnapshotPartition):
+            async with limit:
+                done = 0
+                async for rows in self._read(manifest, directory, partition):
+                    id_map.add(await self.execute(vertex_script, {"rows": rows}, write=True))
+                    done += len(rows)
+                    report.vertices += len(rows)
+                    self._report("import", partition, done)
+
+        async def import_edges(partition: SnapshotPartition):
+            async with limit:
+                done = 0
+                async for rows in self._read(manifest, directory, partition):
+                    new_ids = id_map.lookup([r["outV"] for r in rows] + [r["inV"] for r in rows])
+                    edges = []
+                    for row in rows:
+                        out_id, in_id = new_ids.get(json.dumps(row["outV"])), new_ids.get(json.dumps(row["inV"]))
+                        if out_id is None or in_id is None:
+                            report.skipped_edges += 1
+                        else:
+                            edges.append({**row, "outV": out_id, "inV": in_id})
+                    if edges:
+                        await self.execute(_ADD_EDGES, {"rows": edges}, write=True)
+                    done += len(rows)
+                    report.edges += len(edges)
+                    self._report("import", partition, done)
+
+        try:
+            await asyncio.gather(*(import_vertices(p) for p in manifest.partitions if p.kind == "vertex"))
+            await asyncio.gather(*(import_edges(p) for p in manifest.partitions if p.kind == "edge"))
+        finally:
+            id_map.close()
+            if owns_id_map:
+                os.remove(id_map_path)
+        logger.info(f"Imported {report.vertices} vertices and {report.edges} edges from {directory}")
+        return report
+
+    async def _read(self, manifest: SnapshotManifest, directory: str, partition: SnapshotPartition) -> AsyncIterator[List[Dict[str, Any]]]:
+        """A partition's rows, `write_batch_size` at a time, read in a worker thread."""
+        batches = _open_file(manifest.format, os.path.join(directory, partition.file), partition.kind).read(self.write_batch_size)
+        while True:
+            rows = await asyncio.to_thread(next, batches, None)
+            if rows is None:
+                return
+            yield rows
+
+    def _report(self, operation: str, partition: SnapshotPartition, done: int):
+        if self.progress is None:
+            return
+        total = partition.count if operation == "import" else None
+        self.progress(SnapshotProgress(operation=operation, kind=partition.kind, label=partition.label, done=done, total=total))
+
+
+def read_manifest(directory: str) -> SnapshotManifest:
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        raise SnapshotError(f"No complete snapshot in {directory}: {MANIFEST_FILE} is missing.")
+    with open(path, encoding="utf-8") as f:
+        return SnapshotManifest.model_validate_json(f.read())
@@ -1,12 +1,14 @@
 # KnowledgeGraphQ/app/main.py
 from fastapi import FastAPI
+import asyncio
 import logging
 import os
 
-from app.api import query, ingest
+from app.api import query, ingest, insights
 from app.core.gremlin_client import gremlin_client
 from shared.observability.logging_config import setup_logging
 from shared.pulsar_client import shared_pulsar_client
+from shared.q_auth_parser.parser import start_revocation_feed, stop_revocation_feed
 
 # Configure logging
 setup_logging(service_name="KnowledgeGraphQ")
@@ -22,8 +24,10 @@ app = FastAPI(
 async def startup_event():
     """On startup, connect to the graph database."""
     logger.info("KnowledgeGraphQ starting up...")
+    start_revocation_feed()
     try:
-        gremlin_client.connect()
+        # The Gremlin driver blocks while connecting, and can't do so on a running event loop
+        await asyncio.get_running_loop().run_in_executor(None, gremlin_client.connect)
         logger.info("Successfully connected to Gremlin server.")
     except ConnectionError as e:
         # If we can't connect at startup, log a critical error.
@@ -32,16 +36,28 @@ async def startup_event():
         # In a real-world scenario, you might want to exit the process
         # import sys; sys.exit(1)
 
+    insights.insight_index.open()
+    if len(insights.insight_index) == 0:
+        # First start, or the index file was lost: rebuild it from the embeddings stored on the graph
+        try:
+            indexed = await insights.insight_store.rebuild_index()
+            logger.info(f"Rebuilt the insight index with {indexed} insights.")
+        except Exception as e:
+            logger.error(f"Could not rebuild the insight index: {e}", exc_info=True)
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """On shutdown, close the connection."""
     logger.info("KnowledgeGraphQ shutting down...")
     gremlin_client.close()
+    insights.insight_index.close()
     shared_pulsar_client.close()
+    stop_revocation_feed()
 
 # --- API Routers ---
 app.include_router(query.router, prefix="/api/v1/query", tags=["Query"])
 app.include_router(ingest.router, prefix="/api/v1/ingest", tags=["Ingest"])
+app.include_router(insights.router, prefix="/api/v1/insights", tags=["Insights"])
 
 @app.get("/health", tags=["Health"])
 async def health_check():
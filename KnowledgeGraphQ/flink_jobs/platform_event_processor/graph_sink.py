@@ -0,0 +1,199 @@
+"""
+Delivery of graph operations to the KnowledgeGraphQ ingest API, used by the
+platform event processor's KnowledgeGraphSink.
+
+This module deliberately has no PyFlink imports so batching and retries can
+be tested against a local HTTP stub without a Flink runtime. The job in
+`job.py` keeps undelivered operations in checkpointed state and hands them
+to a GraphOperationWriter.
+
+The ingest API upserts vertices by uid and creates edges only if missing,
+so re-sending an operation is harmless. A retry or a replay after a
+restore can't duplicate graph data. That makes at-least-once delivery safe.
+"""
+import logging
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+
+LOG = logging.getLogger(__name__)
+
+# Per-operation ingest outcomes that are worth another attempt. An edge whose
+# vertex is missing may succeed once a concurrent batch has created it.
+RETRYABLE_STATUSES = {"failed", "missing_vertex"}
+RETRYABLE_HTTP_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class AdaptiveBatchSize:
+    """
+    Batch size driven by round-trip latency (additive increase,
+    multiplicative decrease). Fast successful round trips grow the batch by
+    `step`. Slow or failed ones halve it, down to `minimum`.
+    """
+
+    def __init__(self, initial: int = 100, minimum: int = 10, maximum: int = 1000, target_latency: float = 1.0, step: int = 20):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.step = step
+        self.value = max(minimum, min(initial, maximum))
+
+    def record(self, latency: float, ok: bool):
+        if ok and latency <= self.target_latency:
+            self.value = min(self.maximum, self.value + self.step)
+        else:
+            self.value = max(self.minimum, self.value // 2)
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter: attempt n waits up to base_delay * 2**(n-1), capped at max_delay."""
+
+    def __init__(self, max_attempts: int = 6, base_delay: float = 0.5, max_delay: float = 30.0, jitter: bool = True):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def delay(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, delay) if self.jitter else delay
+
+
+class DeliveryReport:
+    """The outcome of one write: how many operations landed and which were dead-lettered."""
+
+    def __init__(self):
+        self.delivered = 0
+        self.retries = 0
+        self.dead_letters: List[Dict[str, Any]] = []
+
+
+class _Pending:
+    __slots__ = ("operation", "attempts")
+
+    def __init__(self, operation: Dict[str, Any]):
+        self.operation = operation
+        self.attempts = 0
+
+
+class GraphOperationWriter:
+    """
+    Sends graph operations to the ingest API in batches, with at most
+    `max_in_flight` requests at a time. `write` blocks until every operation
+    is either delivered or dead-lettered, so the caller can safely discard
+    them afterwards.
+
+    *   **Batch size** adapts to latency (see AdaptiveBatchSize).
+    *   **Retries**: connection errors, timeouts, 408/429/5xx responses and
+        per-operation `failed` or `missing_vertex` results are retried
+        with exponential backoff. Only the operations that failed are
+        re-sent.
+    *   **Poison operations**: a batch rejected as invalid (other 4xx) is
+        split in half until the offending operations are isolated. Only
+        those are dead-lettered.
+    *   **Dead letters** hold the operation, the last error and the
+        number of attempts. They are also produced once an operation runs
+        out of attempts.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        token: str,
+        batch_size: Optional[AdaptiveBatchSize] = None,
+        max_in_flight: int = 4,
+        retry: Optional[RetryPolicy] = None,
+        timeout: float = 10.0,
+        session: Optional[requests.Session] = None,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.url = url
+        self.batch_size = batch_size or AdaptiveBatchSize()
+        self.max_in_flight = max_in_flight
+        self.retry = retry or RetryPolicy()
+        self.timeout = timeout
+        self._session = session or requests.Session()
+        self._session.headers.update({"Authorization": f"Bearer {token}", "Content-Type": "application/json"})
+        self._sleep = sleep
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="kg-sink")
+
+    def write(self, operations: List[Dict[str, Any]]) -> DeliveryReport:
+        report = DeliveryReport()
+        pending = [_Pending(op) for op in operations]
+        round_number = 0
+        while pending:
+            if round_number:
+                report.retries += len(pending)
+                self._sleep(self.retry.delay(round_number))
+            round_number += 1
+            pending = self._send_round(pending, report)
+        if report.dead_letters:
+            LOG.warning(f"Dead-lettered {len(report.dead_letters)} of {len(operations)} graph operations.")
+        return report
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self._session.close()
+
+    def _send_round(self, pending: List[_Pending], report: DeliveryReport) -> List[_Pending]:
+        """Sends every pending operation once and returns those to retry."""
+        for item in pending:
+            item.attempts += 1
+        queue = list(pending)
+        splits: List[List[_Pending]] = []
+        retry: List[_Pending] = []
+        in_flight = {}
+        while queue or splits or in_flight:
+            while (queue or splits) and len(in_flight) < self.max_in_flight:
+                if splits:
+                    batch = splits.pop()
+                else:
+                    # Read the batch size per batch, so it adapts within a round too
+                    size = self.batch_size.value
+                    batch, queue = queue[:size], queue[size:]
+                in_flight[self._executor.submit(self._post, batch)] = batch
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch = in_flight.pop(future)
+                failed, retryable, sample = future.result()
+                if sample is not None:
+                    self.batch_size.record(*sample)
+                if failed and not retryable and len(batch) > 1:
+                    # Isolate the invalid operations; the halves don't count as new attempts
+                    middle = len(batch) // 2
+                    splits.extend([batch[middle:], batch[:middle]])
+                    continue
+                for item, error in failed:
+                    if retryable and item.attempts < self.retry.max_attempts:
+                        retry.append(item)
+                    else:
+                        report.dead_letters.append({"operation": item.operation, "error": error, "attempts": item.attempts})
+                report.delivered += len(batch) - len(failed)
+        return retry
+
+    def _post(self, batch: List[_Pending]) -> Tuple[List[Tuple[_Pending, str]], bool, Optional[Tuple[float, bool]]]:
+        """
+        Sends one batch. Returns the operations that failed, each with its
+        error, whether they are worth retrying, and a (latency, ok) sample
+        for the batch size (None when it says nothing about the graph's load).
+        """
+        start = time.monotonic()
+        try:
+            response = self._session.post(self.url, json={"operations": [item.operation for item in batch]}, timeout=self.timeout)
+        except requests.RequestException as e:
+            return [(item, f"{type(e).__name__}: {e}") for item in batch], True, (time.monotonic() - start, False)
+
+        if response.status_code >= 400:
+            retryable = response.status_code in RETRYABLE_HTTP_STATUSES
+            error = f"HTTP {response.status_code}: {response.text[:500]}"
+            return [(item, error) for item in batch], retryable, (time.monotonic() - start, False) if retryable else None
+
+        latency = time.monotonic() - start
+        failed = []
+        for result in response.json().get("results", []):
+            if result.get("status") in RETRYABLE_STATUSES:
+                failed.append((batch[result["index"]], result.get("error") or result["status"]))
+        return failed, True, (latency, True)
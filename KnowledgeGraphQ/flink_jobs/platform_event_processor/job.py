@@ -1,13 +1,17 @@
 import logging
 import os
 import json
+import zlib
 from typing import List, Dict, Any
 
 from pyflink.common import WatermarkStrategy, SimpleStringSchema
-from pyflink.datastream import StreamExecutionEnvironment
-from pyflink.datastream.connectors.pulsar import PulsarSource, PulsarSourceBuilder, SubscriptionType
-from pyflink.datastream.functions import RuntimeContext, MapFunction
-import requests
+from pyflink.common.typeinfo import Types
+from pyflink.datastream import StreamExecutionEnvironment, CheckpointingMode
+from pyflink.datastream.connectors.pulsar import PulsarSource, PulsarSink, PulsarSerializationSchema, SubscriptionType
+from pyflink.datastream.functions import RuntimeContext, KeyedProcessFunction
+from pyflink.datastream.state import ListStateDescriptor, ValueStateDescriptor
+
+from graph_sink import AdaptiveBatchSize, GraphOperationWriter, RetryPolicy
 
 # --- Configuration ---
 LOG = logging.getLogger(__name__)
@@ -20,6 +24,17 @@ KG_API_URL = os.getenv("KG_API_URL", "http://knowledgegraphq:8000/api/v1/ingest"
 # This would be a service account token fetched securely
 KG_API_TOKEN = os.getenv("KG_API_TOKEN", "dummy-token-for-now")
 
+# Operations that can't be delivered, with their last error
+DEAD_LETTER_TOPIC = os.getenv("KG_DEAD_LETTER_TOPIC", "persistent://public/default/knowledgegraph-dead-letter")
+CHECKPOINT_INTERVAL_MS = int(os.getenv("CHECKPOINT_INTERVAL_MS", "10000"))
+# Events are spread over this many keys, each with its own buffer of pending operations
+SINK_SHARDS = int(os.getenv("KG_SINK_SHARDS", "16"))
+SINK_FLUSH_SIZE = int(os.getenv("KG_SINK_FLUSH_SIZE", "500"))
+SINK_FLUSH_INTERVAL_MS = int(os.getenv("KG_SINK_FLUSH_INTERVAL_MS", "1000"))
+SINK_MAX_IN_FLIGHT = int(os.getenv("KG_SINK_MAX_IN_FLIGHT", "4"))
+SINK_MAX_ATTEMPTS = int(os.getenv("KG_SINK_MAX_ATTEMPTS", "6"))
+SINK_TARGET_LATENCY_SECONDS = float(os.getenv("KG_SINK_TARGET_LATENCY_SECONDS", "1.0"))
+
 
 # --- Transformation Logic ---
 
@@ -216,50 +231,81 @@ def event_to_graph_ops(event: Dict[str, Any]) -> List[Dict[str, Any]]:
 
 # --- Flink Sink Logic ---
 
-class KnowledgeGraphSink(MapFunction):
+def shard_of(ops: List[Dict[str, Any]]) -> int:
+    """A stable shard for an event's operations (Python's hash() differs between workers)."""
+    return zlib.crc32(str(ops[0]["properties"].get("uid")).encode()) % SINK_SHARDS
+
+
+class KnowledgeGraphSink(KeyedProcessFunction):
     """
-    A MapFunction that sends graph operations to the KnowledgeGraphQ API.
-    It collects records into batches to reduce HTTP request overhead.
+    Sends graph operations to the KnowledgeGraphQ API with at-least-once delivery.
+
+    Operations wait in keyed list state until a shard has `flush_size` of
+    them or its oldest is `flush_interval_ms` old. The state is part of every
+    checkpoint, so operations that weren't delivered yet are restored after a
+    failure and sent again. PyFlink gives Python functions no
+    checkpoint hook to flush on, and this makes one unnecessary. A flush
+    blocks until the writer has delivered or dead-lettered every operation,
+    which also backpressures the source while KnowledgeGraphQ is slow.
+
+    Emits dead letters as JSON strings.
     """
-    def __init__(self, batch_size=20):
-        self.batch_size = batch_size
-        self.batch = []
+    def __init__(self, flush_size=SINK_FLUSH_SIZE, flush_interval_ms=SINK_FLUSH_INTERVAL_MS):
+        self.flush_size = flush_size
+        self.flush_interval_ms = flush_interval_ms
+        self.writer = None
 
     def open(self, runtime_context: RuntimeContext):
-        LOG.info(f"Initializing KnowledgeGraphSink with batch size {self.batch_size}")
-
-    def map(self, ops: List[Dict[str, Any]]):
-        if ops:
-            self.batch.extend(ops)
-        
-        if len(self.batch) >= self.batch_size:
-            self.flush()
-        
-        return ops # We don't change the stream, just sink the data
+        self.pending = runtime_context.get_list_state(ListStateDescriptor("pending_ops", Types.PICKLED_BYTE_ARRAY()))
+        self.pending_count = runtime_context.get_state(ValueStateDescriptor("pending_count", Types.INT()))
+        self.writer = GraphOperationWriter(
+            KG_API_URL,
+            KG_API_TOKEN,
+            batch_size=AdaptiveBatchSize(target_latency=SINK_TARGET_LATENCY_SECONDS),
+            max_in_flight=SINK_MAX_IN_FLIGHT,
+            retry=RetryPolicy(max_attempts=SINK_MAX_ATTEMPTS)
+        )
+        metrics = runtime_context.get_metrics_group().add_group("knowledgegraph_sink")
+        self.delivered_counter = metrics.counter("delivered")
+        self.retried_counter = metrics.counter("retried")
+        self.dead_letter_counter = metrics.counter("dead_lettered")
+        metrics.gauge("batch_size", lambda: self.writer.batch_size.value)
+        LOG.info(f"Initializing KnowledgeGraphSink (flush at {self.flush_size} ops or {self.flush_interval_ms} ms)")
+
+    def process_element(self, ops: List[Dict[str, Any]], ctx: 'KeyedProcessFunction.Context'):
+        count = self.pending_count.value() or 0
+        if count == 0:
+            # The first pending operation of this shard starts the age timer
+            ctx.timer_service().register_processing_time_timer(ctx.timer_service().current_processing_time() + self.flush_interval_ms)
+        self.pending.add_all(ops)
+        count += len(ops)
+        self.pending_count.update(count)
+        if count >= self.flush_size:
+            yield from self.flush()
+
+    def on_timer(self, timestamp: int, ctx: 'KeyedProcessFunction.OnTimerContext'):
+        yield from self.flush()
 
     def flush(self):
-        if not self.batch:
+        ops = list(self.pending.get() or [])
+        if not ops:
             return
 
-        LOG.info(f"Sending batch of {len(self.batch)} operations to KnowledgeGraphQ API.")
-        try:
-            headers = {
-                "Authorization": f"Bearer {KG_API_TOKEN}",
-                "Content-Type": "application/json"
-            }
-            response = requests.post(KG_API_URL, json={"operations": self.batch}, headers=headers, timeout=10)
-            response.raise_for_status()
-            LOG.info(f"Successfully ingested batch. Status: {response.status_code}")
-            self.batch.clear()
-        except requests.RequestException as e:
-            # In a production system, you'd add retries, dead-letter queues, etc.
-            LOG.error(f"Failed to send batch to KnowledgeGraph API: {e}", exc_info=True)
-            # For now, we'll clear the batch to avoid repeated failures on the same data.
-            self.batch.clear()
+        LOG.info(f"Sending {len(ops)} operations to KnowledgeGraphQ API.")
+        report = self.writer.write(ops)
+        # Only now are the operations delivered or dead-lettered
+        self.pending.clear()
+        self.pending_count.clear()
+
+        self.delivered_counter.inc(report.delivered)
+        self.retried_counter.inc(report.retries)
+        self.dead_letter_counter.inc(len(report.dead_letters))
+        for dead_letter in report.dead_letters:
+            yield json.dumps(dead_letter, default=str)
 
     def close(self):
-        # Flush any remaining items on shutdown
-        self.flush()
+        if self.writer is not None:
+            self.writer.close()
 
 
 # --- Flink Job Definition ---
@@ -271,6 +317,8 @@ def run_job():
     env = StreamExecutionEnvironment.get_execution_environment()
     # In a real cluster, you would set this higher.
     # env.set_parallelism(1)
+    # The sink's pending operations are only safe once checkpointed
+    env.enable_checkpointing(CHECKPOINT_INTERVAL_MS, CheckpointingMode.AT_LEAST_ONCE)
 
     # 1. Pulsar Source
     pulsar_source = PulsarSource.builder() \
@@ -283,6 +331,13 @@ def run_job():
         .set_subscription_type(SubscriptionType.Shared) \
         .build()
 
+    dead_letter_sink = PulsarSink.builder() \
+        .set_service_url(PULSAR_SERVICE_URL) \
+        .set_admin_url(PULSAR_ADMIN_URL) \
+        .set_topics(DEAD_LETTER_TOPIC) \
+        .set_serialization_schema(PulsarSerializationSchema.flink_schema(SimpleStringSchema())) \
+        .build()
+
     # 2. Create DataStream
     stream = env.from_source(
         pulsar_source,
@@ -291,16 +346,19 @@ def run_job():
     )
 
     # 3. Transformation and Sink
-    stream.map(lambda raw_json: json.loads(raw_json)) \
+    dead_letters = stream.map(lambda raw_json: json.loads(raw_json)) \
           .map(event_to_graph_ops) \
           .filter(lambda ops: ops is not None and len(ops) > 0) \
-          .map(KnowledgeGraphSink()) \
+          .key_by(shard_of, key_type=Types.INT()) \
+          .process(KnowledgeGraphSink(), output_type=Types.STRING()) \
           .name("TransformAndSendToKG")
 
+    dead_letters.sink_to(dead_letter_sink).name("KnowledgeGraphDeadLetters")
+
     # 4. Execute Job
     env.execute("PlatformEventProcessor")
 
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-    run_job() 
\ No newline at end of file
+    run_job()
@@ -0,0 +1,66 @@
+"""
+Benchmarks repeated lookups sent as raw query strings (values formatted into
+the script, so every distinct value is a new script for the server to
+compile) versus a named query template (one script, values as bindings).
+
+    # From the KnowledgeGraphQ directory, against a running Gremlin Server / JanusGraph
+    PYTHONPATH=.:.. python scripts/benchmark_templates.py --url ws://localhost:8182/gremlin
+
+Seeds a few Service vertices, then runs the same lookups both ways from
+several threads and reports queries/second.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from gremlin_python.driver import client, serializer
+
+from app.core.query_templates import query_templates
+
+LABEL = "BenchTemplateService"
+
+def seed(gremlin, num_services: int):
+    gremlin.submit("g.V().hasLabel(l).drop()", {"l": LABEL}).all().result()
+    for i in range(num_services):
+        gremlin.submit("g.addV(l).property('name', n)", {"l": LABEL, "n": f"svc-{i}"}).all().result()
+
+def run(gremlin, requests, concurrency: int) -> float:
+    def submit(request):
+        script, bindings = request
+        return gremlin.submit(script, bindings).all().result()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(submit, requests))
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="ws://localhost:8182/gremlin")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--services", type=int, default=200, help="Distinct lookup values")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    gremlin = client.Client(
+        args.url, "g", pool_size=args.concurrency, message_serializer=serializer.GraphSONSerializersV2d0()
+    )
+    names = [f"svc-{i % args.services}" for i in range(args.queries)]
+    # The same lookup as the service_dependents template, with the label swapped for the benchmark's own
+    template = query_templates.get("service_dependents").script.replace("'Service'", f"'{LABEL}'")
+    raw = [(template.replace("service_name", f"'{name}'"), None) for name in names]
+    parameterized = [(template, {"service_name": name}) for name in names]
+
+    try:
+        seed(gremlin, args.services)
+        print(f"{args.queries} lookups over {args.services} distinct values, {args.concurrency} threads")
+        print(f"{'path':<16}{'seconds':>10}{'queries/s':>12}")
+        for label, requests in (("raw strings", raw), ("template", parameterized)):
+            elapsed = run(gremlin, requests, args.concurrency)
+            print(f"{label:<16}{elapsed:>10.2f}{args.queries / elapsed:>12.0f}")
+    finally:
+        gremlin.submit("g.V().hasLabel(l).drop()", {"l": LABEL}).all().result()
+        gremlin.close()
+
+if __name__ == "__main__":
+    main()
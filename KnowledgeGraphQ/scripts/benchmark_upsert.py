@@ -0,0 +1,106 @@
+"""
+Benchmarks graph ingestion with the old per-operation upserts (a lookup,
+then a fetch or create, then a property update: two or three round trips
+each) versus the BatchUpserter (one round trip per chunk).
+
+    # From the KnowledgeGraphQ directory, against a running Gremlin Server / JanusGraph
+    PYTHONPATH=.:.. python scripts/benchmark_upsert.py --url ws://localhost:8182/gremlin
+
+The workload looks like the platform event processor's: deployments linked
+to a small set of services. Reports operations/second for each path. Each
+path writes under its own label prefix, and the written data is dropped
+afterwards.
+"""
+import argparse
+import time
+
+from gremlin_python.driver import client, serializer
+from gremlin_python.driver.driver_remote_connection import DriverRemoteConnection
+from gremlin_python.process.anonymous_traversal import traversal
+from gremlin_python.process.graph_traversal import __
+
+from app.core.batch_upsert import BatchUpserter, UpsertEdge, UpsertVertex
+
+def make_operations(prefix: str, num_events: int, num_services: int):
+    ops = []
+    for i in range(num_events):
+        service = f"svc-{i % num_services}"
+        ops.append(UpsertVertex(operation="upsert_vertex", label=f"{prefix}Deployment", properties={"uid": f"d{i}", "version": str(i)}))
+        ops.append(UpsertVertex(operation="upsert_vertex", label=f"{prefix}Service", properties={"uid": service, "name": service}))
+        ops.append(UpsertEdge(
+            operation="upsert_edge", label="DEPLOYED_TO", from_vertex_id=f"d{i}", to_vertex_id=service,
+            from_vertex_label=f"{prefix}Deployment", to_vertex_label=f"{prefix}Service"
+        ))
+    return ops
+
+def run_per_operation(g, ops):
+    """The pre-batching GremlinClient.upsert_vertex / upsert_edge logic."""
+    start = time.perf_counter()
+    for op in ops:
+        if op.operation == "upsert_vertex":
+            t = g.V().has(op.label, op.id_key, op.properties[op.id_key])
+            if t.hasNext():
+                update = g.V(t.next())
+                for key, value in op.properties.items():
+                    if key != op.id_key:
+                        update = update.property(key, value)
+                update.iterate()
+            else:
+                create = g.addV(op.label)
+                for key, value in op.properties.items():
+                    create = create.property(key, value)
+                create.iterate()
+        else:
+            from_v = g.V().has(op.from_vertex_label, op.id_key, op.from_vertex_id).next()
+            to_v = g.V().has(op.to_vertex_label, op.id_key, op.to_vertex_id).next()
+            g.V(from_v).outE(op.label).where(__.inV().hasId(to_v.id)).fold().coalesce(
+                __.unfold(), __.addE(op.label).from_(__.V(from_v)).to(__.V(to_v))
+            ).iterate()
+    return time.perf_counter() - start
+
+def run_batched(gremlin, ops, chunk_size: int):
+    upserter = BatchUpserter(lambda script, bindings: gremlin.submit(script, bindings).all().result(), chunk_size=chunk_size)
+    start = time.perf_counter()
+    results = upserter.upsert(ops)
+    elapsed = time.perf_counter() - start
+    failed = sum(r.status.value in ("failed", "missing_vertex") for r in results)
+    if failed:
+        print(f"  warning: {failed} operations failed in the batched run")
+    return elapsed
+
+def drop(gremlin, prefixes):
+    for prefix in prefixes:
+        for label in ("Deployment", "Service"):
+            gremlin.submit("g.V().hasLabel(l).drop()", {"l": f"{prefix}{label}"}).all().result()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="ws://localhost:8182/gremlin")
+    parser.add_argument("--events", type=int, default=500, help="Events to ingest; each is three operations")
+    parser.add_argument("--services", type=int, default=20)
+    parser.add_argument("--chunk-sizes", default="1,25,100,250", help="Comma-separated BatchUpserter chunk sizes")
+    args = parser.parse_args()
+
+    gremlin = client.Client(args.url, "g", message_serializer=serializer.GraphSONSerializersV2d0())
+    connection = DriverRemoteConnection(args.url, "g", message_serializer=serializer.GraphSONSerializersV2d0())
+    g = traversal().withRemote(connection)
+    chunk_sizes = [int(size) for size in args.chunk_sizes.split(",")]
+    prefixes = ["BenchPerOp"] + [f"BenchBatch{size}" for size in chunk_sizes]
+    total = args.events * 3
+
+    try:
+        drop(gremlin, prefixes)
+        print(f"{args.events} events x 3 operations ({args.services} services)")
+        print(f"{'path':<24}{'seconds':>10}{'ops/s':>10}")
+        elapsed = run_per_operation(g, make_operations("BenchPerOp", args.events, args.services))
+        print(f"{'per operation':<24}{elapsed:>10.2f}{total / elapsed:>10.0f}")
+        for size in chunk_sizes:
+            elapsed = run_batched(gremlin, make_operations(f"BenchBatch{size}", args.events, args.services), size)
+            print(f"{f'batched (chunk {size})':<24}{elapsed:>10.2f}{total / elapsed:>10.0f}")
+    finally:
+        drop(gremlin, prefixes)
+        connection.close()
+        gremlin.close()
+
+if __name__ == "__main__":
+    main()
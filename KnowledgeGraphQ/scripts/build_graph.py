@@ -1,76 +1,83 @@
 # KnowledgeGraphQ/scripts/build_graph.py
+"""
+Builds Document and Chunk vertices, and the chunks' embeddings in
+VectorStoreQ, from the documents in the data directory. Incremental: only
+changed documents are re-chunked and only new chunks are embedded, stale
+chunks are deleted, and an interrupted run picks up where it stopped.
 
-import os
+    # From the KnowledgeGraphQ directory
+    PYTHONPATH=.:.. python scripts/build_graph.py [--graph-only]
+
+What has been written is tracked in the manifest file; delete it (and the
+documents' vertices and vectors) to rebuild from scratch. The vector
+collection must exist (see ingest_docs.py).
+"""
+import argparse
+import asyncio
 import logging
-from gremlin_python.driver import client, serializer
-from gremlin_python.process.anonymous_traversal import traversal
+import os
+import sys
+
+from app.core.document_builder import BATCH_SIZE, DocumentGraphBuilder, Manifest, vector_store_writers
+from app.core.gremlin_client import GremlinClient
+from shared.q_service_client import aclose_all
+from shared.q_vectorstore_client.client import VectorStoreClient
 
 # --- Configuration ---
 LOG_LEVEL = "INFO"
 JANUSGRAPH_HOST = os.getenv("JANUSGRAPH_HOST", "localhost")
 JANUSGRAPH_PORT = int(os.getenv("JANUSGRAPH_PORT", "8182"))
-DATA_DIR = "KnowledgeGraphQ/data"
+VECTORSTORE_URL = os.getenv("VECTORSTORE_URL", "http://localhost:8001")
+COLLECTION_NAME = "rag_document_chunks"
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+MANIFEST_PATH = os.getenv("DOCUMENT_MANIFEST_PATH", os.path.join(DATA_DIR, ".build_manifest.json"))
+# A graph-only build hasn't embedded anything, so it is tracked separately
+GRAPH_ONLY_MANIFEST_PATH = os.path.join(os.path.dirname(MANIFEST_PATH), ".graph_manifest.json")
 
 # --- Logging ---
 logging.basicConfig(level=LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
-def run():
-    """Connects to the graph, defines a simple schema, and populates it from files."""
+async def build(data_dir: str = DATA_DIR, manifest_path: str = MANIFEST_PATH, with_vectors: bool = True, batch_size: int = BATCH_SIZE):
+    """Brings the graph (and vectors) in line with the documents in `data_dir`. Returns the BuildReport."""
+    if not os.path.isdir(data_dir):
+        raise FileNotFoundError(f"Data directory not found at: {data_dir}")
+
+    gremlin_client = GremlinClient(JANUSGRAPH_HOST, JANUSGRAPH_PORT, pool_size=2)
+    vs_client = VectorStoreClient(base_url=VECTORSTORE_URL) if with_vectors else None
     try:
-        remote_connection = client.DriverRemoteConnection(
-            f"ws://{JANUSGRAPH_HOST}:{JANUSGRAPH_PORT}/gremlin", 'g',
-            message_serializer=serializer.GraphSONSerializersV2d0()
+        builder = DocumentGraphBuilder(
+            Manifest(manifest_path).load(),
+            gremlin_client.upsert_batch,
+            gremlin_client.execute_template,
+            batch_size=batch_size,
+            **(vector_store_writers(vs_client, COLLECTION_NAME) if vs_client else {}),
         )
-        g = traversal().withRemote(remote_connection)
-        
-        logger.info("Successfully connected to Gremlin server.")
-        
-        # Simple schema and population logic
-        populate_graph(g)
+        return await builder.build(data_dir)
+    finally:
+        gremlin_client.close()
+        # Closes the vector store client's pooled connections
+        await aclose_all()
 
+def run(data_dir: str, manifest_path: str, with_vectors: bool, batch_size: int) -> bool:
+    try:
+        report = asyncio.run(build(data_dir, manifest_path, with_vectors, batch_size))
+        logger.info(f"Graph build complete: {report.model_dump()}")
+        return True
     except Exception as e:
+        # Progress up to the last batch is kept in the manifest; rerun to resume
         logger.error(f"An error occurred during the graph build process: {e}", exc_info=True)
-    finally:
-        if 'remote_connection' in locals() and remote_connection:
-            remote_connection.close()
-            logger.info("Gremlin connection closed.")
-
-def populate_graph(g):
-    """Populates the graph with documents and chunks."""
-    logger.info("Checking/populating graph...")
-
-    if not os.path.exists(DATA_DIR):
-        logger.error(f"Data directory not found at: {DATA_DIR}")
-        return
+        return False
 
-    files_to_process = [f for f in os.listdir(DATA_DIR) if f.endswith(".md")]
-    logger.info(f"Found {len(files_to_process)} files to populate graph.")
-
-    for filename in files_to_process:
-        doc_vertex = g.V().has('Document', 'name', filename).fold().coalesce(
-            g.V().has('Document', 'name', filename),
-            g.addV('Document').property('name', filename)
-        ).next()
-        
-        logger.info(f"Processing document: {filename}")
-        
-        with open(os.path.join(DATA_DIR, filename), 'r') as f:
-            content = f.read()
-        
-        chunks = [p for p in content.split('\n\n') if p.strip()]
-        
-        for i, chunk_text in enumerate(chunks):
-            chunk_id = f"{filename}-{i}"
-            chunk_vertex = g.V().has('Chunk', 'chunk_id', chunk_id).fold().coalesce(
-                g.V().has('Chunk', 'chunk_id', chunk_id),
-                g.addV('Chunk').property('chunk_id', chunk_id).property('text', chunk_text)
-            ).next()
-            
-            # Create an edge from the Document to the Chunk
-            g.V(doc_vertex).addE('has_chunk').to(chunk_vertex).iterate()
-
-    logger.info("Graph population check complete.")
 
 if __name__ == "__main__":
-    run() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Incrementally build the document graph and its chunk embeddings.")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Directory of Markdown documents.")
+    parser.add_argument("--manifest", help="Where to keep track of what has been written.")
+    parser.add_argument("--graph-only", action="store_true", help="Don't embed chunks or write them to VectorStoreQ.")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Chunks written per checkpoint.")
+    args = parser.parse_args()
+
+    manifest_path = args.manifest or (GRAPH_ONLY_MANIFEST_PATH if args.graph_only else MANIFEST_PATH)
+    ok = run(args.data_dir, manifest_path, not args.graph_only, args.batch_size)
+    sys.exit(0 if ok else 1)
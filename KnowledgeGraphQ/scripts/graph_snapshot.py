@@ -0,0 +1,92 @@
+# KnowledgeGraphQ/scripts/graph_snapshot.py
+"""
+Exports the graph, or the subgraph of some vertex labels, to a snapshot
+directory, and imports a snapshot into a (new) graph. Loading a snapshot
+stands up an environment or test fixture without replaying build_graph.py,
+ingest_docs.py and the platform event history.
+
+    # From the KnowledgeGraphQ directory
+    PYTHONPATH=.:.. python scripts/graph_snapshot.py export snapshots/base [--format parquet] [--labels Service Insight]
+    PYTHONPATH=.:.. python scripts/graph_snapshot.py import snapshots/base [--preserve-ids]
+
+For a fast import, open the target graph with storage.batch-loading=true
+and create its schema first. Vertices get new ids unless --preserve-ids
+is given, which needs graph.set-vertex-id=true.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+from app.core.gremlin_client import GremlinClient
+from app.core.snapshot import PARALLELISM, READ_BATCH_SIZE, WRITE_BATCH_SIZE, GraphSnapshotter, SnapshotFormat, SnapshotProgress
+
+# --- Configuration ---
+LOG_LEVEL = "INFO"
+JANUSGRAPH_HOST = os.getenv("JANUSGRAPH_HOST", "localhost")
+JANUSGRAPH_PORT = int(os.getenv("JANUSGRAPH_PORT", "8182"))
+# Snapshot queries run far longer than API queries
+QUERY_TIMEOUT = float(os.getenv("KG_SNAPSHOT_QUERY_TIMEOUT_SECONDS", "3600"))
+
+# --- Logging ---
+logging.basicConfig(level=LOG_LEVEL)
+logger = logging.getLogger(__name__)
+
+# Log a partition's progress about this often (in elements)
+PROGRESS_EVERY = 10000
+_last_logged = {}
+
+def log_progress(progress: SnapshotProgress):
+    partition = (progress.operation, progress.kind, progress.label)
+    if progress.done - _last_logged.get(partition, 0) >= PROGRESS_EVERY or progress.done == progress.total:
+        _last_logged[partition] = progress.done
+        of_total = f"/{progress.total}" if progress.total is not None else ""
+        logger.info(f"{progress.operation}: {progress.done}{of_total} {progress.kind} elements labeled '{progress.label}'")
+
+async def snapshot(args) -> None:
+    # Every partition gets its own connection, for reads and writes alike
+    gremlin_client = GremlinClient(
+        JANUSGRAPH_HOST, JANUSGRAPH_PORT,
+        pool_size=args.parallelism, write_connections=args.parallelism, query_timeout=QUERY_TIMEOUT
+    )
+    try:
+        snapshotter = GraphSnapshotter(
+            gremlin_client.stream_query,
+            gremlin_client.execute_query,
+            parallelism=args.parallelism,
+            read_batch_size=READ_BATCH_SIZE,
+            write_batch_size=args.batch_size,
+            progress=log_progress,
+        )
+        if args.command == "export":
+            manifest = await snapshotter.export(args.directory, SnapshotFormat(args.format), args.labels)
+            logger.info(f"Snapshot complete: {manifest.vertices} vertices, {manifest.edges} edges in {args.directory}")
+        else:
+            report = await snapshotter.import_(args.directory, preserve_ids=args.preserve_ids)
+            logger.info(f"Import complete: {report.model_dump()}")
+    finally:
+        gremlin_client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or import a snapshot of the knowledge graph.")
+    parser.add_argument("--parallelism", type=int, default=PARALLELISM, help="Partitions processed at once.")
+    parser.add_argument("--batch-size", type=int, default=WRITE_BATCH_SIZE, help="Elements per import transaction.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Write a snapshot of the graph.")
+    export_parser.add_argument("directory", help="Directory to write the snapshot to; must not hold one already.")
+    export_parser.add_argument("--format", choices=[f.value for f in SnapshotFormat], default=SnapshotFormat.JSONL.value)
+    export_parser.add_argument("--labels", nargs="+", help="Only export these vertex labels and the edges between them.")
+
+    import_parser = commands.add_parser("import", help="Load a snapshot into the graph.")
+    import_parser.add_argument("directory", help="Directory holding the snapshot.")
+    import_parser.add_argument("--preserve-ids", action="store_true", help="Keep vertex ids (needs graph.set-vertex-id).")
+
+    args = parser.parse_args()
+    try:
+        asyncio.run(snapshot(args))
+    except Exception as e:
+        logger.error(f"Graph snapshot {args.command} failed: {e}", exc_info=True)
+        sys.exit(1)
@@ -0,0 +1,136 @@
+import copy
+import re
+
+import pytest
+
+from app.core.batch_upsert import (
+    BatchUpserter, UpsertEdge, UpsertStatus, UpsertVertex, compile_chunk, plan_operations
+)
+
+def vertex(label, uid, **props):
+    return UpsertVertex(operation="upsert_vertex", label=label, properties={"uid": uid, **props})
+
+def edge(label, from_label, from_id, to_label, to_id):
+    return UpsertEdge(
+        operation="upsert_edge", label=label, from_vertex_id=from_id, to_vertex_id=to_id,
+        from_vertex_label=from_label, to_vertex_label=to_label
+    )
+
+class FakeGraph:
+    """
+    Executes compiled upsert scripts against dicts. Each operation is rebuilt
+    from the script's bindings, and a script is applied as one transaction.
+    """
+
+    def __init__(self):
+        self.vertices = {}  # (label, uid) -> properties
+        self.edges = set()  # (label, from, to)
+        self.round_trips = 0
+        self.fail_when = None
+
+    def execute(self, script, bindings):
+        self.round_trips += 1
+        vertices, edges = copy.deepcopy(self.vertices), set(self.edges)
+        markers = []
+        for slot in sorted({int(s) for s in re.findall(r"constant\('(\d+):", script)}):
+            if f"v{slot}" in bindings:
+                key = (bindings[f"l{slot}"], bindings[f"v{slot}"])
+                if self.fail_when and self.fail_when(key):
+                    raise RuntimeError(f"write conflict on {key}")
+                markers.append(f"{slot}:{'updated' if key in vertices else 'created'}")
+                props = vertices.setdefault(key, {bindings[f"k{slot}"]: bindings[f"v{slot}"]})
+                n = 0
+                while f"pk{slot}_{n}" in bindings:
+                    props[bindings[f"pk{slot}_{n}"]] = bindings[f"pv{slot}_{n}"]
+                    n += 1
+            else:
+                source, target = (bindings[f"fl{slot}"], bindings[f"fv{slot}"]), (bindings[f"tl{slot}"], bindings[f"tv{slot}"])
+                if source not in vertices or target not in vertices:
+                    continue
+                key = (bindings[f"e{slot}"], source, target)
+                markers.append(f"{slot}:{'exists' if key in edges else 'created'}")
+                edges.add(key)
+        self.vertices, self.edges = vertices, edges
+        return [markers]
+
+def test_vertices_are_written_before_edges_in_few_round_trips():
+    graph = FakeGraph()
+    ops = []
+    for i in range(50):
+        ops.append(edge("DEPLOYED_TO", "Deployment", f"d{i}", "Service", "svc"))
+        ops.append(vertex("Deployment", f"d{i}", version=str(i)))
+    ops.append(vertex("Service", "svc", name="svc"))
+
+    results = BatchUpserter(graph.execute, chunk_size=40).upsert(ops)
+
+    assert graph.round_trips == 3
+    assert [r.index for r in results] == list(range(len(ops)))
+    assert all(r.status == UpsertStatus.CREATED for r in results)
+    assert len(graph.edges) == 50
+
+def test_reapplying_a_batch_is_idempotent():
+    graph = FakeGraph()
+    upserter = BatchUpserter(graph.execute)
+    ops = [vertex("User", "u1", username="alice"), vertex("Event", "e1"), edge("INITIATED", "User", "u1", "Event", "e1")]
+    upserter.upsert(ops)
+
+    ops[0] = vertex("User", "u1", username="alice2")
+    statuses = [r.status for r in upserter.upsert(ops)]
+
+    assert statuses == [UpsertStatus.UPDATED, UpsertStatus.UPDATED, UpsertStatus.EXISTS]
+    assert graph.vertices[("User", "u1")]["username"] == "alice2"
+    assert len(graph.edges) == 1
+
+def test_repeated_operations_are_merged():
+    ops = [vertex("Entity", "db", name="db"), vertex("Entity", "db", owner="sre"), vertex("Entity", "db", name="postgres")]
+    ops += [edge("CONTAINS", "Memory", "m1", "Entity", "db")] * 2
+
+    planned = plan_operations(ops)
+
+    assert len(planned) == 2
+    assert planned[0][0].properties == {"uid": "db", "name": "postgres", "owner": "sre"}
+    assert planned[0][1] == [0, 1, 2] and planned[1][1] == [3, 4]
+
+def test_edges_with_missing_endpoints_are_reported():
+    graph = FakeGraph()
+    results = BatchUpserter(graph.execute).upsert([
+        vertex("RCAReport", "rca-1"), edge("GENERATED_BY", "RCAReport", "rca-1", "Workflow", "wf-1")
+    ])
+    assert [r.status for r in results] == [UpsertStatus.CREATED, UpsertStatus.MISSING_VERTEX]
+
+def test_a_failed_chunk_is_rolled_back_without_stopping_the_batch():
+    graph = FakeGraph()
+    graph.fail_when = lambda key: key == ("Flow", "f1")
+    ops = [vertex("Flow", "f0"), vertex("Flow", "f1"), vertex("Flow", "f2"), vertex("Flow", "f3")]
+
+    results = BatchUpserter(graph.execute, chunk_size=2).upsert(ops)
+
+    assert [r.status for r in results] == [UpsertStatus.FAILED] * 2 + [UpsertStatus.CREATED] * 2
+    assert "write conflict" in results[0].error
+    assert set(graph.vertices) == {("Flow", "f2"), ("Flow", "f3")}
+
+def test_connection_errors_abort_the_batch():
+    def unreachable(script, bindings):
+        raise ConnectionError("janusgraph is down")
+
+    with pytest.raises(ConnectionError):
+        BatchUpserter(unreachable).upsert([vertex("Flow", "f0")])
+
+def test_invalid_vertices_are_rejected_before_writing():
+    graph = FakeGraph()
+    bad = UpsertVertex(operation="upsert_vertex", label="Flow", properties={"name": "x"})
+    with pytest.raises(ValueError, match="id_key"):
+        BatchUpserter(graph.execute).upsert([vertex("Flow", "f0"), bad])
+    assert graph.round_trips == 0
+
+def test_scripts_are_parameterized():
+    first, first_bindings = compile_chunk([vertex("Service", "a", name="a", owner=None), edge("DEPENDS_ON", "Service", "a", "Service", "b")])
+    second, second_bindings = compile_chunk([vertex("Service", "c", name="c"), edge("CALLS", "Service", "c", "Service", "d")])
+
+    # Same shape, same script: the server compiles it once
+    assert first == second
+    assert first.startswith("g.inject(0).sideEffect(") and first.endswith(".cap('r')")
+    assert "fold().coalesce(unfold()" in first
+    assert first_bindings["v0"] == "a" and second_bindings["e1"] == "CALLS"
+    # Null properties are skipped rather than sent to the graph
+    assert "pk0_1" not in first_bindings
@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import json
+
+import pytest
+
+from app.core.batch_upsert import UpsertResult, UpsertStatus
+from app.core.document_builder import DocumentGraphBuilder, Manifest, chunk_document, chunk_text, vector_store_writers
+
+class FakeStores:
+    """An in-memory graph and vector store, with a tiny bag-of-words embedder."""
+
+    def __init__(self):
+        self.vertices = {}   # (label, uid) -> properties
+        self.edges = set()   # (label, from uid, to uid)
+        self.vectors = {}    # id -> Vector
+        self.embedded = []
+        self.upserts = 0
+        self.fail_upserts_after = None
+
+    async def upsert(self, operations):
+        if self.fail_upserts_after is not None and self.upserts >= self.fail_upserts_after:
+            raise ConnectionError("graph unavailable")
+        self.upserts += 1
+        results = []
+        for i, op in enumerate(operations):
+            if op.operation == "upsert_vertex":
+                self.vertices[(op.label, op.properties["uid"])] = op.properties
+            else:
+                self.edges.add((op.label, op.from_vertex_id, op.to_vertex_id))
+            results.append(UpsertResult(index=i, operation=op.operation, label=op.label, status=UpsertStatus.CREATED))
+        return results
+
+    async def run_template(self, name, params=None, timeout=None):
+        assert name == "delete_vertices"
+        for uid in params["uids"]:
+            self.vertices.pop((params["vertex_label"], uid), None)
+            self.edges = {edge for edge in self.edges if uid not in edge[1:]}
+        return []
+
+    async def embed(self, texts):
+        self.embedded.extend(texts)
+        vectors = []
+        for text in texts:
+            vector = [0.0] * 8
+            for word in text.split():
+                vector[hashlib.md5(word.encode()).digest()[0] % 8] += 1.0
+            vectors.append(vector)
+        return vectors
+
+    async def upsert_vectors(self, vectors):
+        self.vectors.update((v.id, v) for v in vectors)
+
+    async def delete_vectors(self, ids):
+        for vector_id in ids:
+            self.vectors.pop(vector_id, None)
+
+    def chunk_ids(self):
+        return {uid for label, uid in self.vertices if label == "Chunk"}
+
+class BufferingVectorStoreClient:
+    """Stands in for VectorStoreClient against a service that buffers upserts and loses them on restart."""
+
+    def __init__(self, stores):
+        self.stores = stores
+        self.buffered = {}
+
+    async def embed(self, texts):
+        return await self.stores.embed(texts)
+
+    async def upsert(self, collection_name, vectors, read_your_writes=False):
+        if read_your_writes:
+            await self.stores.upsert_vectors(vectors)
+        else:
+            self.buffered.update((v.id, v) for v in vectors)
+
+    async def delete(self, collection_name, ids):
+        for vector_id in ids:
+            self.buffered.pop(vector_id, None)
+        await self.stores.delete_vectors(ids)
+
+    def restart(self):
+        self.buffered.clear()
+
+def make_builder(stores, manifest_path, batch_size=64):
+    return DocumentGraphBuilder(
+        Manifest(str(manifest_path)).load(), stores.upsert, stores.run_template,
+        embed=stores.embed, upsert_vectors=stores.upsert_vectors, delete_vectors=stores.delete_vectors,
+        batch_size=batch_size, chunk_size=60
+    )
+
+def write_docs(data_dir, docs):
+    for name, paragraphs in docs.items():
+        (data_dir / name).write_text("\n\n".join(paragraphs))
+
+@pytest.fixture
+def data_dir(tmp_path):
+    docs = tmp_path / "data"
+    docs.mkdir()
+    write_docs(docs, {
+        "agentq.md": ["AgentQ plans and runs tasks.", "It calls tools through managerQ.", "Results are stored as memories."],
+        "platform.md": ["The Q platform is a set of services.", "KnowledgeGraphQ stores the graph."],
+    })
+    return docs
+
+def test_paragraphs_are_packed_into_chunks_with_stable_ids():
+    text = "First paragraph.\n\nSecond one.\n\n" + "word " * 30
+
+    chunks = chunk_text(text, chunk_size=40)
+
+    assert chunks[0] == "First paragraph.\n\nSecond one."
+    assert all(len(chunk) <= 40 for chunk in chunks) and len(chunks) == 5
+    assert [c.id for c in chunk_document("a.md", text, 40)] == [c.id for c in chunk_document("a.md", text, 40)]
+    assert len({c.id for c in chunk_document("a.md", text, 40)}) == 5
+    assert chunk_document("a.md", text, 40)[0].id != chunk_document("b.md", text, 40)[0].id
+
+def test_only_changed_documents_and_chunks_are_rebuilt(data_dir, tmp_path):
+    stores = FakeStores()
+    manifest_path = tmp_path / "manifest.json"
+
+    first = asyncio.run(make_builder(stores, manifest_path).build(str(data_dir)))
+    assert first.documents_built == 2 and first.chunks_embedded == len(stores.embedded) == len(stores.vectors)
+    assert stores.chunk_ids() == set(stores.vectors)
+
+    stores.embedded.clear()
+    again = asyncio.run(make_builder(stores, manifest_path).build(str(data_dir)))
+    assert again.documents_unchanged == 2 and not stores.embedded
+
+    old_ids = stores.chunk_ids()
+    write_docs(data_dir, {"agentq.md": ["AgentQ plans and runs tasks.", "It calls tools through the tool registry.", "Results are stored as memories."]})
+    (data_dir / "platform.md").unlink()
+    report = asyncio.run(make_builder(stores, manifest_path).build(str(data_dir)))
+
+    assert report.documents_built == 1 and report.documents_removed == 1
+    assert stores.embedded == [chunk.text for chunk in chunk_document("agentq.md", (data_dir / "agentq.md").read_text(), 60)
+                               if chunk.id not in old_ids]
+    assert stores.chunk_ids() == set(stores.vectors)
+    assert all(v.metadata["source_name"] == "agentq.md" for v in stores.vectors.values())
+    assert ("Document", "platform.md") not in stores.vertices
+    assert {edge[2] for edge in stores.edges} == stores.chunk_ids()
+    assert set(json.loads(manifest_path.read_text())["files"]) == {"agentq.md"}
+
+def test_an_interrupted_build_resumes_without_orphans(data_dir, tmp_path):
+    stores = FakeStores()
+    manifest_path = tmp_path / "manifest.json"
+    write_docs(data_dir, {f"doc{i}.md": [f"Document {i} paragraph {j}." for j in range(3)] for i in range(4)})
+    stores.fail_upserts_after = 1
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(make_builder(stores, manifest_path, batch_size=3).build(str(data_dir)))
+    written = len(stores.embedded)
+    manifest = Manifest(str(manifest_path)).load()
+    assert manifest.files["agentq.md"].hash and not manifest.files["agentq.md"].pending
+    assert manifest.files["doc0.md"].pending and "doc2.md" not in manifest.files
+    assert len(stores.vectors) > len(stores.chunk_ids())
+
+    # A document whose write was interrupted changes before the next run
+    write_docs(data_dir, {"doc0.md": ["Document 0 is rewritten."]})
+    stores.fail_upserts_after = None
+    report = asyncio.run(make_builder(stores, manifest_path, batch_size=3).build(str(data_dir)))
+
+    assert report.documents_unchanged == 1
+    assert len(stores.embedded) - written == report.chunks_embedded
+    assert stores.chunk_ids() == set(stores.vectors)
+    assert not any(entry.pending for entry in Manifest(str(manifest_path)).load().files.values())
+
+def test_checkpointed_vectors_survive_a_vector_store_restart(data_dir, tmp_path):
+    stores = FakeStores()
+    vs_client = BufferingVectorStoreClient(stores)
+    manifest_path = tmp_path / "manifest.json"
+
+    def build():
+        builder = DocumentGraphBuilder(
+            Manifest(str(manifest_path)).load(), stores.upsert, stores.run_template,
+            batch_size=2, chunk_size=60, **vector_store_writers(vs_client, "rag_document_chunks")
+        )
+        return asyncio.run(builder.build(str(data_dir)))
+
+    build()
+    vs_client.restart()
+    report = build()
+
+    assert report.documents_unchanged == 2 and report.chunks_embedded == 0
+    assert stores.chunk_ids() == set(stores.vectors)
@@ -0,0 +1,176 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from flink_jobs.platform_event_processor.graph_sink import AdaptiveBatchSize, GraphOperationWriter, RetryPolicy
+
+class IngestStub:
+    """
+    A local stand-in for the ingest API. `respond(operations)` returns
+    (status code, body); by default every operation is created. Records the
+    batches it received and the most concurrent requests it saw.
+    """
+
+    def __init__(self, respond=None, delay=0.0):
+        self.respond = respond or (lambda ops: (202, created(ops)))
+        self.delay = delay
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                operations = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["operations"]
+                with stub._lock:
+                    stub.batches.append(operations)
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                threading.Event().wait(stub.delay)
+                with stub._lock:
+                    code, body = stub.respond(operations)
+                    stub.in_flight -= 1
+                payload = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api/v1/ingest"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def delivered(self):
+        return [op["properties"]["uid"] for batch in self.batches for op in batch]
+
+def created(ops, statuses=None):
+    statuses = statuses or {}
+    return {"results": [
+        {"index": i, "operation": op["operation"], "label": op["label"], "status": statuses.get(i, "created")}
+        for i, op in enumerate(ops)
+    ]}
+
+def vertex(uid, label="Event"):
+    return {"operation": "upsert_vertex", "label": label, "properties": {"uid": uid}}
+
+@pytest.fixture
+def make_writer():
+    stubs, writers = [], []
+
+    def make(stub, **kwargs):
+        kwargs.setdefault("retry", RetryPolicy(max_attempts=4, base_delay=0.1, jitter=False))
+        kwargs.setdefault("sleep", delays.append)
+        writer = GraphOperationWriter(stub.url, "token", **kwargs)
+        stubs.append(stub)
+        writers.append(writer)
+        return writer
+
+    delays = []
+    make.delays = delays
+    yield make
+    for writer in writers:
+        writer.close()
+    for stub in stubs:
+        stub.server.shutdown()
+
+def test_batches_grow_while_the_api_is_fast(make_writer):
+    stub = IngestStub()
+    writer = make_writer(stub, batch_size=AdaptiveBatchSize(initial=10, step=10), max_in_flight=1)
+
+    report = writer.write([vertex(f"e{i}") for i in range(100)])
+
+    assert report.delivered == 100 and not report.dead_letters
+    assert [len(batch) for batch in stub.batches] == [10, 20, 30, 40]
+
+def test_batch_size_halves_when_slow_or_failing():
+    size = AdaptiveBatchSize(initial=400, minimum=50, target_latency=0.5)
+
+    size.record(2.0, ok=True)
+    assert size.value == 200
+    size.record(0.1, ok=False)
+    assert size.value == 100
+    for _ in range(3):
+        size.record(0.1, ok=False)
+    assert size.value == 50
+
+def test_transient_errors_are_retried_with_exponential_backoff(make_writer):
+    failures = iter([503, 503])
+    stub = IngestStub(respond=lambda ops: (next(failures, 202), created(ops)))
+    writer = make_writer(stub, max_in_flight=1)
+
+    report = writer.write([vertex("e1"), vertex("e2")])
+
+    assert report.delivered == 2 and report.retries == 4
+    assert make_writer.delays == [0.1, 0.2]
+
+def test_only_failed_operations_are_resent(make_writer):
+    attempts = []
+
+    def respond(ops):
+        attempts.append(len(ops))
+        # The edge's vertex is missing on the first attempt only
+        return 202, created(ops, {1: "missing_vertex"} if len(attempts) == 1 else {})
+
+    stub = IngestStub(respond=respond)
+    writer = make_writer(stub)
+
+    report = writer.write([vertex("e1"), {"operation": "upsert_edge", "label": "TRIGGERED", "properties": {"uid": "edge"}}])
+
+    assert report.delivered == 2
+    assert stub.delivered() == ["e1", "edge", "edge"]
+
+def test_invalid_operations_are_isolated_and_dead_lettered(make_writer):
+    def respond(ops):
+        if any(op["label"] == "Bad" for op in ops):
+            return 422, {"detail": "invalid operation"}
+        return 202, created(ops)
+
+    stub = IngestStub(respond=respond)
+    writer = make_writer(stub)
+    ops = [vertex(f"e{i}") for i in range(8)]
+    ops[5] = vertex("poison", label="Bad")
+
+    report = writer.write(ops)
+
+    assert report.delivered == 7
+    assert [d["operation"]["properties"]["uid"] for d in report.dead_letters] == ["poison"]
+    assert "HTTP 422" in report.dead_letters[0]["error"] and report.dead_letters[0]["attempts"] == 1
+    assert not make_writer.delays
+
+def test_operations_are_dead_lettered_after_the_last_attempt(make_writer):
+    stub = IngestStub(respond=lambda ops: (503, {"detail": "graph unavailable"}))
+    writer = make_writer(stub)
+
+    report = writer.write([vertex("e1")])
+
+    assert report.delivered == 0
+    assert report.dead_letters == [{"operation": vertex("e1"), "error": 'HTTP 503: {"detail": "graph unavailable"}', "attempts": 4}]
+    assert len(stub.batches) == 4
+
+def test_connection_errors_are_retried(make_writer):
+    stub = IngestStub()
+    writer = make_writer(stub, timeout=1.0)
+    stub.server.shutdown()
+    stub.server.server_close()
+
+    report = writer.write([vertex("e1")])
+
+    assert report.dead_letters[0]["attempts"] == 4
+    assert "ConnectionError" in report.dead_letters[0]["error"]
+
+def test_in_flight_requests_are_bounded(make_writer):
+    stub = IngestStub(delay=0.05)
+    writer = make_writer(stub, batch_size=AdaptiveBatchSize(initial=10, minimum=10, maximum=10), max_in_flight=3)
+
+    report = writer.write([vertex(f"e{i}") for i in range(120)])
+
+    assert report.delivered == 120
+    assert stub.max_in_flight == 3
+    assert sorted(stub.delivered()) == sorted(f"e{i}" for i in range(120))
@@ -0,0 +1,198 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from app.core.gremlin_pool import GremlinPool, GremlinPoolExhaustedError, GremlinQueryTimeoutError
+
+class FakeDriverClient:
+    """Stands in for gremlin_python's Client: `submit` blocks for as long as the script says."""
+
+    def __init__(self, server):
+        self.server = server
+        self.closed = False
+
+    def submit(self, script, bindings=None, request_options=None):
+        self.server.requests.append((script, bindings, request_options))
+        if script.startswith("range:"):
+            # Streams <count> integers, a batch at a time
+            return self._batches(int(script.split(":")[1]), request_options["batchSize"])
+        with self.server.lock:
+            self.server.running += 1
+            self.server.peak = max(self.server.peak, self.server.running)
+        try:
+            # Scripts look like "sleep:<seconds>"
+            time.sleep(float(script.split(":")[1]))
+        finally:
+            with self.server.lock:
+                self.server.running -= 1
+        result = Future()
+        result.set_result([script])
+        return type("ResultSet", (), {"all": lambda self: result})()
+
+    def _batches(self, count, batch_size):
+        for start in range(0, count, batch_size):
+            self.server.produced += 1
+            yield list(range(start, min(start + batch_size, count)))
+
+    def close(self):
+        self.closed = True
+
+class FakeServer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+        self.produced = 0
+        self.requests = []
+        self.clients = []
+
+    def connect(self):
+        client = FakeDriverClient(self)
+        self.clients.append(client)
+        return client
+
+def open_pool(server, **kwargs):
+    pool = GremlinPool(server.connect, **kwargs)
+    pool.open()
+    return pool
+
+def test_reads_run_in_parallel_on_separate_connections():
+    server = FakeServer()
+
+    async def scenario():
+        pool = open_pool(server, size=4)
+        start = time.monotonic()
+        results = await asyncio.gather(*(pool.submit("sleep:0.1") for _ in range(4)))
+        elapsed = time.monotonic() - start
+        pool.close()
+        return results, elapsed
+
+    results, elapsed = asyncio.run(scenario())
+    assert results == [["sleep:0.1"]] * 4
+    assert elapsed < 0.3
+    assert server.peak == 4 and len(server.clients) == 4
+
+def test_the_event_loop_keeps_running_during_a_query():
+    server = FakeServer()
+
+    async def scenario():
+        pool = open_pool(server, size=1)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        await pool.submit("sleep:0.2")
+        task.cancel()
+        pool.close()
+        return ticks
+
+    assert asyncio.run(scenario()) >= 5
+
+def test_reads_are_not_starved_by_writes():
+    server = FakeServer()
+
+    async def scenario():
+        pool = open_pool(server, size=2, write_limit=1)
+        writes = [asyncio.create_task(pool.submit("sleep:0.3", write=True)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        start = time.monotonic()
+        await pool.submit("sleep:0.01")
+        read_latency = time.monotonic() - start
+        await asyncio.gather(*writes)
+        pool.close()
+        return read_latency
+
+    assert asyncio.run(scenario()) < 0.15
+
+def test_timed_out_queries_discard_their_connection():
+    server = FakeServer()
+
+    async def scenario():
+        pool = open_pool(server, size=1)
+        with pytest.raises(GremlinQueryTimeoutError):
+            await pool.submit("sleep:0.3", timeout=0.05)
+        # The slot is free again, on a fresh connection
+        assert await pool.submit("sleep:0", timeout=1.0) == ["sleep:0"]
+        pool.close()
+
+    asyncio.run(scenario())
+    assert len(server.clients) == 2
+    assert server.clients[0].closed
+    # The remaining budget is passed on to the server
+    assert 0 < server.requests[0][2]["evaluationTimeout"] <= 50
+
+def test_waiting_for_a_connection_counts_against_the_timeout():
+    server = FakeServer()
+
+    async def scenario():
+        pool = open_pool(server, size=1)
+        busy = asyncio.create_task(pool.submit("sleep:0.2"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(GremlinQueryTimeoutError):
+            await pool.submit("sleep:0", timeout=0.05)
+        await busy
+        pool.close()
+
+    asyncio.run(scenario())
+
+def test_excess_waiters_are_rejected():
+    server = FakeServer()
+
+    async def scenario():
+        pool = open_pool(server, size=1, max_waiting=1)
+        results = await asyncio.gather(*(pool.submit("sleep:0.05") for _ in range(3)), return_exceptions=True)
+        pool.close()
+        return results
+
+    results = asyncio.run(scenario())
+    assert sum(isinstance(r, list) for r in results) == 2
+    assert sum(isinstance(r, GremlinPoolExhaustedError) for r in results) == 1
+
+def test_cancelled_queries_release_their_slot():
+    server = FakeServer()
+
+    async def scenario():
+        pool = open_pool(server, size=1)
+        task = asyncio.create_task(pool.submit("sleep:0.2"))
+        await asyncio.sleep(0.02)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert pool.in_use == 0
+        assert await pool.submit("sleep:0") == ["sleep:0"]
+        pool.close()
+
+    asyncio.run(scenario())
+
+def test_streams_are_read_in_batches_with_bounded_read_ahead():
+    server = FakeServer()
+
+    async def scenario():
+        pool = open_pool(server, size=1)
+        stream = pool.stream("range:10000", batch_size=100)
+        first = await stream.__anext__()
+        await asyncio.sleep(0.05)
+        read_ahead = server.produced
+        rest = [batch async for batch in stream]
+        # Abandoned early: the connection is replaced and the slot is free
+        abandoned = pool.stream("range:10000", batch_size=100)
+        await abandoned.__anext__()
+        await abandoned.aclose()
+        assert pool.in_use == 0
+        assert await pool.submit("sleep:0") == ["sleep:0"]
+        pool.close()
+        return first, read_ahead, rest
+
+    first, read_ahead, rest = asyncio.run(scenario())
+    assert first == list(range(100)) and len(rest) == 99
+    assert [n for batch in [first] + rest for n in batch] == list(range(10000))
+    assert read_ahead <= 7
+    assert len(server.clients) == 2 and server.clients[0].closed
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import time
+
+import numpy as np
+import pytest
+
+from app.core.batch_upsert import UpsertResult, UpsertStatus
+from app.core.insight_index import InsightIndex
+from app.core.insights import InsightStore
+
+def unit(*values):
+    return list(values)
+
+def random_vectors(count, dimension=384, seed=0):
+    return np.random.default_rng(seed).standard_normal((count, dimension)).astype(np.float32)
+
+def test_nearest_neighbors_by_cosine_similarity():
+    index = InsightIndex()
+    index.upsert([(1, unit(1, 0, 0)), (2, unit(0, 1, 0)), (3, unit(1, 1, 0))])
+
+    assert [vertex_id for vertex_id, _ in index.search(unit(1, 0.1, 0), k=2)] == [1, 3]
+
+    index.upsert([(1, unit(0, 0, 1))])
+    index.remove([3])
+    assert [vertex_id for vertex_id, _ in index.search(unit(1, 0.1, 0), k=5)] == [2, 1]
+    assert len(index) == 2
+
+def test_vectors_must_match_the_index_dimension():
+    index = InsightIndex()
+    index.upsert([(1, unit(1, 0, 0))])
+
+    with pytest.raises(ValueError, match="dimension 3"):
+        index.upsert([(2, unit(1, 0, 0)), (3, unit(1, 0))])
+    assert 2 not in index
+
+def test_lookups_stay_under_ten_milliseconds_on_thousands_of_insights():
+    vectors = random_vectors(5000)
+    index = InsightIndex(initial_capacity=16)
+    index.upsert(enumerate(vectors))
+
+    start = time.perf_counter()
+    for query in vectors[:100]:
+        index.search(query, k=10)
+    per_lookup = (time.perf_counter() - start) / 100
+
+    assert index.search(vectors[42], k=1)[0][0] == 42
+    assert per_lookup < 0.01
+
+def test_the_log_survives_restarts_torn_writes_and_compaction(tmp_path):
+    path = str(tmp_path / "insights.log")
+    vectors = random_vectors(20, dimension=8)
+    index = InsightIndex(path=path)
+    index.open()
+    index.upsert([(i, vectors[i]) for i in range(20)])
+    index.remove([5])
+    index.close()
+    with open(path, "a") as log:
+        log.write('{"op": "upsert", "id": 99, "vec')
+
+    reopened = InsightIndex(path=path)
+    reopened.open()
+    assert len(reopened) == 19 and 99 not in reopened and 5 not in reopened
+    assert reopened.search(vectors[7], k=1)[0][0] == 7
+
+    reopened.upsert([(21, vectors[5])])
+    reopened.compact()
+    reopened.close()
+    with open(path) as log:
+        assert len(log.readlines()) == 20
+
+    compacted = InsightIndex(path=path)
+    compacted.open()
+    assert compacted.search(vectors[5], k=1)[0][0] == 21
+
+class FakeGraph:
+    """Answers the insight templates and records upserts."""
+
+    def __init__(self, insights):
+        self.insights = insights  # vertex ID -> details row
+        self.upserts = []
+
+    async def run_template(self, name, params=None, timeout=None):
+        if name == "insight_details":
+            return [self.insights[i] for i in params["ids"] if i in self.insights]
+        if name == "insight_vertex_ids":
+            return [{"uid": uid, "id": 100} for uid in params["uids"]]
+        if name == "insight_embeddings":
+            rows = [{"id": i, "embedding": json.dumps(row["embedding"])} for i, row in self.insights.items()]
+            return rows[params["offset"]:params["offset"] + params["max_results"]]
+        raise AssertionError(name)
+
+    async def upsert(self, operations):
+        self.upserts.append(operations)
+        return [UpsertResult(index=i, operation=op.operation, label=op.label, status=UpsertStatus.CREATED) for i, op in enumerate(operations)]
+
+def insight(vertex_id, lesson, services, embedding):
+    return {"id": vertex_id, "lesson": lesson, "workflow_id": f"wf-{vertex_id}", "services": services, "embedding": embedding}
+
+async def embed(texts):
+    return [[1.0, 0.0, 0.0] for _ in texts]
+
+def make_store(graph):
+    return InsightStore(InsightIndex(), graph.run_template, graph.upsert, embed)
+
+def test_similar_insights_join_the_graph_and_filter_by_service():
+    graph = FakeGraph({
+        1: insight(1, "Check logs first", ["webappq"], [1, 0, 0]),
+        2: insight(2, "Roll back bad deploys", ["authq"], [0.9, 0.1, 0]),
+        3: insight(3, "Unrelated", ["webappq"], [0, 0, 1]),
+    })
+    store = make_store(graph)
+    store.index.upsert([(i, row["embedding"]) for i, row in graph.insights.items()])
+    store.index.upsert([(4, [1, 0.05, 0])])  # deleted from the graph since
+
+    results = asyncio.run(store.similar(k=2, text="deployment failed"))
+    filtered = asyncio.run(store.similar(k=5, service="authq", vector=[1, 0, 0]))
+
+    assert [r.lesson for r in results] == ["Check logs first", "Roll back bad deploys"]
+    assert results[0].score == pytest.approx(1.0)
+    assert [r.id for r in filtered] == [2]
+    assert 4 not in store.index
+
+def test_recording_an_insight_links_and_indexes_it():
+    graph = FakeGraph({})
+    store = make_store(graph)
+
+    vertex_id = asyncio.run(store.record("wf-9", "Check logs first", services=["webappq"]))
+
+    operations = graph.upserts[0]
+    assert vertex_id == 100 and 100 in store.index
+    assert {(op.label, op.operation) for op in operations} >= {("Insight", "upsert_vertex"), ("AFFECTS", "upsert_edge")}
+    assert json.loads(operations[1].properties["embedding"]) == [1.0, 0.0, 0.0]
+
+def test_the_index_can_be_rebuilt_from_the_graph():
+    graph = FakeGraph({i: insight(i, f"lesson {i}", [], [float(i), 1.0, 0.0]) for i in range(1, 8)})
+    store = make_store(graph)
+
+    assert asyncio.run(store.rebuild_index(page_size=3)) == 7
+    assert len(store.index) == 7
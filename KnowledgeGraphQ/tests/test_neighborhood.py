@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from app.core.neighborhood import NeighborhoodRequest, UnknownNodeError, explore
+
+class FakeGraph:
+    """Answers the neighborhood scripts from an edge list, and counts the queries."""
+
+    def __init__(self, edges):
+        self.edges = [
+            {"id": f"e{i}", "label": label, "OUT": {"id": source, "label": "V"}, "IN": {"id": target, "label": "V"}}
+            for i, (source, label, target) in enumerate(edges)
+        ]
+        self.vertices = {v for e in self.edges for v in (e["OUT"]["id"], e["IN"]["id"])}
+        self.queries = []
+
+    async def execute(self, script, bindings, timeout=None, write=False):
+        self.queries.append(script)
+        if "project" not in script:
+            return [{"id": v, "label": "V", "name": f"n{v}"} for v in bindings["ids"] if v in self.vertices]
+        rows = []
+        for v in bindings["frontier"]:
+            matching = [
+                e for e in self.edges
+                if ("outE" in script and e["OUT"]["id"] == v)
+                or ("inE" in script and e["IN"]["id"] == v)
+                or ("bothE" in script and v in (e["OUT"]["id"], e["IN"]["id"]))
+            ]
+            if "edge_labels" in script:
+                matching = [e for e in matching if e["label"] in bindings["edge_labels"]]
+            rows.append({"source": v, "edges": matching[:bindings["fetch"]]})
+        # The graph returns vertices in no particular order
+        return list(reversed(rows))
+
+def run(graph, **request):
+    return asyncio.run(explore(graph.execute, NeighborhoodRequest(**request)))
+
+def hub_graph(spokes):
+    # Vertex 0 is a hub; each spoke i has one further neighbor 1000 + i
+    edges = [(0, "DEPENDS_ON", i) for i in range(1, spokes + 1)]
+    edges += [(i, "DEPLOYED_TO", 1000 + i) for i in range(1, spokes + 1)]
+    return FakeGraph(edges)
+
+def test_one_query_per_hop_with_deduplicated_nodes():
+    graph = FakeGraph([(1, "A", 2), (1, "A", 3), (2, "A", 3), (3, "A", 4)])
+
+    result = run(graph, node_id=1, hops=2)
+
+    assert sorted((n.id, n.hop) for n in result.nodes) == [(1, 0), (2, 1), (3, 1), (4, 2)]
+    assert sorted(e.id for e in result.edges) == ["e0", "e1", "e2", "e3"]
+    # Start vertex, two expansions, one lookup of the new vertices
+    assert len(graph.queries) == 4
+    assert not result.truncated and result.next_cursor is None
+
+def test_hub_fan_out_is_capped_per_hop():
+    graph = hub_graph(1000)
+
+    result = run(graph, node_id=0, hops=2, direction="out", fan_out=[10, 1], max_nodes=5000)
+
+    assert len([n for n in result.nodes if n.hop == 1]) == 10
+    assert len([n for n in result.nodes if n.hop == 2]) == 10
+    assert result.capped_nodes == [0]
+
+def test_direction_and_label_filters():
+    graph = FakeGraph([(1, "DEPENDS_ON", 2), (3, "DEPENDS_ON", 1), (1, "OWNS", 4)])
+
+    outgoing = run(graph, node_id=1, direction="out", edge_labels=["DEPENDS_ON"])
+    incoming = run(graph, node_id=1, direction="in")
+
+    assert sorted(n.id for n in outgoing.nodes) == [1, 2]
+    assert [(e.source, e.target) for e in incoming.edges] == [(3, 1)]
+
+def test_pages_continue_the_traversal_without_repeating_nodes():
+    graph = hub_graph(30)
+    pages, cursor = [], None
+    while True:
+        page = run(graph, node_id=0, hops=2, fan_out=50, max_nodes=25, cursor=cursor)
+        pages.append(page)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    ids = [n.id for page in pages for n in page.nodes]
+    assert len(pages) == 3 and all(len(page.nodes) <= 25 for page in pages)
+    assert sorted(ids) == sorted(graph.vertices)
+    assert len({e.id for page in pages for e in page.edges}) == 60
+
+def test_unknown_node_and_bad_cursor():
+    graph = FakeGraph([(1, "A", 2)])
+
+    with pytest.raises(UnknownNodeError):
+        run(graph, node_id=99)
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        run(graph, node_id=1, cursor="not-a-cursor")
+    with pytest.raises(ValueError, match="fan_out"):
+        NeighborhoodRequest(node_id=1, fan_out=[10, 0])
@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from app.core.neighborhood import Neighborhood, NeighborhoodNode
+from app.core.query_cache import QueryResultCache, mutates
+from app.core.query_templates import query_templates
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class Loader:
+    """Counts loads; each returns `value`, optionally after waiting for `release`."""
+
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+        self.release = None
+
+    async def __call__(self):
+        self.calls += 1
+        if self.release is not None:
+            await self.release.wait()
+        return self.value
+
+def service(name):
+    return [{"id": 1, "label": "Service", "name": name}]
+
+def test_results_are_reused_until_a_write_touches_their_labels():
+    async def scenario():
+        cache = QueryResultCache()
+        dependents = Loader(service("authq"))
+        deployments = Loader([{"id": 2, "label": "Deployment", "version": "1.2"}])
+        by_name = Loader(service("authq"))
+
+        for _ in range(3):
+            await cache.get_or_load("service_dependents", "authq", dependents, ["Service", "DEPENDS_ON"])
+            await cache.get_or_load("service_deployments", "authq", deployments, ["DEPLOYED_TO"])
+            await cache.get_or_load("search_by_name", "auth", by_name, None)
+        assert (dependents.calls, deployments.calls, by_name.calls) == (1, 1, 1)
+
+        # Tagged with the labels in the result too
+        cache.invalidate({"Deployment"})
+        await cache.get_or_load("service_dependents", "authq", dependents, ["Service", "DEPENDS_ON"])
+        await cache.get_or_load("service_deployments", "authq", deployments, ["DEPLOYED_TO"])
+        await cache.get_or_load("search_by_name", "auth", by_name, None)
+        assert (dependents.calls, deployments.calls, by_name.calls) == (1, 2, 2)
+
+        cache.invalidate({"DEPENDS_ON"})
+        await cache.get_or_load("service_dependents", "authq", dependents, ["Service", "DEPENDS_ON"])
+        assert dependents.calls == 2
+        return cache
+
+    cache = asyncio.run(scenario())
+    assert cache.stats()["lookups"] == {"hit": 7, "stale": 0, "coalesced": 0, "miss": 6}
+    assert cache.stats()["hit_rate"] == pytest.approx(7 / 13)
+
+def test_a_load_overlapping_a_write_is_not_stored():
+    async def scenario():
+        cache = QueryResultCache()
+        loader = Loader(service("authq"))
+        loader.release = asyncio.Event()
+        first = asyncio.ensure_future(cache.get_or_load("service_dependents", "authq", loader, ["Service"]))
+        second = asyncio.ensure_future(cache.get_or_load("service_dependents", "authq", loader, ["Service"]))
+        await asyncio.sleep(0)
+        cache.invalidate({"Service"})
+        loader.release.set()
+        assert await first == await second == service("authq")
+        assert loader.calls == 1 and len(cache) == 0
+        return cache
+
+    assert asyncio.run(scenario()).stats()["lookups"]["coalesced"] == 1
+
+def test_hot_entries_are_served_stale_while_they_refresh():
+    async def scenario():
+        clock = Clock()
+        cache = QueryResultCache(ttl_seconds=10, stale_seconds=10, hot_hits=2, clock=clock)
+        hot, cold = Loader(service("v1")), Loader(service("cold"))
+        for _ in range(3):
+            await cache.get_or_load("neighborhood", "hot", hot, [])
+        await cache.get_or_load("neighborhood", "cold", cold, [])
+
+        clock.now = 15
+        hot.value = service("v2")
+        assert await cache.get_or_load("neighborhood", "hot", hot, []) == service("v1")
+        assert await cache.get_or_load("neighborhood", "cold", cold, []) == service("cold")
+        assert cold.calls == 2
+        await asyncio.sleep(0)
+        assert hot.calls == 2
+        assert await cache.get_or_load("neighborhood", "hot", hot, []) == service("v2")
+
+        clock.now = 50
+        await cache.get_or_load("neighborhood", "hot", hot, [])
+        assert hot.calls == 3
+        return cache
+
+    assert asyncio.run(scenario()).stats()["lookups"]["stale"] == 1
+
+def test_least_recently_used_results_are_evicted_past_the_memory_bound():
+    async def scenario():
+        cache = QueryResultCache(max_bytes=1200)
+        for name in ("a", "b", "a", "c"):
+            await cache.get_or_load("search_by_name", name, Loader(service(name)), None)
+        return cache
+
+    cache = asyncio.run(scenario())
+    assert len(cache) == 2 and cache.size_bytes <= 1200
+    assert set(cache._entries) == {("search_by_name", "a"), ("search_by_name", "c")}
+
+def test_neighborhoods_are_tagged_with_their_node_labels():
+    async def scenario():
+        cache = QueryResultCache()
+        loader = Loader(Neighborhood(nodes=[NeighborhoodNode(id=1, label="Service", hop=0)], edges=[]))
+        await cache.get_or_load("neighborhood", "1", loader, [])
+        cache.invalidate({"Insight"})
+        await cache.get_or_load("neighborhood", "1", loader, [])
+        cache.invalidate({"Service"})
+        await cache.get_or_load("neighborhood", "1", loader, [])
+        return loader.calls
+
+    assert asyncio.run(scenario()) == 2
+
+def test_templates_declare_the_labels_they_touch():
+    template, bindings = query_templates.bind("delete_vertices", {"vertex_label": "Chunk", "uids": ["c1"]})
+    assert template.touched_labels(bindings) == {"Chunk"}
+    template, bindings = query_templates.bind("search_by_name", {"text": "auth"})
+    assert template.touched_labels(bindings) is None
+    assert mutates("g.V(id).property('status', 'down')") and not mutates("g.V().has('Service', 'name', 'x').properties()")
@@ -0,0 +1,102 @@
+import asyncio
+from enum import Enum
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from app.core.query_templates import (
+    ParameterType, QueryTemplate, QueryTemplateRegistry, TemplateParameter, UnknownTemplateError,
+    query_templates, to_json_compatible
+)
+from shared.q_knowledgegraph_client import KnowledgeGraphClient
+from shared.q_service_client import mount_transport, unmount_transport
+
+class T(Enum):
+    # Mirrors gremlin_python's T, which keys ids and labels in element maps
+    id = 1
+    label = 4
+
+def test_parameters_become_bindings_and_the_script_never_changes():
+    first, first_bindings = query_templates.bind("search_by_name", {"text": "managerQ"})
+    second, second_bindings = query_templates.bind("search_by_name", {"text": "x') ; g.V().drop(); ('", "max_results": 5})
+
+    assert first.script == second.script
+    assert "managerQ" not in first.script
+    assert first_bindings == {"text": "managerQ", "max_results": 10}
+    assert second_bindings["max_results"] == 5
+
+@pytest.mark.parametrize("params, message", [
+    ({}, "Missing required parameter 'node_id'"),
+    ({"node_id": "v1", "hops": 10}, "at most 3"),
+    ({"node_id": "v1", "hops": "2"}, "must be of type integer"),
+    ({"node_id": "v1", "hops": True}, "must be of type integer"),
+    ({"node_id": "v1", "depth": 2}, "Unknown parameters"),
+])
+def test_invalid_parameters_are_rejected(params, message):
+    registry = QueryTemplateRegistry()
+    registry.register(QueryTemplate(
+        name="walk", description="", script="g.V(node_id).repeat(both()).times(hops)",
+        parameters={
+            "node_id": TemplateParameter(type=ParameterType.ID),
+            "hops": TemplateParameter(type=ParameterType.INTEGER, default=1, minimum=1, maximum=3),
+        },
+    ))
+    with pytest.raises(ValueError, match=message):
+        registry.bind("walk", params)
+
+def test_unknown_templates_and_duplicates():
+    registry = QueryTemplateRegistry()
+    template = QueryTemplate(name="count", description="", script="g.V().count()")
+    registry.register(template)
+
+    with pytest.raises(ValueError, match="already registered"):
+        registry.register(template)
+    with pytest.raises(UnknownTemplateError):
+        registry.bind("missing")
+    with pytest.raises(ValueError, match="Invalid parameter name"):
+        registry.register(QueryTemplate(name="bad", description="", script="", parameters={"Bad-Name": TemplateParameter()}))
+
+def test_templates_run_through_the_executor():
+    calls = []
+
+    async def execute(script, bindings, timeout=None, write=False):
+        calls.append((script, bindings, timeout, write))
+        return [{T.id: 7, T.label: "Report", "content": "disk full"}]
+
+    result = asyncio.run(query_templates.run(
+        execute, "record_report",
+        {"source": "AIOpsWorkflow", "content": "disk full", "created_at": "2024-01-01T00:00:00", "service_name": "authq"},
+        timeout=5.0
+    ))
+
+    assert result == [{"id": 7, "label": "Report", "content": "disk full"}]
+    script, bindings, timeout, write = calls[0]
+    assert write and timeout == 5.0
+    assert bindings["event_id"] == "" and "disk full" not in script
+
+def test_paths_are_made_json_compatible():
+    class Path:
+        labels = [set(), set()]
+        objects = [{T.id: 1, T.label: "Service"}, {T.id: 2, T.label: "Service"}]
+
+    assert to_json_compatible([Path()]) == [{"objects": [{"id": 1, "label": "Service"}, {"id": 2, "label": "Service"}]}]
+
+def test_client_helpers_call_templates():
+    app = FastAPI()
+    seen = []
+
+    @app.post("/api/v1/query/templates/{name}")
+    async def run_template(name: str, request: Request):
+        seen.append((name, await request.json()))
+        return {"result": [{"id": 1, "label": "Service", "name": "authq"}]}
+
+    mount_transport("http://kg-stub", httpx.ASGITransport(app=app))
+    try:
+        client = KnowledgeGraphClient(base_url="http://kg-stub")
+        result = asyncio.run(client.search_by_name("auth", limit=5))
+    finally:
+        unmount_transport("http://kg-stub")
+
+    assert result[0]["name"] == "authq"
+    assert seen == [("search_by_name", {"params": {"text": "auth", "max_results": 5}})]
@@ -0,0 +1,108 @@
+import asyncio
+import itertools
+import os
+
+import pytest
+
+from app.core.snapshot import GraphSnapshotter, SnapshotError, SnapshotFormat, read_manifest
+
+class FakeGraph:
+    """An in-memory graph that answers the snapshot module's scripts."""
+
+    def __init__(self, first_id=1):
+        self.vertices = {}   # id -> (label, {key: [values]})
+        self.edges = []      # (label, out id, in id, properties)
+        self._ids = itertools.count(first_id)
+        self.largest_write = 0
+
+    def add_vertex(self, label, **properties):
+        vertex_id = next(self._ids)
+        self.vertices[vertex_id] = (label, {k: [v] for k, v in properties.items()})
+        return vertex_id
+
+    async def stream(self, script, bindings, batch_size=1000):
+        label = bindings["partition_label"]
+        if script.startswith("g.V()"):
+            rows = [{"id": i, "label": l, "properties": p} for i, (l, p) in self.vertices.items() if l == label]
+        else:
+            endpoints = bindings.get("vertex_labels")
+            rows = [
+                {"label": l, "outV": o, "inV": n, "properties": p} for l, o, n, p in self.edges
+                if l == label and (endpoints is None or {self.vertices[o][0], self.vertices[n][0]} <= set(endpoints))
+            ]
+        for start in range(0, len(rows), batch_size):
+            yield rows[start:start + batch_size]
+
+    async def execute(self, script, bindings, write=False):
+        if script == "g.V().label().dedup()":
+            return list({label for label, _ in self.vertices.values()})
+        if script == "g.E().label().dedup()":
+            return list({edge[0] for edge in self.edges})
+        assert write
+        rows = bindings["rows"]
+        self.largest_write = max(self.largest_write, len(rows))
+        if "addVertex" in script:
+            pairs = []
+            for row in rows:
+                new_id = next(self._ids)
+                self.vertices[new_id] = (row["label"], row["properties"])
+                pairs.append([row["id"], new_id])
+            return pairs
+        for row in rows:
+            assert row["outV"] in self.vertices and row["inV"] in self.vertices
+            self.edges.append((row["label"], row["outV"], row["inV"], row["properties"]))
+        return [len(rows)]
+
+    def shape(self):
+        """The graph with vertices named instead of numbered, to compare graphs across ids."""
+        name = {i: (label, props["name"][0]) for i, (label, props) in self.vertices.items()}
+        return (
+            sorted((label, sorted(props.items())) for label, props in self.vertices.values()),
+            sorted((label, name[o], name[n], sorted(p.items())) for label, o, n, p in self.edges),
+        )
+
+@pytest.fixture
+def source():
+    graph = FakeGraph()
+    services = [graph.add_vertex("Service", name=f"svc{i}", tier=i % 3) for i in range(25)]
+    insight = graph.add_vertex("Insight", name="latency spike", confidence=0.9)
+    for a, b in zip(services, services[1:]):
+        graph.edges.append(("DEPENDS_ON", a, b, {"weight": 1.0}))
+    graph.edges.append(("ABOUT", insight, services[0], {}))
+    return graph
+
+@pytest.mark.parametrize("snapshot_format", list(SnapshotFormat))
+def test_a_graph_survives_an_export_and_import(source, tmp_path, snapshot_format):
+    target = FakeGraph(first_id=1000)
+    events = []
+
+    manifest = asyncio.run(GraphSnapshotter(source.stream, source.execute, read_batch_size=4).export(str(tmp_path), snapshot_format))
+    report = asyncio.run(GraphSnapshotter(target.stream, target.execute, write_batch_size=10, progress=events.append).import_(str(tmp_path)))
+
+    assert (manifest.vertices, manifest.edges) == (26, 25)
+    assert (report.vertices, report.edges, report.skipped_edges) == (26, 25, 0)
+    assert target.shape() == source.shape()
+    assert target.largest_write == 10
+    services = [e for e in events if e.label == "Service"]
+    assert [e.done for e in services] == [10, 20, 25] and services[-1].total == 25
+    assert read_manifest(str(tmp_path)).format == snapshot_format
+
+def test_a_label_filtered_subgraph_keeps_only_edges_between_its_vertices(source, tmp_path):
+    target = FakeGraph()
+
+    manifest = asyncio.run(GraphSnapshotter(source.stream, source.execute).export(str(tmp_path), vertex_labels=["Service"]))
+    report = asyncio.run(GraphSnapshotter(target.stream, target.execute).import_(str(tmp_path)))
+
+    assert {p.label: p.count for p in manifest.partitions} == {"Service": 25, "DEPENDS_ON": 24, "ABOUT": 0}
+    assert (report.vertices, report.edges) == (25, 24)
+    assert {label for label, _ in target.vertices.values()} == {"Service"}
+
+def test_incomplete_snapshots_are_refused(source, tmp_path):
+    snapshotter = GraphSnapshotter(source.stream, source.execute)
+    with pytest.raises(SnapshotError):
+        asyncio.run(snapshotter.import_(str(tmp_path)))
+
+    asyncio.run(snapshotter.export(str(tmp_path)))
+    with pytest.raises(SnapshotError):
+        asyncio.run(snapshotter.export(str(tmp_path)))
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
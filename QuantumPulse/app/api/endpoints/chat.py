@@ -10,6 +10,7 @@ from app.models.chat import ChatRequest, ChatResponse, ChatChoice, ChatMessage,
 from shared.q_auth_parser.parser import get_current_user
 from shared.q_auth_parser.models import UserClaims
 from app.core.model_manager import model_manager
+from app.core.prefix_cache import generate_with_prefix_cache
 from shared.q_h2m_client.client import h2m_client
 import random
 
@@ -87,7 +88,15 @@ async def create_chat_completion(
         # Note: This is a simplified generation process.
         # A real implementation would handle tokenization, attention masks, etc. more robustly.
         inputs = tokenizer(request.messages[-1].content, return_tensors="pt")
-        outputs = model.generate(**inputs, max_new_tokens=request.max_tokens)
+        # Reuse cached attention state for any prefix we've already seen
+        # (the same system prompt, or earlier turns of this conversation).
+        outputs, _ = generate_with_prefix_cache(
+            model,
+            inputs.input_ids,
+            model_manager.get_prefix_cache(selected_model_name),
+            conversation_id=request.conversation_id,
+            max_new_tokens=request.max_tokens
+        )
         completion_text = tokenizer.decode(outputs[0], skip_special_tokens=True)
         
         # 5. Format the response to match the expected ChatResponse model
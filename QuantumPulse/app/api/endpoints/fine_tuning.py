@@ -1,21 +1,26 @@
 import logging
-import uuid
 import os
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Optional
 
 from shared.q_auth_parser.parser import get_current_user
 from shared.q_auth_parser.models import UserClaims
-from shared.vault_client import VaultClient
-from datasets import Dataset
-from transformers import AutoModelForCausalLM, AutoTokenizer, TrainingArguments
-from trl import DPOTrainer
-from app.core.model_manager import model_manager
+from app.services.fine_tuning_queue import (
+    FineTuneJob,
+    FineTuneSchedule,
+    FineTuningQueue,
+    QueueFullError,
+    get_fine_tuning_queue,
+)
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Roles that may see and cancel every user's jobs
+ADMIN_ROLES = {"admin"}
+
 # --- Pydantic Models ---
 class PreferencePair(BaseModel):
     chosen: Optional[str] = Field(None, description="The preferred (e.g., 'good' feedback) response from a prompt.")
@@ -26,6 +31,7 @@ class FineTuneRequest(BaseModel):
     model_to_fine_tune: str = Field(description="The ID of the base model on Hugging Face to fine-tune (e.g., 'gpt2').")
     dataset: List[PreferencePair] = Field(description="The dataset of preference pairs for training.")
     new_model_name: str = Field(description="The desired name for the new, fine-tuned model on the Hugging Face Hub.")
+    schedule: FineTuneSchedule = Field(FineTuneSchedule.IMMEDIATE, description="'immediate', or 'idle' to wait for a quiet period in inference traffic.")
 
 class FineTuneResponse(BaseModel):
     job_id: str
@@ -33,97 +39,83 @@ class FineTuneResponse(BaseModel):
     message: str
     hub_url: str | None = None
 
-# --- Fine-Tuning Logic ---
-
-def run_fine_tuning_job(request: FineTuneRequest, job_id: str):
-    """
-    This function runs the actual DPO fine-tuning process.
-    It's designed to be run in a background task.
-    """
-    logger.info(f"Starting fine-tuning job {job_id} for model {request.model_to_fine_tune}.")
-    try:
-        # 1. Fetch Hugging Face token from Vault
-        vault_client = VaultClient()
-        hf_token = vault_client.read_secret("secret/data/huggingface", "token")
-        if not hf_token:
-            raise ValueError("Hugging Face token not found in Vault.")
-
-        # 2. Prepare the dataset
-        data_dict = {"prompt": [], "chosen": [], "rejected": []}
-        for item in request.dataset:
-            data_dict["prompt"].append(item.prompt)
-            data_dict["chosen"].append(item.chosen)
-            data_dict["rejected"].append(item.rejected)
-        
-        train_dataset = Dataset.from_dict(data_dict)
-
-        # 3. Load model and tokenizer
-        model = AutoModelForCausalLM.from_pretrained(request.model_to_fine_tune)
-        tokenizer = AutoTokenizer.from_pretrained(request.model_to_fine_tune)
-        if tokenizer.pad_token is None:
-            tokenizer.pad_token = tokenizer.eos_token
+def _is_visible(job: FineTuneJob, user: UserClaims) -> bool:
+    """A job is visible to the user who submitted it, and to admins."""
+    return bool(ADMIN_ROLES.intersection(user.roles)) or (job.submitted_by is not None and job.submitted_by == user.username)
 
-        # 4. Set up Training Arguments
-        output_dir = f"./dpo_results_{job_id}"
-        training_args = TrainingArguments(
-            per_device_train_batch_size=2,
-            gradient_accumulation_steps=4,
-            learning_rate=5e-5,
-            num_train_epochs=1,
-            lr_scheduler_type="cosine",
-            warmup_steps=10,
-            logging_steps=1,
-            output_dir=output_dir,
-            push_to_hub=True,
-            hub_model_id=request.new_model_name,
-            hub_token=hf_token,
-        )
-
-        # 5. Initialize and run the DPO Trainer
-        dpo_trainer = DPOTrainer(
-            model,
-            args=training_args,
-            beta=0.1,
-            train_dataset=train_dataset,
-            tokenizer=tokenizer,
-        )
-        dpo_trainer.train()
-        
-        # 6. Push the final model to the hub
-        dpo_trainer.push_model()
-        logger.info(f"Fine-tuning job {job_id} completed. Model pushed to {request.new_model_name}.")
-        
-        # 7. Dynamically load the new model into the ModelManager
-        logger.info(f"Attempting to dynamically load new model '{request.new_model_name}'...")
-        model_manager.load_model(request.new_model_name)
-        
-    except Exception as e:
-        logger.error(f"Fine-tuning job {job_id} failed: {e}", exc_info=True)
-        # Here you might update a database with the failure status
+def _get_visible_job(queue: FineTuningQueue, job_id: str, user: UserClaims) -> FineTuneJob:
+    job = queue.get(job_id)
+    # Other users' jobs are reported as missing, not forbidden, so job IDs can't be probed
+    if job is None or not _is_visible(job, user):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Fine-tuning job '{job_id}' not found.")
+    return job
 
 @router.post("", response_model=FineTuneResponse, status_code=status.HTTP_202_ACCEPTED)
 async def submit_fine_tuning_job(
     request: FineTuneRequest,
-    background_tasks: BackgroundTasks,
+    queue: FineTuningQueue = Depends(get_fine_tuning_queue),
     user: UserClaims = Depends(get_current_user) # Ensure only authorized users/services can run this
 ):
     """
-    Accepts a dataset of preference pairs and launches an asynchronous DPO fine-tuning job.
+    Accepts a dataset of preference pairs and queues a DPO fine-tuning job.
+    Jobs run one at a time in a separate worker process; poll GET /{job_id} for progress.
     """
     logger.info(f"Received fine-tuning request for model '{request.model_to_fine_tune}' from user '{user.username}'.")
-    
-    job_id = f"ft-job-{uuid.uuid4()}"
-    
-    # Run the complex, long-running training process in the background
-    background_tasks.add_task(run_fine_tuning_job, request, job_id)
-    
-    logger.info(f"Dispatched fine-tuning job '{job_id}' to a background worker.")
-    
+
+    try:
+        # Spooling the dataset to disk is blocking I/O
+        job = await run_in_threadpool(
+            queue.submit,
+            model_to_fine_tune=request.model_to_fine_tune,
+            new_model_name=request.new_model_name,
+            dataset=(pair.model_dump() for pair in request.dataset),
+            schedule=request.schedule,
+            submitted_by=user.username,
+        )
+    except QueueFullError as e:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
+
     hub_url = f"https://huggingface.co/{os.getenv('HF_USERNAME', 'your-hf-user')}/{request.new_model_name}"
 
     return FineTuneResponse(
-        job_id=job_id,
-        status="submitted",
-        message="Fine-tuning job has been successfully submitted and is running in the background.",
+        job_id=job.job_id,
+        status=job.status.value,
+        message="Fine-tuning job has been queued.",
         hub_url=hub_url
-    ) 
\ No newline at end of file
+    )
+
+@router.get("", response_model=List[FineTuneJob])
+async def list_fine_tuning_jobs(
+    queue: FineTuningQueue = Depends(get_fine_tuning_queue),
+    user: UserClaims = Depends(get_current_user)
+):
+    """
+    Lists the user's fine-tuning jobs (every job, for admins) and their status.
+    """
+    return [job for job in queue.list() if _is_visible(job, user)]
+
+@router.get("/{job_id}", response_model=FineTuneJob)
+async def get_fine_tuning_job(
+    job_id: str,
+    queue: FineTuningQueue = Depends(get_fine_tuning_queue),
+    user: UserClaims = Depends(get_current_user)
+):
+    """
+    Returns a job's status, including step/loss progress while it runs.
+    """
+    return _get_visible_job(queue, job_id, user)
+
+@router.delete("/{job_id}", response_model=FineTuneJob)
+async def cancel_fine_tuning_job(
+    job_id: str,
+    queue: FineTuningQueue = Depends(get_fine_tuning_queue),
+    user: UserClaims = Depends(get_current_user)
+):
+    """
+    Cancels a queued or running job. A running job's worker process is terminated.
+    """
+    _get_visible_job(queue, job_id, user)
+    try:
+        return queue.cancel(job_id)
+    except KeyError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Fine-tuning job '{job_id}' not found.")
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import JSONResponse
 import logging
 
-from app.models.inference import InferenceRequest
-from app.core.pulsar_client import PulsarManager, get_pulsar_manager
+from app.models.inference import OWNER_METADATA_KEY, InferenceRequest
+from app.core.pulsar_client import PulsarManager, PublishBackpressureError, get_pulsar_manager
+from app.services.result_store import RequestIdConflictError, ResultStore, get_result_store
 from app.core.config import config
 from shared.q_auth_parser.parser import get_current_user
 from shared.q_auth_parser.models import UserClaims
@@ -15,32 +16,45 @@ router = APIRouter()
 
 REQUEST_TOPIC = config.pulsar.topics.requests
 
-@router.post("/v1/inference", status_code=status.HTTP_202_ACCEPTED)
+@router.post("", status_code=status.HTTP_202_ACCEPTED)
 async def create_inference_request(
     request: InferenceRequest,
-    background_tasks: BackgroundTasks,
     pulsar_manager: PulsarManager = Depends(get_pulsar_manager),
+    result_store: ResultStore = Depends(get_result_store),
     user: UserClaims = Depends(get_current_user)
 ):
     """
     Accepts an inference request and publishes it to the message queue for processing.
+    The 202 is only returned once the broker has acknowledged the message.
+    Requests without a `reply_to_topic` can fetch their result from `/v1/results/{request_id}`.
     """
+    # Track before publishing so a fast result can never arrive for an unknown request
     try:
-        # Publishing to Pulsar can be an I/O operation.
-        # For a truly async producer, the pulsar-client would need to be used with an async framework.
-        # Here, we use a background task to avoid blocking the response.
-        background_tasks.add_task(
-            pulsar_manager.publish_request,
-            topic=REQUEST_TOPIC,
-            request=request
-        )
-        
-        logger.info(f"Accepted inference request {request.request_id} from user '{user.username}'. Publishing to topic {REQUEST_TOPIC}.")
+        result_store.track(request.request_id, owner=user.username)
+    except RequestIdConflictError as ce:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(ce))
+    # Workers echo the owner on their responses, for replicas that didn't track the request
+    request.metadata[OWNER_METADATA_KEY] = user.username
+    try:
+        try:
+            await pulsar_manager.publish_request_async(topic=REQUEST_TOPIC, request=request)
+        except Exception:
+            result_store.forget(request.request_id)
+            raise
+
+        logger.info(f"Accepted inference request {request.request_id} from user '{user.username}'. Published to topic {REQUEST_TOPIC}.")
 
         return {
             "message": "Inference request accepted for processing.",
             "request_id": request.request_id
         }
+    except PublishBackpressureError as be:
+        logger.warning(f"Rejecting inference request {request.request_id} due to publish backpressure: {be}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The service is overloaded. Please retry shortly.",
+            headers={"Retry-After": "1"}
+        )
     except ConnectionError as ce:
         logger.error(f"Pulsar connection error while handling request {request.request_id}: {ce}", exc_info=True)
         raise HTTPException(
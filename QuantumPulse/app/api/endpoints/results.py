@@ -0,0 +1,81 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+import json
+import logging
+
+from app.models.inference import InferenceResult
+from app.services.result_store import ResultRecord, ResultStore, get_result_store
+from shared.q_auth_parser.parser import get_current_user
+from shared.q_auth_parser.models import UserClaims
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+MAX_WAIT_SECONDS = 60.0
+
+def _to_result(record: ResultRecord) -> InferenceResult:
+    return InferenceResult(
+        request_id=record.request_id,
+        status="completed" if record.is_complete else "pending",
+        model=record.model,
+        text=record.text,
+        chunks_received=len(record.chunks),
+        conversation_id=record.conversation_id,
+        input_tokens=record.input_tokens,
+        output_tokens=record.output_tokens
+    )
+
+def _get_owned_record(store: ResultStore, request_id: str, user: UserClaims) -> ResultRecord:
+    record = store.get(request_id)
+    # Results belonging to another user, or to no known user, are reported as
+    # missing, not forbidden, so request IDs can't be probed.
+    if record is None or record.owner is None or record.owner != user.username:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No result found for request '{request_id}'.")
+    return record
+
+@router.get("/{request_id}", response_model=InferenceResult)
+async def get_inference_result(
+    request_id: str,
+    response: Response,
+    wait: float = Query(0, ge=0, le=MAX_WAIT_SECONDS, description="Seconds to long-poll for the result to complete."),
+    store: ResultStore = Depends(get_result_store),
+    user: UserClaims = Depends(get_current_user)
+):
+    """
+    Returns the result of an asynchronous inference request.
+    Responds 200 once complete, or 202 with any partial text if still pending after `wait` seconds.
+    """
+    record = _get_owned_record(store, request_id, user)
+    if not record.is_complete and wait > 0:
+        record = await store.wait_for_completion(request_id, timeout=wait) or record
+
+    if not record.is_complete:
+        response.status_code = status.HTTP_202_ACCEPTED
+    return _to_result(record)
+
+@router.get("/{request_id}/stream")
+async def stream_inference_result(
+    request_id: str,
+    timeout: float = Query(MAX_WAIT_SECONDS, gt=0, le=300, description="Seconds to keep the stream open."),
+    store: ResultStore = Depends(get_result_store),
+    user: UserClaims = Depends(get_current_user)
+):
+    """
+    Streams the result chunks of an inference request as Server-Sent Events,
+    starting with any chunks that have already arrived.
+    """
+    _get_owned_record(store, request_id, user)
+
+    async def event_generator():
+        completed = False
+        async for sequence, text, is_final in store.stream_chunks(request_id, timeout=timeout):
+            completed = completed or is_final
+            payload = {"request_id": request_id, "sequence": sequence, "text": text, "is_final": is_final}
+            yield f"data: {json.dumps(payload)}\n\n"
+        if not completed:
+            logger.info(f"Result stream for request {request_id} timed out before completion.")
+            yield f"event: timeout\ndata: {json.dumps({'request_id': request_id})}\n\n"
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
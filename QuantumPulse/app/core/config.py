@@ -24,6 +24,10 @@ class PulsarConfig(BaseModel):
     tls_trust_certs_file_path: Optional[str] = None
     token: Optional[str] = None
     topics: PulsarTopics
+    # Async publishing: the max number of unacknowledged messages before requests get a 503
+    max_in_flight: int = 1000
+    publish_timeout_seconds: float = 10.0
+    batching_max_publish_delay_ms: int = 10
 
 class ApiConfig(BaseModel):
     host: str
@@ -48,6 +52,37 @@ class OtelConfig(BaseModel):
     enabled: bool = True
     endpoint: Optional[str] = "http://localhost:4317" # OTLP gRPC endpoint
 
+class ResultsConfig(BaseModel):
+    """Configuration for the in-process result store and its Pulsar consumer."""
+    max_entries: int = 10000
+    ttl_seconds: float = 600.0
+    batch_max_messages: int = 100
+    batch_timeout_ms: int = 50
+
+class DPOTrainingConfig(BaseModel):
+    """Trainer settings for DPO jobs. Unset ones keep the trainer's defaults."""
+    per_device_train_batch_size: Optional[int] = None
+    gradient_accumulation_steps: Optional[int] = None
+    num_train_epochs: Optional[float] = None
+    learning_rate: Optional[float] = None
+    warmup_steps: Optional[int] = None
+    save_steps: Optional[int] = None
+    max_length: Optional[int] = None
+    beta: Optional[float] = None
+
+class FineTuningConfig(BaseModel):
+    """Configuration for the queued DPO fine-tuning runner."""
+    work_dir: str = "/var/lib/quantumpulse/fine-tuning"
+    max_concurrent_jobs: int = 1
+    max_queued_jobs: int = 16
+    # Per-worker-process limits, so training can't starve inference on the same host
+    num_threads: Optional[int] = 4
+    memory_limit_mb: Optional[int] = None
+    # How long inference traffic must be quiet before 'idle' scheduled jobs start
+    idle_seconds: float = 60.0
+    push_to_hub: bool = True
+    training: DPOTrainingConfig = Field(default_factory=DPOTrainingConfig)
+
 class AppConfig(BaseModel):
     """The main configuration model for the application."""
     service_name: str
@@ -58,6 +93,8 @@ class AppConfig(BaseModel):
     models: List[ModelShardConfig]
     flink: FlinkConfig
     otel: OtelConfig = Field(default_factory=OtelConfig)
+    results: ResultsConfig = Field(default_factory=ResultsConfig)
+    fine_tuning: FineTuningConfig = Field(default_factory=FineTuningConfig)
 
 # --- Configuration Loading ---
 
@@ -6,6 +6,7 @@ from typing import Dict, Any
 
 from transformers import AutoModelForCausalLM, AutoTokenizer
 from shared.vault_client import VaultClient
+from app.core.prefix_cache import PrefixCache
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +18,9 @@ class ModelManager:
     def __init__(self):
         self._models: Dict[str, Any] = {}
         self._tokenizers: Dict[str, Any] = {}
+        self._prefix_caches: Dict[str, PrefixCache] = {}
+        # Memory budget for each model's KV prefix cache
+        self._prefix_cache_max_bytes = int(os.getenv("PREFIX_CACHE_MAX_BYTES", 2 * 1024 ** 3))
         self._lock = Lock()
         self._hf_token = None
 
@@ -69,5 +73,14 @@ class ModelManager:
             
             return self._models.get(model_name), self._tokenizers.get(model_name)
 
+    def get_prefix_cache(self, model_name: str) -> PrefixCache:
+        """
+        Retrieves the KV prefix cache for a model, creating it on first use.
+        """
+        with self._lock:
+            if model_name not in self._prefix_caches:
+                self._prefix_caches[model_name] = PrefixCache(model_name, max_bytes=self._prefix_cache_max_bytes)
+            return self._prefix_caches[model_name]
+
 # Singleton instance
 model_manager = ModelManager() 
\ No newline at end of file
@@ -0,0 +1,232 @@
+# QuantumPulse/app/core/prefix_cache.py
+import copy
+import hashlib
+import logging
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import torch
+
+from shared.observability.metrics import (
+    PREFIX_CACHE_BYTES,
+    PREFIX_CACHE_LOOKUPS,
+    PREFIX_CACHE_SAVED_TOKENS,
+)
+
+logger = logging.getLogger(__name__)
+
+def _cache_nbytes(past_key_values: Any) -> int:
+    """Returns the memory held by a KV cache, across transformers cache layouts."""
+    layers = getattr(past_key_values, "layers", None)
+    if layers is not None:
+        tensors = [t for layer in layers for t in (getattr(layer, "keys", None), getattr(layer, "values", None))]
+    elif hasattr(past_key_values, "key_cache"):
+        tensors = list(past_key_values.key_cache) + list(past_key_values.value_cache)
+    else:
+        # Legacy tuple-of-tuples layout: ((key, value), ...) per layer
+        tensors = [t for layer in past_key_values for t in layer]
+    return sum(t.numel() * t.element_size() for t in tensors if isinstance(t, torch.Tensor))
+
+
+class _PrefixEntry:
+    """A cached KV state for an exact token prefix."""
+
+    def __init__(self, key: str, tokens: Tuple[int, ...], past_key_values: Any, conversation_id: Optional[str]):
+        self.key = key
+        self.tokens = tokens
+        self.past_key_values = past_key_values
+        self.conversation_id = conversation_id
+        self.nbytes = _cache_nbytes(past_key_values)
+        self.block_hashes: List[str] = []
+
+
+class PrefixCache:
+    """
+    A per-worker cache of attention KV states, keyed by token-prefix hash and
+    conversation ID, so multi-turn conversations and shared system prompts
+    don't recompute attention over the same prefix on every request.
+
+    Lookups find the longest cached prefix of a prompt in two ways:
+    - the conversation's most recent entry, compared token by token (exact);
+    - a block-level hash index (every `block_size` tokens), which lets
+      different conversations share e.g. a long system prompt.
+
+    Entries are evicted least-recently-used once `max_bytes` is exceeded.
+    """
+
+    def __init__(self, model_name: str, max_bytes: int = 2 * 1024 ** 3, block_size: int = 16):
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self.block_size = block_size
+        self._entries: "OrderedDict[str, _PrefixEntry]" = OrderedDict()
+        self._block_index: Dict[str, str] = {}
+        self._conversations: Dict[str, str] = {}
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_tokens = 0
+
+    # --- Hashing ---
+
+    def _block_hashes(self, tokens: Sequence[int]) -> List[str]:
+        """Chained hashes of each complete block, so hash i identifies tokens[:(i+1)*block_size]."""
+        hashes = []
+        digest = b""
+        for start in range(0, len(tokens) - self.block_size + 1, self.block_size):
+            block = ",".join(str(t) for t in tokens[start:start + self.block_size]).encode("utf-8")
+            digest = hashlib.sha1(digest + block).digest()
+            hashes.append(digest.hex())
+        return hashes
+
+    @staticmethod
+    def _common_prefix_length(a: Sequence[int], b: Sequence[int]) -> int:
+        length = min(len(a), len(b))
+        for i in range(length):
+            if a[i] != b[i]:
+                return i
+        return length
+
+    # --- Public API ---
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, tokens: Sequence[int], conversation_id: Optional[str] = None) -> Tuple[int, Optional[Any]]:
+        """
+        Finds the longest cached prefix of `tokens`. Returns the number of
+        reusable tokens and a private copy of the KV cache cropped to that
+        length (generation mutates the cache in place). At least one token is
+        always left uncached so the model produces logits for the last position.
+        """
+        tokens = tuple(tokens)
+        max_reuse = len(tokens) - 1
+        best_entry, best_length = None, 0
+
+        with self._lock:
+            if conversation_id and conversation_id in self._conversations:
+                entry = self._entries.get(self._conversations[conversation_id])
+                if entry is not None:
+                    best_entry, best_length = entry, self._common_prefix_length(entry.tokens, tokens)
+
+            hashes = self._block_hashes(tokens)
+            for i in range(len(hashes) - 1, -1, -1):
+                length = (i + 1) * self.block_size
+                if length <= best_length:
+                    break
+                entry_key = self._block_index.get(hashes[i])
+                if entry_key is not None and entry_key in self._entries:
+                    best_entry, best_length = self._entries[entry_key], length
+                    break
+
+            reuse = min(best_length, max_reuse)
+            if best_entry is None or reuse <= 0:
+                self.misses += 1
+                PREFIX_CACHE_LOOKUPS.labels(model=self.model_name, result="miss").inc()
+                return 0, None
+
+            self._entries.move_to_end(best_entry.key)
+            past_key_values = copy.deepcopy(best_entry.past_key_values)
+
+        cached_length = past_key_values.get_seq_length()
+        if reuse < cached_length:
+            # A negative crop removes that many tokens from the end.
+            past_key_values.crop(reuse - cached_length)
+
+        self.hits += 1
+        self.saved_tokens += reuse
+        PREFIX_CACHE_LOOKUPS.labels(model=self.model_name, result="hit").inc()
+        PREFIX_CACHE_SAVED_TOKENS.labels(model=self.model_name).inc(reuse)
+        return reuse, past_key_values
+
+    def store(self, tokens: Sequence[int], past_key_values: Any, conversation_id: Optional[str] = None):
+        """
+        Caches the KV state for `tokens`. The cache must cover exactly the
+        first `past_key_values.get_seq_length()` tokens of `tokens`.
+        """
+        cached_length = past_key_values.get_seq_length()
+        tokens = tuple(tokens[:cached_length])
+        if not tokens:
+            return
+
+        block_hashes = self._block_hashes(tokens)
+        key = block_hashes[-1] + f":{len(tokens)}" if block_hashes else f"short:{hash(tokens)}"
+        entry = _PrefixEntry(key, tokens, past_key_values, conversation_id)
+        entry.block_hashes = block_hashes
+        if entry.nbytes > self.max_bytes:
+            logger.debug(f"Not caching a {entry.nbytes} byte prefix; it exceeds the cache budget.")
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.nbytes
+            # The newest entry wins the block slots it shares with older ones
+            for block_hash in block_hashes:
+                self._block_index[block_hash] = key
+            if conversation_id:
+                self._conversations[conversation_id] = key
+
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+            PREFIX_CACHE_BYTES.labels(model=self.model_name).set(self._bytes)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._block_index.clear()
+            self._conversations.clear()
+            self._bytes = 0
+            PREFIX_CACHE_BYTES.labels(model=self.model_name).set(0)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.nbytes
+        for block_hash in entry.block_hashes:
+            if self._block_index.get(block_hash) == key:
+                del self._block_index[block_hash]
+        if entry.conversation_id and self._conversations.get(entry.conversation_id) == key:
+            del self._conversations[entry.conversation_id]
+
+
+def generate_with_prefix_cache(
+    model: Any,
+    input_ids: torch.Tensor,
+    prefix_cache: Optional[PrefixCache],
+    conversation_id: Optional[str] = None,
+    **generate_kwargs
+) -> Tuple[torch.Tensor, int]:
+    """
+    Runs `model.generate` for a single sequence, reusing the longest cached
+    prefix and caching the resulting KV state (prompt and completion) for the
+    next turn. Returns the full output sequence and the number of prompt
+    tokens that were served from the cache.
+    """
+    if prefix_cache is None:
+        with torch.no_grad():
+            return model.generate(input_ids, attention_mask=torch.ones_like(input_ids), **generate_kwargs), 0
+
+    tokens = input_ids[0].tolist()
+    reused, past_key_values = prefix_cache.lookup(tokens, conversation_id)
+    if past_key_values is not None:
+        generate_kwargs["past_key_values"] = past_key_values
+
+    with torch.no_grad():
+        output = model.generate(
+            input_ids,
+            attention_mask=torch.ones_like(input_ids),
+            return_dict_in_generate=True,
+            use_cache=True,
+            **generate_kwargs
+        )
+
+    if output.past_key_values is not None:
+        prefix_cache.store(output.sequences[0].tolist(), output.past_key_values, conversation_id)
+    return output.sequences, reused
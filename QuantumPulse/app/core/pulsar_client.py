@@ -1,29 +1,47 @@
 import pulsar
 from pulsar.schema import JsonSchema
+import asyncio
 import logging
-from typing import Dict, Any, Optional
+import threading
+import time
+from typing import Dict, Any, List, Optional
 
 from app.models.inference import InferenceRequest
 from opentelemetry import trace
-from opentelemetry.propagate import inject, extract, TextMapPropagator
+from opentelemetry.propagate import inject, extract
+from opentelemetry.propagators.textmap import Getter, Setter
+from shared.observability.metrics import (
+    PULSAR_PUBLISH_IN_FLIGHT,
+    PULSAR_PUBLISH_LATENCY,
+    PULSAR_PUBLISH_TOTAL,
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class PulsarMessageTextMapPropagator(TextMapPropagator):
-    """A custom propagator for Pulsar message properties."""
-    def get(self, carrier: Dict[str, str], key: str) -> Optional[str]:
-        return carrier.get(key)
+class PulsarMessageTextMapPropagator(Getter, Setter):
+    """A custom getter/setter for carrying trace context in Pulsar message properties."""
+    def get(self, carrier: Dict[str, str], key: str) -> Optional[List[str]]:
+        value = carrier.get(key)
+        return [value] if value is not None else None
 
     def set(self, carrier: Dict[str, str], key: str, value: str):
         carrier[key] = value
 
-    def fields(self) -> set:
-        return set() # Not strictly needed for injection
+    def keys(self, carrier: Dict[str, str]) -> List[str]:
+        return list(carrier.keys())
 
 propagator = PulsarMessageTextMapPropagator()
 
+class PublishBackpressureError(Exception):
+    """Raised when the in-flight publish window is full and the request should be retried later."""
+    pass
+
+class PublishError(ConnectionError):
+    """Raised when Pulsar fails or times out acknowledging a published message."""
+    pass
+
 class PulsarManager:
     """
     Manages the connection to Pulsar and handles producers and consumers.
@@ -31,10 +49,27 @@ class PulsarManager:
     _client: Optional[pulsar.Client] = None
     _producers: Dict[str, pulsar.Producer] = {}
 
-    def __init__(self, service_url: str, token: Optional[str] = None, tls_trust_certs_file_path: Optional[str] = None):
+    def __init__(
+        self,
+        service_url: str,
+        token: Optional[str] = None,
+        tls_trust_certs_file_path: Optional[str] = None,
+        max_in_flight: int = 1000,
+        publish_timeout_seconds: float = 10.0,
+        batching_max_publish_delay_ms: int = 10,
+        batching_max_messages: int = 1000,
+    ):
         self.service_url = service_url
         self.token = token
         self.tls_trust_certs_file_path = tls_trust_certs_file_path
+        self.max_in_flight = max_in_flight
+        self.publish_timeout_seconds = publish_timeout_seconds
+        self.batching_max_publish_delay_ms = batching_max_publish_delay_ms
+        self.batching_max_messages = batching_max_messages
+        self._in_flight = 0
+        # Slots are released by send_async callbacks, on Pulsar IO threads
+        self._in_flight_lock = threading.Lock()
+        self._producers_lock = threading.Lock()
 
     def connect(self):
         """
@@ -85,18 +120,28 @@ class PulsarManager:
         if not self._client:
             raise ConnectionError("Pulsar client is not connected. Call connect() first.")
 
-        if topic not in self._producers:
+        with self._producers_lock:
+            if topic in self._producers:
+                return self._producers[topic]
             try:
+                # Batching lets concurrent async sends share a single broker round trip.
+                # The producer queue never blocks the caller; the in-flight window
+                # in publish_request_async is what applies backpressure.
                 self._producers[topic] = self._client.create_producer(
                     topic,
                     schema=schema,
-                    properties={"producer-name": f"quantumpulse-api-{topic}"}
+                    properties={"producer-name": f"quantumpulse-api-{topic}"},
+                    batching_enabled=True,
+                    batching_max_messages=self.batching_max_messages,
+                    batching_max_publish_delay_ms=self.batching_max_publish_delay_ms,
+                    max_pending_messages=self.max_in_flight,
+                    block_if_queue_full=False,
                 )
                 logger.info("Created producer for topic: %s", topic)
             except Exception as e:
                 logger.error("Failed to create producer for topic %s: %s", topic, e, exc_info=True)
                 raise
-        return self._producers[topic]
+            return self._producers[topic]
 
     def publish_request(self, topic: str, request: InferenceRequest):
         """
@@ -105,7 +150,7 @@ class PulsarManager:
         try:
             properties = {}
             # Inject the current tracing context into the message properties
-            inject(properties, propagator=propagator)
+            inject(properties, setter=propagator)
             
             producer = self.get_producer(topic, JsonSchema(type(request)))
             producer.send(request, properties=properties)
@@ -118,6 +163,91 @@ class PulsarManager:
             # Optionally re-raise or handle the error
             raise
 
+    @property
+    def in_flight(self) -> int:
+        """The number of published messages still awaiting a broker acknowledgement."""
+        return self._in_flight
+
+    def _release_slot(self):
+        with self._in_flight_lock:
+            self._in_flight -= 1
+            PULSAR_PUBLISH_IN_FLIGHT.set(self._in_flight)
+
+    async def publish_request_async(self, topic: str, request: InferenceRequest, timeout: Optional[float] = None):
+        """
+        Publishes an inference request without blocking the event loop and waits
+        for the broker acknowledgement. The producer's `send_async` callback runs
+        on a Pulsar IO thread, so its result is bridged back onto the loop.
+
+        Raises PublishBackpressureError if the in-flight window is full, and
+        PublishError if the broker rejects the message or does not ack in time.
+        A message that timed out keeps its slot in the window until the producer
+        reports on it, since it is still queued. A topic's producer is created
+        on first use, off the event loop.
+        """
+        with self._in_flight_lock:
+            if self._in_flight >= self.max_in_flight:
+                PULSAR_PUBLISH_TOTAL.labels(topic=topic, result="rejected").inc()
+                raise PublishBackpressureError(
+                    f"Too many in-flight publishes ({self._in_flight}/{self.max_in_flight})."
+                )
+            self._in_flight += 1
+            PULSAR_PUBLISH_IN_FLIGHT.set(self._in_flight)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def _set_result(res, msg_id):
+            if future.done():
+                return
+            if res == pulsar.Result.Ok:
+                future.set_result(msg_id)
+            else:
+                future.set_exception(PublishError(f"Pulsar rejected the message: {res}"))
+
+        def callback(res, msg_id):
+            self._release_slot()
+            try:
+                loop.call_soon_threadsafe(_set_result, res, msg_id)
+            except RuntimeError:
+                # The caller's loop has closed; nobody is waiting any more
+                pass
+
+        properties = {}
+        # Inject the current tracing context into the message properties
+        inject(properties, setter=propagator)
+
+        start_time = time.monotonic()
+        result = "error"
+        sent = False
+        try:
+            producer = self._producers.get(topic)
+            if producer is None:
+                # Creating a producer blocks on a broker round trip
+                producer = await loop.run_in_executor(None, self.get_producer, topic, JsonSchema(type(request)))
+            producer.send_async(request, callback, properties=properties)
+            sent = True
+            msg_id = await asyncio.wait_for(future, timeout or self.publish_timeout_seconds)
+            result = "ok"
+            logger.info("Published request %s to topic %s with trace context.", request.request_id, topic)
+            return msg_id
+        except asyncio.TimeoutError as e:
+            result = "timeout"
+            logger.error("Timed out publishing request %s to topic %s.", request.request_id, topic)
+            raise PublishError(f"Timed out waiting for Pulsar to acknowledge request {request.request_id}.") from e
+        except Exception as e:
+            logger.error(
+                "Failed to publish request %s to topic %s: %s",
+                request.request_id, topic, e, exc_info=True
+            )
+            raise
+        finally:
+            if not sent:
+                # The callback will never run for a message that wasn't queued
+                self._release_slot()
+            PULSAR_PUBLISH_LATENCY.labels(topic=topic).observe(time.monotonic() - start_time)
+            PULSAR_PUBLISH_TOTAL.labels(topic=topic, result=result).inc()
+
 # A global instance to be initialized on app startup
 pulsar_manager: Optional[PulsarManager] = None
 
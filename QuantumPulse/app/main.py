@@ -1,15 +1,23 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 import uvicorn
 import logging
 import structlog
 
-from app.api.endpoints import inference, fine_tuning, chat
+from app.api.endpoints import inference, fine_tuning, chat, results
 from app.core.pulsar_client import PulsarManager
 from app.core import pulsar_client as pulsar_manager_module
+from app.services import result_store as result_store_module
+from app.services import results_handler as results_handler_module
+from app.services.result_store import ResultStore, InMemoryResultBackend
+from app.services.results_handler import ResultsHandler
+from app.services import fine_tuning_queue as fine_tuning_queue_module
+from app.services.fine_tuning_queue import FineTuningQueue
+from app.core.model_manager import model_manager
 from app.core.config import config
 from shared.opentelemetry.tracing import setup_tracing
 from shared.observability.logging_config import setup_logging
 from shared.observability.metrics import setup_metrics
+from shared.q_auth_parser.parser import start_revocation_feed, stop_revocation_feed
 
 # --- Logging and Metrics Setup ---
 setup_logging()
@@ -28,6 +36,20 @@ setup_metrics(app, app_name=config.service_name)
 # Setup OpenTelemetry
 setup_tracing(app)
 
+@app.middleware("http")
+async def track_serving_activity(request: Request, call_next):
+    """Tells the fine-tuning queue about inference traffic for idle-time scheduling."""
+    queue = fine_tuning_queue_module.fine_tuning_queue
+    if queue and request.url.path.startswith(("/v1/inference", "/v1/chat")):
+        queue.mark_activity()
+    return await call_next(request)
+
+def load_fine_tuned_model(job):
+    """Loads a completed job's model into the ModelManager."""
+    model_name = job.new_model_name if config.fine_tuning.push_to_hub else job.model_dir
+    logger.info(f"Attempting to dynamically load new model '{model_name}'...")
+    model_manager.load_model(model_name)
+
 @app.on_event("startup")
 def startup_event():
     """
@@ -35,10 +57,14 @@ def startup_event():
     Initializes the Pulsar manager and connects to the cluster.
     """
     logger.info("Application startup...")
+    start_revocation_feed()
     pulsar_manager_module.pulsar_manager = PulsarManager(
         service_url=config.pulsar.service_url,
         token=config.pulsar.token,
-        tls_trust_certs_file_path=config.pulsar.tls_trust_certs_file_path
+        tls_trust_certs_file_path=config.pulsar.tls_trust_certs_file_path,
+        max_in_flight=config.pulsar.max_in_flight,
+        publish_timeout_seconds=config.pulsar.publish_timeout_seconds,
+        batching_max_publish_delay_ms=config.pulsar.batching_max_publish_delay_ms
     )
     try:
         pulsar_manager_module.pulsar_manager.connect()
@@ -47,6 +73,36 @@ def startup_event():
         # Depending on the desired behavior, you might want to exit the application
         # exit(1)
 
+    # Results are consumed in-process so /v1/results can serve them without reply topics
+    result_store_module.result_store = ResultStore(
+        backend=InMemoryResultBackend(
+            max_entries=config.results.max_entries,
+            ttl_seconds=config.results.ttl_seconds
+        )
+    )
+    results_handler_module.results_handler = ResultsHandler(
+        store=result_store_module.result_store,
+        batch_max_messages=config.results.batch_max_messages,
+        batch_timeout_ms=config.results.batch_timeout_ms
+    )
+    try:
+        results_handler_module.results_handler.start()
+    except Exception as e:
+        logger.error(f"Failed to start the results handler: {e}", exc_info=True)
+
+    fine_tuning_queue_module.fine_tuning_queue = FineTuningQueue(
+        work_dir=config.fine_tuning.work_dir,
+        max_concurrent_jobs=config.fine_tuning.max_concurrent_jobs,
+        max_queued_jobs=config.fine_tuning.max_queued_jobs,
+        num_threads=config.fine_tuning.num_threads,
+        memory_limit_mb=config.fine_tuning.memory_limit_mb,
+        idle_seconds=config.fine_tuning.idle_seconds,
+        push_to_hub=config.fine_tuning.push_to_hub,
+        training=config.fine_tuning.training.model_dump(exclude_none=True),
+        on_complete=load_fine_tuned_model
+    )
+    fine_tuning_queue_module.fine_tuning_queue.start()
+
 @app.on_event("shutdown")
 def shutdown_event():
     """
@@ -54,13 +110,20 @@ def shutdown_event():
     Closes the Pulsar client connection.
     """
     logger.info("Application shutdown...")
+    if fine_tuning_queue_module.fine_tuning_queue:
+        # Running jobs are re-queued and resume from their last checkpoint on restart
+        fine_tuning_queue_module.fine_tuning_queue.stop()
+    if results_handler_module.results_handler:
+        results_handler_module.results_handler.close()
     if pulsar_manager_module.pulsar_manager:
         pulsar_manager_module.pulsar_manager.close()
+    stop_revocation_feed()
 
 # --- API Routers ---
 app.include_router(inference.router, prefix="/v1/inference", tags=["Inference"])
 app.include_router(fine_tuning.router, prefix="/v1/fine-tune", tags=["Fine-Tuning"])
 app.include_router(chat.router, prefix="/v1/chat", tags=["Chat"])
+app.include_router(results.router, prefix="/v1/results", tags=["Results"])
 
 @app.get("/health", tags=["Health"])
 def health_check():
@@ -11,6 +11,7 @@ class ChatRequest(BaseModel):
     temperature: float = 0.7
     max_tokens: int = 1500
     stream: bool = False # Streaming is not yet supported on this endpoint
+    conversation_id: Optional[str] = None # Lets the KV prefix cache reuse earlier turns
 
 class ChatChoice(BaseModel):
     index: int
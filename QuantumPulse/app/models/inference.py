@@ -2,6 +2,10 @@ from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
 import uuid
 
+# The API stores the submitting user here; workers echo it on their responses,
+# so every API replica knows whose result a chunk is
+OWNER_METADATA_KEY = "owner"
+
 class InferenceRequest(BaseModel):
     """
     Represents a request for inference from a client.
@@ -25,18 +29,33 @@ class InferenceResponse(BaseModel):
     model: str
     text: str
     is_final: bool = True
+    sequence: Optional[int] = None # Position of this chunk in a streamed response
     conversation_id: Optional[str] = None
     reply_to_topic: Optional[str] = None # Echo the reply topic for context
     input_tokens: Optional[int] = None
     output_tokens: Optional[int] = None
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
+class InferenceResult(BaseModel):
+    """
+    The assembled result of an inference request, as returned by the results API.
+    """
+    request_id: str
+    status: str # 'pending' or 'completed'
+    model: Optional[str] = None
+    text: str = ""
+    chunks_received: int = 0
+    conversation_id: Optional[str] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+
 class PreprocessedInferenceRequest(InferenceRequest):
     """
     Represents a request after initial preprocessing (e.g., cleaning, tokenizing).
     This is an internal representation.
     """
     tokens: List[int] = Field(default_factory=list)
+    prompt_tokens: Optional[int] = None # Token count after optimization, used for cost-based routing
 
 class RoutedInferenceRequest(PreprocessedInferenceRequest):
     """
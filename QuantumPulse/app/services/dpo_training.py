@@ -0,0 +1,167 @@
+"""
+The DPO training entry point, executed in a dedicated worker process by the
+FineTuningQueue. Heavy ML libraries are only imported here, after the
+process's resource limits have been applied, so the API process never loads
+trl and training never competes with inference for the same interpreter.
+"""
+import json
+import logging
+import math
+import os
+import resource
+import sys
+import time
+import traceback
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SPEC_FILE = "spec.json"
+STATUS_FILE = "status.json"
+DATASET_FILE = "dataset.jsonl"
+
+def write_json(path: str, data: Dict[str, Any]):
+    """Writes JSON atomically so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def apply_resource_limits(num_threads: Optional[int], memory_limit_mb: Optional[int]):
+    """
+    Caps the training process's CPU threads and address space. Must run
+    before torch is imported so the thread pools pick up the limits.
+    """
+    if num_threads:
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "TOKENIZERS_PARALLELISM"):
+            os.environ[var] = "false" if var == "TOKENIZERS_PARALLELISM" else str(num_threads)
+    if memory_limit_mb:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+def count_examples(dataset_path: str) -> int:
+    """Counts JSONL records without loading them into memory."""
+    with open(dataset_path) as f:
+        return sum(1 for line in f if line.strip())
+
+def latest_checkpoint(output_dir: str) -> Optional[str]:
+    if not os.path.isdir(output_dir):
+        return None
+    checkpoints = [d for d in os.listdir(output_dir) if d.startswith("checkpoint-")]
+    if not checkpoints:
+        return None
+    return os.path.join(output_dir, max(checkpoints, key=lambda d: int(d.split("-")[-1])))
+
+def run_dpo_job(job_dir: str):
+    """
+    Runs one DPO fine-tuning job described by `<job_dir>/spec.json`.
+    Progress is reported through `<job_dir>/status.json`. Training resumes
+    from the latest checkpoint if the job was interrupted.
+    """
+    logging.basicConfig(level=logging.INFO)
+    status_path = os.path.join(job_dir, STATUS_FILE)
+    spec = read_json(os.path.join(job_dir, SPEC_FILE))
+    try:
+        apply_resource_limits(spec.get("num_threads"), spec.get("memory_limit_mb"))
+
+        import torch
+        from datasets import load_dataset
+        from transformers import AutoModelForCausalLM, AutoTokenizer, TrainerCallback
+        from trl import DPOConfig, DPOTrainer
+
+        if spec.get("num_threads"):
+            torch.set_num_threads(spec["num_threads"])
+
+        class StatusCallback(TrainerCallback):
+            """Publishes step and loss to the status file for the API to read."""
+            def on_log(self, args, state, control, logs=None, **kwargs):
+                write_json(status_path, {
+                    "state": "running",
+                    "step": state.global_step,
+                    "max_steps": state.max_steps,
+                    "loss": (logs or {}).get("loss"),
+                    "updated_at": time.time()
+                })
+
+        training = spec.get("training", {})
+        batch_size = training.get("per_device_train_batch_size", 2)
+        grad_accum = training.get("gradient_accumulation_steps", 4)
+        epochs = training.get("num_train_epochs", 1)
+        dataset_path = spec["dataset_path"]
+
+        # A streamed dataset has no length, so the step budget is derived up front
+        num_examples = count_examples(dataset_path)
+        max_steps = max(math.ceil(num_examples / (batch_size * grad_accum)) * epochs, 1)
+        train_dataset = load_dataset("json", data_files=dataset_path, split="train", streaming=True)
+
+        model = AutoModelForCausalLM.from_pretrained(spec["model_to_fine_tune"])
+        tokenizer = AutoTokenizer.from_pretrained(spec["model_to_fine_tune"])
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+
+        hf_token = None
+        if spec.get("push_to_hub"):
+            from shared.vault_client import VaultClient
+            hf_token = VaultClient().read_secret("secret/data/huggingface", "token")
+            if not hf_token:
+                raise ValueError("Hugging Face token not found in Vault.")
+
+        output_dir = os.path.join(job_dir, "checkpoints")
+        training_args = DPOConfig(
+            output_dir=output_dir,
+            per_device_train_batch_size=batch_size,
+            gradient_accumulation_steps=grad_accum,
+            learning_rate=training.get("learning_rate", 5e-5),
+            max_steps=max_steps,
+            lr_scheduler_type="cosine",
+            warmup_steps=training.get("warmup_steps", 10),
+            logging_steps=1,
+            save_steps=training.get("save_steps", 50),
+            save_total_limit=2,
+            max_length=training.get("max_length", 1024),
+            beta=training.get("beta", 0.1),
+            report_to=[],
+            use_cpu=not torch.cuda.is_available(),
+            push_to_hub=bool(spec.get("push_to_hub")),
+            hub_model_id=spec.get("new_model_name"),
+            hub_token=hf_token,
+        )
+
+        dpo_trainer = DPOTrainer(
+            model,
+            args=training_args,
+            train_dataset=train_dataset,
+            processing_class=tokenizer,
+            callbacks=[StatusCallback()],
+        )
+        resume_from = latest_checkpoint(output_dir)
+        if resume_from:
+            logger.info(f"Resuming fine-tuning job {spec['job_id']} from {resume_from}.")
+        dpo_trainer.train(resume_from_checkpoint=resume_from)
+
+        final_dir = os.path.join(job_dir, "model")
+        dpo_trainer.save_model(final_dir)
+        if spec.get("push_to_hub"):
+            dpo_trainer.push_to_hub()
+
+        write_json(status_path, {
+            "state": "completed",
+            "step": dpo_trainer.state.global_step,
+            "max_steps": max_steps,
+            "model_dir": final_dir,
+            "updated_at": time.time()
+        })
+        logger.info(f"Fine-tuning job {spec['job_id']} completed.")
+    except Exception as e:
+        logger.error(f"Fine-tuning job {spec.get('job_id') if spec else job_dir} failed: {e}", exc_info=True)
+        status = read_json(status_path) or {}
+        status.update({"state": "failed", "error": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc(), "updated_at": time.time()})
+        write_json(status_path, status)
+        sys.exit(1)
@@ -0,0 +1,341 @@
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.services.dpo_training import (
+    DATASET_FILE,
+    SPEC_FILE,
+    STATUS_FILE,
+    read_json,
+    run_dpo_job,
+    write_json,
+)
+
+logger = logging.getLogger(__name__)
+
+JOB_FILE = "job.json"
+
+class FineTuneJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+TERMINAL_STATUSES = {FineTuneJobStatus.COMPLETED, FineTuneJobStatus.FAILED, FineTuneJobStatus.CANCELLED}
+
+class FineTuneSchedule(str, Enum):
+    IMMEDIATE = "immediate"
+    # Only start once the service has seen no inference traffic for `idle_seconds`
+    IDLE = "idle"
+
+class FineTuneJob(BaseModel):
+    job_id: str
+    status: FineTuneJobStatus = FineTuneJobStatus.QUEUED
+    model_to_fine_tune: str
+    new_model_name: str
+    schedule: FineTuneSchedule = FineTuneSchedule.IMMEDIATE
+    submitted_by: Optional[str] = None
+    created_at: float = Field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    attempts: int = 0
+    progress: Dict[str, Any] = Field(default_factory=dict)
+    error: Optional[str] = None
+    model_dir: Optional[str] = None
+
+
+class QueueFullError(Exception):
+    """Raised when the fine-tuning queue is at capacity."""
+    pass
+
+
+class FineTuningQueue:
+    """
+    A bounded queue of DPO fine-tuning jobs, executed one at a time (or
+    `max_concurrent_jobs`) in separate worker processes so training never
+    shares the API process's interpreter, threads or memory.
+
+    Each job lives in its own directory under `work_dir` (spec, spooled
+    dataset, status and checkpoints), so jobs survive restarts: unfinished
+    jobs are re-queued on start and resume from their latest checkpoint.
+    """
+
+    def __init__(
+        self,
+        work_dir: str,
+        max_concurrent_jobs: int = 1,
+        max_queued_jobs: int = 16,
+        num_threads: Optional[int] = None,
+        memory_limit_mb: Optional[int] = None,
+        idle_seconds: float = 60.0,
+        poll_interval: float = 1.0,
+        push_to_hub: bool = True,
+        training: Optional[Dict[str, Any]] = None,
+        on_complete: Optional[Callable[[FineTuneJob], None]] = None,
+        job_runner: Callable[[str], None] = run_dpo_job,
+    ):
+        self.work_dir = work_dir
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.max_queued_jobs = max_queued_jobs
+        self.num_threads = num_threads
+        self.memory_limit_mb = memory_limit_mb
+        self.idle_seconds = idle_seconds
+        self.poll_interval = poll_interval
+        self.push_to_hub = push_to_hub
+        self.training = training or {}
+        self.on_complete = on_complete
+        self.job_runner = job_runner
+
+        # 'spawn' gives the trainer a fresh interpreter instead of a fork of the API server
+        self._mp = multiprocessing.get_context("spawn")
+        self._jobs: Dict[str, FineTuneJob] = {}
+        self._processes: Dict[str, multiprocessing.process.BaseProcess] = {}
+        self._cancelling: set = set()
+        self._lock = threading.RLock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._scheduler: Optional[threading.Thread] = None
+        self._last_activity = 0.0
+        os.makedirs(self.work_dir, exist_ok=True)
+
+    # --- Job Submission & Queries ---
+
+    def submit(
+        self,
+        model_to_fine_tune: str,
+        new_model_name: str,
+        dataset: Iterable[Dict[str, Any]],
+        schedule: FineTuneSchedule = FineTuneSchedule.IMMEDIATE,
+        submitted_by: Optional[str] = None,
+    ) -> FineTuneJob:
+        """
+        Queues a job. The dataset is spooled to disk as JSONL so the worker
+        can stream it instead of holding it in memory.
+        """
+        with self._lock:
+            queued = sum(1 for job in self._jobs.values() if job.status == FineTuneJobStatus.QUEUED)
+            if queued >= self.max_queued_jobs:
+                raise QueueFullError(f"The fine-tuning queue is full ({queued} jobs waiting).")
+
+            job = FineTuneJob(
+                job_id=f"ft-job-{uuid.uuid4()}",
+                model_to_fine_tune=model_to_fine_tune,
+                new_model_name=new_model_name,
+                schedule=schedule,
+                submitted_by=submitted_by,
+            )
+            job_dir = self._job_dir(job.job_id)
+            os.makedirs(job_dir)
+            with open(os.path.join(job_dir, DATASET_FILE), "w") as f:
+                for example in dataset:
+                    f.write(json.dumps(example) + "\n")
+            write_json(os.path.join(job_dir, SPEC_FILE), {
+                "job_id": job.job_id,
+                "model_to_fine_tune": model_to_fine_tune,
+                "new_model_name": new_model_name,
+                "dataset_path": os.path.join(job_dir, DATASET_FILE),
+                "push_to_hub": self.push_to_hub,
+                "num_threads": self.num_threads,
+                "memory_limit_mb": self.memory_limit_mb,
+                "training": self.training,
+            })
+            self._jobs[job.job_id] = job
+            self._save(job)
+
+        logger.info(f"Queued fine-tuning job '{job.job_id}' ({schedule.value}).")
+        self._wakeup.set()
+        return job.model_copy()
+
+    def get(self, job_id: str) -> Optional[FineTuneJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status == FineTuneJobStatus.RUNNING:
+                job.progress = self._read_progress(job_id)
+            return job.model_copy()
+
+    def list(self) -> List[FineTuneJob]:
+        with self._lock:
+            return [self.get(job_id) for job_id in self._jobs]
+
+    def cancel(self, job_id: str) -> FineTuneJob:
+        """
+        Cancels a queued or running job. Running jobs are terminated; their
+        checkpoints are kept on disk. Finished jobs are returned unchanged.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise KeyError(job_id)
+            if job.status == FineTuneJobStatus.QUEUED:
+                self._finish(job, FineTuneJobStatus.CANCELLED)
+            elif job.status == FineTuneJobStatus.RUNNING:
+                self._cancelling.add(job_id)
+                process = self._processes.get(job_id)
+                if process is not None and process.is_alive():
+                    process.terminate()
+        self._wakeup.set()
+        logger.info(f"Cancellation requested for fine-tuning job '{job_id}'.")
+        return self.get(job_id)
+
+    # --- Idle-Time Scheduling ---
+
+    def mark_activity(self):
+        """Records serving traffic; idle-scheduled jobs wait until it quiets down."""
+        self._last_activity = time.monotonic()
+
+    def is_idle(self) -> bool:
+        return time.monotonic() - self._last_activity >= self.idle_seconds
+
+    # --- Lifecycle ---
+
+    def start(self):
+        """Recovers unfinished jobs from `work_dir` and starts the scheduler thread."""
+        self._recover()
+        self._stopping.clear()
+        self._scheduler = threading.Thread(target=self._run, name="fine-tuning-scheduler", daemon=True)
+        self._scheduler.start()
+        logger.info(f"Fine-tuning queue started with {self.max_concurrent_jobs} slot(s).")
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Stops the scheduler and terminates running workers. Interrupted jobs
+        are put back in the queue and resume from their checkpoint next start.
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        if self._scheduler:
+            self._scheduler.join(timeout)
+        with self._lock:
+            for job_id, process in list(self._processes.items()):
+                if process.is_alive():
+                    process.terminate()
+                process.join(timeout)
+                job = self._jobs[job_id]
+                job.status = FineTuneJobStatus.QUEUED
+                self._save(job)
+            self._processes.clear()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self._tick()
+            except Exception as e:
+                logger.error(f"Error in fine-tuning scheduler: {e}", exc_info=True)
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _tick(self):
+        """Reaps finished workers, then fills free slots with eligible jobs."""
+        finished = []
+        with self._lock:
+            for job_id, process in list(self._processes.items()):
+                if process.is_alive():
+                    continue
+                process.join()
+                del self._processes[job_id]
+                finished.append(self._reap(self._jobs[job_id], process.exitcode))
+
+            queued = sorted(
+                (job for job in self._jobs.values() if job.status == FineTuneJobStatus.QUEUED),
+                key=lambda job: job.created_at
+            )
+            for job in queued:
+                if len(self._processes) >= self.max_concurrent_jobs:
+                    break
+                if job.schedule == FineTuneSchedule.IDLE and not self.is_idle():
+                    continue
+                self._launch(job)
+
+        for job in finished:
+            if job.status == FineTuneJobStatus.COMPLETED and self.on_complete:
+                try:
+                    self.on_complete(job)
+                except Exception as e:
+                    logger.error(f"Completion hook for fine-tuning job '{job.job_id}' failed: {e}", exc_info=True)
+
+    def _launch(self, job: FineTuneJob):
+        process = self._mp.Process(
+            target=self.job_runner, args=(self._job_dir(job.job_id),),
+            name=f"dpo-{job.job_id}", daemon=True
+        )
+        process.start()
+        self._processes[job.job_id] = process
+        job.status = FineTuneJobStatus.RUNNING
+        job.started_at = time.time()
+        job.attempts += 1
+        self._save(job)
+        logger.info(f"Started fine-tuning job '{job.job_id}' in worker process {process.pid}.")
+
+    def _reap(self, job: FineTuneJob, exitcode: Optional[int]) -> FineTuneJob:
+        status = read_json(os.path.join(self._job_dir(job.job_id), STATUS_FILE)) or {}
+        job.progress = {k: status[k] for k in ("step", "max_steps", "loss") if k in status}
+        if job.job_id in self._cancelling:
+            self._cancelling.discard(job.job_id)
+            self._finish(job, FineTuneJobStatus.CANCELLED)
+        elif exitcode == 0 and status.get("state") == "completed":
+            job.model_dir = status.get("model_dir")
+            self._finish(job, FineTuneJobStatus.COMPLETED)
+        else:
+            job.error = status.get("error") or f"Worker process exited with code {exitcode}."
+            self._finish(job, FineTuneJobStatus.FAILED)
+        logger.info(f"Fine-tuning job '{job.job_id}' finished with status '{job.status.value}'.")
+        return job
+
+    def _finish(self, job: FineTuneJob, status: FineTuneJobStatus):
+        job.status = status
+        job.finished_at = time.time()
+        self._save(job)
+        # The spooled dataset is only needed while the job can still run
+        if status in TERMINAL_STATUSES:
+            dataset_path = os.path.join(self._job_dir(job.job_id), DATASET_FILE)
+            if os.path.exists(dataset_path):
+                os.remove(dataset_path)
+
+    # --- Persistence ---
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.work_dir, job_id)
+
+    def _save(self, job: FineTuneJob):
+        write_json(os.path.join(self._job_dir(job.job_id), JOB_FILE), job.model_dump(mode="json"))
+
+    def _read_progress(self, job_id: str) -> Dict[str, Any]:
+        status = read_json(os.path.join(self._job_dir(job_id), STATUS_FILE)) or {}
+        return {k: status[k] for k in ("step", "max_steps", "loss") if k in status}
+
+    def _recover(self):
+        """Loads jobs persisted by a previous run; interrupted ones go back in the queue."""
+        with self._lock:
+            for job_id in os.listdir(self.work_dir):
+                data = read_json(os.path.join(self._job_dir(job_id), JOB_FILE))
+                if data is None or job_id in self._jobs:
+                    continue
+                job = FineTuneJob(**data)
+                if job.status == FineTuneJobStatus.RUNNING:
+                    job.status = FineTuneJobStatus.QUEUED
+                    self._save(job)
+                    logger.info(f"Re-queued interrupted fine-tuning job '{job_id}'.")
+                self._jobs[job_id] = job
+
+
+# A global instance to be initialized on app startup
+fine_tuning_queue: Optional[FineTuningQueue] = None
+
+def get_fine_tuning_queue() -> FineTuningQueue:
+    """
+    Dependency injector for the FineTuningQueue.
+    """
+    if not fine_tuning_queue:
+        raise RuntimeError("FineTuningQueue has not been initialized.")
+    return fine_tuning_queue
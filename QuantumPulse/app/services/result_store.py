@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel, Field
+
+from app.models.inference import OWNER_METADATA_KEY, InferenceResponse
+
+logger = logging.getLogger(__name__)
+
+class RequestIdConflictError(ValueError):
+    """Raised when a request ID is already tracked, so a new request can't take it over."""
+    pass
+
+class ResultRecord(BaseModel):
+    """
+    The correlation record for one inference request.
+    Streamed chunks are kept by sequence number and assembled in order.
+    """
+    request_id: str
+    owner: Optional[str] = None
+    model: Optional[str] = None
+    conversation_id: Optional[str] = None
+    chunks: Dict[int, str] = Field(default_factory=dict)
+    next_sequence: int = 0
+    final_sequence: Optional[int] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    created_at: float = Field(default_factory=time.time)
+    completed_at: Optional[float] = None
+
+    @property
+    def is_complete(self) -> bool:
+        return self.final_sequence is not None and len(self.chunks) == self.final_sequence + 1
+
+    def contiguous_chunks(self, start: int = 0) -> List[Tuple[int, str]]:
+        """Returns the in-order chunks from `start` up to the first gap."""
+        chunks = []
+        seq = start
+        while seq in self.chunks:
+            chunks.append((seq, self.chunks[seq]))
+            seq += 1
+        return chunks
+
+    @property
+    def text(self) -> str:
+        return "".join(text for _, text in self.contiguous_chunks())
+
+    def apply(self, response: InferenceResponse):
+        """Merges a (possibly partial) response into the record."""
+        seq = response.sequence if response.sequence is not None else self.next_sequence
+        self.chunks[seq] = response.text
+        self.next_sequence = max(self.next_sequence, seq + 1)
+        self.model = response.model or self.model
+        self.conversation_id = response.conversation_id or self.conversation_id
+        if response.input_tokens is not None:
+            self.input_tokens = response.input_tokens
+        if response.output_tokens is not None:
+            self.output_tokens = response.output_tokens
+        if response.is_final:
+            self.final_sequence = seq
+        if self.is_complete and self.completed_at is None:
+            self.completed_at = time.time()
+
+
+# --- Storage Backends ---
+
+class ResultBackend(ABC):
+    """The pluggable storage behind the ResultStore (in-memory, Ignite, ...)."""
+
+    @abstractmethod
+    def get(self, request_id: str) -> Optional[ResultRecord]:
+        pass
+
+    @abstractmethod
+    def put(self, record: ResultRecord):
+        pass
+
+    @abstractmethod
+    def delete(self, request_id: str):
+        pass
+
+
+class InMemoryResultBackend(ResultBackend):
+    """A bounded, TTL-expiring, LRU-evicting in-process backend."""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._records: "OrderedDict[str, Tuple[float, ResultRecord]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, request_id: str) -> Optional[ResultRecord]:
+        with self._lock:
+            entry = self._records.get(request_id)
+            if entry is None:
+                return None
+            expires_at, record = entry
+            if expires_at < time.monotonic():
+                del self._records[request_id]
+                return None
+            return record.model_copy(deep=True)
+
+    def put(self, record: ResultRecord):
+        with self._lock:
+            self._records[record.request_id] = (time.monotonic() + self.ttl_seconds, record.model_copy(deep=True))
+            self._records.move_to_end(record.request_id)
+            self._evict()
+
+    def delete(self, request_id: str):
+        with self._lock:
+            self._records.pop(request_id, None)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _evict(self):
+        now = time.monotonic()
+        # Entries are ordered by last write, so expired ones sit at the front
+        while self._records:
+            request_id, (expires_at, _) = next(iter(self._records.items()))
+            if expires_at >= now and len(self._records) <= self.max_entries:
+                break
+            self._records.popitem(last=False)
+
+
+# --- Result Store ---
+
+class ResultStore:
+    """
+    Correlates inference results with their requests and wakes up waiting
+    readers. Results arrive on the Pulsar consumer thread; readers are asyncio
+    tasks, so notifications are handed over with `call_soon_threadsafe`.
+    The waiter registry is always local to the process, the records themselves
+    live in the configured backend.
+    """
+
+    def __init__(self, backend: Optional[ResultBackend] = None):
+        self.backend = backend if backend is not None else InMemoryResultBackend()
+        self._lock = threading.Lock()
+        self._waiters: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+
+    def track(self, request_id: str, owner: Optional[str] = None) -> ResultRecord:
+        """
+        Registers an accepted request so GETs can tell 'pending' from 'unknown'.
+        Raises RequestIdConflictError if the ID is already tracked: an existing
+        record (and its owner) is never taken over.
+        """
+        with self._lock:
+            if self.backend.get(request_id) is not None:
+                raise RequestIdConflictError(f"Request ID '{request_id}' is already in use.")
+            record = ResultRecord(request_id=request_id, owner=owner)
+            self.backend.put(record)
+            return record
+
+    def get(self, request_id: str) -> Optional[ResultRecord]:
+        return self.backend.get(request_id)
+
+    def forget(self, request_id: str):
+        """Drops a request, e.g. when it could not be published."""
+        self.backend.delete(request_id)
+
+    def add_response(self, response: InferenceResponse) -> ResultRecord:
+        """Stores a result chunk and notifies any waiters for its request."""
+        with self._lock:
+            record = self.backend.get(response.request_id) or ResultRecord(request_id=response.request_id)
+            # Records this replica didn't track learn their owner from the response
+            if record.owner is None:
+                record.owner = response.metadata.get(OWNER_METADATA_KEY)
+            record.apply(response)
+            self.backend.put(record)
+            waiters = list(self._waiters.get(response.request_id, ()))
+
+        for loop, queue in waiters:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, None)
+            except RuntimeError:
+                # The waiter's loop has been closed; it will be unregistered by its owner.
+                pass
+        return record
+
+    def _register(self, request_id: str) -> Tuple[asyncio.AbstractEventLoop, asyncio.Queue]:
+        waiter = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._waiters.setdefault(request_id, set()).add(waiter)
+        return waiter
+
+    def _unregister(self, request_id: str, waiter: Tuple[asyncio.AbstractEventLoop, asyncio.Queue]):
+        with self._lock:
+            waiters = self._waiters.get(request_id)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[request_id]
+
+    async def wait_for_completion(self, request_id: str, timeout: float) -> Optional[ResultRecord]:
+        """
+        Long-polls until the request's result is complete or `timeout` expires.
+        Returns the latest record either way (None if the request is unknown).
+        """
+        waiter = self._register(request_id)
+        try:
+            deadline = time.monotonic() + timeout
+            while True:
+                record = self.get(request_id)
+                if record is None or record.is_complete:
+                    return record
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return record
+                try:
+                    await asyncio.wait_for(waiter[1].get(), remaining)
+                except asyncio.TimeoutError:
+                    return self.get(request_id)
+        finally:
+            self._unregister(request_id, waiter)
+
+    async def stream_chunks(self, request_id: str, timeout: float) -> AsyncIterator[Tuple[int, str, bool]]:
+        """
+        Yields `(sequence, text, is_final)` for each chunk in order, including
+        chunks that arrived before the caller subscribed. Stops after the final
+        chunk or once `timeout` passes without completion.
+        """
+        waiter = self._register(request_id)
+        try:
+            deadline = time.monotonic() + timeout
+            emitted = 0
+            while True:
+                record = self.get(request_id)
+                if record is None:
+                    return
+                for seq, text in record.contiguous_chunks(emitted):
+                    emitted = seq + 1
+                    yield seq, text, seq == record.final_sequence
+                if record.is_complete:
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    await asyncio.wait_for(waiter[1].get(), remaining)
+                except asyncio.TimeoutError:
+                    return
+        finally:
+            self._unregister(request_id, waiter)
+
+
+# A global instance to be initialized on app startup
+result_store: Optional[ResultStore] = None
+
+def get_result_store() -> ResultStore:
+    """
+    Dependency injector for the ResultStore.
+    """
+    if not result_store:
+        raise RuntimeError("ResultStore has not been initialized.")
+    return result_store
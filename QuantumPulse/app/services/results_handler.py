@@ -1,11 +1,13 @@
 import pulsar
 from pulsar.schema import JsonSchema
 import logging
+import threading
 import time
 from typing import Optional
 
 from app.models.inference import InferenceResponse
 from app.core.config import config
+from app.services.result_store import ResultStore
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -13,81 +15,102 @@ logger = logging.getLogger(__name__)
 
 class ResultsHandler:
     """
-    Consumes inference results from Pulsar and handles them.
-    
-    In a real system, this service would be responsible for:
-    - Looking up the original client connection details (e.g., from a cache like Ignite).
-    - Pushing the result back to the client via WebSocket, SSE, or a webhook.
-    - Storing the final result in a database.
+    Consumes inference results from Pulsar in batches and delivers them to the
+    ResultStore, where the results API long-polls or streams them to clients.
+
+    Every API replica keeps its own store, so each one reads the whole topic
+    with its own non-durable reader. Readers leave no subscription behind,
+    so a rescheduled pod doesn't leave a backlog growing on the topic.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        store: ResultStore,
+        batch_max_messages: int = 100,
+        batch_timeout_ms: int = 50,
+    ):
         self.config = config
+        self.store = store
+        self.batch_max_messages = batch_max_messages
+        self.batch_timeout_ms = batch_timeout_ms
         self._client: Optional[pulsar.Client] = None
-        self._consumer: Optional[pulsar.Consumer] = None
+        self._reader: Optional[pulsar.Reader] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
 
     def connect(self):
-        """Connects to Pulsar and sets up the consumer."""
+        """Connects to Pulsar and sets up the reader."""
         pulsar_conf = self.config.pulsar
         self._client = pulsar.Client(pulsar_conf.service_url)
-        
+
         results_topic = pulsar_conf.topics.results
-        self._consumer = self._client.subscribe(
+        self._reader = self._client.create_reader(
             results_topic,
-            subscription_name="results-handler-sub",
+            pulsar.MessageId.latest,
             schema=JsonSchema(InferenceResponse)
         )
-        logger.info(f"Subscribed to results topic: {results_topic}")
+        logger.info(f"Reading results topic: {results_topic}")
+
+    def _read_batch(self) -> list:
+        """
+        Waits up to `batch_timeout_ms` for a result, then takes whatever else
+        is already available, up to `batch_max_messages`.
+        """
+        try:
+            messages = [self._reader.read_next(timeout_millis=self.batch_timeout_ms)]
+        except pulsar.Timeout:
+            return []
+        while len(messages) < self.batch_max_messages and self._reader.has_message_available():
+            messages.append(self._reader.read_next())
+        return messages
 
     def run(self):
         """The main loop for the results handler."""
         self.connect()
+        self._running = True
         logger.info("Results handler started. Waiting for messages...")
 
-        while True:
+        while self._running:
             try:
-                msg = self._consumer.receive()
-                response = msg.value()
-                
-                try:
-                    logger.info(
-                        f"Received result for request {response.request_id}. "
-                        f"Final: {response.is_final}. Text: '{response.text[:100]}...'"
-                    )
-                    
-                    # Placeholder for actual result delivery logic
-                    self.deliver_result(response)
-
-                    self._consumer.acknowledge(msg)
-                except Exception as e:
-                    self._consumer.negative_acknowledge(msg)
-                    logger.error(f"Failed to handle result for request {response.request_id}: {e}", exc_info=True)
-
+                messages = self._read_batch()
             except Exception as e:
+                if not self._running:
+                    break
                 logger.error(f"An error occurred in the results handler loop: {e}", exc_info=True)
                 time.sleep(5)
+                continue
+
+            for msg in messages:
+                try:
+                    self.deliver_result(msg.value())
+                except Exception as e:
+                    logger.error(f"Failed to handle result message {msg.message_id()}: {e}", exc_info=True)
+
+    def start(self):
+        """Runs the consumer loop on a daemon thread inside the API process."""
+        self._thread = threading.Thread(target=self.run, name="results-handler", daemon=True)
+        self._thread.start()
 
     def deliver_result(self, response: InferenceResponse):
         """
-        A placeholder for the logic to deliver the result to the original client.
+        Stores the (possibly partial) result, waking any clients waiting on it.
         """
-        logger.info(f"Delivering result for request {response.request_id}...")
-        # In a real implementation, this would involve a lookup and a push.
-        time.sleep(0.1) # Simulate work
-        logger.info("Delivery placeholder finished.")
+        record = self.store.add_response(response)
+        logger.debug(
+            f"Stored result chunk for request {response.request_id}. "
+            f"Final: {response.is_final}. Complete: {record.is_complete}."
+        )
 
     def close(self):
         """Cleans up resources."""
-        if self._consumer:
-            self._consumer.close()
+        self._running = False
+        if self._reader:
+            self._reader.close()
         if self._client:
             self._client.close()
+        if self._thread:
+            self._thread.join(timeout=5)
         logger.info("Results handler resources cleaned up.")
 
-
-if __name__ == "__main__":
-    handler = ResultsHandler()
-    try:
-        handler.run()
-    except KeyboardInterrupt:
-        handler.close() 
\ No newline at end of file
+# A global instance to be initialized on app startup
+results_handler: Optional[ResultsHandler] = None
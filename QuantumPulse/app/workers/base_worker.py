@@ -5,7 +5,7 @@ import time
 from abc import ABC, abstractmethod
 from typing import List, Optional, Dict
 
-from app.models.inference import RoutedInferenceRequest, InferenceResponse
+from app.models.inference import OWNER_METADATA_KEY, RoutedInferenceRequest, InferenceResponse
 from app.core.config import config
 from opentelemetry import trace
 from opentelemetry.propagate import extract
@@ -80,7 +80,7 @@ class BaseWorker(ABC):
                 msg = self._consumer.receive()
                 
                 # Extract the trace context from message properties
-                context = extract(msg.properties(), propagator=propagator)
+                context = extract(msg.properties(), getter=propagator)
                 
                 with tracer.start_as_current_span("process_inference_request", context=context) as span:
                     request = msg.value()
@@ -95,14 +95,16 @@ class BaseWorker(ABC):
 
                     try:
                         response = self.infer(request)
+                        # Lets every API replica tell whose result this is
+                        if OWNER_METADATA_KEY in request.metadata:
+                            response.metadata[OWNER_METADATA_KEY] = request.metadata[OWNER_METADATA_KEY]
                         
-                        # Dynamically get a producer for the reply topic
-                        if request.reply_to_topic:
-                            reply_producer = self._get_producer(request.reply_to_topic)
-                            reply_producer.send(response)
-                            logger.info(f"Sent response for request {request.request_id} to topic {request.reply_to_topic}")
-                        else:
-                            logger.warning(f"No reply_to_topic specified for request {request.request_id}. Dropping response.")
+                        # Reply on the caller's topic if it asked for one; otherwise publish to
+                        # the shared results topic, where the API's ResultsHandler picks it up.
+                        reply_topic = request.reply_to_topic or self.config.pulsar.topics.results
+                        reply_producer = self._get_producer(reply_topic)
+                        reply_producer.send(response)
+                        logger.info(f"Sent response for request {request.request_id} to topic {reply_topic}")
 
                         self._consumer.acknowledge(msg)
                         logger.info(f"Successfully processed and acknowledged request: {request.request_id}")
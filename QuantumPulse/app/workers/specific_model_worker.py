@@ -1,9 +1,13 @@
 import logging
-import time
+import os
 import argparse
 
+from prometheus_client import start_http_server
+
 from app.workers.base_worker import BaseWorker
 from app.models.inference import RoutedInferenceRequest, InferenceResponse
+from app.core.model_manager import model_manager
+from app.core.prefix_cache import generate_with_prefix_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -12,48 +16,60 @@ logger = logging.getLogger(__name__)
 class SpecificModelWorker(BaseWorker):
     """
     A concrete implementation of a worker for a specific model.
+    Keeps a KV prefix cache so repeated system prompts and earlier turns of a
+    conversation are not recomputed on every request.
     """
 
     def __init__(self, model_name: str, subscription_name: str):
         super().__init__(model_name, subscription_name)
         self.model = None
+        self.tokenizer = None
+        self.prefix_cache = None
 
     def load_model(self):
         """
-        Loads the specific model assets.
-        In a real scenario, this would involve loading a large model file
-        from disk (e.g., from the 'model_repository').
+        Loads the model and tokenizer through the ModelManager.
         """
         logger.info(f"Loading model '{self.model_name}' assets...")
-        # Simulate a delay for loading a large model
-        time.sleep(3)
-        self.model = f"Loaded-{self.model_name}-Model"
+        model_manager.load_model(self.model_name)
+        self.model, self.tokenizer = model_manager.get_model_and_tokenizer(self.model_name)
+        self.model.eval()
+        self.prefix_cache = model_manager.get_prefix_cache(self.model_name)
         logger.info(f"Model '{self.model_name}' loaded successfully.")
 
     def infer(self, request: RoutedInferenceRequest) -> InferenceResponse:
         """
-        Performs inference using the loaded model.
-        This is a simulation of the actual inference process.
+        Performs inference using the loaded model, reusing the longest cached
+        prompt prefix for this conversation.
         """
         if not self.model:
             raise RuntimeError("Model is not loaded. Cannot perform inference.")
 
         logger.info(f"Performing inference for prompt: '{request.prompt[:70]}...' on shard '{request.target_shard}'")
-        
-        # Simulate inference time
-        time.sleep(0.5 + len(request.prompt) / 1000) # Simulate variable delay
-        
-        response_text = f"Response from {self.model} (shard: {request.target_shard}): The prompt was '{request.prompt[:30]}...'"
-        
+
+        input_ids = self.tokenizer(request.prompt, return_tensors="pt").input_ids
+        sequences, reused_tokens = generate_with_prefix_cache(
+            self.model,
+            input_ids,
+            self.prefix_cache,
+            conversation_id=request.conversation_id,
+            max_new_tokens=request.max_tokens,
+            do_sample=request.temperature > 0,
+            temperature=request.temperature if request.temperature > 0 else None,
+            pad_token_id=self.tokenizer.pad_token_id or self.tokenizer.eos_token_id
+        )
+        completion_ids = sequences[0][input_ids.shape[1]:]
+        response_text = self.tokenizer.decode(completion_ids, skip_special_tokens=True)
+
         return InferenceResponse(
             request_id=request.request_id,
             model=self.model_name,
             text=response_text,
             is_final=True, # Assuming non-streaming for this worker
             conversation_id=request.conversation_id,
-            # In a real scenario, you'd calculate these
-            input_tokens=len(request.prompt.split()),
-            output_tokens=len(response_text.split())
+            input_tokens=input_ids.shape[1],
+            output_tokens=len(completion_ids),
+            metadata={"cached_prompt_tokens": reused_tokens}
         )
 
 def main():
@@ -67,6 +83,8 @@ def main():
     args = parser.parse_args()
 
     logger.info(f"Initializing worker for model: {args.model_name}, shard: {args.shard_id}")
+    # Workers have no FastAPI app, so expose the prefix cache metrics directly
+    start_http_server(int(os.environ.get("METRICS_PORT", 8001)))
     worker = SpecificModelWorker(model_name=args.model_name, subscription_name=args.shard_id)
     
     try:
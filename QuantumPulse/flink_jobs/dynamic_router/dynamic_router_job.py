@@ -47,6 +47,7 @@ class RoutingProcessFunction(ProcessFunction):
             conversation_id=value.conversation_id,
             metadata=value.metadata,
             optimized=value.optimized,
+            prompt_tokens=value.prompt_tokens,
             target_shard=shard,
             target_topic=target_topic
         )
@@ -80,8 +81,8 @@ def dynamic_router_job():
     
     # Define the output type for the process function
     output_type_info = Types.ROW_NAMED(
-        ['request_id', 'reply_to_topic', 'prompt', 'model', 'stream', 'conversation_id', 'metadata', 'optimized', 'target_shard', 'target_topic'],
-        [Types.STRING(), Types.STRING(), Types.STRING(), Types.STRING(), Types.BOOLEAN(), Types.STRING(), Types.MAP(Types.STRING(), Types.STRING()), Types.BOOLEAN(), Types.STRING(), Types.STRING()]
+        ['request_id', 'reply_to_topic', 'prompt', 'model', 'stream', 'conversation_id', 'metadata', 'optimized', 'prompt_tokens', 'target_shard', 'target_topic'],
+        [Types.STRING(), Types.STRING(), Types.STRING(), Types.STRING(), Types.BOOLEAN(), Types.STRING(), Types.MAP(Types.STRING(), Types.STRING()), Types.BOOLEAN(), Types.INT(), Types.STRING(), Types.STRING()]
     )
     
     routed_ds = ds.process(RoutingProcessFunction(), output_type=output_type_info)
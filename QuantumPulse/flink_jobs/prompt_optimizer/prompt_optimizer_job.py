@@ -1,8 +1,19 @@
 from pyflink.common import WatermarkStrategy, Row
 from pyflink.common.typeinfo import Types
-from pyflink.datastream import StreamExecutionEnvironment
+from pyflink.datastream import StreamExecutionEnvironment, MapFunction, RuntimeContext
 from pyflink.datastream.connectors.pulsar import PulsarSource, PulsarSink, PulsarSerializationSchema, PulsarDeserializationSchema
 import json
+import logging
+import os
+
+from prompt_transforms import PromptOptimizer, DEFAULT_MODEL_CONTEXT_WINDOWS
+
+LOG = logging.getLogger(__name__)
+
+OUTPUT_FIELDS = [
+    'request_id', 'reply_to_topic', 'prompt', 'model', 'max_tokens', 'temperature',
+    'stream', 'conversation_id', 'metadata', 'optimized', 'prompt_tokens'
+]
 
 class JsonDeserializationSchema(PulsarDeserializationSchema):
     def deserialize(self, message):
@@ -11,16 +22,43 @@ class JsonDeserializationSchema(PulsarDeserializationSchema):
 
 class JsonSerializerSchema(PulsarSerializationSchema):
     def serialize(self, element, timestamp):
-        # A simple JSON serializer
-        return json.dumps(element).encode('utf-8')
+        # Rows are named, so they can be serialized as plain dicts
+        return json.dumps(element.as_dict()).encode('utf-8')
+
+class PromptOptimizerFunction(MapFunction):
+    """
+    Normalises, deduplicates and trims each request's prompt to the target
+    model's context budget, annotating the token count for the router.
+    The transforms themselves live in `prompt_transforms.py`.
+    """
+    def __init__(self, context_windows=None):
+        self.context_windows = context_windows
+        self.optimizer = None
+
+    def open(self, runtime_context: RuntimeContext):
+        # Tokenizers are loaded lazily per model, once per task
+        self.optimizer = PromptOptimizer(context_windows=self.context_windows)
+
+    def map(self, row):
+        request = row[0] if len(row) == 1 and isinstance(row[0], dict) else row.as_dict()
+        optimized = self.optimizer.optimize_request(request)
+        LOG.info(
+            f"Optimized request {optimized.get('request_id')}: "
+            f"{optimized['metadata']['original_tokens']} -> {optimized['prompt_tokens']} tokens."
+        )
+        return Row(**{field: optimized.get(field) for field in OUTPUT_FIELDS})
 
 def prompt_optimizer_job():
     env = StreamExecutionEnvironment.get_execution_environment()
+    # Ship the transform module to the Python workers alongside this script
+    env.add_python_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompt_transforms.py"))
+
     # Replace with actual configuration values from the job submission
     service_url = "pulsar://localhost:6650"
     admin_url = "http://localhost:8080"
     input_topic = "persistent://public/default/inference-requests"
     output_topic = "persistent://public/default/preprocessed-requests"
+    context_windows = json.loads(os.getenv("MODEL_CONTEXT_WINDOWS", json.dumps(DEFAULT_MODEL_CONTEXT_WINDOWS)))
 
     pulsar_source = PulsarSource.builder() \
         .set_service_url(service_url) \
@@ -40,29 +78,29 @@ def prompt_optimizer_job():
 
     # DataStream pipeline
     ds = env.from_source(pulsar_source, WatermarkStrategy.no_watermarks(), "PulsarSource")
-    
-    # Simple transformation: log and pass through
-    # A real job would perform cleaning, tokenization, etc.
-    def optimize(row):
-        print(f"Optimizing request: {row}")
-        # Add a dummy field to show transformation
-        row['optimized'] = True
-        return row
-
-    optimized_ds = ds.map(optimize, output_type=Types.ROW([
-        Types.STRING(), # request_id
-        Types.STRING(), # reply_to_topic
-        Types.STRING(), # prompt
-        Types.STRING(), # model
-        Types.BOOLEAN(),# stream
-        Types.STRING(), # conversation_id
-        Types.MAP(Types.STRING(), Types.STRING()), # metadata
-        Types.BOOLEAN() # optimized
-    ]))
-    
+
+    output_type_info = Types.ROW_NAMED(
+        OUTPUT_FIELDS,
+        [
+            Types.STRING(),  # request_id
+            Types.STRING(),  # reply_to_topic
+            Types.STRING(),  # prompt
+            Types.STRING(),  # model
+            Types.INT(),     # max_tokens
+            Types.FLOAT(),   # temperature
+            Types.BOOLEAN(), # stream
+            Types.STRING(),  # conversation_id
+            Types.MAP(Types.STRING(), Types.STRING()), # metadata
+            Types.BOOLEAN(), # optimized
+            Types.INT(),     # prompt_tokens
+        ]
+    )
+
+    optimized_ds = ds.map(PromptOptimizerFunction(context_windows), output_type=output_type_info)
+
     optimized_ds.sink_to(pulsar_sink)
 
     env.execute("Prompt Optimizer Job")
 
 if __name__ == '__main__':
-    prompt_optimizer_job() 
\ No newline at end of file
+    prompt_optimizer_job()
@@ -0,0 +1,293 @@
+"""
+Prompt preprocessing used by the Prompt Optimizer Flink job.
+
+This module deliberately has no PyFlink imports so the transforms can be
+unit tested (and reused elsewhere) without a Flink runtime. The job in
+`prompt_optimizer_job.py` only wires these functions into the stream.
+"""
+import hashlib
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Context windows (in tokens) per routed model. Anything not listed falls back
+# to DEFAULT_CONTEXT_WINDOW.
+DEFAULT_MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    "model-a": 4096,
+    "model-b": 8192,
+}
+DEFAULT_CONTEXT_WINDOW = 4096
+
+# Tokens kept free on top of the request's own `max_tokens` so templates and
+# special tokens added by the worker never push the prompt over the window.
+DEFAULT_SAFETY_MARGIN = 32
+
+# Patterns that never carry meaning for the model.
+DEFAULT_BOILERPLATE_PATTERNS: List[str] = [
+    r"<!--.*?-->",                  # HTML comments left over from scraped docs
+    r"[\u200b\u200c\u200d\u2060\ufeff]",  # Zero-width characters / BOMs
+]
+
+# Chunks are separated by blank lines, or start at a ReAct observation marker
+# even when the agent did not leave a blank line before it.
+_CHUNK_SPLIT_RE = re.compile(r"\n[ \t]*\n+|\n(?=(?:Tool )?Observation:)")
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+_INLINE_SPACE_RE = re.compile(r"(?<=\S)[ \t]{2,}")
+
+
+# --- Tokenizers ---
+
+class RegexTokenizer:
+    """
+    A dependency-free approximate tokenizer (words and punctuation).
+    Used when no Hugging Face tokenizer is available for a model.
+    """
+
+    def count(self, text: str) -> int:
+        return sum(1 for _ in _WORD_RE.finditer(text))
+
+    def truncate(self, text: str, max_tokens: int, keep_head: bool = True) -> str:
+        if max_tokens <= 0:
+            return ""
+        matches = list(_WORD_RE.finditer(text))
+        if len(matches) <= max_tokens:
+            return text
+        if keep_head:
+            return text[:matches[max_tokens - 1].end()]
+        return text[matches[-max_tokens].start():]
+
+
+class HuggingFaceTokenizer:
+    """Adapts a `transformers` tokenizer to the count/truncate interface."""
+
+    def __init__(self, tokenizer: Any):
+        self._tokenizer = tokenizer
+
+    def count(self, text: str) -> int:
+        return len(self._tokenizer.encode(text, add_special_tokens=False))
+
+    def truncate(self, text: str, max_tokens: int, keep_head: bool = True) -> str:
+        if max_tokens <= 0:
+            return ""
+        ids = self._tokenizer.encode(text, add_special_tokens=False)
+        if len(ids) <= max_tokens:
+            return text
+        ids = ids[:max_tokens] if keep_head else ids[-max_tokens:]
+        return self._tokenizer.decode(ids, skip_special_tokens=True)
+
+
+def load_tokenizer(model_name: Optional[str]):
+    """
+    Loads the Hugging Face tokenizer for `model_name`, falling back to the
+    approximate RegexTokenizer if transformers or the model are unavailable.
+    """
+    if model_name:
+        try:
+            from transformers import AutoTokenizer
+            return HuggingFaceTokenizer(AutoTokenizer.from_pretrained(model_name))
+        except Exception as e:
+            logger.warning(f"Could not load tokenizer for '{model_name}', using approximate counts: {e}")
+    return RegexTokenizer()
+
+
+# --- Text Transforms ---
+
+def normalize_whitespace(text: str) -> str:
+    """
+    Normalises line endings, strips trailing whitespace, collapses runs of
+    inline spaces and blank lines. Leading indentation is preserved so code
+    blocks keep their structure.
+    """
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\u00a0", " ")
+    lines = [_INLINE_SPACE_RE.sub(" ", line.rstrip()) for line in text.split("\n")]
+    text = "\n".join(lines)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+def strip_boilerplate(text: str, patterns: Optional[List[str]] = None) -> str:
+    """Removes every match of the given boilerplate regex patterns."""
+    for pattern in patterns if patterns is not None else DEFAULT_BOILERPLATE_PATTERNS:
+        text = re.sub(pattern, "", text, flags=re.DOTALL)
+    return text
+
+
+def split_chunks(text: str) -> List[str]:
+    """Splits a prompt into paragraph / observation chunks."""
+    return [chunk.strip() for chunk in _CHUNK_SPLIT_RE.split(text) if chunk.strip()]
+
+
+def _fingerprint(chunk: str) -> str:
+    canonical = " ".join(chunk.lower().split())
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def _shingles(words: List[str], size: int = 3) -> set:
+    if len(words) < size:
+        return {tuple(words)}
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def dedupe_chunks(
+    chunks: List[str],
+    near_duplicate_threshold: float = 0.85,
+    min_words: int = 8
+) -> List[str]:
+    """
+    Drops exact duplicates (ignoring case and whitespace) and near duplicates
+    (word-shingle Jaccard similarity >= threshold) of earlier chunks.
+    The last occurrence of a chunk is kept, since in RAG-stuffed prompts and
+    ReAct transcripts the latest copy sits closest to the question.
+    Chunks shorter than `min_words` are never treated as near duplicates,
+    so short labels like "Thought:" survive.
+    """
+    kept_reversed: List[str] = []
+    seen_hashes = set()
+    kept_shingles: List[set] = []
+
+    for chunk in reversed(chunks):
+        digest = _fingerprint(chunk)
+        if digest in seen_hashes:
+            continue
+
+        words = chunk.lower().split()
+        if len(words) >= min_words:
+            shingles = _shingles(words)
+            is_near_duplicate = False
+            for other in kept_shingles:
+                smaller, larger = sorted((len(shingles), len(other)))
+                # The Jaccard index can't reach the threshold if the sizes differ too much.
+                if larger == 0 or smaller / larger < near_duplicate_threshold:
+                    continue
+                if len(shingles & other) / len(shingles | other) >= near_duplicate_threshold:
+                    is_near_duplicate = True
+                    break
+            if is_near_duplicate:
+                continue
+            kept_shingles.append(shingles)
+
+        seen_hashes.add(digest)
+        kept_reversed.append(chunk)
+
+    return list(reversed(kept_reversed))
+
+
+def trim_to_budget(chunks: List[str], budget: int, tokenizer) -> List[str]:
+    """
+    Trims chunks to fit `budget` tokens. The first chunk (instructions / system
+    prompt) and the last chunk (the latest question) are kept; the oldest
+    middle chunks are dropped first. If the two anchors alone still don't fit,
+    the first chunk is cut from its end and then the last from its start.
+    """
+    separator_cost = tokenizer.count("\n\n")
+    counts = [tokenizer.count(chunk) for chunk in chunks]
+
+    def total(selected: List[int]) -> int:
+        return sum(counts[i] for i in selected) + separator_cost * max(len(selected) - 1, 0)
+
+    selected = list(range(len(chunks)))
+    while total(selected) > budget and len(selected) > 2:
+        selected.pop(1)
+
+    result = [chunks[i] for i in selected]
+    if total(selected) <= budget:
+        return result
+
+    if len(result) == 1:
+        return [tokenizer.truncate(result[0], budget, keep_head=True)]
+
+    last_count = counts[selected[-1]]
+    head_budget = max(budget - last_count - separator_cost, 0)
+    head = tokenizer.truncate(result[0], head_budget, keep_head=True)
+    tail_budget = budget - tokenizer.count(head) - (separator_cost if head else 0)
+    tail = tokenizer.truncate(result[-1], max(tail_budget, 0), keep_head=False)
+    return [chunk for chunk in (head, tail) if chunk]
+
+
+# --- Optimizer ---
+
+class PromptOptimizer:
+    """
+    Applies normalisation, deduplication and token-budget trimming to prompts.
+    Tokenizers are loaded lazily and cached per model.
+    """
+
+    def __init__(
+        self,
+        context_windows: Optional[Dict[str, int]] = None,
+        default_context_window: int = DEFAULT_CONTEXT_WINDOW,
+        safety_margin: int = DEFAULT_SAFETY_MARGIN,
+        boilerplate_patterns: Optional[List[str]] = None,
+        near_duplicate_threshold: float = 0.85,
+        tokenizer_loader=load_tokenizer,
+    ):
+        self.context_windows = context_windows if context_windows is not None else dict(DEFAULT_MODEL_CONTEXT_WINDOWS)
+        self.default_context_window = default_context_window
+        self.safety_margin = safety_margin
+        self.boilerplate_patterns = boilerplate_patterns
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self._tokenizer_loader = tokenizer_loader
+        self._tokenizers: Dict[Optional[str], Any] = {}
+
+    def get_tokenizer(self, model: Optional[str]):
+        if model not in self._tokenizers:
+            self._tokenizers[model] = self._tokenizer_loader(model)
+        return self._tokenizers[model]
+
+    def prompt_budget(self, model: Optional[str], max_tokens: int = 0) -> int:
+        """The number of prompt tokens available once the output is reserved."""
+        window = self.context_windows.get(model, self.default_context_window)
+        return max(window - max_tokens - self.safety_margin, 1)
+
+    def optimize(self, prompt: str, model: Optional[str] = None, max_tokens: int = 0) -> Dict[str, Any]:
+        """
+        Optimizes a single prompt. Returns the new prompt with token counts
+        before and after, the number of removed chunks and whether it was trimmed.
+        """
+        tokenizer = self.get_tokenizer(model)
+        original_tokens = tokenizer.count(prompt)
+
+        text = normalize_whitespace(strip_boilerplate(prompt, self.boilerplate_patterns))
+        chunks = split_chunks(text)
+        deduped = dedupe_chunks(chunks, self.near_duplicate_threshold)
+
+        budget = self.prompt_budget(model, max_tokens)
+        trimmed_chunks = trim_to_budget(deduped, budget, tokenizer)
+        optimized = "\n\n".join(trimmed_chunks)
+
+        return {
+            "prompt": optimized,
+            "original_tokens": original_tokens,
+            "prompt_tokens": tokenizer.count(optimized),
+            "removed_chunks": len(chunks) - len(deduped),
+            "trimmed": trimmed_chunks != deduped,
+        }
+
+    def optimize_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Optimizes an inference request dict (as published by the API) and
+        annotates it with token counts for the router's cost-based routing.
+        Metadata values are strings to match the job's MAP<STRING, STRING> type.
+        """
+        result = self.optimize(
+            request.get("prompt") or "",
+            model=request.get("model"),
+            max_tokens=request.get("max_tokens") or 0,
+        )
+        metadata = {k: str(v) for k, v in (request.get("metadata") or {}).items()}
+        metadata.update({
+            "original_tokens": str(result["original_tokens"]),
+            "removed_chunks": str(result["removed_chunks"]),
+            "trimmed": str(result["trimmed"]).lower(),
+        })
+
+        optimized_request = dict(request)
+        optimized_request.update({
+            "prompt": result["prompt"],
+            "prompt_tokens": result["prompt_tokens"],
+            "metadata": metadata,
+            "optimized": True,
+        })
+        return optimized_request
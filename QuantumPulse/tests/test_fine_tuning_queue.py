@@ -0,0 +1,166 @@
+import os
+import time
+
+import pytest
+from unittest.mock import patch
+
+from app.services.dpo_training import run_dpo_job
+from app.services.fine_tuning_queue import FineTuneJobStatus, FineTuneSchedule, FineTuningQueue, QueueFullError
+
+PAIRS = [
+    {"prompt": f"question {i}", "chosen": f"good answer {i}", "rejected": f"bad answer {i}"}
+    for i in range(8)
+]
+
+def sleeping_job(job_dir):
+    """A stand-in worker for scheduling tests; runs until terminated or released."""
+    while not os.path.exists(os.path.join(job_dir, "release")):
+        time.sleep(0.05)
+
+def wait_for(queue, job_id, statuses, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job.status in statuses:
+            return job
+        time.sleep(0.1)
+    raise AssertionError(f"Job {job_id} is still {queue.get(job_id).status}")
+
+@pytest.fixture
+def make_queue(tmp_path):
+    queues = []
+    def make(**kwargs):
+        kwargs.setdefault("job_runner", sleeping_job)
+        queue = FineTuningQueue(work_dir=str(tmp_path / "jobs"), poll_interval=0.05, push_to_hub=False, **kwargs)
+        queue.start()
+        queues.append(queue)
+        return queue
+    yield make
+    for queue in queues:
+        queue.stop()
+
+def release(queue, job_id):
+    open(os.path.join(queue.work_dir, job_id, "release"), "w").close()
+
+def test_runs_one_job_at_a_time(make_queue):
+    queue = make_queue(max_concurrent_jobs=1)
+    first = queue.submit("base", "model-1", PAIRS)
+    second = queue.submit("base", "model-2", PAIRS)
+
+    wait_for(queue, first.job_id, {FineTuneJobStatus.RUNNING})
+    assert queue.get(second.job_id).status == FineTuneJobStatus.QUEUED
+
+    release(queue, first.job_id)
+    wait_for(queue, first.job_id, {FineTuneJobStatus.FAILED})  # the stand-in writes no 'completed' status
+    wait_for(queue, second.job_id, {FineTuneJobStatus.RUNNING})
+
+def test_queue_is_bounded(make_queue):
+    queue = make_queue(max_concurrent_jobs=0, max_queued_jobs=1)
+    queue.submit("base", "model-1", PAIRS)
+
+    with pytest.raises(QueueFullError):
+        queue.submit("base", "model-2", PAIRS)
+
+def test_cancel_terminates_running_worker(make_queue):
+    queue = make_queue()
+    job = queue.submit("base", "model-1", PAIRS)
+    wait_for(queue, job.job_id, {FineTuneJobStatus.RUNNING})
+
+    queue.cancel(job.job_id)
+
+    assert wait_for(queue, job.job_id, {FineTuneJobStatus.CANCELLED}).finished_at is not None
+
+def test_idle_jobs_wait_for_quiet_period(make_queue):
+    queue = make_queue(idle_seconds=0.5)
+    queue.mark_activity()
+    job = queue.submit("base", "model-1", PAIRS, schedule=FineTuneSchedule.IDLE)
+
+    time.sleep(0.2)
+    assert queue.get(job.job_id).status == FineTuneJobStatus.QUEUED
+
+    wait_for(queue, job.job_id, {FineTuneJobStatus.RUNNING}, timeout=5)
+
+def test_interrupted_jobs_are_requeued_on_restart(tmp_path):
+    work_dir = str(tmp_path / "jobs")
+    queue = FineTuningQueue(work_dir=work_dir, poll_interval=0.05, job_runner=sleeping_job)
+    queue.start()
+    job = queue.submit("base", "model-1", PAIRS)
+    wait_for(queue, job.job_id, {FineTuneJobStatus.RUNNING})
+    queue.stop()
+
+    restarted = FineTuningQueue(work_dir=work_dir, poll_interval=0.05, max_concurrent_jobs=0, job_runner=sleeping_job)
+    restarted.start()
+    try:
+        recovered = restarted.get(job.job_id)
+        assert recovered.status == FineTuneJobStatus.QUEUED
+        assert recovered.attempts == 1
+    finally:
+        restarted.stop()
+
+# --- End-to-end DPO training on a tiny CPU model ---
+
+@pytest.fixture
+def tiny_model_dir(tmp_path):
+    """Saves a tiny GPT-2 and a word-level tokenizer that cover the PAIRS vocabulary."""
+    transformers = pytest.importorskip("transformers")
+    pytest.importorskip("trl")
+    pytest.importorskip("datasets")
+    from tokenizers import Tokenizer, models, pre_tokenizers
+
+    words = sorted({word for pair in PAIRS for text in pair.values() for word in text.split()})
+    vocab = {"<pad>": 0, "<eos>": 1, "<unk>": 2, **{word: i + 3 for i, word in enumerate(words)}}
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    fast_tokenizer = transformers.PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, pad_token="<pad>", eos_token="<eos>", unk_token="<unk>"
+    )
+
+    config = transformers.GPT2Config(
+        n_layer=2, n_embd=32, n_head=2, vocab_size=len(vocab), n_positions=64,
+        bos_token_id=1, eos_token_id=1, pad_token_id=0
+    )
+    model_dir = str(tmp_path / "tiny-model")
+    transformers.AutoModelForCausalLM.from_config(config).save_pretrained(model_dir)
+    fast_tokenizer.save_pretrained(model_dir)
+    return model_dir
+
+def load_fine_tuning_config(fine_tuning):
+    """Parses a `fine_tuning` section the way the service loads it from Vault."""
+    secret = {
+        "service_name": "QuantumPulse", "version": "test",
+        "pulsar": {"service_url": "pulsar://localhost:6650", "topics": {
+            topic: topic for topic in ("requests", "preprocessed", "routed_prefix", "results", "feedback", "analytics", "model_updates")
+        }},
+        "api": {"host": "localhost", "port": 8000},
+        "ignite": {"addresses": [], "cluster_name": "test", "cache_name": "test"},
+        "models": [],
+        "flink": {"rest_url": "", "prompt_optimizer_jar_path": "", "dynamic_router_jar_path": ""},
+        "fine_tuning": fine_tuning,
+    }
+    # app.core.config loads the service's configuration from Vault on import
+    with patch("shared.vault_client.VaultClient") as vault_client:
+        vault_client.return_value.read_secret_data.return_value = secret
+        from app.core.config import AppConfig
+    return AppConfig(**secret).fine_tuning
+
+def test_dpo_job_trains_and_checkpoints(make_queue, tiny_model_dir):
+    completed = []
+    config = load_fine_tuning_config({
+        "num_threads": 1,
+        "training": {"per_device_train_batch_size": 2, "gradient_accumulation_steps": 1, "save_steps": 2, "max_length": 32, "warmup_steps": 0},
+    })
+    queue = make_queue(
+        job_runner=run_dpo_job,
+        num_threads=config.num_threads,
+        training=config.training.model_dump(exclude_none=True),
+        on_complete=completed.append,
+    )
+    job = queue.submit(tiny_model_dir, "tiny-dpo", PAIRS)
+
+    job = wait_for(queue, job.job_id, {FineTuneJobStatus.COMPLETED, FineTuneJobStatus.FAILED}, timeout=300)
+
+    assert job.status == FineTuneJobStatus.COMPLETED, job.error
+    assert job.progress["step"] == job.progress["max_steps"] == 4
+    assert os.path.exists(os.path.join(job.model_dir, "config.json"))
+    assert os.listdir(os.path.join(queue.work_dir, job.job_id, "checkpoints"))
+    assert [j.job_id for j in completed] == [job.job_id]
@@ -0,0 +1,94 @@
+import time
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from app.core.prefix_cache import PrefixCache, generate_with_prefix_cache
+
+VOCAB_SIZE = 128
+GENERATE_KWARGS = {"max_new_tokens": 6, "do_sample": False, "pad_token_id": 0}
+
+@pytest.fixture(scope="module")
+def model():
+    """A tiny, randomly initialised causal LM that runs quickly on CPU."""
+    torch.manual_seed(0)
+    config = transformers.GPT2Config(
+        n_layer=4, n_embd=128, n_head=4, vocab_size=VOCAB_SIZE, n_positions=2048,
+        bos_token_id=0, eos_token_id=None
+    )
+    return transformers.AutoModelForCausalLM.from_config(config).eval()
+
+def random_tokens(length, seed):
+    generator = torch.Generator().manual_seed(seed)
+    return torch.randint(1, VOCAB_SIZE, (1, length), generator=generator)
+
+def test_cached_generation_matches_uncached(model):
+    cache = PrefixCache("tiny", block_size=16)
+    system_prompt = random_tokens(200, seed=1)
+    turn_1 = torch.cat([system_prompt, random_tokens(30, seed=2)], dim=1)
+
+    first, reused = generate_with_prefix_cache(model, turn_1, cache, conversation_id="c1", **GENERATE_KWARGS)
+    assert reused == 0
+
+    # The next turn resends the whole history plus a new message
+    turn_2 = torch.cat([first, random_tokens(20, seed=3)], dim=1)
+    cached, reused = generate_with_prefix_cache(model, turn_2, cache, conversation_id="c1", **GENERATE_KWARGS)
+    uncached, _ = generate_with_prefix_cache(model, turn_2, None, **GENERATE_KWARGS)
+
+    assert torch.equal(cached, uncached)
+    assert reused == first.shape[1] - 1
+    assert cache.hits == 1 and cache.saved_tokens == reused
+
+def test_shared_system_prompt_reused_across_conversations(model):
+    cache = PrefixCache("tiny", block_size=16)
+    system_prompt = random_tokens(100, seed=4)
+
+    generate_with_prefix_cache(model, torch.cat([system_prompt, random_tokens(10, seed=5)], dim=1), cache, conversation_id="a", **GENERATE_KWARGS)
+    other = torch.cat([system_prompt, random_tokens(10, seed=6)], dim=1)
+    cached, reused = generate_with_prefix_cache(model, other, cache, conversation_id="b", **GENERATE_KWARGS)
+    uncached, _ = generate_with_prefix_cache(model, other, None, **GENERATE_KWARGS)
+
+    # Reuse is block aligned for cross-conversation hits
+    assert reused == 96
+    assert torch.equal(cached, uncached)
+
+def test_lookup_leaves_at_least_one_token(model):
+    cache = PrefixCache("tiny", block_size=16)
+    prompt = random_tokens(64, seed=7)
+    output, _ = generate_with_prefix_cache(model, prompt, cache, conversation_id="c", **GENERATE_KWARGS)
+
+    reused, past_key_values = cache.lookup(prompt[0].tolist(), conversation_id="c")
+
+    assert reused == 63
+    assert past_key_values.get_seq_length() == 63
+
+def test_lru_eviction_respects_memory_budget(model):
+    probe = PrefixCache("tiny")
+    generate_with_prefix_cache(model, random_tokens(64, seed=8), probe, conversation_id="probe", **GENERATE_KWARGS)
+    entry_bytes = probe.nbytes
+
+    cache = PrefixCache("tiny", max_bytes=int(entry_bytes * 2.5))
+    for i in range(4):
+        generate_with_prefix_cache(model, random_tokens(64, seed=10 + i), cache, conversation_id=f"c{i}", **GENERATE_KWARGS)
+
+    assert len(cache) == 2
+    assert cache.nbytes <= cache.max_bytes
+    assert cache.lookup(random_tokens(64, seed=10)[0].tolist(), conversation_id="c0") == (0, None)
+
+def test_prefix_reuse_is_faster(model):
+    cache = PrefixCache("tiny")
+    prompt = random_tokens(1500, seed=20)
+    kwargs = dict(GENERATE_KWARGS, max_new_tokens=1)
+    generate_with_prefix_cache(model, prompt, cache, conversation_id="c", **kwargs)
+
+    def timed(prefix_cache):
+        start = time.perf_counter()
+        generate_with_prefix_cache(model, prompt, prefix_cache, conversation_id="c", **kwargs)
+        return time.perf_counter() - start
+
+    uncached = min(timed(None) for _ in range(3))
+    cached = min(timed(cache) for _ in range(3))
+
+    assert cached < uncached
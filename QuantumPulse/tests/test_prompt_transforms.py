@@ -0,0 +1,82 @@
+import pytest
+
+from flink_jobs.prompt_optimizer.prompt_transforms import (
+    PromptOptimizer,
+    RegexTokenizer,
+    dedupe_chunks,
+    normalize_whitespace,
+    split_chunks,
+    strip_boilerplate,
+    trim_to_budget,
+)
+
+OBSERVATION = "Tool Observation: service managerQ is healthy, 3 replicas running, p99 latency 120ms, no errors in the last hour."
+
+@pytest.fixture
+def optimizer():
+    """An optimizer that never tries to download a real tokenizer."""
+    return PromptOptimizer(
+        context_windows={"tiny-model": 64},
+        safety_margin=0,
+        tokenizer_loader=lambda model: RegexTokenizer()
+    )
+
+def test_normalize_whitespace_preserves_indentation():
+    text = "Hello   world  \r\n\r\n\r\n\r\ndef f():\n    return 1 \n"
+    assert normalize_whitespace(text) == "Hello world\n\ndef f():\n    return 1"
+
+def test_strip_boilerplate_removes_comments_and_zero_width_chars():
+    assert strip_boilerplate("a<!-- generated\nby tool -->b\u200bc") == "abc"
+
+def test_split_chunks_on_blank_lines_and_observations():
+    text = "System prompt\n\nQuestion?\nThought: check\nTool Observation: ok"
+    assert split_chunks(text) == ["System prompt", "Question?\nThought: check", "Tool Observation: ok"]
+
+def test_dedupe_removes_exact_duplicates_keeping_last():
+    chunks = ["intro", OBSERVATION, "middle", OBSERVATION.upper(), "question"]
+    assert dedupe_chunks(chunks) == ["intro", "middle", OBSERVATION.upper(), "question"]
+
+def test_dedupe_removes_near_duplicates():
+    body = " ".join(f"pod-{i} ready" for i in range(30))
+    original = f"{OBSERVATION} Pods: {body}"
+    near = original.replace("120ms", "121ms")
+    assert dedupe_chunks([original, near]) == [near]
+
+def test_dedupe_keeps_short_repeated_labels():
+    chunks = ["Thought: retry", "other text", "Thought: retry again"]
+    assert dedupe_chunks(chunks) == chunks
+
+def test_trim_drops_oldest_middle_chunks_first():
+    tokenizer = RegexTokenizer()
+    chunks = ["system", "old context one", "new context", "question"]
+    assert trim_to_budget(chunks, 5, tokenizer) == ["system", "new context", "question"]
+
+def test_trim_truncates_anchors_when_they_alone_exceed_budget():
+    tokenizer = RegexTokenizer()
+    head = " ".join(f"h{i}" for i in range(20))
+    tail = " ".join(f"t{i}" for i in range(5))
+    trimmed = trim_to_budget([head, "middle", tail], 10, tokenizer)
+    assert trimmed == ["h0 h1 h2 h3 h4", tail]
+
+def test_optimize_request_annotates_token_counts(optimizer):
+    prompt = "You are helpful.\n\n" + "\n\n".join([OBSERVATION] * 5) + "\n\nWhat is wrong?"
+    request = {"request_id": "r1", "prompt": prompt, "model": "tiny-model", "max_tokens": 16, "metadata": {"user": "u"}}
+
+    result = optimizer.optimize_request(request)
+
+    assert result["optimized"] is True
+    assert result["prompt"].count("Tool Observation") == 1
+    assert result["prompt_tokens"] <= optimizer.prompt_budget("tiny-model", 16)
+    assert int(result["metadata"]["original_tokens"]) > result["prompt_tokens"]
+    assert result["metadata"]["removed_chunks"] == "4"
+    assert result["metadata"]["user"] == "u"
+    assert result["request_id"] == "r1"
+
+def test_optimize_trims_to_model_budget(optimizer):
+    prompt = "System.\n\n" + "\n\n".join(f"Document {i}: " + "lorem ipsum " * 10 for i in range(10)) + "\n\nQuestion?"
+    result = optimizer.optimize(prompt, model="tiny-model", max_tokens=0)
+
+    assert result["trimmed"] is True
+    assert result["prompt_tokens"] <= 64
+    assert result["prompt"].startswith("System.")
+    assert result["prompt"].endswith("Question?")
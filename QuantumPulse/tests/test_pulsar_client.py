@@ -0,0 +1,106 @@
+import asyncio
+import threading
+
+import pulsar
+import pytest
+
+from app.core.pulsar_client import PulsarManager, PublishBackpressureError, PublishError
+from app.models.inference import InferenceRequest
+
+class FakeProducer:
+    """Acks each send_async from a separate thread, like the Pulsar IO thread does."""
+
+    def __init__(self, result=pulsar.Result.Ok, delay: float = 0.01, ack: bool = True):
+        self.result = result
+        self.delay = delay
+        self.ack = ack
+        self.sent = []
+
+    def send_async(self, msg, callback, properties=None):
+        self.sent.append((msg, properties))
+        if self.ack:
+            threading.Timer(self.delay, callback, args=(self.result, f"msg-{len(self.sent)}")).start()
+
+def make_manager(producer: FakeProducer, **kwargs) -> PulsarManager:
+    manager = PulsarManager(service_url="pulsar://localhost:6650", **kwargs)
+    manager.get_producer = lambda topic, schema: producer
+    return manager
+
+def test_publish_async_waits_for_ack():
+    producer = FakeProducer()
+    manager = make_manager(producer)
+
+    msg_id = asyncio.run(manager.publish_request_async("topic", InferenceRequest(prompt="hi")))
+
+    assert msg_id == "msg-1"
+    assert len(producer.sent) == 1
+    assert manager.in_flight == 0
+
+def test_publish_async_raises_on_broker_error():
+    manager = make_manager(FakeProducer(result=pulsar.Result.Timeout))
+
+    with pytest.raises(PublishError):
+        asyncio.run(manager.publish_request_async("topic", InferenceRequest(prompt="hi")))
+    assert manager.in_flight == 0
+
+def test_publish_async_times_out_without_ack():
+    manager = make_manager(FakeProducer(ack=False))
+
+    with pytest.raises(PublishError):
+        asyncio.run(manager.publish_request_async("topic", InferenceRequest(prompt="hi"), timeout=0.05))
+    # The message is still queued in the producer, so it still counts
+    assert manager.in_flight == 1
+
+def test_timed_out_publish_keeps_its_slot_until_the_producer_reports():
+    producer = FakeProducer(delay=0.3)
+    manager = make_manager(producer, max_in_flight=1)
+
+    async def overloaded():
+        with pytest.raises(PublishError):
+            await manager.publish_request_async("topic", InferenceRequest(prompt="slow"), timeout=0.05)
+        with pytest.raises(PublishBackpressureError):
+            await manager.publish_request_async("topic", InferenceRequest(prompt="next"))
+        await asyncio.sleep(0.4)
+        return await manager.publish_request_async("topic", InferenceRequest(prompt="later"))
+
+    assert asyncio.run(overloaded()) == "msg-2"
+    assert manager.in_flight == 0
+
+def test_producers_are_created_off_the_event_loop():
+    manager = PulsarManager(service_url="pulsar://localhost:6650")
+    producer = FakeProducer()
+    created_on = []
+
+    def get_producer(topic, schema):
+        created_on.append(threading.current_thread())
+        manager._producers[topic] = producer
+        return producer
+
+    manager.get_producer = get_producer
+    try:
+        async def publish_twice():
+            for prompt in ("a", "b"):
+                await manager.publish_request_async("topic", InferenceRequest(prompt=prompt))
+
+        asyncio.run(publish_twice())
+    finally:
+        manager._producers.clear()
+
+    assert created_on and threading.main_thread() not in created_on
+    assert len(created_on) == 1 and len(producer.sent) == 2
+
+def test_publish_async_applies_backpressure_when_window_full():
+    producer = FakeProducer(delay=0.2)
+    manager = make_manager(producer, max_in_flight=2)
+
+    async def burst():
+        return await asyncio.gather(
+            *(manager.publish_request_async("topic", InferenceRequest(prompt=str(i))) for i in range(3)),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(burst())
+
+    assert sum(isinstance(r, PublishBackpressureError) for r in results) == 1
+    assert len(producer.sent) == 2
+    assert manager.in_flight == 0
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+
+from app.models.inference import InferenceResponse
+import pytest
+
+from app.services.result_store import InMemoryResultBackend, RequestIdConflictError, ResultStore
+
+def chunk(text, sequence=None, is_final=False, request_id="req-1"):
+    return InferenceResponse(request_id=request_id, model="model-a", text=text, sequence=sequence, is_final=is_final)
+
+def deliver_later(store, responses, delay=0.02):
+    """Delivers responses from another thread, like the Pulsar consumer does."""
+    def run():
+        for response in responses:
+            time.sleep(delay)
+            store.add_response(response)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+def test_assembles_out_of_order_chunks():
+    store = ResultStore()
+    store.track("req-1", owner="alice")
+
+    store.add_response(chunk("world", sequence=1, is_final=True))
+    assert not store.get("req-1").is_complete
+    store.add_response(chunk("hello ", sequence=0))
+
+    record = store.get("req-1")
+    assert record.is_complete
+    assert record.text == "hello world"
+    assert record.owner == "alice"
+
+def test_tracked_request_ids_cannot_be_taken_over():
+    store = ResultStore()
+    store.track("req-1", owner="alice")
+    store.add_response(InferenceResponse(request_id="untracked", model="model-a", text="hi", metadata={"owner": "bob"}))
+
+    for request_id in ("req-1", "untracked"):
+        with pytest.raises(RequestIdConflictError):
+            store.track(request_id, owner="mallory")
+    assert store.get("req-1").owner == "alice"
+    # Replicas that didn't track a request take its owner from the response
+    assert store.get("untracked").owner == "bob"
+
+def test_backend_expires_entries_after_ttl():
+    backend = InMemoryResultBackend(ttl_seconds=0.01)
+    store = ResultStore(backend)
+    store.track("req-1")
+
+    time.sleep(0.02)
+
+    assert store.get("req-1") is None
+
+def test_backend_is_bounded():
+    store = ResultStore(InMemoryResultBackend(max_entries=2))
+    for i in range(3):
+        store.track(f"req-{i}")
+
+    assert store.get("req-0") is None
+    assert store.get("req-2") is not None
+
+def test_wait_for_completion_wakes_on_result():
+    store = ResultStore()
+    store.track("req-1")
+
+    async def wait():
+        thread = deliver_later(store, [chunk("done", is_final=True)])
+        start = time.monotonic()
+        record = await store.wait_for_completion("req-1", timeout=5)
+        thread.join()
+        return record, time.monotonic() - start
+
+    record, elapsed = asyncio.run(wait())
+
+    assert record.is_complete
+    assert record.text == "done"
+    assert elapsed < 1
+
+def test_wait_for_completion_times_out_with_partial_result():
+    store = ResultStore()
+    store.track("req-1")
+    store.add_response(chunk("partial"))
+
+    record = asyncio.run(store.wait_for_completion("req-1", timeout=0.05))
+
+    assert not record.is_complete
+    assert record.text == "partial"
+
+def test_stream_chunks_replays_then_follows():
+    store = ResultStore()
+    store.track("req-1")
+    store.add_response(chunk("a", sequence=0))
+
+    async def collect():
+        thread = deliver_later(store, [chunk("b", sequence=1), chunk("c", sequence=2, is_final=True)])
+        received = [item async for item in store.stream_chunks("req-1", timeout=5)]
+        thread.join()
+        return received
+
+    assert asyncio.run(collect()) == [(0, "a", False), (1, "b", False), (2, "c", True)]
@@ -5,6 +5,7 @@ from contextlib import asynccontextmanager
 
 from shared.observability.logging_config import setup_logging
 from shared.opentelemetry.tracing import setup_tracing
+from shared.q_auth_parser.parser import start_revocation_feed, stop_revocation_feed
 from UserProfileQ.app.api.profiles import router as profiles_router
 from UserProfileQ.app.core.cassandra_client import CassandraClient
 from UserProfileQ.app.config import settings # Assuming a config file will be created
@@ -19,6 +20,7 @@ cassandra_client = None
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("UserProfileQ service starting up...")
+    start_revocation_feed()
     global cassandra_client
     cassandra_client = CassandraClient(
         hosts=settings.cassandra.hosts,
@@ -38,6 +40,7 @@ async def lifespan(app: FastAPI):
     logger.info("UserProfileQ service shutting down...")
     if cassandra_client:
         cassandra_client.close()
+    stop_revocation_feed()
 
 # Create FastAPI app
 app = FastAPI(
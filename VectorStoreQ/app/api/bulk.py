@@ -0,0 +1,103 @@
+from fastapi import APIRouter, HTTPException, status, Depends, Query as QueryParam, Request
+from starlette.concurrency import run_in_threadpool
+import logging
+
+from shared.q_vectorstore_client.models import BulkImportJob, BulkImportJobRequest
+from app.core.config import config
+from app.core.milvus_handler import milvus_handler
+from app.core.collection_registry import CollectionNotReadyError
+from app.core.bulk_import import BulkImportError, BulkJobNotFoundError, BulkJobClosedError
+from app.core.request_scheduler import SchedulerOverloadedError
+from shared.q_auth_parser.parser import get_current_user
+from shared.q_auth_parser.models import UserClaims
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+AUTHORIZED_ROLES = {"admin", "service-account"}
+
+def require_ingest_role(user: UserClaims = Depends(get_current_user)) -> UserClaims:
+    if not AUTHORIZED_ROLES.intersection(user.roles):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User does not have the required roles to perform this action."
+        )
+    return user
+
+def _get_job(job_id: str) -> BulkImportJob:
+    try:
+        return milvus_handler.bulk_importer.get_job(job_id)
+    except BulkJobNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+@router.post("/jobs", response_model=BulkImportJob, status_code=status.HTTP_201_CREATED)
+async def create_job(request: BulkImportJobRequest, user: UserClaims = Depends(require_ingest_role)):
+    """
+    Starts a resumable bulk import into a collection.
+    Requires 'admin' or 'service-account' role.
+    """
+    try:
+        job = await run_in_threadpool(milvus_handler.bulk_importer.create_job, request.collection_name, request.format)
+        logger.info(f"User '{user.username}' started bulk import '{job.job_id}' into '{request.collection_name}'.")
+        return job
+    except CollectionNotReadyError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "1"})
+    except ValueError as ve:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(ve))
+
+@router.put("/jobs/{job_id}/chunks", response_model=BulkImportJob)
+async def write_chunk(
+    job_id: str,
+    request: Request,
+    offset: int = QueryParam(..., ge=0, description="The position of the chunk's first record in the import."),
+    user: UserClaims = Depends(require_ingest_role)
+):
+    """
+    Writes a chunk of records: NDJSON (one Vector per line) or an Arrow IPC
+    stream, depending on the job's format. Records already written by an
+    earlier attempt are skipped, so chunks can be retried safely.
+    Returns the job's progress.
+    """
+    job = _get_job(job_id)
+    max_bytes = config.bulk_import.max_chunk_bytes
+    if int(request.headers.get("content-length") or 0) > max_bytes:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"Chunks are limited to {max_bytes} bytes.")
+    data = await request.body()
+    if len(data) > max_bytes:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"Chunks are limited to {max_bytes} bytes.")
+
+    try:
+        return await milvus_handler.scheduler.run(
+            job.collection_name, "bulk_import", milvus_handler.bulk_importer.write_chunk, job_id, offset, data
+        )
+    except BulkImportError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except BulkJobClosedError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except (SchedulerOverloadedError, CollectionNotReadyError) as e:
+        logger.warning(f"Bulk import chunk deferred: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "1"})
+    except ValueError as ve:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(ve))
+    except Exception as e:
+        logger.error(f"Bulk import chunk at offset {offset} of job '{job_id}' failed: {e}", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An internal error occurred while writing the chunk; it can be retried.")
+
+@router.get("/jobs/{job_id}", response_model=BulkImportJob)
+async def get_job(job_id: str, user: UserClaims = Depends(require_ingest_role)):
+    """Returns a job's progress; resume an interrupted import from its `offset`."""
+    return _get_job(job_id)
+
+@router.post("/jobs/{job_id}/complete", response_model=BulkImportJob)
+async def complete_job(job_id: str, user: UserClaims = Depends(require_ingest_role)):
+    """Marks a job as finished; no further chunks are accepted."""
+    _get_job(job_id)
+    return await run_in_threadpool(milvus_handler.bulk_importer.complete, job_id)
+
+@router.delete("/jobs/{job_id}", response_model=BulkImportJob)
+async def abort_job(job_id: str, user: UserClaims = Depends(require_ingest_role)):
+    """Stops a job. Records already written stay in the collection."""
+    _get_job(job_id)
+    return await run_in_threadpool(milvus_handler.bulk_importer.abort, job_id)
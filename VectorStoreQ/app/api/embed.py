@@ -0,0 +1,37 @@
+from fastapi import APIRouter, HTTPException, status, Depends
+from starlette.concurrency import run_in_threadpool
+import logging
+
+from shared.q_vectorstore_client.models import EmbedRequest, EmbedResponse
+from app.core.embeddings import EmbeddingService, get_embedding_service
+from shared.q_auth_parser.parser import get_current_user
+from shared.q_auth_parser.models import UserClaims
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+MAX_TEXTS_PER_REQUEST = 1024
+
+@router.post("", response_model=EmbedResponse)
+async def embed_texts(
+    request: EmbedRequest,
+    user: UserClaims = Depends(get_current_user),
+    embedding_service: EmbeddingService = Depends(get_embedding_service)
+):
+    """
+    Embeds a batch of texts with the service's shared embedding model.
+    Requires any authenticated user.
+    """
+    if len(request.texts) > MAX_TEXTS_PER_REQUEST:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {MAX_TEXTS_PER_REQUEST} texts can be embedded per request."
+        )
+    try:
+        embeddings = await run_in_threadpool(embedding_service.embed, request.texts)
+        return EmbedResponse(model=embedding_service.model_name, dim=embedding_service.dim, embeddings=embeddings)
+    except Exception as e:
+        logger.error(f"An unexpected error occurred while embedding texts: {e}", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An internal error occurred while embedding the texts.")
@@ -1,8 +1,13 @@
 from fastapi import APIRouter, HTTPException, status, Depends
+from starlette.concurrency import run_in_threadpool
 import logging
 
-from shared.q_vectorstore_client.models import UpsertRequest
+from shared.q_vectorstore_client.models import UpsertRequest, DeleteRequest
 from app.core.milvus_handler import milvus_handler
+from app.core.collection_registry import CollectionNotReadyError
+from app.core.embeddings import get_embedding_service
+from app.core.ingest_buffer import IngestBufferFullError
+from app.core.request_scheduler import SchedulerOverloadedError
 from shared.q_auth_parser.parser import get_current_user
 from shared.q_auth_parser.models import UserClaims
 
@@ -20,6 +25,7 @@ async def upsert_vectors(
 ):
     """
     Accepts a batch of vectors and upserts them into the specified Milvus collection.
+    Vectors are buffered and written in batches unless `read_your_writes` is set.
     Requires 'admin' or 'service-account' role.
     """
     # Simple role-based authorization
@@ -32,15 +38,60 @@ async def upsert_vectors(
 
     try:
         logger.info(f"Received upsert request for collection '{request.collection_name}' with {len(request.vectors)} vectors from user '{user.username}'.")
-        result = milvus_handler.upsert(request.collection_name, request.vectors)
+        if any(vector.values is None for vector in request.vectors):
+            # Vectors given as text are embedded with the shared model
+            await run_in_threadpool(get_embedding_service().fill_values, request.vectors)
+        result = await milvus_handler.scheduler.run(
+            request.collection_name, "upsert", milvus_handler.upsert,
+            request.collection_name, request.vectors, read_your_writes=request.read_your_writes
+        )
         return {
-            "message": "Upsert request accepted and processed.",
+            "message": "Upsert request accepted." if result['buffered'] else "Upsert request accepted and processed.",
             "insert_count": result['insert_count'],
             "primary_keys": result['primary_keys']
         }
+    except (IngestBufferFullError, SchedulerOverloadedError) as e:
+        logger.warning(f"Upsert rejected: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "1"})
+    except CollectionNotReadyError as e:
+        logger.info(f"Upsert deferred: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "1"})
     except ValueError as ve:
         logger.warning(f"Upsert failed due to invalid input: {ve}")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(ve))
     except Exception as e:
         logger.error(f"An unexpected error occurred during upsert: {e}", exc_info=True)
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An internal error occurred while processing the upsert request.") 
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An internal error occurred while processing the upsert request.")
+
+
+@router.post("/delete")
+async def delete_vectors(
+    request: DeleteRequest,
+    user: UserClaims = Depends(get_current_user)
+):
+    """
+    Deletes vectors from the specified Milvus collection by primary key,
+    including upserts that are still buffered.
+    Requires 'admin' or 'service-account' role.
+    """
+    if not AUTHORIZED_ROLES.intersection(user.roles):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User does not have the required roles to perform this action."
+        )
+
+    try:
+        logger.info(f"Received delete request for collection '{request.collection_name}' with {len(request.ids)} IDs from user '{user.username}'.")
+        result = await milvus_handler.scheduler.run(
+            request.collection_name, "delete", milvus_handler.delete, request.collection_name, request.ids
+        )
+        return {"message": "Delete request processed.", "delete_count": result['delete_count']}
+    except (SchedulerOverloadedError, CollectionNotReadyError) as e:
+        logger.warning(f"Delete deferred: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "1"})
+    except ValueError as ve:
+        logger.warning(f"Delete failed due to invalid input: {ve}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(ve))
+    except Exception as e:
+        logger.error(f"An unexpected error occurred during delete: {e}", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An internal error occurred while processing the delete request.")
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any
 from fastapi import APIRouter, HTTPException, status, Depends
+from starlette.concurrency import run_in_threadpool
 import logging
 
 from shared.q_auth_parser.parser import get_current_user
@@ -28,10 +29,16 @@ class IndexParams(BaseModel):
     metric_type: str = "COSINE"
     params: Dict[str, Any] = Field(default_factory=lambda: {"M": 16, "efConstruction": 256})
 
+class ScalarIndexParams(BaseModel):
+    """Defines an index on a scalar field, used to speed up filtered searches."""
+    field_name: str
+    index_type: str = "INVERTED"
+
 class CreateCollectionRequest(BaseModel):
     """The complete request to create a new collection and its index."""
     schema: CollectionSchema
     index: IndexParams
+    scalar_indexes: List[ScalarIndexParams] = Field(default_factory=list)
 
 # --- API Endpoint ---
 
@@ -61,9 +68,11 @@ async def create_collection(
 
     try:
         logger.info(f"User '{user.username}' requested to create collection: {request.schema.collection_name}")
-        result = milvus_handler.create_collection_with_index(
+        result = await run_in_threadpool(
+            milvus_handler.create_collection_with_index,
             schema_def=request.schema,
-            index_params=request.index
+            index_params=request.index,
+            scalar_indexes=request.scalar_indexes
         )
         if result["created"]:
             return {"message": "Collection created successfully."}
@@ -74,4 +83,106 @@ async def create_collection(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An internal error occurred: {e}"
-        ) 
\ No newline at end of file
+        )
+
+@router.delete("/collections/{collection_name}")
+async def drop_collection(
+    collection_name: str,
+    user: UserClaims = Depends(get_current_user)
+):
+    """
+    Drops a collection and evicts it from the loaded-collection cache.
+    Requires 'admin' or 'service-account' role.
+    """
+    user_roles = set(user.roles)
+    if not AUTHORIZED_ROLES.intersection(user_roles):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User does not have the required roles to perform this action."
+        )
+
+    try:
+        logger.info(f"User '{user.username}' requested to drop collection: {collection_name}")
+        result = await run_in_threadpool(milvus_handler.drop_collection, collection_name)
+        if not result["dropped"]:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Collection '{collection_name}' does not exist.")
+        return {"message": f"Collection '{collection_name}' dropped."}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to drop collection '{collection_name}': {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An internal error occurred: {e}"
+        )
+
+@router.put("/collections/{collection_name}/index")
+async def alter_index(
+    collection_name: str,
+    index: IndexParams,
+    user: UserClaims = Depends(get_current_user)
+):
+    """
+    Replaces a collection's vector index (e.g., to change its metric type).
+    The collection is reloaded in the background and answers 503 until it is ready.
+    Requires 'admin' or 'service-account' role.
+    """
+    user_roles = set(user.roles)
+    if not AUTHORIZED_ROLES.intersection(user_roles):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User does not have the required roles to perform this action."
+        )
+
+    try:
+        logger.info(f"User '{user.username}' requested to alter the index of collection: {collection_name}")
+        await run_in_threadpool(milvus_handler.alter_index, collection_name, index)
+        return {"message": f"Index of collection '{collection_name}' replaced; the collection is reloading."}
+    except ValueError as ve:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(ve))
+    except Exception as e:
+        logger.error(f"Failed to alter the index of collection '{collection_name}': {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An internal error occurred: {e}"
+        )
+
+@router.post("/collections/{collection_name}/scalar-index", status_code=status.HTTP_201_CREATED)
+async def create_scalar_index(
+    collection_name: str,
+    index: ScalarIndexParams,
+    user: UserClaims = Depends(get_current_user)
+):
+    """
+    Creates an index on a scalar field so searches filtering on it stay fast.
+    The collection is reloaded in the background and answers 503 until it is ready.
+    Requires 'admin' or 'service-account' role.
+    """
+    user_roles = set(user.roles)
+    if not AUTHORIZED_ROLES.intersection(user_roles):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User does not have the required roles to perform this action."
+        )
+
+    try:
+        logger.info(f"User '{user.username}' requested a scalar index on '{collection_name}.{index.field_name}'")
+        await run_in_threadpool(milvus_handler.create_scalar_index, collection_name, index)
+        return {"message": f"Scalar index created on field '{index.field_name}'; the collection is reloading."}
+    except ValueError as ve:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(ve))
+    except Exception as e:
+        logger.error(f"Failed to create a scalar index on '{collection_name}.{index.field_name}': {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An internal error occurred: {e}"
+        )
+
+@router.get("/collections")
+async def list_loaded_collections(
+    user: UserClaims = Depends(get_current_user)
+):
+    """
+    Returns the load state and cached schema details of each known collection.
+    """
+    return milvus_handler.registry.states()
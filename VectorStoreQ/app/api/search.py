@@ -1,8 +1,14 @@
 from fastapi import APIRouter, HTTPException, status, Depends
+from starlette.concurrency import run_in_threadpool
 import logging
 
-from shared.q_vectorstore_client.models import SearchRequest, SearchResponse
+from shared.q_vectorstore_client.models import SearchRequest, SearchResponse, SearchMode
 from app.core.milvus_handler import milvus_handler
+from app.core.collection_registry import CollectionNotReadyError
+from app.core.embeddings import get_embedding_service
+from app.core.query_builder import FilterError
+from app.core.keyword_index import HybridSearchError
+from app.core.request_scheduler import SchedulerOverloadedError
 from shared.q_auth_parser.parser import get_current_user
 from shared.q_auth_parser.models import UserClaims
 
@@ -22,8 +28,28 @@ async def search_vectors(
     """
     try:
         logger.info(f"Received search request for collection '{request.collection_name}' with {len(request.queries)} queries from user '{user.username}'.")
-        results = milvus_handler.search(request.collection_name, request.queries)
+        to_embed = [q for q in request.queries if q.values is None and q.mode != SearchMode.KEYWORD]
+        if to_embed:
+            # Queries given as text are embedded with the shared model
+            await run_in_threadpool(get_embedding_service().fill_values, to_embed)
+        if len(request.queries) == 1 and not request.read_your_writes:
+            # Single-query searches (the common RAG case) are coalesced with concurrent ones
+            result = await milvus_handler.search_coalescer.search(request.collection_name, request.queries[0])
+            return SearchResponse(results=[result])
+        results = await milvus_handler.scheduler.run(
+            request.collection_name, "search", milvus_handler.search,
+            request.collection_name, request.queries, read_your_writes=request.read_your_writes
+        )
         return SearchResponse(results=results)
+    except SchedulerOverloadedError as e:
+        logger.warning(f"Search rejected: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "1"})
+    except CollectionNotReadyError as e:
+        logger.info(f"Search deferred: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "1"})
+    except (FilterError, HybridSearchError) as fe:
+        logger.warning(f"Search rejected due to an invalid query: {fe}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(fe))
     except ValueError as ve:
         logger.warning(f"Search failed due to invalid input: {ve}")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(ve))
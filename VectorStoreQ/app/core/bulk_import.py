@@ -0,0 +1,257 @@
+import io
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+
+from shared.q_vectorstore_client.models import Vector, BulkImportFormat, BulkImportJob, BulkImportStatus
+from shared.observability.metrics import VECTORSTORE_BULK_IMPORT_RECORDS
+
+logger = logging.getLogger(__name__)
+
+# Record fields that aren't metadata
+_VECTOR_FIELDS = ("id", "values", "text")
+
+class BulkImportError(ValueError):
+    """Raised when a chunk can't be parsed or doesn't match the collection's schema."""
+    pass
+
+class BulkJobNotFoundError(LookupError):
+    pass
+
+class BulkJobClosedError(Exception):
+    """Raised when a chunk is sent to a job that is no longer active."""
+    pass
+
+
+def _mark_written(job: BulkImportJob, start: int, end: int):
+    """Adds [start, end) to the job's written ranges, advances the contiguous offset and recounts the records written."""
+    ranges = sorted(job.written_ranges + [(start, end)])
+    merged: List[Tuple[int, int]] = []
+    for s, e in ranges:
+        if merged and s <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], e))
+        else:
+            merged.append((s, e))
+    while merged and merged[0][0] <= job.offset:
+        job.offset = max(job.offset, merged.pop(0)[1])
+    job.written_ranges = merged
+    job.records_written = job.offset + sum(e - s for s, e in merged)
+
+def _is_written(job: BulkImportJob, position: int) -> bool:
+    return position < job.offset or any(s <= position < e for s, e in job.written_ranges)
+
+
+class BulkImporter:
+    """
+    Runs resumable bulk imports into a collection.
+
+    A job is created for a collection, which fixes the fields records may
+    carry. Chunks of records then arrive as NDJSON (one `Vector` per line) or
+    an Arrow IPC stream (columns `id`, `values` and/or `text`, plus metadata
+    columns), each tagged with the offset of its first record. Records are
+    written straight through in batches of `batch_size`, bypassing the
+    write-behind buffer. After every batch, the job's progress is persisted
+    to `state_dir`.
+
+    Chunks may arrive out of order and may be retried. Records already
+    written are skipped, and `offset` is the point below which everything is
+    written, so an interrupted import resumes from there. Chunks of one job
+    are written one at a time, so overlapping retries can't both write a
+    record; different jobs run in parallel.
+    """
+
+    def __init__(
+        self,
+        state_dir: str,
+        writer: Callable[[str, List[Vector]], None],
+        schema_fields: Callable[[str], Sequence[str]],
+        prepare: Optional[Callable[[List[Vector]], None]] = None,
+        batch_size: int = 1000
+    ):
+        self.state_dir = state_dir
+        self.writer = writer
+        self.schema_fields = schema_fields
+        self.prepare = prepare
+        self.batch_size = batch_size
+        self._jobs: Dict[str, BulkImportJob] = {}
+        self._job_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Creates the state directory and recovers jobs persisted by an earlier run."""
+        os.makedirs(self.state_dir, exist_ok=True)
+        self._load_jobs()
+
+    def create_job(self, collection_name: str, format: BulkImportFormat) -> BulkImportJob:
+        """Starts a job. Raises ValueError if the collection doesn't exist."""
+        job = BulkImportJob(
+            job_id=uuid.uuid4().hex,
+            collection_name=collection_name,
+            format=format,
+            schema_fields=list(self.schema_fields(collection_name)),
+        )
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._save(job)
+        logger.info(f"Bulk import job '{job.job_id}' created for collection '{collection_name}'.")
+        return job
+
+    def get_job(self, job_id: str) -> BulkImportJob:
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise BulkJobNotFoundError(f"Bulk import job '{job_id}' not found.")
+        return job
+
+    def list_jobs(self) -> List[BulkImportJob]:
+        return list(self._jobs.values())
+
+    def write_chunk(self, job_id: str, offset: int, data: bytes) -> BulkImportJob:
+        """Writes a chunk whose first record is at `offset`, skipping already written records."""
+        job = self.get_job(job_id)
+        if offset < 0:
+            raise BulkImportError("Chunk offset must not be negative.")
+        with self._job_lock(job_id):
+            if job.status != BulkImportStatus.ACTIVE:
+                raise BulkJobClosedError(f"Bulk import job '{job_id}' is {job.status.value}.")
+            self._write_records(job, offset, data)
+        return job
+
+    def _write_records(self, job: BulkImportJob, offset: int, data: bytes):
+        batch: List[Vector] = []
+        batch_start = offset
+        position = offset
+        for position_in_chunk, vector in enumerate(self._parse(job, data)):
+            position = offset + position_in_chunk
+            if _is_written(job, position):
+                # Already written by an earlier attempt: close the current batch before the gap
+                self._write_batch(job, batch_start, batch)
+                batch = []
+                batch_start = position + 1
+                continue
+            batch.append(vector)
+            if len(batch) >= self.batch_size:
+                self._write_batch(job, batch_start, batch)
+                batch = []
+                batch_start = position + 1
+        self._write_batch(job, batch_start, batch)
+
+    def complete(self, job_id: str) -> BulkImportJob:
+        return self._close(job_id, BulkImportStatus.COMPLETED)
+
+    def abort(self, job_id: str) -> BulkImportJob:
+        return self._close(job_id, BulkImportStatus.ABORTED)
+
+    def _close(self, job_id: str, status: BulkImportStatus) -> BulkImportJob:
+        job = self.get_job(job_id)
+        # Waits for a chunk being written to finish
+        with self._job_lock(job_id), self._lock:
+            job.status = status
+            job.updated_at = time.time()
+            self._save(job)
+        logger.info(f"Bulk import job '{job_id}' {status.value} after {job.records_written} records.")
+        return job
+
+    def _job_lock(self, job_id: str) -> threading.Lock:
+        with self._lock:
+            return self._job_locks.setdefault(job_id, threading.Lock())
+
+    def _write_batch(self, job: BulkImportJob, start: int, batch: List[Vector]):
+        if not batch:
+            return
+        if self.prepare is not None:
+            self.prepare(batch)
+        self.writer(job.collection_name, batch)
+        with self._lock:
+            _mark_written(job, start, start + len(batch))
+            job.batches_written += 1
+            job.updated_at = time.time()
+            self._save(job)
+        VECTORSTORE_BULK_IMPORT_RECORDS.labels(collection=job.collection_name).inc(len(batch))
+
+    # --- Parsing ---
+
+    def _parse(self, job: BulkImportJob, data: bytes) -> Iterator[Vector]:
+        if job.format == BulkImportFormat.NDJSON:
+            return self._parse_ndjson(job, data)
+        return self._parse_arrow(job, data)
+
+    def _parse_ndjson(self, job: BulkImportJob, data: bytes) -> Iterator[Vector]:
+        allowed = set(job.schema_fields)
+        checked_keys = set()
+        for line_number, line in enumerate(data.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                vector = Vector.model_validate_json(line)
+            except ValidationError as e:
+                raise BulkImportError(f"Invalid record on line {line_number}: {e.errors()[0]['msg']}")
+            # Records of one import nearly always share a shape, so each distinct key set is checked once
+            keys = frozenset(vector.metadata)
+            if keys not in checked_keys:
+                unknown = keys - allowed
+                if unknown:
+                    raise BulkImportError(f"Record on line {line_number} has fields not in the collection schema: {sorted(unknown)}.")
+                checked_keys.add(keys)
+            yield vector
+
+    def _parse_arrow(self, job: BulkImportJob, data: bytes) -> Iterator[Vector]:
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise BulkImportError("Arrow imports need pyarrow installed in VectorStoreQ.")
+        try:
+            reader = pa.ipc.open_stream(io.BytesIO(data))
+        except pa.ArrowInvalid as e:
+            raise BulkImportError(f"Invalid Arrow IPC stream: {e}")
+
+        # The stream's schema is validated once per job; later chunks only need to match it
+        schema_text = reader.schema.to_string(show_schema_metadata=False)
+        if job.arrow_schema is None:
+            names = set(reader.schema.names)
+            if "id" not in names or not names.intersection(("values", "text")):
+                raise BulkImportError("Arrow streams need an 'id' column and a 'values' or 'text' column.")
+            unknown = names - set(_VECTOR_FIELDS) - set(job.schema_fields)
+            if unknown:
+                raise BulkImportError(f"Arrow columns not in the collection schema: {sorted(unknown)}.")
+            with self._lock:
+                job.arrow_schema = schema_text
+                self._save(job)
+        elif schema_text != job.arrow_schema:
+            raise BulkImportError("Arrow schema differs from the one this job started with.")
+
+        for record_batch in reader:
+            for row in record_batch.to_pylist():
+                yield Vector(
+                    id=str(row.pop("id")),
+                    values=row.pop("values", None),
+                    text=row.pop("text", None),
+                    metadata={k: v for k, v in row.items() if v is not None},
+                )
+
+    # --- Persistence ---
+
+    def _save(self, job: BulkImportJob):
+        path = os.path.join(self.state_dir, f"{job.job_id}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(job.model_dump_json())
+        os.replace(tmp_path, path)
+
+    def _load_jobs(self):
+        for name in os.listdir(self.state_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.state_dir, name)) as f:
+                    job = BulkImportJob(**json.load(f))
+                self._jobs[job.job_id] = job
+            except Exception as e:
+                logger.warning(f"Skipping unreadable bulk import job state '{name}': {e}")
+        if self._jobs:
+            logger.info(f"Recovered {len(self._jobs)} bulk import jobs from '{self.state_dir}'.")
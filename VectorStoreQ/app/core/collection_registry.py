@@ -0,0 +1,164 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Callable, Dict, List, Optional
+
+from pymilvus import utility, Collection, DataType
+
+logger = logging.getLogger(__name__)
+
+VECTOR_DTYPES = {DataType.FLOAT_VECTOR, DataType.BINARY_VECTOR}
+
+class CollectionState(str, Enum):
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+class CollectionNotReadyError(Exception):
+    """Raised when a collection exists but is still being loaded in the background."""
+    def __init__(self, collection_name: str, state: CollectionState):
+        super().__init__(f"Collection '{collection_name}' is not ready yet (state: {state.value}).")
+        self.collection_name = collection_name
+        self.state = state
+
+
+class CollectionInfo:
+    """A loaded collection handle together with the schema details searches need."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CollectionState.LOADING
+        self.collection: Optional[Collection] = None
+        self.primary_field: Optional[str] = None
+        self.vector_field: Optional[str] = None
+        self.metric_type: Optional[str] = None
+        self.scalar_fields: List[str] = []
+        # The fields an insert must provide, in schema order (auto-generated IDs excluded)
+        self.insert_fields: List[str] = []
+        self.index_params: Dict = {}
+        self.error: Optional[str] = None
+        self.loaded_at: Optional[float] = None
+        self.ready = threading.Event()
+
+    def describe(self) -> Dict:
+        return {
+            "state": self.state.value,
+            "primary_field": self.primary_field,
+            "vector_field": self.vector_field,
+            "metric_type": self.metric_type,
+            "scalar_fields": self.scalar_fields,
+            "error": self.error,
+        }
+
+
+class CollectionRegistry:
+    """
+    A process-wide registry of loaded Milvus collections and their schemas.
+
+    `get` never loads a collection inline: an unknown collection is loaded on a
+    background thread and the caller gets a `CollectionNotReadyError` until it
+    is ready. Once loaded, the `Collection` object, its vector field and
+    metric type are reused for every request, so a search or upsert costs
+    exactly one round trip. Entries must be invalidated when a collection is
+    dropped or its index is altered. `on_load` is called on the loader thread
+    after each successful load.
+    """
+
+    def __init__(self, alias: str = "default", max_workers: int = 2, on_load: Optional[Callable[[CollectionInfo], None]] = None):
+        self.alias = alias
+        self.on_load = on_load
+        self._collections: Dict[str, CollectionInfo] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="milvus-loader")
+
+    def get(self, collection_name: str, wait: float = 0.0) -> CollectionInfo:
+        """
+        Returns the ready collection, waiting up to `wait` seconds for a
+        background load. Raises ValueError if the collection does not exist.
+        """
+        with self._lock:
+            info = self._collections.get(collection_name)
+            if info is not None and info.state == CollectionState.READY:
+                return info
+
+        if info is None or info.state == CollectionState.FAILED:
+            if not utility.has_collection(collection_name, using=self.alias):
+                raise ValueError(f"Collection '{collection_name}' does not exist in Milvus.")
+            info = self._schedule_load(collection_name)
+
+        if wait > 0 and info.ready.wait(wait) and info.state == CollectionState.READY:
+            return info
+        raise CollectionNotReadyError(collection_name, info.state)
+
+    def warm(self, collection_names: Optional[List[str]] = None):
+        """Starts background loads, e.g. for all existing collections at startup."""
+        if collection_names is None:
+            collection_names = utility.list_collections(using=self.alias)
+        for name in collection_names:
+            self._schedule_load(name)
+
+    def invalidate(self, collection_name: str):
+        """Forgets a collection after it was dropped or altered; the next request reloads it."""
+        with self._lock:
+            if self._collections.pop(collection_name, None) is not None:
+                logger.info(f"Invalidated cached collection '{collection_name}'.")
+
+    def states(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {name: info.describe() for name, info in self._collections.items()}
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _schedule_load(self, collection_name: str) -> CollectionInfo:
+        with self._lock:
+            info = self._collections.get(collection_name)
+            if info is not None and info.state != CollectionState.FAILED:
+                return info
+            info = CollectionInfo(collection_name)
+            self._collections[collection_name] = info
+        self._executor.submit(self._load, info)
+        return info
+
+    def _load(self, info: CollectionInfo):
+        start = time.monotonic()
+        try:
+            collection = Collection(name=info.name, using=self.alias)
+            collection.load()
+
+            schema = collection.schema
+            vector_fields = [f.name for f in schema.fields if f.dtype in VECTOR_DTYPES]
+            if not vector_fields:
+                raise ValueError(f"Collection '{info.name}' has no vector field.")
+            info.primary_field = schema.primary_field.name if schema.primary_field else None
+            info.vector_field = vector_fields[0]
+            info.scalar_fields = [
+                f.name for f in schema.fields
+                if f.dtype not in VECTOR_DTYPES
+            ]
+            info.insert_fields = [
+                f.name for f in schema.fields
+                if not (f.is_primary and schema.auto_id)
+            ]
+            for index in collection.indexes:
+                if index.field_name == info.vector_field:
+                    info.index_params = dict(index.params)
+                    info.metric_type = index.params.get("metric_type")
+            info.collection = collection
+            info.loaded_at = time.time()
+            info.state = CollectionState.READY
+            logger.info(f"Loaded collection '{info.name}' in {time.monotonic() - start:.2f}s.")
+        except Exception as e:
+            info.error = str(e)
+            info.state = CollectionState.FAILED
+            logger.error(f"Failed to load collection '{info.name}': {e}", exc_info=True)
+        finally:
+            info.ready.set()
+
+        if self.on_load is not None and info.state == CollectionState.READY:
+            try:
+                self.on_load(info)
+            except Exception as e:
+                logger.error(f"Post-load hook failed for collection '{info.name}': {e}", exc_info=True)
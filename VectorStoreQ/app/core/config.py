@@ -1,7 +1,7 @@
 import yaml
 import logging
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Any, Dict, Optional
 from shared.vault_client import VaultClient
 
 # Configure logging
@@ -19,6 +19,78 @@ class MilvusConfig(BaseModel):
     port: int
     token: Optional[str] = None
     alias: str = "default"
+    # Collections are loaded in the background; requests for a collection that is
+    # still loading wait this long before getting a 503
+    collection_ready_wait_seconds: float = 0.0
+    loader_threads: int = 2
+    # Per-collection default search params (e.g. {"rag_document_chunks": {"ef": 128}}),
+    # layered over the defaults for the collection's index type
+    search_params: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
+
+class IngestConfig(BaseModel):
+    """Configuration for the write-behind upsert buffer."""
+    max_batch_size: int = 1000
+    max_delay_ms: int = 1000
+    # Upserts are rejected with a 503 once this many vectors are waiting to be written
+    max_buffered_vectors: int = 100000
+    # Explicitly seal segments at most this often; None leaves sealing to Milvus
+    seal_interval_seconds: Optional[float] = None
+
+class ConcurrencyConfig(BaseModel):
+    """Configuration for running Milvus calls off the event loop."""
+    max_workers: int = 16
+    # Requests beyond this many queued or running Milvus calls get a 503
+    max_pending_requests: int = 256
+    per_collection_limit: int = 8
+    # Concurrent single-query searches on a collection arriving within this
+    # window are sent to Milvus as one batch
+    coalesce_window_ms: float = 2.0
+    max_coalesced_queries: int = 64
+
+class EmbeddingConfig(BaseModel):
+    """Configuration for the shared text embedding model."""
+    # 'sentence_transformers', or 'hashing' for a deterministic model-free embedder
+    backend: str = "sentence_transformers"
+    model_name: str = "all-MiniLM-L6-v2"
+    device: Optional[str] = None
+    # Only used by the hashing backend
+    dim: int = 384
+    batch_size: int = 32
+    cache_size: int = 10000
+
+class HybridConfig(BaseModel):
+    """Configuration for keyword (BM25) and hybrid search."""
+    # The scalar field holding each collection's text; only these collections get a keyword index
+    text_fields: Dict[str, str] = Field(default_factory=lambda: {
+        "rag_document_chunks": "text_chunk",
+        "code_documentation": "code_chunk",
+    })
+    dense_weight: float = 1.0
+    keyword_weight: float = 1.0
+    rrf_k: int = 60
+    # Each ranking contributes top_k * candidate_multiplier candidates to the fusion
+    candidate_multiplier: int = 4
+    bm25_k1: float = 1.2
+    bm25_b: float = 0.75
+
+class ResultCacheConfig(BaseModel):
+    """Configuration for the search result cache."""
+    enabled: bool = True
+    max_bytes: int = 64 * 1024 * 1024
+    # Reuse a cached result for a query vector at least this similar (cosine); None disables
+    similarity_threshold: Optional[float] = 0.995
+    max_neighbors: int = 32
+    # Bounds staleness from writes accepted by other replicas
+    ttl_seconds: Optional[float] = 60.0
+
+class BulkImportConfig(BaseModel):
+    """Configuration for streaming bulk import jobs."""
+    # Job progress is persisted here so imports can resume after a restart
+    state_dir: str = "/var/lib/vectorstoreq/bulk_jobs"
+    # Records are written to Milvus in batches of this size
+    batch_size: int = 1000
+    # Chunks larger than this are rejected with a 413
+    max_chunk_bytes: int = 32 * 1024 * 1024
 
 class OtelConfig(BaseModel):
     enabled: bool
@@ -31,6 +103,12 @@ class AppConfig(BaseModel):
     api: ApiConfig
     milvus: MilvusConfig
     otel: OtelConfig
+    ingest: IngestConfig = Field(default_factory=IngestConfig)
+    embedding: EmbeddingConfig = Field(default_factory=EmbeddingConfig)
+    concurrency: ConcurrencyConfig = Field(default_factory=ConcurrencyConfig)
+    hybrid: HybridConfig = Field(default_factory=HybridConfig)
+    result_cache: ResultCacheConfig = Field(default_factory=ResultCacheConfig)
+    bulk_import: BulkImportConfig = Field(default_factory=BulkImportConfig)
 
 # --- Configuration Loading ---
 
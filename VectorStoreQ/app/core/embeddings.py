@@ -0,0 +1,175 @@
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+
+from shared.observability.metrics import VECTORSTORE_EMBED_CACHE_LOOKUPS, VECTORSTORE_EMBED_LATENCY
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbedder:
+    """
+    A deterministic, dependency-free embedder based on feature hashing of
+    lower-cased word tokens. Texts sharing words get similar vectors, which is
+    enough for tests and local development without downloading a model.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def encode(self, texts: Sequence[str]) -> List[List[float]]:
+        vectors = []
+        for text in texts:
+            vector = [0.0] * self.dim
+            for token in _TOKEN.findall(text.lower()):
+                digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dim
+                vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+            norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+            vectors.append([v / norm for v in vector])
+        return vectors
+
+
+class SentenceTransformerEmbedder:
+    """Wraps a sentence-transformers model, loaded lazily on first use."""
+
+    def __init__(self, model_name: str, device: Optional[str] = None):
+        self.model_name = model_name
+        self.device = device
+        self._model = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    logger.info(f"Loading embedding model '{self.model_name}'...")
+                    self._model = SentenceTransformer(self.model_name, device=self.device)
+        return self._model
+
+    @property
+    def dim(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: Sequence[str], batch_size: int = 32) -> List[List[float]]:
+        embeddings = self.model.encode(list(texts), batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+        return embeddings.tolist()
+
+
+class EmbeddingService:
+    """
+    Turns text into vectors for the search and ingest endpoints and /v1/embed.
+
+    Identical texts within a call are encoded once, texts seen recently are
+    served from an LRU cache, and the rest are encoded in batches of
+    `batch_size`. Encoding is serialized so concurrent requests don't contend
+    for the same model.
+    """
+
+    def __init__(self, embedder, model_name: str, batch_size: int = 32, cache_size: int = 10000):
+        self.embedder = embedder
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._encode_lock = threading.Lock()
+
+    @property
+    def dim(self) -> int:
+        return self.embedder.dim
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """Returns one embedding per text, in order."""
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        missing: "OrderedDict[str, List[int]]" = OrderedDict()
+
+        with self._cache_lock:
+            for i, text in enumerate(texts):
+                cached = self._cache.get(text)
+                if cached is not None:
+                    self._cache.move_to_end(text)
+                    results[i] = cached
+                else:
+                    missing.setdefault(text, []).append(i)
+        hits = len(texts) - sum(len(indexes) for indexes in missing.values())
+        if hits:
+            VECTORSTORE_EMBED_CACHE_LOOKUPS.labels(result="hit").inc(hits)
+        if missing:
+            VECTORSTORE_EMBED_CACHE_LOOKUPS.labels(result="miss").inc(len(texts) - hits)
+
+        unique_texts = list(missing)
+        for start in range(0, len(unique_texts), self.batch_size):
+            batch = unique_texts[start:start + self.batch_size]
+            embeddings = self._encode(batch)
+            with self._cache_lock:
+                for text, embedding in zip(batch, embeddings):
+                    for i in missing[text]:
+                        results[i] = embedding
+                    if self.cache_size > 0:
+                        self._cache[text] = embedding
+                        self._cache.move_to_end(text)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return results
+
+    def fill_values(self, items: Sequence) -> int:
+        """
+        Embeds the `text` of every item (a Vector or Query) that has no
+        `values` yet, in a single batched call. Returns the number embedded.
+        """
+        pending = [item for item in items if item.values is None]
+        if not pending:
+            return 0
+        for item, embedding in zip(pending, self.embed([item.text for item in pending])):
+            item.values = embedding
+        return len(pending)
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        start = time.monotonic()
+        with self._encode_lock:
+            embeddings = self.embedder.encode(texts)
+        VECTORSTORE_EMBED_LATENCY.observe(time.monotonic() - start)
+        return embeddings
+
+
+def create_embedder(backend: str, model_name: str, dim: int, device: Optional[str] = None):
+    if backend == "hashing":
+        return HashingEmbedder(dim=dim)
+    if backend == "sentence_transformers":
+        return SentenceTransformerEmbedder(model_name, device=device)
+    raise ValueError(f"Unknown embedding backend '{backend}'.")
+
+
+# Global instance for the application, created at startup
+embedding_service: Optional[EmbeddingService] = None
+
+def init_embedding_service(embedding_config) -> EmbeddingService:
+    global embedding_service
+    embedder = create_embedder(
+        embedding_config.backend,
+        embedding_config.model_name,
+        embedding_config.dim,
+        device=embedding_config.device
+    )
+    embedding_service = EmbeddingService(
+        embedder,
+        model_name=embedding_config.model_name if embedding_config.backend != "hashing" else f"hashing-{embedding_config.dim}",
+        batch_size=embedding_config.batch_size,
+        cache_size=embedding_config.cache_size
+    )
+    return embedding_service
+
+def get_embedding_service() -> EmbeddingService:
+    if embedding_service is None:
+        raise RuntimeError("EmbeddingService has not been initialized.")
+    return embedding_service
@@ -0,0 +1,79 @@
+from typing import Any, Dict, Optional
+
+from shared.q_vectorstore_client.models import Query, QueryResult, SearchHit, SearchMode
+from .collection_registry import CollectionInfo
+from .keyword_index import BM25Index, reciprocal_rank_fusion
+from .query_builder import build_filter_expression
+
+def hit_metadata(hit, vector_field: Optional[str]) -> Dict[str, Any]:
+    """The scalar fields of a search hit's entity (the vector itself is left out)."""
+    if not hasattr(hit, "entity"):
+        return {}
+    fields = hit.entity.to_dict()
+    fields = fields.get("entity", fields)
+    return {k: v for k, v in fields.items() if k != vector_field}
+
+def hybrid_search(
+    info: CollectionInfo,
+    query: Query,
+    index: BM25Index,
+    expr: Optional[str],
+    search_params: Dict[str, Any],
+    rrf_k: int = 60,
+    candidate_multiplier: int = 4,
+    dense_weight: float = 1.0,
+    keyword_weight: float = 1.0,
+    **search_kwargs
+) -> QueryResult:
+    """
+    Serves a keyword or hybrid query against a loaded collection.
+
+    BM25 candidates come from the local index and are checked against the
+    query's filter (and fetched) with one `query` call on their primary keys.
+    In hybrid mode the dense candidates come from one `search` call, and both
+    rankings are fused with weighted reciprocal rank fusion; hit scores are
+    then RRF scores. Keyword-only hits are scored by BM25.
+    """
+    num_candidates = query.top_k * candidate_multiplier
+    metadata: Dict[Any, Dict[str, Any]] = {}
+    rankings = []
+
+    if query.mode == SearchMode.HYBRID:
+        results = info.collection.search(
+            data=[query.values],
+            anns_field=info.vector_field,
+            param=search_params,
+            limit=num_candidates,
+            expr=expr,
+            output_fields=["*"],
+            **search_kwargs
+        )
+        dense_ids = []
+        for hit in results[0]:
+            dense_ids.append(hit.id)
+            metadata[hit.id] = hit_metadata(hit, info.vector_field)
+        rankings.append((dense_ids, dense_weight if query.dense_weight is None else query.dense_weight))
+
+    keyword_hits = index.search(query.text, num_candidates)
+    keyword_scores = dict(keyword_hits)
+    keyword_ids = []
+    if keyword_hits:
+        fetch_expr = build_filter_expression({info.primary_field: {"$in": [doc_id for doc_id, _ in keyword_hits]}})
+        if expr:
+            fetch_expr = f"({fetch_expr}) and ({expr})"
+        rows = info.collection.query(expr=fetch_expr, output_fields=["*"], **search_kwargs)
+        found = {row[info.primary_field]: row for row in rows}
+        # Drops candidates the filter excludes and ones not written to Milvus yet
+        keyword_ids = [doc_id for doc_id, _ in keyword_hits if doc_id in found]
+        for doc_id in keyword_ids:
+            metadata.setdefault(doc_id, {k: v for k, v in found[doc_id].items() if k != info.vector_field})
+    rankings.append((keyword_ids, keyword_weight if query.keyword_weight is None else query.keyword_weight))
+
+    if query.mode == SearchMode.KEYWORD:
+        ranked = [(doc_id, keyword_scores[doc_id]) for doc_id in keyword_ids[:query.top_k]]
+    else:
+        ranked = reciprocal_rank_fusion(rankings, k=rrf_k, top_k=query.top_k)
+    return QueryResult(hits=[
+        SearchHit(id=str(doc_id), score=score, metadata=metadata.get(doc_id, {}))
+        for doc_id, score in ranked
+    ])
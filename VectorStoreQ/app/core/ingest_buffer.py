@@ -0,0 +1,235 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from shared.observability.metrics import (
+    VECTORSTORE_INGEST_BATCH_SIZE,
+    VECTORSTORE_INGEST_BUFFERED,
+    VECTORSTORE_INGEST_DEDUPLICATED,
+    VECTORSTORE_INGEST_FLUSHES,
+)
+
+logger = logging.getLogger(__name__)
+
+class IngestBufferFullError(Exception):
+    """Raised when the write-behind buffer is at capacity and can't accept more vectors."""
+    pass
+
+
+class _CollectionBuffer:
+    """Pending rows for one collection, keyed by primary key in arrival order."""
+
+    def __init__(self):
+        self.rows: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.oldest: Optional[float] = None
+        # Serialises writes so an older batch can never land after a newer one
+        self.write_lock = threading.Lock()
+        self.last_sealed = time.monotonic()
+        self.dirty = False
+
+
+class IngestBuffer:
+    """
+    A write-behind buffer for upserts. Rows are coalesced per collection and
+    deduplicated by primary key (last write wins), then written in one batch
+    once `max_batch_size` rows are pending or the oldest row is
+    `max_delay_seconds` old. Callers that need to read their own writes flush
+    the collection synchronously.
+
+    Segments are no longer sealed per request: `sealer` (e.g. Milvus
+    `flush()`) is called at most every `seal_interval_seconds` per collection
+    and on shutdown; otherwise Milvus seals segments on its own schedule.
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[str, List[Any]], None],
+        max_batch_size: int = 1000,
+        max_delay_seconds: float = 1.0,
+        max_buffered: int = 100000,
+        sealer: Optional[Callable[[str], None]] = None,
+        seal_interval_seconds: Optional[float] = None,
+    ):
+        self.writer = writer
+        self.max_batch_size = max_batch_size
+        self.max_delay_seconds = max_delay_seconds
+        self.max_buffered = max_buffered
+        self.sealer = sealer
+        self.seal_interval_seconds = seal_interval_seconds
+
+        self._buffers: Dict[str, _CollectionBuffer] = {}
+        self._buffered = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._poll_interval = min(max_delay_seconds / 4, 0.25)
+
+    # --- Public API ---
+
+    def add(self, collection_name: str, rows: Iterable[Tuple[Hashable, Any]]) -> int:
+        """
+        Buffers `(primary_key, row)` pairs. Returns the number of rows accepted.
+        Raises IngestBufferFullError if the buffer would exceed `max_buffered`.
+        """
+        rows = list(rows)
+        with self._lock:
+            if self._buffered + len(rows) > self.max_buffered:
+                raise IngestBufferFullError(
+                    f"The ingest buffer is full ({self._buffered} vectors pending); retry shortly."
+                )
+            buffer = self._buffers.setdefault(collection_name, _CollectionBuffer())
+            replaced = 0
+            for key, row in rows:
+                if key in buffer.rows:
+                    # Re-append so the row keeps the position of its latest write
+                    del buffer.rows[key]
+                    replaced += 1
+                buffer.rows[key] = row
+            if buffer.oldest is None and buffer.rows:
+                buffer.oldest = time.monotonic()
+            self._buffered += len(rows) - replaced
+            pending = len(buffer.rows)
+            VECTORSTORE_INGEST_BUFFERED.labels(collection=collection_name).set(pending)
+
+        if replaced:
+            VECTORSTORE_INGEST_DEDUPLICATED.labels(collection=collection_name).inc(replaced)
+        if pending >= self.max_batch_size:
+            self._wakeup.set()
+        return len(rows)
+
+    def flush(self, collection_name: Optional[str] = None, reason: str = "explicit") -> int:
+        """
+        Synchronously writes the pending rows of one (or every) collection.
+        Returns the number of rows written. Write errors are raised and the
+        rows stay buffered for the next attempt.
+        """
+        if collection_name is None:
+            with self._lock:
+                names = list(self._buffers)
+            return sum(self.flush(name, reason) for name in names)
+
+        with self._lock:
+            buffer = self._buffers.get(collection_name)
+        if buffer is None:
+            return 0
+
+        with buffer.write_lock:
+            with self._lock:
+                batch, buffer.rows = buffer.rows, OrderedDict()
+                buffer.oldest = None
+                self._buffered -= len(batch)
+            if not batch:
+                return 0
+
+            start = time.monotonic()
+            try:
+                self.writer(collection_name, list(batch.values()))
+            except Exception:
+                VECTORSTORE_INGEST_FLUSHES.labels(collection=collection_name, reason=reason, result="error").inc()
+                self._requeue(collection_name, buffer, batch)
+                raise
+
+            buffer.dirty = True
+            VECTORSTORE_INGEST_FLUSHES.labels(collection=collection_name, reason=reason, result="ok").inc()
+            VECTORSTORE_INGEST_BATCH_SIZE.labels(collection=collection_name).observe(len(batch))
+            with self._lock:
+                VECTORSTORE_INGEST_BUFFERED.labels(collection=collection_name).set(len(buffer.rows))
+            logger.info(f"Flushed {len(batch)} buffered vectors to '{collection_name}' in {time.monotonic() - start:.3f}s ({reason}).")
+            return len(batch)
+
+    def discard(self, collection_name: str, keys: Iterable[Hashable]) -> int:
+        """
+        Drops pending rows by primary key, e.g. because they were deleted.
+        Waits for a write in progress, so a discarded row can't land after
+        this returns. Returns the number of rows dropped.
+        """
+        with self._lock:
+            buffer = self._buffers.get(collection_name)
+        if buffer is None:
+            return 0
+        with buffer.write_lock:
+            with self._lock:
+                dropped = sum(1 for key in keys if buffer.rows.pop(key, None) is not None)
+                self._buffered -= dropped
+                if not buffer.rows:
+                    buffer.oldest = None
+                VECTORSTORE_INGEST_BUFFERED.labels(collection=collection_name).set(len(buffer.rows))
+        return dropped
+
+    def pending(self, collection_name: str) -> int:
+        with self._lock:
+            buffer = self._buffers.get(collection_name)
+            return len(buffer.rows) if buffer else 0
+
+    def start(self, poll_interval: Optional[float] = None):
+        """Starts the background flusher thread."""
+        if poll_interval:
+            self._poll_interval = poll_interval
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="ingest-buffer-flusher", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout: float = 30.0):
+        """Stops the flusher, writes everything still pending and seals dirty collections."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+        try:
+            self.flush(reason="shutdown")
+        except Exception as e:
+            logger.error(f"Failed to flush the ingest buffer on shutdown: {e}", exc_info=True)
+        if self.sealer:
+            for name, buffer in list(self._buffers.items()):
+                if buffer.dirty:
+                    self._seal(name, buffer)
+
+    # --- Background Flushing ---
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self._poll_interval)
+            self._wakeup.clear()
+            for name, reason in self._due():
+                try:
+                    self.flush(name, reason)
+                except Exception as e:
+                    logger.error(f"Background flush of '{name}' failed; will retry: {e}", exc_info=True)
+            if self.sealer and self.seal_interval_seconds:
+                now = time.monotonic()
+                for name, buffer in list(self._buffers.items()):
+                    if buffer.dirty and now - buffer.last_sealed >= self.seal_interval_seconds:
+                        self._seal(name, buffer)
+
+    def _due(self) -> List[Tuple[str, str]]:
+        """Returns the collections that should be flushed now, with the reason."""
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for name, buffer in self._buffers.items():
+                if len(buffer.rows) >= self.max_batch_size:
+                    due.append((name, "size"))
+                elif buffer.oldest is not None and now - buffer.oldest >= self.max_delay_seconds:
+                    due.append((name, "age"))
+        return due
+
+    def _requeue(self, collection_name: str, buffer: _CollectionBuffer, batch: "OrderedDict[Hashable, Any]"):
+        """Puts a failed batch back in front of rows that arrived while it was being written."""
+        with self._lock:
+            newer = buffer.rows
+            buffer.rows = OrderedDict((k, v) for k, v in batch.items() if k not in newer)
+            buffer.rows.update(newer)
+            self._buffered += len(buffer.rows) - len(newer)
+            buffer.oldest = time.monotonic()
+            VECTORSTORE_INGEST_BUFFERED.labels(collection=collection_name).set(len(buffer.rows))
+
+    def _seal(self, collection_name: str, buffer: _CollectionBuffer):
+        try:
+            self.sealer(collection_name)
+            buffer.dirty = False
+            buffer.last_sealed = time.monotonic()
+        except Exception as e:
+            logger.error(f"Failed to seal collection '{collection_name}': {e}", exc_info=True)
@@ -0,0 +1,190 @@
+import heapq
+import logging
+import math
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_CAMEL_PARTS = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z0-9]+|[A-Z0-9]+")
+
+class HybridSearchError(ValueError):
+    """Raised when a keyword or hybrid query can't be served for a collection."""
+    pass
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lower-cased word tokens. Identifiers are kept whole and also split into
+    their snake_case / camelCase parts, so `dispatch_task`, `DispatchTask` and
+    "dispatch task" all match each other while the exact identifier still
+    scores highest.
+    """
+    tokens = []
+    for word in _WORD.findall(text or ""):
+        tokens.append(word.lower())
+        parts = [part.lower() for chunk in word.split("_") for part in _CAMEL_PARTS.findall(chunk)]
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+class BM25Index:
+    """
+    An in-memory inverted index with Okapi BM25 scoring.
+
+    Documents are keyed by the collection's primary key; adding a document
+    that is already indexed replaces it, matching upsert semantics.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[Any, int]] = {}
+        self._doc_terms: Dict[Any, Dict[str, int]] = {}
+        self._doc_lengths: Dict[Any, int] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def add(self, doc_id: Any, text: str, replace: bool = True):
+        """Indexes a document. With `replace=False` an already indexed document is kept as is."""
+        terms: Dict[str, int] = {}
+        for token in tokenize(text):
+            terms[token] = terms.get(token, 0) + 1
+        with self._lock:
+            if doc_id in self._doc_terms:
+                if not replace:
+                    return
+                self._remove(doc_id)
+            self._doc_terms[doc_id] = terms
+            self._doc_lengths[doc_id] = sum(terms.values())
+            self._total_length += self._doc_lengths[doc_id]
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = tf
+
+    def remove(self, doc_id: Any):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id: Any):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+
+    def search(self, text: str, top_k: int) -> List[Tuple[Any, float]]:
+        """Returns up to `top_k` `(doc_id, score)` pairs, best first."""
+        with self._lock:
+            num_docs = len(self._doc_terms)
+            if not num_docs:
+                return []
+            avg_length = self._total_length / num_docs or 1.0
+            scores: Dict[Any, float] = {}
+            for term in set(tokenize(text)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (num_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = tf + self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Tuple[Sequence[Any], float]],
+    k: int = 60,
+    top_k: Optional[int] = None
+) -> List[Tuple[Any, float]]:
+    """
+    Fuses ranked ID lists with weighted reciprocal rank fusion:
+    score(d) = sum(weight / (k + rank of d in that list)).
+    `rankings` is a list of `(ids_best_first, weight)`. Ties keep first-seen order.
+    """
+    scores: Dict[Any, float] = {}
+    for ids, weight in rankings:
+        for rank, doc_id in enumerate(ids, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (k + rank)
+    fused = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return fused[:top_k] if top_k is not None else fused
+
+
+class KeywordIndexRegistry:
+    """
+    One BM25 index per collection that has a text field configured in
+    `hybrid.text_fields`. Indexes are per process: they are backfilled from
+    Milvus when a collection is loaded and kept current on the ingest path.
+    """
+
+    def __init__(self, text_fields: Dict[str, str], k1: float = 1.2, b: float = 0.75):
+        self.text_fields = dict(text_fields)
+        self.k1 = k1
+        self.b = b
+        self._indexes: Dict[str, BM25Index] = {}
+        self._lock = threading.Lock()
+
+    def text_field(self, collection_name: str) -> Optional[str]:
+        return self.text_fields.get(collection_name)
+
+    def get(self, collection_name: str) -> Optional[BM25Index]:
+        """Returns the collection's index, or None if it has no text field configured."""
+        if collection_name not in self.text_fields:
+            return None
+        with self._lock:
+            index = self._indexes.get(collection_name)
+            if index is None:
+                index = self._indexes[collection_name] = BM25Index(self.k1, self.b)
+            return index
+
+    def index_rows(self, collection_name: str, keyed_rows: Iterable[Tuple[Any, Dict[str, Any]]]) -> int:
+        """Indexes the text field of `(primary_key, row)` pairs; rows without text are skipped."""
+        index = self.get(collection_name)
+        if index is None:
+            return 0
+        field = self.text_fields[collection_name]
+        count = 0
+        for key, row in keyed_rows:
+            text = row.get(field)
+            if isinstance(text, str) and text:
+                index.add(key, text)
+                count += 1
+        return count
+
+    def remove_keys(self, collection_name: str, keys: Iterable[Any]):
+        index = self.get(collection_name)
+        if index is None:
+            return
+        for key in keys:
+            index.remove(key)
+
+    def backfill(self, collection_name: str, rows: Iterable[Dict[str, Any]], primary_field: str) -> int:
+        """
+        Indexes rows read back from Milvus, e.g. when a collection is loaded.
+        Documents indexed meanwhile on the ingest path are newer than what
+        Milvus returns, so they are never overwritten.
+        """
+        index = self.get(collection_name)
+        if index is None:
+            return 0
+        field = self.text_fields[collection_name]
+        count = 0
+        for row in rows:
+            text = row.get(field)
+            if isinstance(text, str) and text:
+                index.add(row[primary_field], text, replace=False)
+                count += 1
+        return count
+
+    def drop(self, collection_name: str):
+        with self._lock:
+            self._indexes.pop(collection_name, None)
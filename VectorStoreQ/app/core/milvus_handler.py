@@ -1,10 +1,20 @@
 import logging
 from pymilvus import utility, connections, Collection, CollectionSchema, FieldSchema as MilvusField, DataType
-from typing import List, Dict, Any
+from pymilvus.exceptions import MilvusException
+from typing import List, Dict, Any, Optional
 
 from .config import get_config
-from shared.q_vectorstore_client.models import Vector, Query, SearchHit, QueryResult
-from app.api.management import CollectionSchema as ApiCollectionSchema, IndexParams
+from .collection_registry import CollectionRegistry, CollectionInfo
+from .ingest_buffer import IngestBuffer
+from .query_builder import build_filter_expression, group_queries, search_params_for
+from .request_scheduler import RequestScheduler, SearchCoalescer
+from .keyword_index import KeywordIndexRegistry, HybridSearchError
+from .hybrid_search import hybrid_search, hit_metadata
+from .result_cache import SearchResultCache
+from .bulk_import import BulkImporter
+from .embeddings import get_embedding_service
+from shared.q_vectorstore_client.models import Vector, Query, SearchHit, QueryResult, SearchMode
+from app.api.management import CollectionSchema as ApiCollectionSchema, IndexParams, ScalarIndexParams
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -19,6 +29,54 @@ class MilvusHandler:
         self.config = get_config().milvus
         self.alias = self.config.alias
         self._connected = False
+        self.hybrid_config = get_config().hybrid
+        self.keyword_indexes = KeywordIndexRegistry(
+            self.hybrid_config.text_fields,
+            k1=self.hybrid_config.bm25_k1,
+            b=self.hybrid_config.bm25_b
+        )
+        cache_config = get_config().result_cache
+        self.result_cache = SearchResultCache(
+            max_bytes=cache_config.max_bytes,
+            similarity_threshold=cache_config.similarity_threshold,
+            max_neighbors=cache_config.max_neighbors,
+            ttl_seconds=cache_config.ttl_seconds
+        ) if cache_config.enabled else None
+        self.registry = CollectionRegistry(
+            alias=self.alias,
+            max_workers=self.config.loader_threads,
+            on_load=self._backfill_keyword_index
+        )
+        ingest_config = get_config().ingest
+        self.ingest_buffer = IngestBuffer(
+            writer=self._write_rows,
+            max_batch_size=ingest_config.max_batch_size,
+            max_delay_seconds=ingest_config.max_delay_ms / 1000,
+            max_buffered=ingest_config.max_buffered_vectors,
+            sealer=self._seal,
+            seal_interval_seconds=ingest_config.seal_interval_seconds
+        )
+        # Endpoints run handler calls through the scheduler so they never block the event loop
+        concurrency_config = get_config().concurrency
+        self.scheduler = RequestScheduler(
+            max_workers=concurrency_config.max_workers,
+            max_pending=concurrency_config.max_pending_requests,
+            per_collection_limit=concurrency_config.per_collection_limit
+        )
+        self.search_coalescer = SearchCoalescer(
+            self.scheduler,
+            self.search,
+            window_seconds=concurrency_config.coalesce_window_ms / 1000,
+            max_batch_size=concurrency_config.max_coalesced_queries
+        )
+        bulk_config = get_config().bulk_import
+        self.bulk_importer = BulkImporter(
+            state_dir=bulk_config.state_dir,
+            writer=self.write_vectors,
+            schema_fields=self.metadata_fields,
+            prepare=lambda vectors: get_embedding_service().fill_values(vectors),
+            batch_size=bulk_config.batch_size
+        )
 
     def connect(self):
         """
@@ -56,13 +114,19 @@ class MilvusHandler:
             logger.error(f"Failed to disconnect from Milvus: {e}", exc_info=True)
             raise
 
-    def create_collection_with_index(self, schema_def: ApiCollectionSchema, index_params: IndexParams) -> Dict[str, bool]:
+    def create_collection_with_index(
+        self,
+        schema_def: ApiCollectionSchema,
+        index_params: IndexParams,
+        scalar_indexes: Optional[List[ScalarIndexParams]] = None
+    ) -> Dict[str, bool]:
         """
         Creates a new collection and a vector index if it doesn't already exist.
 
         Args:
             schema_def: The Pydantic model defining the collection schema.
             index_params: The Pydantic model defining the vector index.
+            scalar_indexes: Optional indexes on scalar fields used in filters.
 
         Returns:
             A dictionary indicating if the collection was created.
@@ -113,81 +177,323 @@ class MilvusHandler:
             }
         )
         logger.info(f"Index created on field '{index_params.field_name}' for collection '{collection_name}'.")
+        for scalar_index in scalar_indexes or []:
+            collection.create_index(
+                field_name=scalar_index.field_name,
+                index_name=scalar_index.field_name,
+                index_params={"index_type": scalar_index.index_type}
+            )
+            logger.info(f"Scalar index created on field '{scalar_index.field_name}' for collection '{collection_name}'.")
+
+        # Start loading right away so the first request doesn't find it cold
+        self.registry.warm([collection_name])
         return {"created": True}
 
-    def get_collection(self, collection_name: str) -> Collection:
+    def drop_collection(self, collection_name: str) -> Dict[str, bool]:
         """
-        Retrieves a Milvus collection object, ensuring it exists.
+        Drops a collection and removes it from the loaded-collection registry.
+        """
+        self.connect()
+        self.registry.invalidate(collection_name)
+        self.keyword_indexes.drop(collection_name)
+        self._invalidate_results(collection_name)
+        if not utility.has_collection(collection_name, using=self.alias):
+            return {"dropped": False}
+        utility.drop_collection(collection_name, using=self.alias)
+        logger.info(f"Collection '{collection_name}' dropped.")
+        return {"dropped": True}
+
+    def alter_index(self, collection_name: str, index_params: IndexParams) -> None:
+        """
+        Replaces the vector index of a collection (e.g., to change the metric type)
+        and reloads it in the background.
         """
         self.connect()
         if not utility.has_collection(collection_name, using=self.alias):
             raise ValueError(f"Collection '{collection_name}' does not exist in Milvus.")
-        
+
+        self.registry.invalidate(collection_name)
+        self._invalidate_results(collection_name)
         collection = Collection(name=collection_name, using=self.alias)
-        collection.load() # Load collection into memory for searching
-        return collection
+        collection.release()
+        for index in collection.indexes:
+            if index.field_name == index_params.field_name:
+                index.drop()
+        collection.create_index(
+            field_name=index_params.field_name,
+            index_params={
+                "index_type": index_params.index_type,
+                "metric_type": index_params.metric_type,
+                "params": index_params.params
+            }
+        )
+        logger.info(f"Index on field '{index_params.field_name}' of collection '{collection_name}' replaced.")
+        self.registry.warm([collection_name])
 
-    def upsert(self, collection_name: str, vectors: List[Vector]) -> Dict[str, Any]:
+    def create_scalar_index(self, collection_name: str, index_params: ScalarIndexParams) -> None:
         """
-        Upserts a batch of vectors into the specified collection.
+        Adds an index on a scalar field so filtered searches stay fast,
+        then reloads the collection in the background.
         """
-        collection = self.get_collection(collection_name)
-        
+        self.connect()
+        if not utility.has_collection(collection_name, using=self.alias):
+            raise ValueError(f"Collection '{collection_name}' does not exist in Milvus.")
+
+        self.registry.invalidate(collection_name)
+        collection = Collection(name=collection_name, using=self.alias)
+        collection.release()
+        collection.create_index(
+            field_name=index_params.field_name,
+            index_name=index_params.field_name,
+            index_params={"index_type": index_params.index_type}
+        )
+        logger.info(f"Scalar index created on field '{index_params.field_name}' for collection '{collection_name}'.")
+        self.registry.warm([collection_name])
+
+    def get_collection_info(self, collection_name: str) -> CollectionInfo:
+        """
+        Returns the cached, loaded collection with its schema details.
+        Raises ValueError if it doesn't exist and CollectionNotReadyError while
+        it is still loading in the background.
+        """
+        self.connect()
+        return self.registry.get(collection_name, wait=self.config.collection_ready_wait_seconds)
+
+    def get_collection(self, collection_name: str) -> Collection:
+        """
+        Retrieves a loaded Milvus collection object from the registry.
+        """
+        return self.get_collection_info(collection_name).collection
+
+    def _backfill_keyword_index(self, info: CollectionInfo):
+        """
+        Builds the collection's BM25 index from the text already in Milvus.
+        Runs on the loader thread once the collection is loaded.
+        """
+        text_field = self.keyword_indexes.text_field(info.name)
+        if text_field is None:
+            return
+        if text_field not in info.scalar_fields:
+            logger.warning(f"Keyword index for '{info.name}' skipped: field '{text_field}' is not in the schema.")
+            return
+        iterator = info.collection.query_iterator(batch_size=1000, expr="", output_fields=[info.primary_field, text_field])
+        count = 0
+        try:
+            while True:
+                batch = iterator.next()
+                if not batch:
+                    break
+                count += self.keyword_indexes.backfill(info.name, batch, info.primary_field)
+        finally:
+            iterator.close()
+        logger.info(f"Keyword index for '{info.name}' backfilled from {count} documents.")
+
+    def _to_row(self, info: CollectionInfo, vector: Vector) -> Dict[str, Any]:
+        """
+        Maps a Vector onto the collection's schema. Metadata keys are matched to
+        scalar fields by name; the primary key comes from the metadata if it
+        carries the primary field, otherwise from `vector.id`.
+        """
+        row = {}
+        for field in info.insert_fields:
+            if field == info.vector_field:
+                row[field] = vector.values
+            elif field in vector.metadata:
+                row[field] = vector.metadata[field]
+            elif field == info.primary_field:
+                row[field] = vector.id
+            else:
+                row[field] = None
+        return row
+
+    def _write_rows(self, collection_name: str, rows: List[Dict[str, Any]]):
+        """
+        Writes a batch of buffered rows to Milvus. Called by the ingest buffer.
+        """
+        try:
+            info = self.get_collection_info(collection_name)
+        except ValueError:
+            logger.warning(f"Dropping {len(rows)} buffered vectors: collection '{collection_name}' no longer exists.")
+            return
+
         # Milvus SDK expects lists of fields, not a list of objects
-        ids = [v.id for v in vectors]
-        embeddings = [v.values for v in vectors]
-        metadata_list = [v.metadata for v in vectors]
-        
-        # This assumes the metadata keys match the scalar field names in the collection.
-        # A more robust implementation might validate this.
-        # For now, we assume the first metadata object has all the keys.
-        data_to_insert = [embeddings]
-        if metadata_list and metadata_list[0]:
-            for key in metadata_list[0].keys():
-                field_data = [meta.get(key) for meta in metadata_list]
-                data_to_insert.append(field_data)
-        
-        # Milvus `insert` is actually an upsert if the primary keys already exist.
-        mutation_result = collection.insert(data_to_insert)
-        collection.flush()
-        logger.info(f"Upserted {mutation_result.insert_count} vectors into '{collection_name}'.")
-        return {"primary_keys": mutation_result.primary_keys, "insert_count": mutation_result.insert_count}
+        data_to_insert = [[row[field] for row in rows] for field in info.insert_fields]
+        try:
+            result = info.collection.insert(data_to_insert)
+        except MilvusException:
+            # The collection may have been dropped or altered outside this service
+            self.registry.invalidate(collection_name)
+            raise
+        finally:
+            # Even a failed insert may have partially landed
+            self._invalidate_results(collection_name)
+        if info.primary_field not in info.insert_fields:
+            # Auto-generated primary keys are only known now that the rows are written
+            self.keyword_indexes.index_rows(collection_name, zip(result.primary_keys, rows))
+
+    def _invalidate_results(self, collection_name: str):
+        if self.result_cache is not None:
+            self.result_cache.invalidate(collection_name)
+
+    def _seal(self, collection_name: str):
+        self.get_collection(collection_name).flush()
+
+    def upsert(self, collection_name: str, vectors: List[Vector], read_your_writes: bool = False) -> Dict[str, Any]:
+        """
+        Upserts a batch of vectors into the specified collection.
+        The vectors are buffered and written in batches; with `read_your_writes`
+        the collection's buffer is written before returning, so a subsequent
+        read-your-writes search sees them.
+        """
+        info = self.get_collection_info(collection_name)
+        rows = [self._to_row(info, v) for v in vectors]
+        if info.primary_field in info.insert_fields:
+            primary_keys = [row[info.primary_field] for row in rows]
+            keyed_rows = zip(primary_keys, rows)
+        else:
+            # Auto-generated primary keys: there is nothing to deduplicate on
+            primary_keys = []
+            keyed_rows = ((id(row), row) for row in rows)
 
+        keyed_rows = list(keyed_rows)
+        self.ingest_buffer.add(collection_name, keyed_rows)
+        if primary_keys:
+            # Keep the keyword index in step with what will be written; rows with
+            # auto-generated keys are indexed once written (see _write_rows)
+            self.keyword_indexes.index_rows(collection_name, keyed_rows)
+        if read_your_writes:
+            self.ingest_buffer.flush(collection_name, reason="read_your_writes")
+        logger.info(f"Accepted {len(rows)} vectors for '{collection_name}' ({'written' if read_your_writes else 'buffered'}).")
+        return {"primary_keys": primary_keys, "insert_count": len(rows), "buffered": not read_your_writes}
 
-    def search(self, collection_name: str, queries: List[Query]) -> List[QueryResult]:
+    def delete(self, collection_name: str, ids: List[Any]) -> Dict[str, Any]:
         """
-        Performs a batch search on a collection.
+        Deletes vectors by primary key, including any still buffered, and
+        drops them from the keyword index. Unknown IDs are ignored.
         """
-        collection = self.get_collection(collection_name)
+        info = self.get_collection_info(collection_name)
+        if not ids:
+            return {"delete_count": 0}
+        discarded = self.ingest_buffer.discard(collection_name, ids)
+        expr = build_filter_expression({info.primary_field: list(ids)})
+        try:
+            result = info.collection.delete(expr)
+        except MilvusException:
+            self.registry.invalidate(collection_name)
+            raise
+        finally:
+            self._invalidate_results(collection_name)
+        self.keyword_indexes.remove_keys(collection_name, ids)
+        logger.info(f"Deleted {len(ids)} vectors from '{collection_name}' ({discarded} were still buffered).")
+        return {"delete_count": result.delete_count}
+
+    def write_vectors(self, collection_name: str, vectors: List[Vector]):
+        """
+        Writes vectors to Milvus straight away, bypassing the write-behind buffer.
+        Used by bulk imports, which batch and track their own progress.
+        """
+        info = self.get_collection_info(collection_name)
+        rows = [self._to_row(info, v) for v in vectors]
+        self._write_rows(collection_name, rows)
+        if info.primary_field in info.insert_fields:
+            self.keyword_indexes.index_rows(collection_name, [(row[info.primary_field], row) for row in rows])
+
+    def metadata_fields(self, collection_name: str) -> List[str]:
+        """The scalar fields a vector's metadata may set for this collection."""
+        return list(self.get_collection_info(collection_name).scalar_fields)
+
+    def search(self, collection_name: str, queries: List[Query], read_your_writes: bool = False) -> List[QueryResult]:
+        """
+        Performs a batch search on a collection. With `read_your_writes`, pending
+        buffered upserts are written first and the search runs with strong consistency.
+        Keyword and hybrid queries use the collection's BM25 index; a hybrid query
+        on a collection without one falls back to dense search.
+        """
+        info = self.get_collection_info(collection_name)
+        if read_your_writes:
+            self.ingest_buffer.flush(collection_name, reason="read_your_writes")
         
-        search_params = {
-            "metric_type": "COSINE", # Should be configurable
-            "params": {"nprobe": 10},
-        }
+        search_kwargs = {"consistency_level": "Strong"} if read_your_writes else {}
+        collection_defaults = self.config.search_params.get(collection_name)
 
-        results = collection.search(
-            data=[q.values for q in queries],
-            anns_field="embedding", # Assumes the vector field is named "embedding"
-            param=search_params,
-            limit=max(q.top_k for q in queries), # Use the max top_k for the batch
-            expr=None, # Placeholder for filter expressions
-            output_fields=["*"] # Return all scalar fields
-        )
+        search_responses: List[QueryResult] = [None] * len(queries)
+        # Read-your-writes searches bypass the result cache
+        cache = self.result_cache if not read_your_writes else None
+        generation = cache.generation(collection_name) if cache is not None else None
+        pending = []
+        for i, query in enumerate(queries):
+            cached = cache.get(collection_name, query) if cache is not None else None
+            if cached is not None:
+                search_responses[i] = cached
+            else:
+                pending.append(i)
+
+        keyword_index = self.keyword_indexes.get(collection_name)
+        dense = []
+        for i in pending:
+            query = queries[i]
+            if query.mode == SearchMode.DENSE or (query.mode == SearchMode.HYBRID and keyword_index is None):
+                dense.append(i)
+            elif keyword_index is None:
+                raise HybridSearchError(f"Collection '{collection_name}' has no keyword index; configure hybrid.text_fields for it.")
+            else:
+                search_responses[i] = self._hybrid_search(info, query, keyword_index, collection_defaults, search_kwargs)
+
+        # One Milvus call per distinct (filter, top_k, params), so each is right-sized
+        for expr, top_k, overrides, group in group_queries([queries[i] for i in dense], info.scalar_fields):
+            indexes = [dense[j] for j in group]
+            search_params = {
+                "metric_type": info.metric_type or "COSINE",
+                "params": search_params_for(info.index_params, top_k, collection_defaults, overrides),
+            }
+            try:
+                results = info.collection.search(
+                    data=[queries[i].values for i in indexes],
+                    anns_field=info.vector_field,
+                    param=search_params,
+                    limit=top_k,
+                    expr=expr,
+                    output_fields=["*"], # Return all scalar fields
+                    **search_kwargs
+                )
+            except MilvusException:
+                self.registry.invalidate(collection_name)
+                raise
+
+            # Process results into our Pydantic models
+            for i, hits in zip(indexes, results):
+                query_hits = []
+                for hit in hits:
+                    query_hits.append(SearchHit(id=str(hit.id), score=hit.distance, metadata=hit_metadata(hit, info.vector_field)))
+                search_responses[i] = QueryResult(hits=query_hits)
 
-        # Process results into our Pydantic models
-        search_responses = []
-        for i, hits in enumerate(results):
-            query_hits = []
-            for hit in hits:
-                # The 'entity' field contains the scalar fields
-                metadata = hit.entity.to_dict() if hasattr(hit, 'entity') else {}
-                query_hits.append(SearchHit(id=hit.id, score=hit.distance, metadata=metadata))
-            
-            # Trim results to the specific top_k for this query
-            query_hits = query_hits[:queries[i].top_k]
-            search_responses.append(QueryResult(hits=query_hits))
-            
+        if cache is not None:
+            for i in pending:
+                cache.put(collection_name, generation, queries[i], search_responses[i])
         return search_responses
 
+    def _hybrid_search(self, info: CollectionInfo, query: Query, keyword_index, collection_defaults, search_kwargs) -> QueryResult:
+        num_candidates = query.top_k * self.hybrid_config.candidate_multiplier
+        search_params = {
+            "metric_type": info.metric_type or "COSINE",
+            "params": search_params_for(info.index_params, num_candidates, collection_defaults, query.search_params),
+        }
+        try:
+            return hybrid_search(
+                info,
+                query,
+                keyword_index,
+                build_filter_expression(query.filter, info.scalar_fields),
+                search_params,
+                rrf_k=self.hybrid_config.rrf_k,
+                candidate_multiplier=self.hybrid_config.candidate_multiplier,
+                dense_weight=self.hybrid_config.dense_weight,
+                keyword_weight=self.hybrid_config.keyword_weight,
+                **search_kwargs
+            )
+        except MilvusException:
+            self.registry.invalidate(info.name)
+            raise
+
 # Global instance for the application
 milvus_handler = MilvusHandler() 
\ No newline at end of file
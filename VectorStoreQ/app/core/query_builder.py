@@ -0,0 +1,147 @@
+import json
+import math
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from shared.q_vectorstore_client.models import Query
+
+_FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+_COMPARISONS = {
+    "$eq": "==",
+    "$ne": "!=",
+    "$gt": ">",
+    "$gte": ">=",
+    "$lt": "<",
+    "$lte": "<=",
+}
+
+# Search-time defaults per index type, used when neither the request nor the
+# index metadata say otherwise. `ef` for HNSW is also raised to at least top_k.
+DEFAULT_SEARCH_PARAMS: Dict[str, Dict[str, Any]] = {
+    "FLAT": {},
+    "IVF_FLAT": {"nprobe": 16},
+    "IVF_SQ8": {"nprobe": 16},
+    "IVF_PQ": {"nprobe": 16},
+    "HNSW": {"ef": 64},
+    "DISKANN": {"search_list": 100},
+    "AUTOINDEX": {},
+}
+
+class FilterError(ValueError):
+    """Raised when a metadata filter can't be translated into a safe Milvus expression."""
+    pass
+
+
+# --- Filter Translation ---
+
+def _literal(value: Any) -> str:
+    """Renders a scalar as a Milvus expression literal, escaping strings."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise FilterError(f"Non-finite number {value!r} is not allowed in filters.")
+        return repr(value)
+    if isinstance(value, str):
+        # json.dumps escapes quotes, backslashes and control characters
+        return json.dumps(value, ensure_ascii=False)
+    raise FilterError(f"Unsupported filter value {value!r}; use strings, numbers or booleans.")
+
+def _field(name: str, allowed_fields: Optional[set]) -> str:
+    if not _FIELD_NAME.match(name):
+        raise FilterError(f"Invalid field name {name!r} in filter.")
+    if allowed_fields is not None and name not in allowed_fields:
+        raise FilterError(f"Unknown field {name!r} in filter.")
+    return name
+
+def _condition(field: str, condition: Any) -> str:
+    if isinstance(condition, list):
+        condition = {"$in": condition}
+    if not isinstance(condition, dict):
+        return f"{field} == {_literal(condition)}"
+
+    clauses = []
+    for op, value in condition.items():
+        if op in _COMPARISONS:
+            clauses.append(f"{field} {_COMPARISONS[op]} {_literal(value)}")
+        elif op in ("$in", "$nin"):
+            if not isinstance(value, list) or not value:
+                raise FilterError(f"'{op}' on {field!r} needs a non-empty list.")
+            keyword = "in" if op == "$in" else "not in"
+            clauses.append(f"{field} {keyword} [{', '.join(_literal(v) for v in value)}]")
+        else:
+            raise FilterError(f"Unsupported filter operator {op!r}.")
+    if not clauses:
+        raise FilterError(f"Empty condition for {field!r}.")
+    return " and ".join(clauses)
+
+def _expression(filter: Dict[str, Any], allowed_fields: Optional[set]) -> str:
+    clauses = []
+    for key, value in filter.items():
+        if key in ("$and", "$or"):
+            if not isinstance(value, list) or not value:
+                raise FilterError(f"'{key}' needs a non-empty list of filters.")
+            joiner = " and " if key == "$and" else " or "
+            clauses.append("(" + joiner.join(f"({_expression(sub, allowed_fields)})" for sub in value) + ")")
+        else:
+            clauses.append(_condition(_field(key, allowed_fields), value))
+    if not clauses:
+        raise FilterError("Empty filter.")
+    return " and ".join(clauses)
+
+def build_filter_expression(filter: Optional[Dict[str, Any]], allowed_fields: Optional[Iterable[str]] = None) -> Optional[str]:
+    """
+    Translates a metadata filter into a Milvus boolean expression. Supported forms:
+
+        {"source": "runbook.md"}                      -> source == "runbook.md"
+        {"agent_id": ["a1", "a2"]}                    -> agent_id in ["a1", "a2"]
+        {"score": {"$gte": 0.5, "$lt": 1}}            -> score >= 0.5 and score < 1
+        {"$or": [{"source": "a"}, {"source": "b"}]}   -> ((source == "a") or (source == "b"))
+
+    Field names must be identifiers (and, when given, in `allowed_fields`);
+    values are rendered as escaped literals, never interpolated raw.
+    """
+    if not filter:
+        return None
+    return _expression(filter, set(allowed_fields) if allowed_fields is not None else None)
+
+
+# --- Search Planning ---
+
+def search_params_for(
+    index_params: Dict[str, Any],
+    top_k: int,
+    collection_defaults: Optional[Dict[str, Any]] = None,
+    overrides: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Returns the `params` for a search, layering the defaults for the
+    collection's index type, the configured defaults for the collection and
+    the request's overrides. HNSW's `ef` must be at least `top_k`.
+    """
+    index_type = (index_params.get("index_type") or "").upper()
+    params = dict(DEFAULT_SEARCH_PARAMS.get(index_type, {}))
+    params.update(collection_defaults or {})
+    params.update(overrides or {})
+    if index_type == "HNSW":
+        params["ef"] = max(params.get("ef", 0), top_k)
+    return params
+
+def group_queries(queries: List[Query], allowed_fields: Optional[Iterable[str]] = None) -> List[Tuple[Optional[str], int, Dict[str, Any], List[int]]]:
+    """
+    Groups a batch of queries into right-sized Milvus calls: queries sharing
+    a filter, top_k and search param overrides are searched together.
+    Returns `(expr, top_k, overrides, query_indexes)` per group, in first-seen order.
+    """
+    groups: Dict[Tuple, Tuple[Optional[str], int, Dict[str, Any], List[int]]] = {}
+    for i, query in enumerate(queries):
+        expr = build_filter_expression(query.filter, allowed_fields)
+        overrides = query.search_params or {}
+        key = (expr, query.top_k, json.dumps(overrides, sort_keys=True))
+        if key not in groups:
+            groups[key] = (expr, query.top_k, overrides, [])
+        groups[key][3].append(i)
+    return list(groups.values())
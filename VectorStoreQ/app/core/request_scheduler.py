@@ -0,0 +1,168 @@
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from shared.q_vectorstore_client.models import Query, QueryResult
+from shared.observability.metrics import (
+    VECTORSTORE_REQUEST_LATENCY,
+    VECTORSTORE_REQUEST_QUEUE_WAIT,
+    VECTORSTORE_REQUESTS_REJECTED,
+    VECTORSTORE_COALESCED_QUERIES,
+)
+from .query_builder import FilterError
+from .keyword_index import HybridSearchError
+
+logger = logging.getLogger(__name__)
+
+class SchedulerOverloadedError(Exception):
+    """Raised when too many Milvus calls are already queued or running."""
+    pass
+
+
+class RequestScheduler:
+    """
+    Runs the blocking Milvus handler calls off the event loop.
+
+    Calls go to a bounded thread pool. At most `max_pending` calls may be
+    queued or running at once; beyond that new calls are rejected with
+    `SchedulerOverloadedError` instead of piling up. Each collection may use at
+    most `per_collection_limit` workers, so one slow or hot collection can't
+    starve the others.
+    """
+
+    def __init__(self, max_workers: int = 16, max_pending: int = 256, per_collection_limit: int = 8):
+        self.max_pending = max_pending
+        self.per_collection_limit = per_collection_limit
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="milvus-request")
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def run(self, collection_name: str, operation: str, fn: Callable, *args, **kwargs) -> Any:
+        """Runs `fn(*args, **kwargs)` on the pool, subject to admission control and the collection's limit."""
+        if self._pending >= self.max_pending:
+            VECTORSTORE_REQUESTS_REJECTED.labels(operation=operation).inc()
+            raise SchedulerOverloadedError(
+                f"Too many pending requests ({self._pending}); try again shortly."
+            )
+
+        self._pending += 1
+        queued_at = time.monotonic()
+        try:
+            semaphore = self._semaphores.get(collection_name)
+            if semaphore is None:
+                semaphore = self._semaphores[collection_name] = asyncio.Semaphore(self.per_collection_limit)
+            async with semaphore:
+                started_at = time.monotonic()
+                VECTORSTORE_REQUEST_QUEUE_WAIT.labels(collection=collection_name, operation=operation).observe(started_at - queued_at)
+                loop = asyncio.get_running_loop()
+                try:
+                    return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+                finally:
+                    VECTORSTORE_REQUEST_LATENCY.labels(collection=collection_name, operation=operation).observe(time.monotonic() - started_at)
+        finally:
+            self._pending -= 1
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+class _PendingBatch:
+    def __init__(self):
+        self.queries: List[Query] = []
+        self.futures: List[asyncio.Future] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class SearchCoalescer:
+    """
+    Merges concurrent single-query searches against the same collection.
+
+    The first query for a collection opens a batch; queries arriving within
+    `window_seconds` (or until `max_batch_size` is reached) join it, and the
+    whole batch is sent as one `search_fn(collection_name, queries)` call. The
+    handler groups a batch by filter and top_k, so compatible queries cost a
+    single `collection.search` round trip. If a batch is rejected because of
+    one invalid query (e.g. a bad filter), its queries are retried
+    individually so only the offending request fails.
+    """
+
+    def __init__(
+        self,
+        scheduler: RequestScheduler,
+        search_fn: Callable[[str, List[Query]], List[QueryResult]],
+        window_seconds: float = 0.002,
+        max_batch_size: int = 64
+    ):
+        self.scheduler = scheduler
+        self.search_fn = search_fn
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self._batches: Dict[str, _PendingBatch] = {}
+        self._tasks = set()
+
+    async def search(self, collection_name: str, query: Query) -> QueryResult:
+        loop = asyncio.get_running_loop()
+        batch = self._batches.get(collection_name)
+        if batch is None:
+            batch = self._batches[collection_name] = _PendingBatch()
+            batch.timer = loop.call_later(self.window_seconds, self._dispatch, collection_name, batch)
+
+        future = loop.create_future()
+        batch.queries.append(query)
+        batch.futures.append(future)
+        if len(batch.queries) >= self.max_batch_size:
+            batch.timer.cancel()
+            self._dispatch(collection_name, batch)
+        return await future
+
+    def _dispatch(self, collection_name: str, batch: _PendingBatch):
+        if self._batches.get(collection_name) is batch:
+            del self._batches[collection_name]
+        task = asyncio.ensure_future(self._run(collection_name, batch))
+        # Keep a reference so the task isn't garbage collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, collection_name: str, batch: _PendingBatch):
+        VECTORSTORE_COALESCED_QUERIES.labels(collection=collection_name).observe(len(batch.queries))
+        try:
+            results = await self.scheduler.run(collection_name, "search", self.search_fn, collection_name, batch.queries)
+        except (FilterError, HybridSearchError) as e:
+            if len(batch.queries) == 1:
+                self._fail(batch.futures, e)
+                return
+            logger.info(f"Coalesced search on '{collection_name}' hit an invalid query; retrying {len(batch.queries)} queries individually.")
+            await asyncio.gather(*(
+                self._run_single(collection_name, query, future)
+                for query, future in zip(batch.queries, batch.futures)
+            ))
+            return
+        except Exception as e:
+            self._fail(batch.futures, e)
+            return
+
+        for future, result in zip(batch.futures, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _run_single(self, collection_name: str, query: Query, future: asyncio.Future):
+        try:
+            results = await self.scheduler.run(collection_name, "search", self.search_fn, collection_name, [query])
+        except Exception as e:
+            self._fail([future], e)
+        else:
+            if not future.done():
+                future.set_result(results[0])
+
+    @staticmethod
+    def _fail(futures: List[asyncio.Future], error: BaseException):
+        for future in futures:
+            if not future.done():
+                future.set_exception(error)
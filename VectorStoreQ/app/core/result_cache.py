@@ -0,0 +1,192 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+from shared.q_vectorstore_client.models import Query, QueryResult, SearchMode
+from shared.observability.metrics import (
+    VECTORSTORE_SEARCH_CACHE_LOOKUPS,
+    VECTORSTORE_SEARCH_CACHE_BYTES,
+    VECTORSTORE_SEARCH_CACHE_EVICTIONS,
+)
+
+# Rough fixed cost of an entry's keys, bookkeeping and Python objects
+_ENTRY_OVERHEAD_BYTES = 512
+
+
+class _Entry:
+    __slots__ = ("scope", "vector_key", "vector", "result", "size", "expires_at")
+
+    def __init__(self, scope, vector_key, vector, result, size, expires_at):
+        self.scope = scope
+        self.vector_key = vector_key
+        self.vector = vector
+        self.result = result
+        self.size = size
+        self.expires_at = expires_at
+
+
+class SearchResultCache:
+    """
+    Caches search results per query so repeated questions skip Milvus.
+
+    An entry is keyed by its scope (collection, the collection's generation,
+    filter, top_k, mode, search params, fusion weights and, for keyword or
+    hybrid queries, the text) plus a hash of the query vector quantised to
+    int8. On an exact miss, the most recent `max_neighbors` entries in the
+    same scope are scanned, and one whose vector has cosine similarity of at
+    least `similarity_threshold` is reused. That catches near-identical
+    embeddings of the same question.
+
+    Writes bump the collection's generation, which orphans its entries, and
+    those entries are dropped at once. `ttl_seconds` bounds staleness from
+    writes that other replicas accept. The cache stays under `max_bytes`
+    (estimated) by evicting the least recently used entries.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        similarity_threshold: Optional[float] = 0.995,
+        max_neighbors: int = 32,
+        ttl_seconds: Optional[float] = 60.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_bytes = max_bytes
+        self.similarity_threshold = similarity_threshold
+        self.max_neighbors = max_neighbors
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        self._scopes: Dict[Tuple, "OrderedDict[Hashable, None]"] = {}
+        self._generations: Dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def generation(self, collection_name: str) -> int:
+        return self._generations.get(collection_name, 0)
+
+    def invalidate(self, collection_name: str):
+        """Bumps the collection's generation and frees its entries, e.g. after a write."""
+        with self._lock:
+            self._generations[collection_name] = self._generations.get(collection_name, 0) + 1
+            for scope in [s for s in self._scopes if s[0] == collection_name]:
+                for vector_key in list(self._scopes[scope]):
+                    self._remove((scope, vector_key))
+            VECTORSTORE_SEARCH_CACHE_BYTES.set(self._bytes)
+
+    def get(self, collection_name: str, query: Query) -> Optional[QueryResult]:
+        scope = self._scope(collection_name, self.generation(collection_name), query)
+        vector = self._normalize(query.values)
+        vector_key = self._vector_key(vector)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get((scope, vector_key))
+            outcome = "hit"
+            if entry is None and vector is not None and self.similarity_threshold is not None:
+                entry = self._nearest(scope, vector)
+                outcome = "near_hit"
+            if entry is not None and entry.expires_at is not None and entry.expires_at <= now:
+                self._remove((entry.scope, entry.vector_key))
+                entry = None
+            if entry is None:
+                VECTORSTORE_SEARCH_CACHE_LOOKUPS.labels(collection=collection_name, result="miss").inc()
+                return None
+            self._entries.move_to_end((entry.scope, entry.vector_key))
+            self._scopes[entry.scope].move_to_end(entry.vector_key)
+        VECTORSTORE_SEARCH_CACHE_LOOKUPS.labels(collection=collection_name, result=outcome).inc()
+        return entry.result
+
+    def put(self, collection_name: str, generation: int, query: Query, result: QueryResult):
+        """
+        Stores a result computed while the collection was at `generation`
+        (read before the search ran). Results that raced with a write are dropped.
+        """
+        if generation != self.generation(collection_name):
+            return
+        scope = self._scope(collection_name, generation, query)
+        vector = self._normalize(query.values)
+        vector_key = self._vector_key(vector)
+        size = len(result.model_dump_json()) + (vector.nbytes if vector is not None else 0) + _ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        expires_at = self._clock() + self.ttl_seconds if self.ttl_seconds else None
+
+        with self._lock:
+            if generation != self._generations.get(collection_name, 0):
+                return
+            key = (scope, vector_key)
+            self._remove(key)
+            self._entries[key] = _Entry(scope, vector_key, vector, result, size, expires_at)
+            self._scopes.setdefault(scope, OrderedDict())[vector_key] = None
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                VECTORSTORE_SEARCH_CACHE_EVICTIONS.inc()
+            VECTORSTORE_SEARCH_CACHE_BYTES.set(self._bytes)
+
+    def _nearest(self, scope: Tuple, vector: np.ndarray) -> Optional[_Entry]:
+        neighbors = self._scopes.get(scope)
+        if not neighbors:
+            return None
+        best, best_similarity = None, self.similarity_threshold
+        for vector_key in reversed(list(neighbors)[-self.max_neighbors:]):
+            entry = self._entries[(scope, vector_key)]
+            if entry.vector is None or entry.vector.shape != vector.shape:
+                continue
+            similarity = float(np.dot(entry.vector, vector))
+            if similarity >= best_similarity:
+                best, best_similarity = entry, similarity
+        return best
+
+    def _remove(self, key: Tuple):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        neighbors = self._scopes[entry.scope]
+        del neighbors[entry.vector_key]
+        if not neighbors:
+            del self._scopes[entry.scope]
+
+    @staticmethod
+    def _scope(collection_name: str, generation: int, query: Query) -> Tuple:
+        return (
+            collection_name,
+            generation,
+            json.dumps(query.filter, sort_keys=True, default=str),
+            query.top_k,
+            query.mode.value,
+            json.dumps(query.search_params, sort_keys=True, default=str),
+            query.dense_weight,
+            query.keyword_weight,
+            # Keyword rankings depend on the exact words, not just the embedding
+            query.text if query.mode != SearchMode.DENSE else None,
+        )
+
+    @staticmethod
+    def _normalize(values) -> Optional[np.ndarray]:
+        if values is None:
+            return None
+        vector = np.asarray(values, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    @staticmethod
+    def _vector_key(vector: Optional[np.ndarray]) -> Optional[str]:
+        if vector is None:
+            return None
+        quantised = np.clip(np.rint(vector * 127), -127, 127).astype(np.int8)
+        return hashlib.blake2b(quantised.tobytes(), digest_size=16).hexdigest()
@@ -3,11 +3,13 @@ import uvicorn
 import logging
 import structlog
 
-from app.api import ingest, search, management
+from app.api import ingest, search, management, embed, bulk
 from app.core.config import config
 from app.core.milvus_handler import milvus_handler
+from app.core.embeddings import init_embedding_service
 from shared.observability.logging_config import setup_logging
 from shared.observability.metrics import setup_metrics
+from shared.q_auth_parser.parser import start_revocation_feed, stop_revocation_feed
 # from shared.opentelemetry.tracing import setup_tracing
 
 # --- Logging and Metrics Setup ---
@@ -43,8 +45,14 @@ def startup_event():
     Connects to Milvus on application startup.
     """
     logger.info("Application startup...")
+    start_revocation_feed()
+    init_embedding_service(config.embedding)
     try:
         milvus_handler.connect()
+        # Load existing collections in the background so requests never load inline
+        milvus_handler.registry.warm()
+        milvus_handler.ingest_buffer.start()
+        milvus_handler.bulk_importer.start()
     except Exception as e:
         logger.critical(f"Could not connect to Milvus on startup. Please check the connection details. Error: {e}", exc_info=True)
         # In a real-world scenario, you might want the app to exit if it can't connect.
@@ -56,11 +64,18 @@ def shutdown_event():
     Disconnects from Milvus on application shutdown.
     """
     logger.info("Application shutdown...")
+    # Write out buffered upserts before the connection goes away
+    milvus_handler.scheduler.close()
+    milvus_handler.ingest_buffer.close()
+    milvus_handler.registry.close()
     milvus_handler.disconnect()
+    stop_revocation_feed()
 
 # Include the API routers
 app.include_router(ingest.router, prefix="/v1/ingest", tags=["Ingestion"])
+app.include_router(bulk.router, prefix="/v1/bulk", tags=["Ingestion"])
 app.include_router(search.router, prefix="/v1/search", tags=["Search"])
+app.include_router(embed.router, prefix="/v1/embed", tags=["Embedding"])
 app.include_router(management.router, prefix="/v1/manage", tags=["Management"])
 
 @app.get("/health", tags=["Health"])
@@ -0,0 +1,104 @@
+"""
+Benchmarks small-batch upserts into Milvus with the old per-request
+insert+flush path versus the write-behind IngestBuffer.
+
+    # From the VectorStoreQ directory, against Milvus Lite (a local file) or a real cluster
+    PYTHONPATH=.:.. python scripts/benchmark_ingest.py --uri ./benchmark.db
+    PYTHONPATH=.:.. python scripts/benchmark_ingest.py --uri http://localhost:19530
+
+Reports vectors/second and, where the server supports it, the number of
+sealed segments each path leaves behind (otherwise the number of flushes).
+"""
+import argparse
+import random
+import time
+
+from pymilvus import connections, utility, Collection, CollectionSchema, DataType, FieldSchema
+
+from app.core.ingest_buffer import IngestBuffer
+
+ALIAS = "ingest-benchmark"
+
+def create_collection(name: str, dim: int) -> Collection:
+    if utility.has_collection(name, using=ALIAS):
+        utility.drop_collection(name, using=ALIAS)
+    schema = CollectionSchema([
+        FieldSchema("id", DataType.VARCHAR, is_primary=True, max_length=64),
+        FieldSchema("text", DataType.VARCHAR, max_length=256),
+        FieldSchema("embedding", DataType.FLOAT_VECTOR, dim=dim),
+    ])
+    collection = Collection(name, schema=schema, using=ALIAS)
+    collection.create_index("embedding", {"index_type": "FLAT", "metric_type": "COSINE", "params": {}})
+    collection.load()
+    return collection
+
+def make_requests(num_requests: int, batch_size: int, dim: int):
+    """Small upserts like memory saves and H2M turns: a few vectors per request."""
+    rng = random.Random(0)
+    return [
+        [(f"doc-{r}-{i}", f"text {r} {i}", [rng.random() for _ in range(dim)]) for i in range(batch_size)]
+        for r in range(num_requests)
+    ]
+
+def segment_count(name: str) -> str:
+    try:
+        return str(len(utility.get_query_segment_info(name, using=ALIAS)))
+    except Exception:
+        return "n/a"
+
+def to_columns(rows):
+    return [list(column) for column in zip(*rows)]
+
+def run_per_request_flush(requests, dim: int):
+    collection = create_collection("bench_per_request", dim)
+    start = time.perf_counter()
+    for batch in requests:
+        collection.insert(to_columns(batch))
+        collection.flush()
+    elapsed = time.perf_counter() - start
+    return elapsed, len(requests), segment_count("bench_per_request")
+
+def run_buffered(requests, dim: int, max_batch_size: int):
+    collection = create_collection("bench_buffered", dim)
+    seals = []
+    buffer = IngestBuffer(
+        writer=lambda name, rows: collection.insert(to_columns(rows)),
+        max_batch_size=max_batch_size,
+        max_delay_seconds=1.0,
+        sealer=lambda name: (collection.flush(), seals.append(name)),
+    )
+    buffer.start()
+    start = time.perf_counter()
+    for batch in requests:
+        buffer.add("bench_buffered", ((row[0], row) for row in batch))
+    buffer.close()
+    elapsed = time.perf_counter() - start
+    return elapsed, len(seals), segment_count("bench_buffered")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default="./benchmark_ingest.db")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=4, help="Vectors per upsert request")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--max-batch-size", type=int, default=1000, help="IngestBuffer flush size")
+    args = parser.parse_args()
+
+    connections.connect(alias=ALIAS, uri=args.uri)
+    requests = make_requests(args.requests, args.batch_size, args.dim)
+    total = args.requests * args.batch_size
+
+    print(f"{args.requests} upserts x {args.batch_size} vectors (dim {args.dim})")
+    print(f"{'path':<22}{'seconds':>10}{'vectors/s':>12}{'flushes':>10}{'segments':>10}")
+    for label, (elapsed, flushes, segments) in (
+        ("insert + flush", run_per_request_flush(requests, args.dim)),
+        ("write-behind buffer", run_buffered(requests, args.dim, args.max_batch_size)),
+    ):
+        print(f"{label:<22}{elapsed:>10.2f}{total / elapsed:>12.0f}{flushes:>10}{segments:>10}")
+
+    for name in ("bench_per_request", "bench_buffered"):
+        utility.drop_collection(name, using=ALIAS)
+    connections.disconnect(ALIAS)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Compares dense, keyword (BM25) and hybrid (RRF) retrieval on a small labelled
+corpus, reporting MRR, recall@k and per-query latency for each mode.
+
+    # From the VectorStoreQ directory, against Milvus Lite (a local file) or a real cluster
+    PYTHONPATH=.:.. python scripts/evaluate_hybrid.py --uri ./evaluate_hybrid.db
+    PYTHONPATH=.:.. python scripts/evaluate_hybrid.py --embedder sentence_transformers
+
+The default corpus is tests/fixtures/hybrid_corpus.json; pass --corpus for
+another file with the same {"documents": [...], "queries": [...]} layout.
+"""
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+from pymilvus import connections, utility, Collection, CollectionSchema, DataType, FieldSchema
+
+from app.core.collection_registry import CollectionRegistry
+from app.core.embeddings import create_embedder
+from app.core.hybrid_search import hybrid_search, hit_metadata
+from app.core.keyword_index import BM25Index
+from shared.q_vectorstore_client.models import Query, SearchMode
+
+ALIAS = "hybrid-evaluation"
+COLLECTION = "hybrid_eval"
+DEFAULT_CORPUS = Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "hybrid_corpus.json"
+
+def load_collection(documents, embedder, dim: int):
+    if utility.has_collection(COLLECTION, using=ALIAS):
+        utility.drop_collection(COLLECTION, using=ALIAS)
+    schema = CollectionSchema([
+        FieldSchema("id", DataType.VARCHAR, is_primary=True, max_length=64),
+        FieldSchema("source", DataType.VARCHAR, max_length=64),
+        FieldSchema("text", DataType.VARCHAR, max_length=2048),
+        FieldSchema("embedding", DataType.FLOAT_VECTOR, dim=dim),
+    ])
+    collection = Collection(COLLECTION, schema=schema, using=ALIAS)
+    collection.create_index("embedding", {"index_type": "FLAT", "metric_type": "COSINE", "params": {}})
+    collection.insert([
+        [d["id"] for d in documents],
+        [d["source"] for d in documents],
+        [d["text"] for d in documents],
+        embedder.encode([d["text"] for d in documents]),
+    ])
+    collection.flush()
+
+    registry = CollectionRegistry(alias=ALIAS)
+    info = registry.get(COLLECTION, wait=60)
+    registry.close()
+    return info
+
+def run_query(info, index, query: Query):
+    if query.mode == SearchMode.DENSE:
+        results = info.collection.search(
+            data=[query.values], anns_field=info.vector_field, param={"metric_type": "COSINE", "params": {}},
+            limit=query.top_k, output_fields=["*"], consistency_level="Strong"
+        )
+        return [hit.id for hit in results[0]]
+    result = hybrid_search(info, query, index, None, {"metric_type": "COSINE", "params": {}}, consistency_level="Strong")
+    return [hit.id for hit in result.hits]
+
+def evaluate(info, index, embedder, queries, top_k: int):
+    report = {}
+    vectors = embedder.encode([q["text"] for q in queries])
+    for mode in SearchMode:
+        reciprocal_ranks, recalls, latencies = [], [], []
+        for labelled, vector in zip(queries, vectors):
+            query = Query(text=labelled["text"], values=vector, top_k=top_k, mode=mode)
+            start = time.perf_counter()
+            ranked = run_query(info, index, query)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            relevant = set(labelled["relevant"])
+            first_hit = next((rank for rank, doc_id in enumerate(ranked, start=1) if doc_id in relevant), None)
+            reciprocal_ranks.append(1 / first_hit if first_hit else 0.0)
+            recalls.append(len(relevant.intersection(ranked)) / len(relevant))
+        report[mode.value] = {
+            "mrr": statistics.mean(reciprocal_ranks),
+            "recall": statistics.mean(recalls),
+            "p50_ms": statistics.median(latencies),
+        }
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default="./evaluate_hybrid.db")
+    parser.add_argument("--corpus", default=str(DEFAULT_CORPUS))
+    parser.add_argument("--embedder", default="hashing", choices=["hashing", "sentence_transformers"])
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = json.loads(Path(args.corpus).read_text())
+    embedder = create_embedder(args.embedder, args.model, dim=384)
+    connections.connect(alias=ALIAS, uri=args.uri)
+
+    info = load_collection(corpus["documents"], embedder, embedder.dim)
+    index = BM25Index()
+    for document in corpus["documents"]:
+        index.add(document["id"], document["text"])
+
+    for kind in sorted({q["kind"] for q in corpus["queries"]}) + ["all"]:
+        queries = [q for q in corpus["queries"] if kind in ("all", q["kind"])]
+        print(f"\n{kind} queries ({len(queries)}), top_k={args.top_k}, embedder={args.embedder}")
+        print(f"{'mode':<10}{'MRR':>8}{'recall':>10}{'p50 ms':>10}")
+        for mode, scores in evaluate(info, index, embedder, queries, args.top_k).items():
+            print(f"{mode:<10}{scores['mrr']:>8.3f}{scores['recall']:>10.3f}{scores['p50_ms']:>10.2f}")
+
+    utility.drop_collection(COLLECTION, using=ALIAS)
+    connections.disconnect(ALIAS)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import asyncio
+import io
+import json
+import threading
+import time
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+
+from app.core.bulk_import import BulkImporter, BulkImportError, BulkJobClosedError
+from shared.q_service_client import mount_transport, unmount_transport
+from shared.q_vectorstore_client.client import VectorStoreClient
+from shared.q_vectorstore_client.models import BulkImportFormat, Vector
+
+FIELDS = ["chunk_id", "source_name", "text_chunk"]
+
+class FakeWriter:
+    def __init__(self, fail_after=None):
+        self.batches = []
+        self.fail_after = fail_after
+
+    def __call__(self, collection_name, vectors):
+        if self.fail_after is not None and len(self.batches) >= self.fail_after:
+            raise ConnectionError("milvus unavailable")
+        self.batches.append([v.id for v in vectors])
+
+    @property
+    def ids(self):
+        return [doc_id for batch in self.batches for doc_id in batch]
+
+def importer(tmp_path, writer, batch_size=2):
+    bulk_importer = BulkImporter(str(tmp_path), writer, lambda collection: FIELDS, batch_size=batch_size)
+    bulk_importer.start()
+    return bulk_importer
+
+def ndjson(start, end, **metadata):
+    return "\n".join(
+        json.dumps({"id": str(i), "values": [0.1, 0.2], "metadata": {"source_name": "a.md", **metadata}})
+        for i in range(start, end)
+    ).encode()
+
+def test_chunks_are_written_in_bounded_batches(tmp_path):
+    writer = FakeWriter()
+    bulk_importer = importer(tmp_path, writer, batch_size=2)
+    job = bulk_importer.create_job("docs", BulkImportFormat.NDJSON)
+
+    job = bulk_importer.write_chunk(job.job_id, 0, ndjson(0, 5))
+
+    assert writer.batches == [["0", "1"], ["2", "3"], ["4"]]
+    assert (job.offset, job.records_written, job.batches_written) == (5, 5, 3)
+
+def test_unknown_fields_are_rejected(tmp_path):
+    bulk_importer = importer(tmp_path, FakeWriter())
+    job = bulk_importer.create_job("docs", BulkImportFormat.NDJSON)
+
+    with pytest.raises(BulkImportError, match="not_a_field"):
+        bulk_importer.write_chunk(job.job_id, 0, ndjson(0, 2, not_a_field=1))
+    with pytest.raises(BulkImportError, match="line 1"):
+        bulk_importer.write_chunk(job.job_id, 0, b'{"id": "x"}')
+
+def test_retried_and_out_of_order_chunks_write_each_record_once(tmp_path):
+    writer = FakeWriter()
+    bulk_importer = importer(tmp_path, writer)
+    job = bulk_importer.create_job("docs", BulkImportFormat.NDJSON)
+
+    bulk_importer.write_chunk(job.job_id, 4, ndjson(4, 6))
+    assert job.offset == 0 and job.written_ranges == [(4, 6)]
+    bulk_importer.write_chunk(job.job_id, 0, ndjson(0, 4))
+    bulk_importer.write_chunk(job.job_id, 2, ndjson(2, 6))  # a retry overlapping both
+
+    assert sorted(writer.ids, key=int) == [str(i) for i in range(6)]
+    assert job.offset == 6 and job.written_ranges == []
+
+def test_concurrent_overlapping_retries_write_each_record_once(tmp_path):
+    first_write_started, release_first_write = threading.Event(), threading.Event()
+
+    class SlowWriter(FakeWriter):
+        def __call__(self, collection_name, vectors):
+            first_write_started.set()
+            release_first_write.wait(timeout=5)
+            super().__call__(collection_name, vectors)
+
+    writer = SlowWriter()
+    bulk_importer = importer(tmp_path, writer)
+    job = bulk_importer.create_job("docs", BulkImportFormat.NDJSON)
+
+    # The retry arrives while the original attempt is still writing
+    attempts = [threading.Thread(target=bulk_importer.write_chunk, args=(job.job_id, 0, ndjson(0, 4))) for _ in range(2)]
+    attempts[0].start()
+    assert first_write_started.wait(timeout=5)
+    attempts[1].start()
+    time.sleep(0.05)
+    release_first_write.set()
+    for attempt in attempts:
+        attempt.join(timeout=5)
+
+    assert writer.ids == ["0", "1", "2", "3"]
+    assert (job.offset, job.records_written) == (4, 4)
+
+def test_interrupted_job_resumes_from_persisted_offset(tmp_path):
+    writer = FakeWriter(fail_after=2)
+    bulk_importer = importer(tmp_path, writer)
+    job = bulk_importer.create_job("docs", BulkImportFormat.NDJSON)
+    with pytest.raises(ConnectionError):
+        bulk_importer.write_chunk(job.job_id, 0, ndjson(0, 6))
+
+    # A restarted service recovers the job; the retried chunk writes only what's missing
+    writer.fail_after = None
+    restarted = importer(tmp_path, writer)
+    resumed = restarted.get_job(job.job_id)
+    assert resumed.offset == 4
+    restarted.write_chunk(job.job_id, 0, ndjson(0, 6))
+
+    assert writer.ids == [str(i) for i in range(6)]
+    restarted.complete(job.job_id)
+    with pytest.raises(BulkJobClosedError):
+        restarted.write_chunk(job.job_id, 6, ndjson(6, 7))
+
+def test_arrow_streams_are_validated_once_per_job(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    writer = FakeWriter()
+    bulk_importer = importer(tmp_path, writer, batch_size=10)
+    job = bulk_importer.create_job("docs", BulkImportFormat.ARROW)
+
+    def stream(ids, **extra_columns):
+        table = pa.table({
+            "id": [str(i) for i in ids],
+            "text": [f"chunk {i}" for i in ids],
+            "source_name": ["a.md"] * len(ids),
+            **extra_columns,
+        })
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as stream_writer:
+            stream_writer.write_table(table, max_chunksize=2)
+        return sink.getvalue()
+
+    bulk_importer.write_chunk(job.job_id, 0, stream(range(3)))
+    bulk_importer.write_chunk(job.job_id, 3, stream(range(3, 5)))
+
+    assert writer.ids == ["0", "1", "2", "3", "4"]
+    assert job.arrow_schema is not None
+    with pytest.raises(BulkImportError, match="differs"):
+        bulk_importer.write_chunk(job.job_id, 5, stream([5], chunk_id=["c5"]))
+
+def test_client_streams_and_retries_with_bounded_concurrency(tmp_path):
+    """The client's uploader against a stub service backed by a real importer."""
+    writer = FakeWriter()
+    bulk_importer = importer(tmp_path, writer, batch_size=3)
+    in_flight, peak, failures = 0, 0, {"remaining": 1}
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        path = request.url.path
+        if request.method == "POST" and path == "/v1/bulk/jobs":
+            body = json.loads(request.content)
+            return httpx.Response(201, json=bulk_importer.create_job(body["collection_name"], body["format"]).model_dump(mode="json"))
+        job_id = path.split("/")[4]
+        if request.method == "PUT":
+            if failures["remaining"]:
+                failures["remaining"] -= 1
+                return httpx.Response(503, json={"detail": "busy"})
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            offset = int(parse_qs(request.url.query.decode())["offset"][0])
+            job = bulk_importer.write_chunk(job_id, offset, request.content)
+        elif path.endswith("/complete"):
+            job = bulk_importer.complete(job_id)
+        else:
+            job = bulk_importer.get_job(job_id)
+        return httpx.Response(200, json=job.model_dump(mode="json"))
+
+    def vectors(n):
+        for i in range(n):
+            yield Vector(id=str(i), values=[0.1, 0.2], metadata={"source_name": "a.md"})
+
+    async def scenario():
+        client = VectorStoreClient(base_url="http://vectorstore")
+        return await client.bulk_import("docs", vectors(20), chunk_size=4, max_concurrency=2)
+
+    mount_transport("http://vectorstore", httpx.MockTransport(handle))
+    try:
+        job = asyncio.run(scenario())
+    finally:
+        unmount_transport("http://vectorstore")
+
+    assert sorted(writer.ids, key=int) == [str(i) for i in range(20)]
+    assert job.offset == 20 and job.status == "completed"
+    assert peak <= 2
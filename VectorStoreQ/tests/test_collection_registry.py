@@ -0,0 +1,95 @@
+import pytest
+
+pymilvus = pytest.importorskip("pymilvus")
+pytest.importorskip("milvus_lite")
+
+from pymilvus import connections, utility, Collection, CollectionSchema, DataType, FieldSchema
+
+from app.core import collection_registry
+from app.core.collection_registry import CollectionNotReadyError, CollectionRegistry, CollectionState
+
+ALIAS = "registry-test"
+
+@pytest.fixture(scope="module")
+def milvus(tmp_path_factory):
+    """A Milvus Lite instance backed by a local file."""
+    connections.connect(alias=ALIAS, uri=str(tmp_path_factory.mktemp("milvus") / "milvus.db"))
+    yield
+    connections.disconnect(ALIAS)
+
+def create_collection(name, metric_type="COSINE"):
+    schema = CollectionSchema([
+        FieldSchema("id", DataType.VARCHAR, is_primary=True, max_length=64),
+        FieldSchema("text", DataType.VARCHAR, max_length=256),
+        FieldSchema("vector", DataType.FLOAT_VECTOR, dim=4),
+    ])
+    collection = Collection(name, schema=schema, using=ALIAS)
+    collection.create_index("vector", {"index_type": "FLAT", "metric_type": metric_type, "params": {}})
+    return collection
+
+@pytest.fixture
+def registry(milvus):
+    registry = CollectionRegistry(alias=ALIAS)
+    yield registry
+    registry.close()
+    for name in utility.list_collections(using=ALIAS):
+        utility.drop_collection(name, using=ALIAS)
+
+def test_first_request_triggers_background_load(registry):
+    create_collection("docs")
+
+    with pytest.raises(CollectionNotReadyError):
+        registry.get("docs")
+
+    info = registry.get("docs", wait=30)
+    assert info.state == CollectionState.READY
+    assert info.primary_field == "id"
+    assert info.vector_field == "vector"
+    assert info.metric_type == "COSINE"
+    assert info.scalar_fields == ["id", "text"]
+
+def test_ready_collection_is_served_from_cache(registry, monkeypatch):
+    create_collection("docs")
+    first = registry.get("docs", wait=30)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Milvus should not be called for a cached collection")
+    monkeypatch.setattr(collection_registry.utility, "has_collection", fail)
+    monkeypatch.setattr(collection_registry, "Collection", fail)
+
+    assert registry.get("docs") is first
+
+def test_unknown_collection_raises_value_error(registry):
+    with pytest.raises(ValueError):
+        registry.get("missing")
+
+def test_invalidate_after_drop(registry):
+    create_collection("docs")
+    registry.get("docs", wait=30)
+
+    utility.drop_collection("docs", using=ALIAS)
+    registry.invalidate("docs")
+
+    with pytest.raises(ValueError):
+        registry.get("docs")
+
+def test_invalidate_after_alter_picks_up_new_metric(registry):
+    collection = create_collection("docs", metric_type="COSINE")
+    registry.get("docs", wait=30)
+
+    collection.release()
+    collection.drop_index()
+    collection.create_index("vector", {"index_type": "FLAT", "metric_type": "L2", "params": {}})
+    registry.invalidate("docs")
+
+    assert registry.get("docs", wait=30).metric_type == "L2"
+
+def test_warm_loads_all_collections(registry):
+    create_collection("a")
+    create_collection("b")
+
+    registry.warm()
+
+    assert registry.get("a", wait=30).state == CollectionState.READY
+    assert registry.get("b", wait=30).state == CollectionState.READY
+    assert set(registry.states()) == {"a", "b"}
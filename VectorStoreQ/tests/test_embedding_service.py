@@ -0,0 +1,65 @@
+import math
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.embeddings import EmbeddingService, HashingEmbedder
+from shared.q_vectorstore_client.models import Query, Vector
+
+class CountingEmbedder(HashingEmbedder):
+    """A hashing embedder that records every batch it encodes."""
+
+    def __init__(self, dim=16):
+        super().__init__(dim)
+        self.batches = []
+
+    def encode(self, texts):
+        self.batches.append(list(texts))
+        return super().encode(texts)
+
+def cosine(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    embedder = HashingEmbedder(dim=64)
+    first, second, other = embedder.encode(["restart the pod", "restart the pod", "quarterly revenue report"])
+
+    assert first == second
+    assert math.isclose(math.sqrt(sum(v * v for v in first)), 1.0)
+    assert cosine(first, embedder.encode(["how to restart a pod"])[0]) > cosine(first, other)
+
+def test_encodes_in_batches_and_deduplicates():
+    embedder = CountingEmbedder()
+    service = EmbeddingService(embedder, model_name="test", batch_size=2)
+
+    embeddings = service.embed(["a", "b", "a", "c"])
+
+    assert embedder.batches == [["a", "b"], ["c"]]
+    assert embeddings[0] == embeddings[2]
+    assert len(embeddings) == 4
+
+def test_lru_cache_serves_repeats_and_evicts_oldest():
+    embedder = CountingEmbedder()
+    service = EmbeddingService(embedder, model_name="test", cache_size=2)
+
+    service.embed(["a", "b"])
+    service.embed(["a"])          # hit; "b" is now least recently used
+    service.embed(["c"])          # evicts "b"
+    service.embed(["a", "b"])
+
+    assert embedder.batches == [["a", "b"], ["c"], ["b"]]
+
+def test_fill_values_only_embeds_text_items():
+    service = EmbeddingService(HashingEmbedder(dim=8), model_name="test")
+    queries = [Query(text="disk pressure on node"), Query(values=[1.0] * 8)]
+
+    assert service.fill_values(queries) == 1
+    assert queries[0].values == service.embed(["disk pressure on node"])[0]
+    assert queries[1].values == [1.0] * 8
+
+def test_models_require_values_or_text():
+    with pytest.raises(ValidationError):
+        Query(top_k=5)
+    with pytest.raises(ValidationError):
+        Vector(id="1")
+    assert Vector(id="1", text="hello").values is None
@@ -0,0 +1,112 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from app.core.keyword_index import BM25Index, KeywordIndexRegistry, reciprocal_rank_fusion, tokenize
+from shared.q_vectorstore_client.models import Query, SearchMode
+
+CORPUS = json.loads((Path(__file__).parent / "fixtures" / "hybrid_corpus.json").read_text())
+
+def corpus_index():
+    index = BM25Index()
+    for document in CORPUS["documents"]:
+        index.add(document["id"], document["text"])
+    return index
+
+def test_tokenize_keeps_identifiers_and_their_parts():
+    assert tokenize("dispatch_task(FineTuningQueue)") == [
+        "dispatch_task", "dispatch", "task", "finetuningqueue", "fine", "tuning", "queue"
+    ]
+
+def test_bm25_finds_exact_identifiers():
+    index = corpus_index()
+
+    for query in (q for q in CORPUS["queries"] if q["kind"] == "identifier"):
+        assert index.search(query["text"], 1)[0][0] in query["relevant"], query["text"]
+
+def test_bm25_add_replaces_and_remove_forgets():
+    index = BM25Index()
+    index.add("a", "milvus timeout")
+    index.add("a", "gremlin traversal")
+    index.add("b", "milvus connection refused")
+
+    assert [doc_id for doc_id, _ in index.search("milvus", 5)] == ["b"]
+    index.remove("b")
+    assert index.search("milvus", 5) == []
+    assert len(index) == 1
+
+def test_backfill_never_overwrites_newer_ingested_text():
+    registry = KeywordIndexRegistry({"docs": "text"})
+    registry.index_rows("docs", [("a", {"text": "new text"})])
+
+    registry.backfill("docs", [{"id": "a", "text": "old text"}, {"id": "b", "text": "other"}], "id")
+
+    assert [doc_id for doc_id, _ in registry.get("docs").search("new", 5)] == ["a"]
+    assert registry.get("docs").search("old", 5) == []
+    assert registry.get("unconfigured") is None
+
+def test_reciprocal_rank_fusion_weights():
+    dense, keyword = ["a", "b", "c"], ["c", "d"]
+
+    fused = [doc_id for doc_id, _ in reciprocal_rank_fusion([(dense, 1.0), (keyword, 1.0)], k=60)]
+    assert fused[0] == "c"  # found by both rankings
+    assert fused[:3] == ["c", "a", "b"]
+
+    keyword_heavy = reciprocal_rank_fusion([(dense, 0.1), (keyword, 1.0)], k=60, top_k=2)
+    assert [doc_id for doc_id, _ in keyword_heavy] == ["c", "d"]
+
+def test_keyword_and_hybrid_queries_need_text():
+    with pytest.raises(ValueError):
+        Query(values=[0.1], mode=SearchMode.HYBRID)
+    assert Query(text="E4031", mode=SearchMode.KEYWORD).values is None
+
+def test_hybrid_search_against_milvus(tmp_path):
+    """Keyword candidates honour filters and are fused with dense hits in one call."""
+    pytest.importorskip("milvus_lite")
+    from pymilvus import connections, Collection, CollectionSchema, DataType, FieldSchema
+    from app.core.collection_registry import CollectionRegistry
+    from app.core.embeddings import HashingEmbedder
+    from app.core.hybrid_search import hybrid_search
+
+    embedder = HashingEmbedder(dim=64)
+    documents = CORPUS["documents"]
+    connections.connect(alias="hybrid", uri=str(tmp_path / "milvus.db"))
+    registry = CollectionRegistry(alias="hybrid")
+    try:
+        schema = CollectionSchema([
+            FieldSchema("id", DataType.VARCHAR, is_primary=True, max_length=64),
+            FieldSchema("source", DataType.VARCHAR, max_length=64),
+            FieldSchema("text", DataType.VARCHAR, max_length=1024),
+            FieldSchema("embedding", DataType.FLOAT_VECTOR, dim=64),
+        ])
+        collection = Collection("docs", schema=schema, using="hybrid")
+        collection.create_index("embedding", {"index_type": "FLAT", "metric_type": "COSINE", "params": {}})
+        collection.insert([
+            [d["id"] for d in documents],
+            [d["source"] for d in documents],
+            [d["text"] for d in documents],
+            embedder.encode([d["text"] for d in documents]),
+        ])
+        info = registry.get("docs", wait=30)
+        index = corpus_index()
+        index.add("not-in-milvus", "E4031 buffered but not written yet")
+        params = {"metric_type": "COSINE", "params": {}}
+
+        def search(text, mode, expr=None):
+            query = Query(text=text, values=embedder.encode([text])[0], top_k=3, mode=mode)
+            return hybrid_search(info, query, index, expr, params, consistency_level="Strong")
+
+        keyword = search("E4031", SearchMode.KEYWORD)
+        assert [hit.id for hit in keyword.hits] == ["d07"]
+        assert keyword.hits[0].metadata["text"].startswith("Error E4031")
+        assert "embedding" not in keyword.hits[0].metadata
+
+        assert search("E4031", SearchMode.KEYWORD, expr='source == "code"').hits == []
+
+        hybrid = search("how do I fix E5002", SearchMode.HYBRID)
+        assert hybrid.hits[0].id == "d08"
+        assert len(hybrid.hits) == 3
+    finally:
+        registry.close()
+        connections.disconnect("hybrid")
@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+from app.core.ingest_buffer import IngestBuffer, IngestBufferFullError
+
+class RecordingWriter:
+    """Records every batch written, optionally failing the next call."""
+
+    def __init__(self):
+        self.batches = []
+        self.fail_next = False
+        self.written = threading.Event()
+
+    def __call__(self, collection_name, rows):
+        if self.fail_next:
+            self.fail_next = False
+            raise ConnectionError("milvus unavailable")
+        self.batches.append((collection_name, rows))
+        self.written.set()
+
+def rows(*pairs):
+    return [(key, {"id": key, "value": value}) for key, value in pairs]
+
+def test_deduplicates_by_primary_key_last_write_wins():
+    writer = RecordingWriter()
+    buffer = IngestBuffer(writer)
+
+    buffer.add("docs", rows(("a", 1), ("b", 1)))
+    buffer.add("docs", rows(("a", 2)))
+
+    assert buffer.flush("docs") == 2
+    assert writer.batches == [("docs", [{"id": "b", "value": 1}, {"id": "a", "value": 2}])]
+
+def test_coalesces_until_batch_size():
+    writer = RecordingWriter()
+    buffer = IngestBuffer(writer, max_batch_size=10, max_delay_seconds=60)
+    buffer.start(poll_interval=0.01)
+    try:
+        for i in range(9):
+            buffer.add("docs", rows((i, i)))
+        time.sleep(0.05)
+        assert writer.batches == []
+
+        buffer.add("docs", rows((9, 9)))
+        assert writer.written.wait(1)
+        assert len(writer.batches) == 1 and len(writer.batches[0][1]) == 10
+    finally:
+        buffer.close()
+
+def test_flushes_after_max_delay():
+    writer = RecordingWriter()
+    buffer = IngestBuffer(writer, max_batch_size=1000, max_delay_seconds=0.05)
+    buffer.start(poll_interval=0.01)
+    try:
+        buffer.add("docs", rows(("a", 1)))
+        assert writer.written.wait(1)
+        assert buffer.pending("docs") == 0
+    finally:
+        buffer.close()
+
+def test_failed_write_is_retried_without_overwriting_newer_rows():
+    writer = RecordingWriter()
+    buffer = IngestBuffer(writer)
+    buffer.add("docs", rows(("a", 1), ("b", 1)))
+
+    writer.fail_next = True
+    with pytest.raises(ConnectionError):
+        buffer.flush("docs")
+    buffer.add("docs", rows(("a", 2)))
+
+    assert buffer.flush("docs") == 2
+    assert writer.batches[0][1] == [{"id": "b", "value": 1}, {"id": "a", "value": 2}]
+
+def test_rejects_writes_when_full():
+    buffer = IngestBuffer(RecordingWriter(), max_buffered=2)
+    buffer.add("docs", rows(("a", 1), ("b", 1)))
+
+    with pytest.raises(IngestBufferFullError):
+        buffer.add("docs", rows(("c", 1)))
+
+    buffer.flush("docs")
+    buffer.add("docs", rows(("c", 1)))
+
+def test_discarded_rows_are_never_written():
+    writer = RecordingWriter()
+    buffer = IngestBuffer(writer, max_buffered=2)
+    buffer.add("docs", rows(("a", 1), ("b", 1)))
+
+    assert buffer.discard("docs", ["a", "missing"]) == 1
+    assert buffer.discard("notes", ["a"]) == 0
+    buffer.add("docs", rows(("c", 1)))
+
+    assert buffer.flush("docs") == 2
+    assert writer.batches == [("docs", [{"id": "b", "value": 1}, {"id": "c", "value": 1}])]
+
+def test_close_flushes_and_seals():
+    writer = RecordingWriter()
+    sealed = []
+    buffer = IngestBuffer(writer, max_delay_seconds=60, sealer=sealed.append)
+    buffer.start()
+    buffer.add("docs", rows(("a", 1)))
+    buffer.add("notes", rows(("b", 1)))
+
+    buffer.close()
+
+    assert sorted(name for name, _ in writer.batches) == ["docs", "notes"]
+    assert sorted(sealed) == ["docs", "notes"]
@@ -0,0 +1,93 @@
+import pytest
+
+from app.core.query_builder import FilterError, build_filter_expression, group_queries, search_params_for
+from shared.q_vectorstore_client.models import Query
+
+def test_equality_and_in_filters():
+    assert build_filter_expression({"source": "runbook.md"}) == 'source == "runbook.md"'
+    assert build_filter_expression({"agent_id": ["a1", "a2"]}) == 'agent_id in ["a1", "a2"]'
+    assert build_filter_expression({"archived": False, "version": 3}) == "archived == false and version == 3"
+
+def test_comparison_and_boolean_operators():
+    expression = build_filter_expression({
+        "$or": [{"score": {"$gte": 0.5, "$lt": 1}}, {"source": {"$nin": ["x"]}}]
+    })
+
+    assert expression == '((score >= 0.5 and score < 1) or (source not in ["x"]))'
+
+def test_string_values_are_escaped():
+    expression = build_filter_expression({"source": 'a" or id != "'})
+
+    assert expression == r'source == "a\" or id != \""'
+
+@pytest.mark.parametrize("bad_filter", [
+    {"source or 1": "x"},
+    {"source": {"$regex": ".*"}},
+    {"source": None},
+    {"score": float("nan")},
+    {"source": {"$in": []}},
+    {"$or": []},
+])
+def test_rejects_unsafe_or_unsupported_filters(bad_filter):
+    with pytest.raises(FilterError):
+        build_filter_expression(bad_filter)
+
+def test_rejects_fields_outside_the_schema():
+    with pytest.raises(FilterError):
+        build_filter_expression({"password": "x"}, allowed_fields=["source"])
+
+def test_groups_queries_by_filter_and_top_k():
+    queries = [
+        Query(values=[0.0], top_k=5, filter={"source": "a"}),
+        Query(values=[1.0], top_k=5),
+        Query(values=[2.0], top_k=5, filter={"source": "a"}),
+        Query(values=[3.0], top_k=50),
+    ]
+
+    groups = group_queries(queries)
+
+    assert [(expr, top_k, indexes) for expr, top_k, _, indexes in groups] == [
+        ('source == "a"', 5, [0, 2]),
+        (None, 5, [1]),
+        (None, 50, [3]),
+    ]
+
+def test_search_params_layering():
+    hnsw = {"index_type": "HNSW", "metric_type": "COSINE"}
+
+    assert search_params_for(hnsw, top_k=10) == {"ef": 64}
+    assert search_params_for(hnsw, top_k=200) == {"ef": 200}
+    assert search_params_for(hnsw, top_k=10, collection_defaults={"ef": 96}) == {"ef": 96}
+    assert search_params_for(hnsw, top_k=10, collection_defaults={"ef": 96}, overrides={"ef": 128}) == {"ef": 128}
+    assert search_params_for({"index_type": "IVF_FLAT"}, top_k=10) == {"nprobe": 16}
+
+def test_filters_run_against_milvus(tmp_path):
+    """The generated expressions, escaping included, are valid Milvus syntax."""
+    pytest.importorskip("milvus_lite")
+    from pymilvus import connections, Collection, CollectionSchema, DataType, FieldSchema
+
+    connections.connect(alias="filters", uri=str(tmp_path / "milvus.db"))
+    try:
+        schema = CollectionSchema([
+            FieldSchema("id", DataType.VARCHAR, is_primary=True, max_length=64),
+            FieldSchema("source", DataType.VARCHAR, max_length=64),
+            FieldSchema("vector", DataType.FLOAT_VECTOR, dim=2),
+        ])
+        collection = Collection("docs", schema=schema, using="filters")
+        collection.create_index("vector", {"index_type": "FLAT", "metric_type": "COSINE", "params": {}})
+        collection.create_index("source", index_name="source", index_params={"index_type": "INVERTED"})
+        collection.load()
+        collection.insert([["1", "2", "3"], ["a", 'quote"d', "c"], [[1.0, 0.0], [0.9, 0.1], [0.0, 1.0]]])
+
+        def search(filter):
+            results = collection.search(
+                [[1.0, 0.0]], "vector", {"metric_type": "COSINE"}, limit=3,
+                expr=build_filter_expression(filter, ["id", "source"]), consistency_level="Strong"
+            )
+            return sorted(hit.id for hit in results[0])
+
+        assert search({"source": 'quote"d'}) == ["2"]
+        assert search({"source": {"$in": ["a", "c"]}}) == ["1", "3"]
+        assert search({"$or": [{"id": "1"}, {"source": "c"}]}) == ["1", "3"]
+    finally:
+        connections.disconnect("filters")
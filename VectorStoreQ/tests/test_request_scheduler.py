@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.query_builder import FilterError, build_filter_expression
+from app.core.request_scheduler import RequestScheduler, SchedulerOverloadedError, SearchCoalescer
+from shared.q_vectorstore_client.models import Query, QueryResult, SearchHit
+
+class FakeHandler:
+    """Stands in for MilvusHandler.search, recording each call and blocking like a Milvus round trip."""
+
+    def __init__(self, delay=0.0):
+        self.calls = []
+        self.delay = delay
+
+    def search(self, collection_name, queries):
+        for query in queries:
+            build_filter_expression(query.filter, ["source"])
+        self.calls.append((collection_name, len(queries)))
+        time.sleep(self.delay)
+        return [QueryResult(hits=[SearchHit(id=str(q.values[0]), score=1.0)]) for q in queries]
+
+def test_blocking_calls_do_not_block_the_event_loop():
+    async def scenario():
+        scheduler = RequestScheduler(max_workers=2)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        ticking = asyncio.ensure_future(ticker())
+        await scheduler.run("docs", "search", time.sleep, 0.1)
+        ticking.cancel()
+        scheduler.close()
+        return ticks
+
+    assert asyncio.run(scenario()) >= 5
+
+def test_admission_control_rejects_beyond_max_pending():
+    async def scenario():
+        scheduler = RequestScheduler(max_workers=1, max_pending=2)
+        release = threading.Event()
+        running = [asyncio.ensure_future(scheduler.run("docs", "upsert", release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(SchedulerOverloadedError):
+            await scheduler.run("docs", "upsert", release.wait)
+
+        release.set()
+        await asyncio.gather(*running)
+        assert scheduler.pending == 0
+        scheduler.close()
+
+    asyncio.run(scenario())
+
+def test_per_collection_limit():
+    async def scenario():
+        scheduler = RequestScheduler(max_workers=8, per_collection_limit=2)
+        active = {"docs": 0, "notes": 0}
+        peak = {"docs": 0, "notes": 0}
+        lock = threading.Lock()
+
+        def work(name):
+            with lock:
+                active[name] += 1
+                peak[name] = max(peak[name], active[name])
+            time.sleep(0.02)
+            with lock:
+                active[name] -= 1
+
+        await asyncio.gather(*(scheduler.run(name, "search", work, name) for name in ["docs"] * 6 + ["notes"] * 2))
+        scheduler.close()
+        return peak
+
+    assert asyncio.run(scenario()) == {"docs": 2, "notes": 2}
+
+def test_concurrent_single_queries_are_coalesced():
+    async def scenario():
+        handler = FakeHandler()
+        coalescer = SearchCoalescer(RequestScheduler(), handler.search, window_seconds=0.01)
+        results = await asyncio.gather(*(
+            coalescer.search("docs", Query(values=[float(i)], top_k=3)) for i in range(20)
+        ))
+        other = await coalescer.search("notes", Query(values=[99.0]))
+        return handler.calls, results, other
+
+    calls, results, other = asyncio.run(scenario())
+
+    assert calls == [("docs", 20), ("notes", 1)]
+    assert [r.hits[0].id for r in results] == [str(float(i)) for i in range(20)]
+    assert other.hits[0].id == "99.0"
+
+def test_batches_are_capped_at_max_batch_size():
+    async def scenario():
+        handler = FakeHandler()
+        coalescer = SearchCoalescer(RequestScheduler(), handler.search, window_seconds=0.01, max_batch_size=8)
+        await asyncio.gather(*(coalescer.search("docs", Query(values=[float(i)])) for i in range(20)))
+        return handler.calls
+
+    assert asyncio.run(scenario()) == [("docs", 8), ("docs", 8), ("docs", 4)]
+
+def test_invalid_filter_only_fails_its_own_request():
+    async def scenario():
+        handler = FakeHandler()
+        coalescer = SearchCoalescer(RequestScheduler(), handler.search, window_seconds=0.01)
+        return await asyncio.gather(
+            coalescer.search("docs", Query(values=[1.0])),
+            coalescer.search("docs", Query(values=[2.0], filter={"password": "x"})),
+            coalescer.search("docs", Query(values=[3.0], filter={"source": "a"})),
+            return_exceptions=True
+        )
+
+    first, second, third = asyncio.run(scenario())
+
+    assert first.hits[0].id == "1.0"
+    assert isinstance(second, FilterError)
+    assert third.hits[0].id == "3.0"
@@ -0,0 +1,89 @@
+import random
+
+from app.core.result_cache import SearchResultCache
+from shared.q_vectorstore_client.models import Query, QueryResult, SearchHit, SearchMode
+
+def result(doc_id):
+    return QueryResult(hits=[SearchHit(id=doc_id, score=0.9, metadata={"text_chunk": "x" * 100})])
+
+def vector(seed, dim=64):
+    rng = random.Random(seed)
+    return [rng.uniform(-1, 1) for _ in range(dim)]
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_exact_and_near_identical_queries_hit():
+    cache = SearchResultCache(similarity_threshold=0.99)
+    query = Query(values=vector(1), top_k=5)
+    cache.put("docs", cache.generation("docs"), query, result("a"))
+
+    assert cache.get("docs", Query(values=vector(1), top_k=5)).hits[0].id == "a"
+    # A slightly perturbed embedding of the same question
+    nudged = [v + 0.001 for v in vector(1)]
+    assert cache.get("docs", Query(values=nudged, top_k=5)).hits[0].id == "a"
+    # A different question, top_k, filter or collection misses
+    assert cache.get("docs", Query(values=vector(2), top_k=5)) is None
+    assert cache.get("docs", Query(values=vector(1), top_k=10)) is None
+    assert cache.get("docs", Query(values=vector(1), top_k=5, filter={"source": "a"})) is None
+    assert cache.get("notes", query) is None
+
+def test_similarity_reuse_can_be_disabled():
+    cache = SearchResultCache(similarity_threshold=None)
+    cache.put("docs", 0, Query(values=vector(1)), result("a"))
+
+    assert cache.get("docs", Query(values=[v * 1.5 for v in vector(1)])) is not None  # same after normalisation
+    assert cache.get("docs", Query(values=[v + 0.01 for v in vector(1)])) is None
+
+def test_keyword_queries_are_keyed_by_text():
+    cache = SearchResultCache()
+    cache.put("docs", 0, Query(text="E4031", mode=SearchMode.KEYWORD), result("a"))
+
+    assert cache.get("docs", Query(text="E4031", mode=SearchMode.KEYWORD)) is not None
+    assert cache.get("docs", Query(text="E5002", mode=SearchMode.KEYWORD)) is None
+
+def test_writes_invalidate_the_collection_only():
+    cache = SearchResultCache()
+    generation = cache.generation("docs")
+    cache.put("docs", generation, Query(values=vector(1)), result("a"))
+    cache.put("notes", cache.generation("notes"), Query(values=vector(1)), result("b"))
+
+    cache.invalidate("docs")
+
+    assert cache.get("docs", Query(values=vector(1))) is None
+    assert cache.get("notes", Query(values=vector(1))) is not None
+    assert len(cache) == 1
+
+def test_results_racing_a_write_are_not_stored():
+    cache = SearchResultCache()
+    generation = cache.generation("docs")  # read before the search runs
+    cache.invalidate("docs")               # a write lands mid-search
+
+    cache.put("docs", generation, Query(values=vector(1)), result("stale"))
+
+    assert cache.get("docs", Query(values=vector(1))) is None
+
+def test_memory_bound_evicts_least_recently_used():
+    cache = SearchResultCache(max_bytes=2000, similarity_threshold=None)
+    for seed in range(3):
+        cache.put("docs", 0, Query(values=vector(seed)), result(str(seed)))
+        cache.get("docs", Query(values=vector(0)))  # keep the first entry hot
+
+    assert cache.size_bytes <= 2000
+    assert cache.get("docs", Query(values=vector(0))) is not None
+    assert cache.get("docs", Query(values=vector(1))) is None
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = SearchResultCache(ttl_seconds=60, clock=clock)
+    cache.put("docs", 0, Query(values=vector(1)), result("a"))
+
+    clock.now = 59
+    assert cache.get("docs", Query(values=vector(1))) is not None
+    clock.now = 61
+    assert cache.get("docs", Query(values=vector(1))) is None
+    assert len(cache) == 0
@@ -1,25 +1,15 @@
 import logging
-import asyncio
 
+from shared.q_service_client import run_and_close
 from shared.q_vectorstore_client.client import VectorStoreClient
-from shared.q_vectorstore_client.models import Query
-from sentence_transformers import SentenceTransformer
+from shared.q_vectorstore_client.models import Query, SearchMode
 
 from agentQ.app.core.toolbox import Tool
 
 logger = logging.getLogger(__name__)
 
-# --- Configuration & Model Loading ---
+# --- Configuration ---
 COLLECTION_NAME = "code_documentation"
-EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
-
-try:
-    logger.info("Loading sentence transformer model for code search tool...")
-    embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
-    logger.info("Sentence transformer model loaded successfully for code search tool.")
-except Exception as e:
-    logger.error(f"Failed to load sentence transformer model for code search tool: {e}", exc_info=True)
-    embedding_model = None
 
 # --- Tool Definition ---
 
@@ -35,9 +25,6 @@ def search_codebase(query: str, top_k: int = 5, config: dict = None) -> str:
     Returns:
         A string containing the most relevant code chunks found.
     """
-    if not embedding_model:
-        return "Error: Embedding model is not available for code search."
-    
     vector_store_url = config.get("vector_store_url")
     if not vector_store_url:
         return "Error: vector_store_url not found in tool configuration."
@@ -46,8 +33,9 @@ def search_codebase(query: str, top_k: int = 5, config: dict = None) -> str:
     
     async def do_search():
         try:
-            query_vector = embedding_model.encode(query).tolist()
-            search_query = Query(values=query_vector, top_k=top_k)
+            # Hybrid search so function and class names match exactly;
+            # VectorStoreQ embeds the query text with its shared model
+            search_query = Query(text=query, top_k=top_k, mode=SearchMode.HYBRID)
             
             search_response = await vs_client.search(
                 collection_name=COLLECTION_NAME,
@@ -69,7 +57,7 @@ def search_codebase(query: str, top_k: int = 5, config: dict = None) -> str:
             await vs_client.close()
 
     try:
-        return asyncio.run(do_search())
+        return run_and_close(do_search())
     except Exception as e:
         logger.error(f"Error searching codebase: {e}", exc_info=True)
         return f"Error: An exception occurred during the code search: {e}"
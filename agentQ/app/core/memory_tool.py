@@ -1,9 +1,9 @@
 import logging
 import uuid
-import asyncio
 from typing import Dict, Any
 
 from shared.q_pulse_client.client import QuantumPulseClient
+from shared.q_service_client import run_and_close
 from shared.q_vectorstore_client.client import VectorStoreClient
 from shared.q_vectorstore_client.models import Vector
 from shared.q_memory_schemas.models import Memory
@@ -47,7 +47,7 @@ def save_memory(memory: Dict[str, Any], config: Dict[str, Any] = None) -> str:
         logger.info(f"Attempting to save memory: '{mem_obj.summary}'")
         
         # 1. Get embedding from QuantumPulse for the summary
-        embedding = asyncio.run(qpulse_client.get_embedding("sentence-transformer", mem_obj.summary))
+        embedding = run_and_close(qpulse_client.get_embedding("sentence-transformer", mem_obj.summary))
         
         # 2. Prepare vector for VectorStoreQ, storing the full memory object in the payload
         vector_to_upsert = Vector(
@@ -57,7 +57,7 @@ def save_memory(memory: Dict[str, Any], config: Dict[str, Any] = None) -> str:
         )
         
         # 3. Upsert into VectorStoreQ
-        asyncio.run(vectorstore_client.upsert(
+        run_and_close(vectorstore_client.upsert(
             collection_name=MEMORY_COLLECTION,
             vectors=[vector_to_upsert]
         ))
@@ -105,10 +105,10 @@ def search_memory(query: str, top_k: int = 3, config: Dict[str, Any] = None) ->
         logger.info(f"Searching memory for: '{query}'")
         
         # 1. Get embedding for the query
-        query_embedding = asyncio.run(qpulse_client.get_embedding("sentence-transformer", query))
+        query_embedding = run_and_close(qpulse_client.get_embedding("sentence-transformer", query))
         
         # 2. Search in VectorStoreQ
-        search_results = asyncio.run(vectorstore_client.search(
+        search_results = run_and_close(vectorstore_client.search(
             collection_name=MEMORY_COLLECTION,
             queries=[query_embedding],
             top_k=top_k
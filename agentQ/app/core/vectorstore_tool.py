@@ -2,25 +2,15 @@ import logging
 import asyncio
 
 from shared.q_vectorstore_client.client import VectorStoreClient
-from shared.q_vectorstore_client.models import Query
-from sentence_transformers import SentenceTransformer
+from shared.q_vectorstore_client.models import Query, SearchMode
 
 from agentQ.app.core.toolbox import Tool
 
 logger = logging.getLogger(__name__)
 
-# --- Configuration & Model Loading ---
+# --- Configuration ---
 VECTORSTORE_URL = "http://localhost:8001"
 COLLECTION_NAME = "rag_document_chunks"
-EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
-
-try:
-    logger.info("Loading sentence transformer model for VectorStoreQ tool...")
-    embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
-    logger.info("Sentence transformer model loaded successfully for tool.")
-except Exception as e:
-    logger.error(f"Failed to load sentence transformer model for tool: {e}", exc_info=True)
-    embedding_model = None
 
 # --- Tool Definition ---
 
@@ -35,9 +25,6 @@ def search_knowledge_base(query: str, top_k: int = 5, config: dict = None) -> st
     Returns:
         A string containing the search results, or an error message.
     """
-    if not embedding_model:
-        return "Error: Embedding model is not available."
-    
     vector_store_url = config.get("vector_store_url")
     if not vector_store_url:
         return "Error: vector_store_url not found in tool configuration."
@@ -45,8 +32,9 @@ def search_knowledge_base(query: str, top_k: int = 5, config: dict = None) -> st
     vs_client = VectorStoreClient(base_url=vector_store_url)
     
     try:
-        query_vector = embedding_model.encode(query).tolist()
-        search_query = Query(values=query_vector, top_k=top_k)
+        # Hybrid search so exact names and error codes match as well as meaning;
+        # VectorStoreQ embeds the query text with its shared model
+        search_query = Query(text=query, top_k=top_k, mode=SearchMode.HYBRID)
         
         # Run the async search function in the current event loop
         # A more robust solution in a sync function might use asyncio.run()
@@ -94,9 +82,6 @@ def search_codebase(query: str, top_k: int = 5, config: dict = None) -> str:
     Returns:
         A string containing the most relevant code chunks found.
     """
-    if not embedding_model:
-        return "Error: Embedding model is not available for code search."
-    
     vector_store_url = config.get("vector_store_url")
     if not vector_store_url:
         return "Error: vector_store_url not found in tool configuration."
@@ -105,8 +90,9 @@ def search_codebase(query: str, top_k: int = 5, config: dict = None) -> str:
     
     async def do_search():
         try:
-            query_vector = embedding_model.encode(query).tolist()
-            search_query = Query(values=query_vector, top_k=top_k)
+            # Hybrid search so function and class names match exactly;
+            # VectorStoreQ embeds the query text with its shared model
+            search_query = Query(text=query, top_k=top_k, mode=SearchMode.HYBRID)
             
             search_response = await vs_client.search(
                 collection_name="code_documentation", # Use the new collection
@@ -7,7 +7,6 @@ import logging
 import time
 import yaml
 import pulsar
-import asyncio
 import fastavro
 import io
 import signal
@@ -26,6 +25,7 @@ from shared.vault_client import VaultClient
 from shared.pulsar_client import shared_pulsar_client
 from shared.q_pulse_client.client import QuantumPulseClient
 from shared.q_pulse_client.models import QPChatRequest, QPChatMessage
+from shared.q_service_client import run_and_close
 from agentQ.app.core.context import ContextManager
 from agentQ.app.core.toolbox import Toolbox, Tool
 from agentQ.app.core.vectorstore_tool import vectorstore_tool
@@ -217,7 +217,7 @@ def generate_and_save_reflexion(user_prompt: str, scratchpad: list, context_mana
         messages = [QPChatMessage(role="user", content=reflexion_prompt)]
         request = QPChatRequest(model=llm_config['model'], messages=messages)
         
-        response = asyncio.run(qpulse_client.get_chat_completion(request))
+        response = run_and_close(qpulse_client.get_chat_completion(request))
         reflexion_text = response.choices[0].message.content
         logger.info("Generated reflexion", reflexion=reflexion_text)
         
@@ -282,7 +282,7 @@ def react_loop(prompt_data, context_manager, toolbox, qpulse_client, llm_config,
         
         # 2. Call QuantumPulse
         request = QPChatRequest(model=llm_config['model'], messages=full_prompt_messages)
-        response = asyncio.run(qpulse_client.get_chat_completion(request))
+        response = run_and_close(qpulse_client.get_chat_completion(request))
         response_text = response.choices[0].message.content
         history.append({"role": "assistant", "content": response_text})
 
@@ -352,7 +352,7 @@ def react_loop(prompt_data, context_manager, toolbox, qpulse_client, llm_config,
                 memory_request_messages = [QPChatMessage(role="system", content=memory_prompt)]
                 memory_request = QPChatRequest(model=llm_config['model'], messages=memory_request_messages, temperature=0.2)
                 
-                memory_response = asyncio.run(qpulse_client.get_chat_completion(memory_request))
+                memory_response = run_and_close(qpulse_client.get_chat_completion(memory_request))
                 memory_json_str = memory_response.choices[0].message.content
                 
                 # The LLM should return a JSON string, which we parse into a dict
@@ -600,7 +600,7 @@ def run_agent():
                         logger.info("Received task", task_id=prompt_data.get("id"), workflow_id=prompt_data.get("workflow_id"))
                         
                         if personality == "reflector":
-                            final_result = asyncio.run(reflector_loop(prompt_data, qpulse_client))
+                            final_result = run_and_close(reflector_loop(prompt_data, qpulse_client))
                         else:
                             final_result = react_loop(prompt_data, context_manager, agent_toolbox, qpulse_client, llm_config, thoughts_producer)
                         
@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Literal, Optional
 import asyncio
 import logging
-from gremlin_python.structure.statics import T
-from pydantic import BaseModel
+import httpx
+from pydantic import BaseModel, Field
 
 from shared.q_auth_parser.parser import get_current_user
 from shared.q_auth_parser.models import UserClaims
@@ -39,13 +39,12 @@ async def cognitive_search(
     """
     try:
         # 1. Asynchronously query the backend services in parallel
-        vector_query = VectorQuery(query=search_query.query, top_k=5)
+        vector_query = VectorQuery(text=search_query.query, top_k=5)
         # Assuming a default collection name for now
         semantic_future = vector_store_client.search(collection_name="documents", queries=[vector_query])
         
-        # A simple Gremlin query to find entities by name (case-insensitive)
-        gremlin_query = f"g.V().has('name', textContains('{search_query.query}')).elementMap().limit(10)"
-        graph_future = kg_client.execute_gremlin_query(gremlin_query)
+        # Entities whose name contains the query, via a parameterized template
+        graph_future = kg_client.search_by_name(search_query.query, limit=10)
         
         results = await asyncio.gather(semantic_future, graph_future, return_exceptions=True)
         
@@ -68,29 +67,7 @@ async def cognitive_search(
         # 3. Process Knowledge Graph results
         kg_result = None
         if not isinstance(results[1], Exception):
-            raw_graph_data = results[1].get('result', {}).get('data', [])
-            
-            nodes = []
-            for item in raw_graph_data:
-                if item.get('@type') == 'g:Vertex':
-                    vertex_value = item.get('@value', {})
-                    node_id = vertex_value.get('id')
-                    if not node_id: continue
-
-                    properties = {}
-                    for key, prop_list in vertex_value.get('properties', {}).items():
-                        if isinstance(prop_list, list) and prop_list:
-                            # Take the first property value
-                            prop_value = prop_list[0].get('@value', {}).get('value')
-                            if prop_value is not None:
-                                properties[key] = prop_value
-
-                    nodes.append(KGNode(
-                        id=node_id,
-                        label=vertex_value.get('label', 'Unknown'),
-                        properties=properties
-                    ))
-            
+            nodes = [_element_to_node(element) for element in results[1] if element.get('id') is not None]
             kg_result = KnowledgeGraphResult(nodes=nodes, edges=[]) # Assuming no edges for now
         else:
             logger.error(f"Knowledge graph search failed: {results[1]}", exc_info=results[1])
@@ -99,10 +76,11 @@ async def cognitive_search(
         summary = "Could not generate a summary."
         model_version = None
         if vector_results or (kg_result and kg_result.nodes):
+            semantic_context = '- ' + '\n- '.join(res.content for res in vector_results)
             summary_prompt = f"""Based on the following information, provide a concise, one-paragraph summary for the query: "{search_query.query}"
 
 Semantic Search Results:
-{'- ' + '\\n- '.join([res.content for res in vector_results])}
+{semantic_context}
 
 Knowledge Graph Context:
 Found {len(kg_result.nodes) if kg_result else 0} related entities.
@@ -137,7 +115,12 @@ Summary:"""
 
 class NodeNeighborsRequest(BaseModel):
     node_id: str
-    hops: int = 1
+    hops: int = Field(1, ge=1, le=4)
+    direction: Literal["out", "in", "both"] = "both"
+    edge_labels: List[str] = Field(default_factory=list)
+    fan_out: int = Field(25, ge=1, le=500, description="Most edges followed from each node.")
+    max_nodes: int = Field(200, ge=1, le=5000)
+    cursor: Optional[str] = None
 
 @router.post("/kg-neighbors", response_model=KnowledgeGraphResult)
 async def get_node_neighbors(
@@ -146,62 +129,42 @@ async def get_node_neighbors(
     kg_client: KnowledgeGraphClient = Depends(get_kg_client),
 ):
     """
-    Fetches the neighbors of a given node in the knowledge graph.
+    Fetches the neighbors of a given node in the knowledge graph. The graph
+    is explored with fan-out caps and a node budget, so hub nodes return a
+    bounded subgraph plus a cursor for the rest.
     """
     logger.info(f"Fetching neighbors for node '{request.node_id}'")
     
-    # A Gremlin query to find a node and its neighbors up to N hops
-    query = f"g.V('{request.node_id}').repeat(both().simplePath()).times({request.hops}).emit().path().by(elementMap())"
-    
     try:
-        raw_graph_data = await kg_client.execute_gremlin_query(query)
-        # We need a function to parse this path-based result into nodes and edges
-        kg_result = parse_gremlin_path_to_graph(raw_graph_data)
-        return kg_result
+        neighborhood = await kg_client.neighborhood(
+            request.node_id, hops=request.hops, direction=request.direction, edge_labels=request.edge_labels,
+            fan_out=request.fan_out, max_nodes=request.max_nodes, cursor=request.cursor
+        )
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code in (status.HTTP_400_BAD_REQUEST, status.HTTP_404_NOT_FOUND):
+            raise HTTPException(status_code=e.response.status_code, detail=e.response.json().get("detail"))
+        logger.error(f"Failed to get node neighbors: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to get node neighbors.")
     except Exception as e:
         logger.error(f"Failed to get node neighbors: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to get node neighbors.")
-
-def parse_gremlin_path_to_graph(gremlin_response: Dict[str, Any]) -> KnowledgeGraphResult:
-    """
-    Parses a Gremlin path() response into a KnowledgeGraphResult.
-    The response contains a list of paths, and each path is a list of elements (nodes and edges).
-    """
-    nodes = {}
-    edges = {}
-    
-    response_data = gremlin_response.get("result", {}).get("data", [])
-    if not isinstance(response_data, list):
-        return KnowledgeGraphResult(nodes=[], edges=[])
-
-    for path in response_data:
-        path_objects = path.get('objects', [])
-        for i, element in enumerate(path_objects):
-            element_value = element.get('@value', {})
-            element_type = element.get('@type')
-
-            if element_type == 'g:Vertex':
-                node_id = element_value.get('id')
-                if node_id and node_id not in nodes:
-                    properties = {}
-                    for key, prop_list in element_value.get('properties', {}).items():
-                        if isinstance(prop_list, list) and prop_list:
-                            prop_value = prop_list[0].get('@value', {}).get('value')
-                            if prop_value is not None:
-                                properties[key] = prop_value
-                    nodes[node_id] = KGNode(id=node_id, label=element_value.get('label', 'Unknown'), properties=properties)
-            
-            # Reconstruct edges from the path sequence
-            if i > 0 and (i % 2) != 0: # An edge appears at every odd index > 0
-                source_vertex = path_objects[i-1].get('@value', {})
-                target_vertex = path_objects[i+1].get('@value', {})
-                edge_id = f"{source_vertex.get('id')}-{element_value.get('label')}-{target_vertex.get('id')}"
-
-                if edge_id not in edges:
-                    edges[edge_id] = KGEdge(
-                        source=source_vertex.get('id'),
-                        target=target_vertex.get('id'),
-                        label=element_value.get('label', 'related')
-                    )
-
-    return KnowledgeGraphResult(nodes=list(nodes.values()), edges=list(edges.values())) 
\ No newline at end of file
+    return neighborhood_to_graph(neighborhood)
+
+def _element_to_node(element: Dict[str, Any]) -> KGNode:
+    """Converts a vertex element map ({'id', 'label', **properties}) into a KGNode."""
+    properties = {k: v for k, v in element.items() if k not in ('id', 'label')}
+    return KGNode(id=str(element['id']), label=element.get('label', 'Unknown'), properties=properties)
+
+def neighborhood_to_graph(neighborhood: Dict[str, Any]) -> KnowledgeGraphResult:
+    """Converts a KnowledgeGraphQ neighborhood page into a KnowledgeGraphResult."""
+    nodes = [
+        KGNode(id=str(node['id']), label=node['label'], properties=node.get('properties', {}))
+        for node in neighborhood.get('nodes', [])
+    ]
+    edges = [
+        KGEdge(source=str(edge['source']), target=str(edge['target']), label=edge['label'])
+        for edge in neighborhood.get('edges', [])
+    ]
+    return KnowledgeGraphResult(
+        nodes=nodes, edges=edges, truncated=neighborhood.get('truncated', False), next_cursor=neighborhood.get('next_cursor')
+    )
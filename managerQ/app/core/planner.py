@@ -4,22 +4,19 @@ import asyncio
 from typing import Dict, Any, List, Optional
 
 from pydantic import BaseModel, Field
-from sentence_transformers import SentenceTransformer
 
 from shared.q_pulse_client.client import QuantumPulseClient
 from shared.q_pulse_client.models import QPChatRequest, QPChatMessage
 from shared.q_knowledgegraph_client import kgq_client
 from managerQ.app.models import Workflow
 from managerQ.app.config import settings
+from managerQ.app.dependencies import get_vector_store_client
 
 logger = logging.getLogger(__name__)
 
 # This client will be configured with the URL from settings
 q_pulse_client = QuantumPulseClient(base_url=settings.qpulse_url)
 
-# Load the sentence transformer model for finding relevant insights
-embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
-
 
 # A Pydantic model for the output of the analysis phase
 class PlanAnalysis(BaseModel):
@@ -174,31 +171,13 @@ class Planner:
         """Finds relevant 'lessons learned' from the knowledge graph based on prompt similarity."""
         logger.info("Searching for relevant insights in the knowledge graph.")
         try:
-            # 1. Embed the user's prompt
-            prompt_embedding = embedding_model.encode(user_prompt).tolist()
-
-            # 2. Formulate a vector search query for the Gremlin endpoint.
-            # This query finds the top_k Insight vertices closest to the prompt's embedding.
-            # This assumes the JanusGraph instance is configured with an indexing backend
-            # that supports vector search, like Elasticsearch. The query syntax might vary
-            # based on the specific indexing plugin used (e.g., janusgraph-es-geoshape).
-            # The query below is a conceptual representation.
-            query = f"""
-            g.V().hasLabel('Insight')
-                 .has('embedding')
-                 .order()
-                 .by(__.map(values('embedding')).map(l -> l.stream().mapToDouble(d -> d.doubleValue()).toArray()), 
-                     T.closeTo, {json.dumps(prompt_embedding)})
-                 .limit({top_k})
-                 .values('lesson')
-            """
-            
-            # Execute the query against the KnowledgeGraphQ service
-            response = await kgq_client.execute_gremlin_query(query)
-            
-            # Assuming the client returns a list of results under a 'data' key
-            # and handles the raw response parsing.
-            insights = response.get("data", [])
+            # 1. Embed the user's prompt with VectorStoreQ's shared embedding model,
+            # the same one KnowledgeGraphQ indexes insights with
+            prompt_embedding = (await get_vector_store_client().embed([user_prompt]))[0]
+
+            # 2. Nearest insights from KnowledgeGraphQ's insight index
+            matches = await kgq_client.similar_insights(vector=prompt_embedding, k=top_k)
+            insights = [match["lesson"] for match in matches]
 
             if insights:
                 logger.info(f"Found {len(insights)} relevant insights from the knowledge graph.")
@@ -13,6 +13,7 @@ import asyncio
 import pulsar
 from managerQ.app.config import settings
 from shared.pulsar_tracing import inject_trace_context, extract_trace_context
+from shared.q_service_client import run_and_close
 from opentelemetry import trace
 from shared.observability.metrics import WORKFLOW_COMPLETED_COUNTER, WORKFLOW_DURATION_HISTOGRAM, TASK_COMPLETED_COUNTER
 from managerQ.app.dependencies import get_kg_client # Import the dependency provider
@@ -265,31 +266,17 @@ class WorkflowExecutor:
             # This is not ideal, but a workaround for the client management issue
             kg_client = get_kg_client()
             
-            report_content = final_task.result.replace("'", "\\'") # Simple escaping for Gremlin
-            
-            # Gremlin query to create the report and link it
-            query = f"""
-            def report = g.addV('Report')
-                           .property('source', 'AIOpsWorkflow')
-                           .property('content', '{report_content}')
-                           .property('createdAt', '{datetime.utcnow().isoformat()}')
-                           .next()
-            
-            def service = g.V().has('Service', 'name', '{service_name}').tryNext().orElse(null)
-            if (service != null) {{
-                g.V(report).addE('REPORT_FOR').to(service).iterate()
-            }}
-            
-            def event = g.V().has('Event', 'eventId', '{workflow.event_id}').tryNext().orElse(null)
-            if (event != null) {{
-                g.V(report).addE('GENERATED_FROM').to(event).iterate()
-            }}
-            
-            return report
-            """
+            # The report is passed as template parameters, so it needs no escaping
+            params = {
+                "source": "AIOpsWorkflow",
+                "content": final_task.result,
+                "created_at": datetime.utcnow().isoformat(),
+                "service_name": service_name,
+                "event_id": workflow.event_id or "",
+            }
             
             # We need to run this async function in our sync thread
-            asyncio.run(kg_client.execute_gremlin_query(query))
+            run_and_close(kg_client.execute_template("record_report", params))
             logger.info("Successfully ingested AIOps report into Knowledge Graph.")
         
         except Exception as e:
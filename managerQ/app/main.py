@@ -23,6 +23,8 @@ from shared.vault_client import VaultClient
 from shared.q_vectorstore_client.client import VectorStoreClient
 from shared.q_knowledgegraph_client.client import KnowledgeGraphClient
 from shared.q_pulse_client.client import QuantumPulseClient
+from shared.q_service_client import DeadlineMiddleware, close_pooled_clients
+from shared.q_auth_parser.parser import start_revocation_feed, stop_revocation_feed
 from managerQ.app.core.user_workflow_store import user_workflow_store
 
 # --- Logging and Metrics ---
@@ -73,6 +75,7 @@ async def lifespan(app: FastAPI):
     Manages the lifecycle of the application's resources, including background services and API clients.
     """
     logger.info("ManagerQ starting up...")
+    start_revocation_feed()
 
     # Initialize API Clients
     app.state.vector_store_client = VectorStoreClient(base_url=vectorstore_q_config.get('url'))
@@ -114,10 +117,8 @@ async def lifespan(app: FastAPI):
 
     logger.info("ManagerQ shutting down...")
     
-    # Close client connections
-    await app.state.vector_store_client.close()
-    await app.state.kg_client.close()
-    await app.state.pulse_client.close()
+    # Close the pooled connections shared by all service clients
+    await close_pooled_clients()
 
     # Stop background services
     dashboard_ws.manager.shutdown()
@@ -127,6 +128,7 @@ async def lifespan(app: FastAPI):
     workflow_executor.stop()
     proactive_goal_monitor.stop()
     autoscaler.stop()
+    stop_revocation_feed()
 
 
 # --- FastAPI App ---
@@ -140,6 +142,9 @@ app = FastAPI(
 # Setup Prometheus metrics
 setup_metrics(app, app_name=config.get('service_name', 'managerq'))
 
+# Calls made while handling a request share the caller's remaining deadline
+app.add_middleware(DeadlineMiddleware)
+
 # --- Dependency Providers ---
 def get_vector_store_client(request: Request) -> VectorStoreClient:
     return request.app.state.vector_store_client
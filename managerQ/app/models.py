@@ -33,6 +33,8 @@ class KnowledgeGraphResult(BaseModel):
     """Represents a subgraph from the knowledge graph relevant to the query."""
     nodes: List[KGNode]
     edges: List[KGEdge]
+    truncated: bool = Field(False, description="Whether more of the subgraph can be fetched with `next_cursor`.")
+    next_cursor: Optional[str] = Field(None, description="Cursor to continue a truncated neighborhood.")
 
 class SearchResponse(BaseModel):
     """The final, aggregated response for a search query."""
@@ -1,6 +1,6 @@
 import unittest
 import asyncio
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 import subprocess
 import os
 
@@ -15,8 +15,9 @@ class TestFeedbackLoop(unittest.IsolatedAsyncioTestCase):
         if not os.path.exists(self.ingest_script_path):
             raise FileNotFoundError(f"Ingestion script not found at {self.ingest_script_path}")
 
+    @patch('managerQ.app.core.planner.get_vector_store_client')
     @patch('managerQ.app.core.planner.kgq_client')
-    async def test_insight_retrieval_e2e(self, mock_kgq_client):
+    async def test_insight_retrieval_e2e(self, mock_kgq_client, mock_get_vector_store_client):
         """
         Tests that an ingested insight is retrieved by the planner for a similar prompt.
         """
@@ -27,15 +28,16 @@ class TestFeedbackLoop(unittest.IsolatedAsyncioTestCase):
         final_status = "FAILED"
         
         similar_prompt = "My web application deployment isn't working."
+        mock_get_vector_store_client.return_value.embed = AsyncMock(return_value=[[0.1, 0.2, 0.3]])
 
         # 2. Mock the external 'ingest_insight.py' script execution
         # We are not testing the script itself, but that the planner *would* find its result.
         # So we will mock the return value from the knowledge graph client.
         
-        # Simulate that the KG contains our lesson
-        mock_kgq_client.execute_gremlin_query.return_value = {
-            "data": [lesson]
-        }
+        # Simulate that the KG's insight index finds our lesson
+        mock_kgq_client.similar_insights = AsyncMock(return_value=[
+            {"id": 1, "lesson": lesson, "workflow_id": workflow_id, "services": ["WebAppQ"], "score": 0.83}
+        ])
 
         # 3. Instantiate the planner and call create_plan
         planner = Planner()
@@ -24,24 +24,10 @@ MOCK_VECTOR_SEARCH_RESULT = VectorSearchResponse(
     ]
 )
 
-MOCK_KG_RESULT = {
-    "result": {
-        "data": [
-            {
-                "@type": "g:Vertex",
-                "@value": {
-                    "id": "node1",
-                    "label": "Service",
-                    "properties": {
-                        "name": [
-                            {"@type": "g:Property", "@value": {"key": "name", "value": "managerQ"}}
-                        ]
-                    }
-                }
-            }
-        ]
-    }
-}
+# Element maps, as returned by the search_by_name query template
+MOCK_KG_RESULT = [
+    {"id": "node1", "label": "Service", "name": "managerQ"}
+]
 
 MOCK_PULSE_RESPONSE = QPChatResponse(
     choices=[QPChatChoice(message=QPChatMessage(role="assistant", content="This is an AI summary."))]
@@ -55,7 +41,7 @@ def mock_vector_store():
 @pytest.fixture
 def mock_kg_client():
     mock = AsyncMock()
-    mock.execute_gremlin_query.return_value = MOCK_KG_RESULT
+    mock.search_by_name.return_value = MOCK_KG_RESULT
     return mock
 
 @pytest.fixture
@@ -93,10 +79,11 @@ def test_cognitive_search_success():
     assert len(data["knowledge_graph_result"]["nodes"]) == 1
     assert data["knowledge_graph_result"]["nodes"][0]["id"] == "node1"
     assert data["knowledge_graph_result"]["nodes"][0]["label"] == "Service"
+    assert data["knowledge_graph_result"]["nodes"][0]["properties"] == {"name": "managerQ"}
 
 def test_cognitive_search_kg_fails(mock_kg_client):
     """Test when the knowledge graph service fails."""
-    mock_kg_client.execute_gremlin_query.side_effect = Exception("KG connection failed")
+    mock_kg_client.search_by_name.side_effect = Exception("KG connection failed")
 
     response = client.post("/v1/search/", json={"query": "test query"})
 
@@ -107,4 +94,27 @@ def test_cognitive_search_kg_fails(mock_kg_client):
     assert data["ai_summary"] is not None
     assert len(data["vector_results"]) == 1
     # KG result should be None
-    assert data["knowledge_graph_result"] is None 
\ No newline at end of file
+    assert data["knowledge_graph_result"] is None
+
+
+def test_kg_neighbors_returns_a_bounded_page(mock_kg_client):
+    """Test that neighbors come from the bounded neighborhood endpoint, with its cursor."""
+    mock_kg_client.neighborhood.return_value = {
+        "nodes": [
+            {"id": 1, "label": "Service", "properties": {"name": "managerQ"}, "hop": 0},
+            {"id": 2, "label": "Service", "properties": {"name": "authQ"}, "hop": 1},
+        ],
+        "edges": [{"id": "e1", "label": "DEPENDS_ON", "source": 1, "target": 2, "properties": {}}],
+        "capped_nodes": [1],
+        "truncated": True,
+        "next_cursor": "abc",
+    }
+
+    response = client.post("/v1/search/kg-neighbors", json={"node_id": "1", "hops": 2, "max_nodes": 2})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [n["id"] for n in data["nodes"]] == ["1", "2"]
+    assert data["edges"] == [{"source": "1", "target": "2", "label": "DEPENDS_ON"}]
+    assert data["truncated"] and data["next_cursor"] == "abc"
+    assert mock_kg_client.neighborhood.call_args.kwargs["max_nodes"] == 2
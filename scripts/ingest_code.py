@@ -3,9 +3,8 @@ import httpx
 import asyncio
 import logging
 import structlog
-from langchain.document_loaders import DirectoryLoader, TextLoader
+from langchain.document_loaders import TextLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from sentence_transformers import SentenceTransformer
 import uuid
 
 from shared.q_vectorstore_client.client import VectorStoreClient
@@ -19,9 +18,12 @@ logger = structlog.get_logger(__name__)
 VECTORSTORE_URL = "http://localhost:8001"
 # Scan the entire project root
 CODE_DIR = "." 
-EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 COLLECTION_NAME = "code_documentation"
-VECTOR_DIMENSION = 384 # Based on all-MiniLM-L6-v2
+VECTOR_DIMENSION = 384 # Matches VectorStoreQ's embedding model (all-MiniLM-L6-v2)
+# Directories that don't contain meaningful source code
+EXCLUDED_DIRS = {"venv", "__pycache__", ".git", "node_modules"}
+# Set to resume an interrupted import (the job ID is logged when it fails)
+BULK_JOB_ID = os.environ.get("BULK_JOB_ID")
 
 # --- Schema Definition for the new collection ---
 CODE_COLLECTION_SCHEMA = {
@@ -67,76 +69,56 @@ async def create_code_collection_if_not_exists():
         logger.error("Could not connect to VectorStoreQ", service_url=VECTORSTORE_URL, error=str(e))
         raise
 
-def load_and_chunk_code():
-    """Loads Python files from the project and splits them into chunks."""
+def iter_code_files():
+    """Yields the project's Python files in a stable order, skipping excluded directories."""
+    for root, dirs, files in os.walk(CODE_DIR):
+        dirs[:] = sorted(d for d in dirs if d not in EXCLUDED_DIRS)
+        for name in sorted(files):
+            if name.endswith(".py"):
+                yield os.path.join(root, name)
+
+def iter_code_chunks():
+    """Loads Python files one at a time and yields their chunks."""
     logger.info("Loading python files from project root", data_dir=CODE_DIR)
-    
-    # Use DirectoryLoader to recursively find all .py files, excluding certain directories
-    loader = DirectoryLoader(
-        CODE_DIR, 
-        glob="**/*.py", 
-        loader_cls=TextLoader,
-        recursive=True,
-        # Exclude directories that don't contain meaningful source code
-        exclude=["**/venv", "**/__pycache__", "**/.git", "**/node_modules"]
-    )
-    documents = loader.load()
 
     # Use a splitter designed for code
     python_splitter = RecursiveCharacterTextSplitter.from_language(
         language="python", chunk_size=1000, chunk_overlap=100
     )
-    chunks = python_splitter.split_documents(documents)
-    logger.info("Finished code processing", doc_count=len(documents), chunk_count=len(chunks))
-    return chunks
-
-def generate_embeddings(chunks, model):
-    """Generates vector embeddings for code chunks."""
-    logger.info("Generating embeddings for all code chunks...")
-    sentences = [chunk.page_content for chunk in chunks]
-    embeddings = model.encode(sentences, show_progress_bar=True)
-    logger.info("Embedding generation complete")
-    return embeddings
-
-async def main():
-    """The main ingestion pipeline for source code."""
-    await create_code_collection_if_not_exists()
-
-    chunks = load_and_chunk_code()
-    if not chunks:
-        logger.warn("No code documents to ingest. Exiting.")
-        return
-
-    logger.info("Loading sentence transformer model", model_name=EMBEDDING_MODEL)
-    embedding_model = SentenceTransformer(EMBEDDING_MODEL)
-    vs_client = VectorStoreClient(base_url=VECTORSTORE_URL)
-
-    embeddings = generate_embeddings(chunks, embedding_model)
-
-    vectors_to_upsert = []
-    for i, chunk in enumerate(chunks):
-        vector = Vector(
+    doc_count = 0
+    for path in iter_code_files():
+        documents = TextLoader(path).load()
+        doc_count += len(documents)
+        yield from python_splitter.split_documents(documents)
+    logger.info("Finished code processing", doc_count=doc_count)
+
+def iter_vectors(chunks):
+    """Turns chunks into vectors; VectorStoreQ embeds their text with its shared model."""
+    for chunk in chunks:
+        yield Vector(
             id=str(uuid.uuid4()),
-            values=embeddings[i].tolist(),
+            text=chunk.page_content,
             metadata={
                 "file_path": chunk.metadata.get('source', 'unknown'),
                 "code_chunk": chunk.page_content
             }
         )
-        vectors_to_upsert.append(vector)
 
-    logger.info("Upserting code vectors to VectorStoreQ", vector_count=len(vectors_to_upsert))
-    try:
-        # Upsert in batches to avoid overwhelming the service
-        batch_size = 100
-        for i in range(0, len(vectors_to_upsert), batch_size):
-            batch = vectors_to_upsert[i:i + batch_size]
-            await vs_client.upsert(collection_name=COLLECTION_NAME, vectors=batch)
-            logger.info(f"Upserted batch {i//batch_size + 1}")
+async def main():
+    """The main ingestion pipeline for source code."""
+    await create_code_collection_if_not_exists()
 
-        logger.info("Code ingestion process completed successfully")
+    # Stream chunks through a bulk import, so only a few chunks are in memory at once
+    vs_client = VectorStoreClient(base_url=VECTORSTORE_URL)
+    try:
+        job = await vs_client.bulk_import(
+            collection_name=COLLECTION_NAME,
+            vectors=iter_vectors(iter_code_chunks()),
+            job_id=BULK_JOB_ID
+        )
+        logger.info("Code ingestion process completed successfully", job_id=job.job_id, vector_count=job.records_written)
     except Exception as e:
-        logger.error("Failed to upsert data", error=str(e), exc_info=True)
+        logger.error("Failed to import data", error=str(e), exc_info=True)
     finally:
         await vs_client.close()
 
@@ -1,5 +1,5 @@
 from fastapi import FastAPI, Request
-from prometheus_client import Counter, Histogram, start_http_server, REGISTRY
+from prometheus_client import Counter, Gauge, Histogram, start_http_server, REGISTRY
 from prometheus_client.exposition import generate_latest
 import time
 import os
@@ -43,6 +43,276 @@ TASK_COMPLETED_COUNTER = Counter(
     ["status"] # e.g., 'COMPLETED', 'FAILED', 'CANCELLED'
 )
 
+# --- Messaging Metrics ---
+PULSAR_PUBLISH_IN_FLIGHT = Gauge(
+    "pulsar_publish_in_flight",
+    "Number of published Pulsar messages awaiting a broker acknowledgement"
+)
+
+PULSAR_PUBLISH_LATENCY = Histogram(
+    "pulsar_publish_latency_seconds",
+    "Time from send to broker acknowledgement for Pulsar publishes",
+    ["topic"]
+)
+
+PULSAR_PUBLISH_TOTAL = Counter(
+    "pulsar_publish_total",
+    "Total number of Pulsar publish attempts",
+    ["topic", "result"] # e.g., 'ok', 'error', 'timeout', 'rejected'
+)
+
+# --- Inference Metrics ---
+PREFIX_CACHE_LOOKUPS = Counter(
+    "prefix_cache_lookups_total",
+    "Total number of KV prefix cache lookups",
+    ["model", "result"] # e.g., 'hit', 'miss'
+)
+
+PREFIX_CACHE_SAVED_TOKENS = Counter(
+    "prefix_cache_saved_tokens_total",
+    "Total number of prompt tokens served from the KV prefix cache instead of being recomputed",
+    ["model"]
+)
+
+PREFIX_CACHE_BYTES = Gauge(
+    "prefix_cache_bytes",
+    "Memory currently held by the KV prefix cache",
+    ["model"]
+)
+
+# --- Vector Store Metrics ---
+VECTORSTORE_INGEST_BUFFERED = Gauge(
+    "vectorstore_ingest_buffered_vectors",
+    "Number of upserted vectors waiting in the write-behind buffer",
+    ["collection"]
+)
+
+VECTORSTORE_INGEST_FLUSHES = Counter(
+    "vectorstore_ingest_flushes_total",
+    "Total number of write-behind buffer flushes",
+    ["collection", "reason", "result"] # reason e.g. 'size', 'age', 'read_your_writes', 'shutdown'
+)
+
+VECTORSTORE_INGEST_BATCH_SIZE = Histogram(
+    "vectorstore_ingest_batch_size",
+    "Number of vectors written to Milvus per flush",
+    ["collection"],
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+)
+
+VECTORSTORE_INGEST_DEDUPLICATED = Counter(
+    "vectorstore_ingest_deduplicated_total",
+    "Total number of buffered vectors overwritten by a later write to the same primary key",
+    ["collection"]
+)
+
+VECTORSTORE_EMBED_CACHE_LOOKUPS = Counter(
+    "vectorstore_embed_cache_lookups_total",
+    "Total number of text embedding cache lookups",
+    ["result"] # 'hit' or 'miss'
+)
+
+VECTORSTORE_EMBED_LATENCY = Histogram(
+    "vectorstore_embed_batch_latency_seconds",
+    "Latency of encoding one batch of texts with the embedding model",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+VECTORSTORE_REQUEST_LATENCY = Histogram(
+    "vectorstore_milvus_request_latency_seconds",
+    "Latency of Milvus handler calls, excluding time spent queued",
+    ["collection", "operation"], # operation e.g. 'search', 'upsert'
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+VECTORSTORE_REQUEST_QUEUE_WAIT = Histogram(
+    "vectorstore_milvus_request_queue_wait_seconds",
+    "Time Milvus handler calls waited for a slot under the per-collection concurrency limit",
+    ["collection", "operation"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+)
+
+VECTORSTORE_REQUESTS_REJECTED = Counter(
+    "vectorstore_requests_rejected_total",
+    "Total number of requests rejected by admission control",
+    ["operation"]
+)
+
+VECTORSTORE_COALESCED_QUERIES = Histogram(
+    "vectorstore_coalesced_queries",
+    "Number of single-query searches merged into one Milvus call",
+    ["collection"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+
+VECTORSTORE_SEARCH_CACHE_LOOKUPS = Counter(
+    "vectorstore_search_cache_lookups_total",
+    "Total number of search result cache lookups",
+    ["collection", "result"] # 'hit', 'near_hit' (similar query vector) or 'miss'
+)
+
+VECTORSTORE_SEARCH_CACHE_BYTES = Gauge(
+    "vectorstore_search_cache_bytes",
+    "Estimated memory used by the search result cache"
+)
+
+VECTORSTORE_SEARCH_CACHE_EVICTIONS = Counter(
+    "vectorstore_search_cache_evictions_total",
+    "Total number of search results evicted from the cache to stay within its memory bound"
+)
+
+VECTORSTORE_BULK_IMPORT_RECORDS = Counter(
+    "vectorstore_bulk_import_records_total",
+    "Total number of records written by bulk import jobs",
+    ["collection"]
+)
+
+# --- Service Client Metrics ---
+SERVICE_CLIENT_REQUESTS = Counter(
+    "service_client_requests_total",
+    "Total number of calls made through the shared service client, by outcome",
+    ["service", "endpoint", "outcome"] # e.g. 'ok', 'client_error', 'server_error', 'timeout', 'connection_error', 'circuit_open', 'bulkhead_full', 'deadline_exceeded'
+)
+
+SERVICE_CLIENT_LATENCY = Histogram(
+    "service_client_request_latency_seconds",
+    "Latency of calls made through the shared service client, per attempt",
+    ["service", "endpoint"]
+)
+
+SERVICE_CLIENT_RETRIES = Counter(
+    "service_client_retries_total",
+    "Total number of retried calls made through the shared service client",
+    ["service", "endpoint"]
+)
+
+SERVICE_CLIENT_CIRCUIT_STATE = Gauge(
+    "service_client_circuit_state",
+    "Circuit breaker state per endpoint: 0 closed, 1 half-open, 2 open",
+    ["service", "endpoint"]
+)
+
+SERVICE_CLIENT_IN_FLIGHT = Gauge(
+    "service_client_in_flight",
+    "Number of calls currently holding a bulkhead slot",
+    ["service", "endpoint"]
+)
+
+# --- Auth Metrics ---
+AUTH_TOKEN_VERIFICATIONS = Counter(
+    "auth_token_verifications_total",
+    "Total number of bearer token verifications",
+    ["method", "result"] # method 'jwt', 'cache' or 'introspection'; result 'valid', 'invalid' or 'revoked'
+)
+
+AUTH_INTROSPECTION_CACHE_LOOKUPS = Counter(
+    "auth_introspection_cache_lookups_total",
+    "Total number of token introspection cache lookups",
+    ["result"] # 'hit' or 'miss'
+)
+
+AUTH_INTROSPECTION_CACHE_SIZE = Gauge(
+    "auth_introspection_cache_entries",
+    "Number of token introspection results currently cached"
+)
+
+AUTH_JWKS_REFRESHES = Counter(
+    "auth_jwks_refreshes_total",
+    "Total number of JWKS fetches",
+    ["result"] # 'ok' or 'error'
+)
+
+# --- Knowledge Graph Metrics ---
+KNOWLEDGEGRAPH_UPSERT_OPERATIONS = Counter(
+    "knowledgegraph_upsert_operations_total",
+    "Total number of vertex and edge upserts applied in batches, by outcome",
+    ["operation", "status"] # status 'created', 'updated', 'exists', 'missing_vertex' or 'failed'
+)
+
+KNOWLEDGEGRAPH_UPSERT_ROUND_TRIP_LATENCY = Histogram(
+    "knowledgegraph_upsert_round_trip_latency_seconds",
+    "Latency of one batched upsert script (one chunk of operations)",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+KNOWLEDGEGRAPH_GREMLIN_POOL_WAIT = Histogram(
+    "knowledgegraph_gremlin_pool_wait_seconds",
+    "Time Gremlin queries waited for a pooled connection",
+    ["kind"], # 'read' or 'write'
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+)
+
+KNOWLEDGEGRAPH_GREMLIN_POOL_IN_USE = Gauge(
+    "knowledgegraph_gremlin_pool_in_use",
+    "Number of pooled Gremlin connections currently running a query"
+)
+
+KNOWLEDGEGRAPH_GREMLIN_QUERIES = Counter(
+    "knowledgegraph_gremlin_queries_total",
+    "Total number of Gremlin queries submitted through the connection pool, by outcome",
+    ["kind", "outcome"] # outcome 'ok', 'error', 'timeout', 'cancelled' or 'rejected'
+)
+
+KNOWLEDGEGRAPH_GREMLIN_QUERY_LATENCY = Histogram(
+    "knowledgegraph_gremlin_query_latency_seconds",
+    "Latency of Gremlin queries on a pooled connection, excluding time spent waiting for it",
+    ["kind"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+KNOWLEDGEGRAPH_TEMPLATE_QUERIES = Counter(
+    "knowledgegraph_template_queries_total",
+    "Total number of named query template executions, by outcome",
+    ["template", "outcome"] # 'ok' or 'error'
+)
+
+KNOWLEDGEGRAPH_TEMPLATE_LATENCY = Histogram(
+    "knowledgegraph_template_latency_seconds",
+    "End-to-end latency of named query template executions, including the wait for a connection",
+    ["template"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+KNOWLEDGEGRAPH_NEIGHBORHOOD_NODES = Histogram(
+    "knowledgegraph_neighborhood_nodes",
+    "Number of vertices returned per page of a neighborhood exploration",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+)
+
+KNOWLEDGEGRAPH_NEIGHBORHOOD_TRUNCATED = Counter(
+    "knowledgegraph_neighborhood_truncated_total",
+    "Total number of neighborhood pages cut short by a limit",
+    ["reason"] # 'fan_out' (a vertex had more edges than its cap) or 'max_nodes'
+)
+
+KNOWLEDGEGRAPH_INSIGHT_INDEX_SIZE = Gauge(
+    "knowledgegraph_insight_index_size",
+    "Number of insight embeddings in the insight similarity index"
+)
+
+KNOWLEDGEGRAPH_INSIGHT_SEARCH_LATENCY = Histogram(
+    "knowledgegraph_insight_search_latency_seconds",
+    "Latency of nearest-neighbor lookups in the insight similarity index, excluding the graph join",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05)
+)
+
+KNOWLEDGEGRAPH_QUERY_CACHE_LOOKUPS = Counter(
+    "knowledgegraph_query_cache_lookups_total",
+    "Total number of query result cache lookups",
+    ["kind", "result"] # kind: template name or 'neighborhood'; result: 'hit', 'stale' (served while refreshing), 'coalesced' (joined a load in progress) or 'miss'
+)
+
+KNOWLEDGEGRAPH_QUERY_CACHE_BYTES = Gauge(
+    "knowledgegraph_query_cache_bytes",
+    "Estimated memory used by the query result cache"
+)
+
+KNOWLEDGEGRAPH_QUERY_CACHE_EVICTIONS = Counter(
+    "knowledgegraph_query_cache_evictions_total",
+    "Total number of query results removed from the cache",
+    ["reason"] # 'invalidated' (a write touched one of its labels), 'expired' or 'memory'
+)
+
 def setup_metrics(app: FastAPI, app_name: str):
     """
     Sets up Prometheus metrics for the FastAPI application.
@@ -37,6 +37,25 @@ class UserClaims(BaseModel):
         """Checks if the user has a specific role."""
         return role in self.realm_access.roles
 
+    @property
+    def user_id(self) -> str:
+        return self.sub
+
+    @property
+    def username(self) -> Optional[str]:
+        return self.preferred_username
+
+    @property
+    def roles(self) -> List[str]:
+        return self.realm_access.roles
+
+    @classmethod
+    def from_token_payload(cls, payload: Dict) -> "UserClaims":
+        """Builds claims from a verified token or introspection payload."""
+        aud = payload.get("aud", [])
+        # A token for a single audience may carry it as a string
+        return cls(**{**payload, "aud": [aud] if isinstance(aud, str) else aud})
+
     class Config:
         # Allows the model to be populated even if some fields are missing from the input
         extra = "ignore" 
\ No newline at end of file
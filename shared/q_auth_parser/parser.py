@@ -5,28 +5,105 @@ import base64
 import logging
 import os
 import httpx
-from typing import Optional
+from typing import Any, Dict, Optional
 import yaml
 from jose import JWTError, jwt
 from keycloak import KeycloakOpenID
 
+from shared.q_service_client import ServiceClient, get_http_client
 from .models import UserClaims
+from .verifier import (
+    AuthServiceUnavailableError, IntrospectionCache, JWKSCache, RevocationFeed,
+    RevocationList, TokenVerificationError, TokenVerifier
+)
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 # --- AuthQ Client Configuration ---
 AUTHQ_API_URL = os.getenv("AUTHQ_API_URL", "http://authq:8000")
-authq_client = httpx.AsyncClient(base_url=AUTHQ_API_URL)
+authq_service = ServiceClient(AUTHQ_API_URL, service_name="authq", timeout=5.0)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{AUTHQ_API_URL}/api/v1/auth/token")
 
+# --- Token Verification Configuration ---
+# Setting AUTH_JWKS_URL (e.g. Keycloak's .../protocol/openid-connect/certs) enables local JWT verification
+AUTH_JWKS_URL = os.getenv("AUTH_JWKS_URL")
+AUTH_JWT_ISSUER = os.getenv("AUTH_JWT_ISSUER")
+AUTH_JWT_AUDIENCE = os.getenv("AUTH_JWT_AUDIENCE")
+AUTH_JWT_ALGORITHMS = os.getenv("AUTH_JWT_ALGORITHMS", "RS256").split(",")
+AUTH_JWKS_REFRESH_SECONDS = float(os.getenv("AUTH_JWKS_REFRESH_SECONDS", "300"))
+AUTH_INTROSPECTION_CACHE_SIZE = int(os.getenv("AUTH_INTROSPECTION_CACHE_SIZE", "10000"))
+# How long a cached introspection result is trusted, i.e. how long a token revoked in AuthQ may keep working
+AUTH_INTROSPECTION_MAX_AGE_SECONDS = float(os.getenv("AUTH_INTROSPECTION_MAX_AGE_SECONDS", "30"))
+# JWTs issued longer ago than this are introspected instead of being trusted locally
+AUTH_MAX_TOKEN_AGE_SECONDS = float(os.environ["AUTH_MAX_TOKEN_AGE_SECONDS"]) if os.getenv("AUTH_MAX_TOKEN_AGE_SECONDS") else None
+# Optional Pulsar topic of token revocation events
+AUTH_REVOCATION_TOPIC = os.getenv("AUTH_REVOCATION_TOPIC")
+PULSAR_SERVICE_URL = os.getenv("PULSAR_SERVICE_URL", "pulsar://pulsar:6650")
+
+
+async def introspect_token(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Asks AuthQ for a token's claims. Returns None if AuthQ rejects the token
+    and raises AuthServiceUnavailableError if AuthQ can't be reached.
+    """
+    try:
+        # Introspection has no side effects, so it is retried like a GET
+        response = await authq_service.request(
+            "POST",
+            "/api/v1/auth/introspect",
+            headers={"Authorization": f"Bearer {token}"},
+            idempotent=True
+        )
+    except httpx.RequestError as e:
+        logger.error(f"Failed to connect to AuthQ service for token introspection: {e}", exc_info=True)
+        raise AuthServiceUnavailableError("Authentication service is unavailable.")
+    if response.status_code >= 500:
+        raise AuthServiceUnavailableError(f"Authentication service returned {response.status_code}.")
+    if response.status_code != 200:
+        logger.warning(f"Token introspection failed with status {response.status_code}: {response.text}")
+        return None
+    return response.json()
+
+async def _fetch_jwks() -> Dict[str, Any]:
+    response = await get_http_client(AUTH_JWKS_URL).get(AUTH_JWKS_URL, timeout=5.0)
+    response.raise_for_status()
+    return response.json()
+
+if AUTH_JWKS_URL and not (AUTH_JWT_ISSUER and AUTH_JWT_AUDIENCE):
+    # A JWT for another audience or from another issuer must not be accepted
+    logger.warning("AUTH_JWKS_URL is set without AUTH_JWT_ISSUER and AUTH_JWT_AUDIENCE; local JWT verification is disabled and every token is introspected.")
+    AUTH_JWKS_URL = None
+
+revocations = RevocationList()
+token_verifier = TokenVerifier(
+    introspect=introspect_token,
+    jwks=JWKSCache(_fetch_jwks, refresh_interval=AUTH_JWKS_REFRESH_SECONDS) if AUTH_JWKS_URL else None,
+    issuer=AUTH_JWT_ISSUER,
+    audience=AUTH_JWT_AUDIENCE,
+    algorithms=AUTH_JWT_ALGORITHMS,
+    cache=IntrospectionCache(max_entries=AUTH_INTROSPECTION_CACHE_SIZE, max_age=AUTH_INTROSPECTION_MAX_AGE_SECONDS),
+    revocations=revocations,
+    max_token_age=AUTH_MAX_TOKEN_AGE_SECONDS
+)
+revocation_feed = RevocationFeed(revocations, PULSAR_SERVICE_URL, AUTH_REVOCATION_TOPIC) if AUTH_REVOCATION_TOPIC else None
+
+def start_revocation_feed():
+    """Starts applying revocation events, if AUTH_REVOCATION_TOPIC is set. Call once on application startup."""
+    if revocation_feed is not None:
+        revocation_feed.start()
+
+def stop_revocation_feed():
+    if revocation_feed is not None:
+        revocation_feed.stop()
+
 
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserClaims:
     """
-    FastAPI dependency that validates a token by calling the AuthQ service's
-    introspect endpoint.
-    Returns the user claims upon successful validation.
+    FastAPI dependency that validates a bearer token and returns the user's claims.
+    JWTs are verified locally against AuthQ's signing keys when AUTH_JWKS_URL is
+    set; other tokens are introspected by AuthQ, with results briefly cached.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -34,33 +111,18 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserClaims:
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        response = await authq_client.post(
-            "/api/v1/auth/introspect",
-            headers={"Authorization": f"Bearer {token}"}
-        )
-        
-        if response.status_code != 200:
-            logger.warning(f"Token introspection failed with status {response.status_code}: {response.text}")
-            raise credentials_exception
-            
-        payload = response.json()
-        
-        # Map Keycloak claims from the introspect response to our UserClaims model
-        user_claims = UserClaims(
-            user_id=payload.get("sub"),
-            username=payload.get("preferred_username"),
-            email=payload.get("email"),
-            roles=payload.get("realm_access", {}).get("roles", []),
-        )
-        return user_claims
-    except httpx.RequestError as e:
-        logger.error(f"Failed to connect to AuthQ service for token introspection: {e}", exc_info=True)
+        payload = await token_verifier.verify(token)
+        return UserClaims.from_token_payload(payload)
+    except TokenVerificationError as e:
+        logger.warning(f"Token rejected: {e}")
+        raise credentials_exception
+    except AuthServiceUnavailableError as e:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Authentication service is unavailable."
         )
     except Exception as e:
-        logger.error(f"User claims validation failed during introspection: {e}", exc_info=True)
+        logger.error(f"User claims validation failed: {e}", exc_info=True)
         raise credentials_exception
 
 
@@ -0,0 +1,364 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from jose import JWTError, jwt
+
+from shared.observability.metrics import (
+    AUTH_TOKEN_VERIFICATIONS,
+    AUTH_INTROSPECTION_CACHE_LOOKUPS,
+    AUTH_INTROSPECTION_CACHE_SIZE,
+    AUTH_JWKS_REFRESHES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TokenVerificationError(Exception):
+    """The token is invalid, expired or revoked."""
+    pass
+
+class AuthServiceUnavailableError(Exception):
+    """The token couldn't be checked because AuthQ or the JWKS endpoint is unreachable."""
+    pass
+
+
+class JWKSCache:
+    """
+    Holds the signing keys from a JWKS endpoint, by key ID. Keys are
+    re-fetched once they are `refresh_interval` seconds old. A token signed
+    with an unknown key ID also triggers a re-fetch (to pick up rotated
+    keys), but at most once per `min_refresh_interval`. If a refresh fails,
+    the last good keys stay in use.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[Dict[str, Any]]],
+        refresh_interval: float = 300.0,
+        min_refresh_interval: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self._fetch = fetch
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self._clock = clock
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._fetched_at: Optional[float] = None
+        self._attempted_at: Optional[float] = None
+
+    async def get_key(self, kid: Optional[str]) -> Optional[Dict[str, Any]]:
+        now = self._clock()
+        if self._fetched_at is None or now - self._fetched_at >= self.refresh_interval:
+            await self.refresh()
+        elif kid not in self._keys and now - self._attempted_at >= self.min_refresh_interval:
+            await self.refresh()
+        if kid is None and len(self._keys) == 1:
+            return next(iter(self._keys.values()))
+        return self._keys.get(kid)
+
+    async def refresh(self):
+        self._attempted_at = self._clock()
+        try:
+            jwks = await self._fetch()
+            keys = {key.get("kid"): key for key in jwks.get("keys", []) if key.get("use", "sig") == "sig"}
+        except Exception as e:
+            AUTH_JWKS_REFRESHES.labels(result="error").inc()
+            if not self._keys:
+                raise AuthServiceUnavailableError(f"Could not fetch signing keys: {e}")
+            logger.warning(f"JWKS refresh failed, keeping {len(self._keys)} cached keys: {e}")
+            return
+        self._keys = keys
+        self._fetched_at = self._attempted_at
+        AUTH_JWKS_REFRESHES.labels(result="ok").inc()
+        logger.info(f"Fetched {len(keys)} signing keys.")
+
+
+class IntrospectionCache:
+    """
+    Remembers introspection results for opaque tokens, keyed by a SHA-256
+    hash of the token so raw tokens are never held in memory. Entries live
+    for `max_age` seconds at most (never past the token's own `exp`), which
+    bounds how long a token revoked in AuthQ keeps working. Least recently
+    used entries are evicted beyond `max_entries`.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_age: float = 30.0, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = self.key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= self._clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                AUTH_INTROSPECTION_CACHE_LOOKUPS.labels(result="miss").inc()
+                AUTH_INTROSPECTION_CACHE_SIZE.set(len(self._entries))
+                return None
+            self._entries.move_to_end(key)
+        AUTH_INTROSPECTION_CACHE_LOOKUPS.labels(result="hit").inc()
+        return entry[0]
+
+    def put(self, token: str, claims: Dict[str, Any]):
+        now = self._clock()
+        expires_at = now + self.max_age
+        if claims.get("exp") is not None:
+            expires_at = min(expires_at, float(claims["exp"]))
+        if expires_at <= now:
+            return
+        key = self.key(token)
+        with self._lock:
+            self._entries[key] = (claims, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            AUTH_INTROSPECTION_CACHE_SIZE.set(len(self._entries))
+
+
+class RevocationList:
+    """
+    Revoked tokens, from a revocation feed. An event revokes one token (`jti`),
+    a session (`sid`), or every token of a user issued before a time (`sub`
+    plus `revoked_at`, default now). Entries are kept for `retention` seconds,
+    which should exceed the longest token lifetime.
+    """
+
+    def __init__(self, retention: float = 24 * 3600.0, clock: Callable[[], float] = time.time):
+        self.retention = retention
+        self._clock = clock
+        self._jtis: Dict[str, float] = {}
+        self._sids: Dict[str, float] = {}
+        self._subjects: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, jti: Optional[str] = None, sid: Optional[str] = None, sub: Optional[str] = None, revoked_at: Optional[float] = None):
+        now = self._clock()
+        with self._lock:
+            if jti:
+                self._jtis[jti] = now
+            if sid:
+                self._sids[sid] = now
+            if sub:
+                self._subjects[sub] = revoked_at if revoked_at is not None else now
+            self._prune(now)
+
+    def handle_event(self, event: Dict[str, Any]):
+        """Applies a revocation event, either bare or wrapped in a platform event's `payload`."""
+        payload = event.get("payload", event)
+        self.revoke(payload.get("jti"), payload.get("sid"), payload.get("sub"), payload.get("revoked_at"))
+        logger.info(f"Applied token revocation: { {k: payload.get(k) for k in ('jti', 'sid', 'sub') if payload.get(k)} }")
+
+    def is_revoked(self, claims: Dict[str, Any]) -> bool:
+        if claims.get("jti") in self._jtis or claims.get("sid") in self._sids:
+            return True
+        revoked_before = self._subjects.get(claims.get("sub"))
+        return revoked_before is not None and float(claims.get("iat", 0)) <= revoked_before
+
+    def _prune(self, now: float):
+        cutoff = now - self.retention
+        for revoked in (self._jtis, self._sids, self._subjects):
+            for key in [k for k, at in revoked.items() if at < cutoff]:
+                del revoked[key]
+
+
+class RevocationFeed:
+    """
+    Reads revocation events from a Pulsar topic into a RevocationList, on a
+    background thread. If Pulsar can't be reached or the connection drops,
+    it reconnects with exponential backoff (from `retry_delay` up to
+    `max_retry_delay` seconds) until stopped.
+    """
+
+    def __init__(self, revocations: RevocationList, service_url: str, topic: str, retry_delay: float = 1.0, max_retry_delay: float = 30.0):
+        self.revocations = revocations
+        self.service_url = service_url
+        self.topic = topic
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._running = False
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        logger.info(f"Listening for token revocations on '{self.topic}'.")
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+            self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        import pulsar
+
+        delay = self.retry_delay
+        while self._running:
+            client = None
+            try:
+                client = pulsar.Client(self.service_url)
+                # Every replica needs every new event, so each reads the topic with
+                # its own non-durable reader; the broker keeps nothing once it's gone
+                reader = client.create_reader(self.topic, pulsar.MessageId.latest)
+                delay = self.retry_delay
+                self._read(reader, pulsar.Timeout)
+            except Exception as e:
+                if not self._running:
+                    break
+                logger.error(f"Revocation feed can't read '{self.topic}', reconnecting in {delay:.0f}s: {e}")
+                self._stopped.wait(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+            finally:
+                if client is not None:
+                    self._close(client)
+
+    @staticmethod
+    def _close(client):
+        try:
+            client.close()
+        except Exception as e:
+            logger.warning(f"Error closing the revocation feed's Pulsar client: {e}")
+
+    def _read(self, reader, timeout_error):
+        try:
+            while self._running:
+                try:
+                    msg = reader.read_next(timeout_millis=1000)
+                except timeout_error:
+                    continue
+                try:
+                    self.revocations.handle_event(json.loads(msg.data().decode("utf-8")))
+                except Exception as e:
+                    logger.error(f"Skipping malformed revocation event: {e}", exc_info=True)
+        finally:
+            reader.close()
+
+
+class TokenVerifier:
+    """
+    Verifies bearer tokens without a round trip to AuthQ where possible.
+
+    JWTs are verified locally against the cached JWKS: signature, expiry,
+    issuer and audience. Local verification therefore needs the expected
+    `issuer` and `audience`; without `jwks`, every token is introspected.
+    Opaque tokens go to `introspect`,
+    with results cached in an IntrospectionCache. JWTs older than
+    `max_token_age` seconds are introspected as well, so long-lived tokens
+    still see revocations made in AuthQ. Every result is checked against the
+    RevocationList.
+
+    `introspect` returns the token's claims, or None if the token is not active.
+    """
+
+    def __init__(
+        self,
+        introspect: Callable[[str], Awaitable[Optional[Dict[str, Any]]]],
+        jwks: Optional[JWKSCache] = None,
+        issuer: Optional[str] = None,
+        audience: Optional[str] = None,
+        algorithms: Iterable[str] = ("RS256",),
+        cache: Optional[IntrospectionCache] = None,
+        revocations: Optional[RevocationList] = None,
+        max_token_age: Optional[float] = None,
+        leeway: float = 30.0,
+        clock: Callable[[], float] = time.time
+    ):
+        if jwks is not None and not (issuer and audience):
+            raise ValueError("Local JWT verification needs the expected issuer and audience.")
+        self._introspect = introspect
+        self.jwks = jwks
+        self.issuer = issuer
+        self.audience = audience
+        self.algorithms = list(algorithms)
+        self.cache = cache if cache is not None else IntrospectionCache()
+        self.revocations = revocations if revocations is not None else RevocationList()
+        self.max_token_age = max_token_age
+        self.leeway = leeway
+        self._clock = clock
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """Returns the token's claims, or raises TokenVerificationError / AuthServiceUnavailableError."""
+        if self.jwks is not None and token.count(".") == 2:
+            claims = await self._verify_jwt(token)
+            if claims is not None:
+                return claims
+        return await self._verify_by_introspection(token)
+
+    async def _verify_jwt(self, token: str) -> Optional[Dict[str, Any]]:
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError:
+            # Not a JWT after all; AuthQ decides
+            return None
+        if header.get("alg") not in self.algorithms:
+            AUTH_TOKEN_VERIFICATIONS.labels(method="jwt", result="invalid").inc()
+            raise TokenVerificationError(f"Token algorithm '{header.get('alg')}' is not allowed.")
+        key = await self.jwks.get_key(header.get("kid"))
+        if key is None:
+            AUTH_TOKEN_VERIFICATIONS.labels(method="jwt", result="invalid").inc()
+            raise TokenVerificationError(f"Token signed with unknown key '{header.get('kid')}'.")
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=self.algorithms,
+                audience=self.audience,
+                issuer=self.issuer,
+                options={"verify_at_hash": False, "leeway": self.leeway}
+            )
+        except JWTError as e:
+            AUTH_TOKEN_VERIFICATIONS.labels(method="jwt", result="invalid").inc()
+            raise TokenVerificationError(f"Invalid token: {e}")
+
+        if self.max_token_age is not None and self._clock() - float(claims.get("iat", 0)) > self.max_token_age:
+            # Old enough that AuthQ may have revoked it since; check there (cached)
+            return None
+        self._check_revoked(claims, "jwt")
+        AUTH_TOKEN_VERIFICATIONS.labels(method="jwt", result="valid").inc()
+        return claims
+
+    async def _verify_by_introspection(self, token: str) -> Dict[str, Any]:
+        claims = self.cache.get(token)
+        if claims is not None:
+            self._check_revoked(claims, "cache")
+            AUTH_TOKEN_VERIFICATIONS.labels(method="cache", result="valid").inc()
+            return claims
+
+        claims = await self._introspect(token)
+        if claims is None or claims.get("active") is False:
+            AUTH_TOKEN_VERIFICATIONS.labels(method="introspection", result="invalid").inc()
+            raise TokenVerificationError("Token is not active.")
+        self._check_revoked(claims, "introspection")
+        self.cache.put(token, claims)
+        AUTH_TOKEN_VERIFICATIONS.labels(method="introspection", result="valid").inc()
+        return claims
+
+    def _check_revoked(self, claims: Dict[str, Any], method: str):
+        if self.revocations.is_revoked(claims):
+            AUTH_TOKEN_VERIFICATIONS.labels(method=method, result="revoked").inc()
+            raise TokenVerificationError("Token has been revoked.")
@@ -4,6 +4,8 @@ import os
 import logging
 from typing import List, Dict, Any
 
+from shared.q_service_client import ServiceClient
+
 logger = logging.getLogger(__name__)
 
 class H2MClient:
@@ -11,16 +13,16 @@ class H2MClient:
     A client for interacting with the H2M service API, specifically the model registry.
     """
 
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, timeout: float = 10.0):
         self.base_url = base_url
-        self._client = httpx.AsyncClient(base_url=self.base_url)
+        self._service = ServiceClient(base_url, service_name="h2m", timeout=timeout)
 
     async def list_models(self) -> List[Dict[str, Any]]:
         """
         Fetches all model entries from the H2M model registry.
         """
         try:
-            response = await self._client.get("/api/v1/registry/")
+            response = await self._service.request("GET", "/api/v1/registry/")
             response.raise_for_status()
             return response.json()
         except httpx.RequestError as e:
@@ -35,7 +37,9 @@ class H2MClient:
         Calls the H2M service to activate a specific model.
         """
         try:
-            response = await self._client.post(f"/api/v1/registry/{model_name}/activate")
+            response = await self._service.request(
+                "POST", f"/api/v1/registry/{model_name}/activate", endpoint="POST /api/v1/registry/{model_name}/activate"
+            )
             response.raise_for_status()
             return response.json()
         except httpx.RequestError as e:
@@ -57,7 +61,8 @@ class H2MClient:
         return active_models
 
     async def close(self):
-        await self._client.aclose()
+        """Kept for compatibility: connections are pooled and shared across clients."""
+        await self._service.close()
 
 # Default instance
 H2M_API_URL = os.getenv("H2M_API_URL", "http://h2m-service:80")
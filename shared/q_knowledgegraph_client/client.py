@@ -1,7 +1,9 @@
 import httpx
 import os
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
+
+from shared.q_service_client import ServiceClient
 
 logger = logging.getLogger(__name__)
 
@@ -10,12 +12,14 @@ class KnowledgeGraphClient:
     A client for interacting with the KnowledgeGraphQ service API.
     """
 
-    def __init__(self, base_url: str, token: Optional[str] = None):
+    def __init__(self, base_url: str, token: Optional[str] = None, timeout: float = 30.0):
         self.base_url = base_url
         # In a real system, the token would be managed more securely
         self._token = token or os.getenv("KG_API_TOKEN", "dummy-token")
-        self._client = httpx.AsyncClient(
-            base_url=self.base_url,
+        self._service = ServiceClient(
+            base_url,
+            service_name="knowledgegraphq",
+            timeout=timeout,
             headers={"Authorization": f"Bearer {self._token}"}
         )
 
@@ -24,7 +28,8 @@ class KnowledgeGraphClient:
         Executes a raw Gremlin query against the KnowledgeGraphQ API.
         """
         try:
-            response = await self._client.post("/api/v1/query", json={"query": query})
+            # Raw queries may write, so they are never retried
+            response = await self._service.request("POST", "/api/v1/query", json={"query": query})
             response.raise_for_status()
             return response.json()
         except httpx.HTTPStatusError as e:
@@ -34,12 +39,129 @@ class KnowledgeGraphClient:
             logger.error(f"An unexpected error occurred while querying KnowledgeGraphQ: {e}", exc_info=True)
             raise
 
+    async def execute_template(
+        self,
+        name: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        idempotent: bool = False
+    ) -> List[Any]:
+        """
+        Executes a named query template on KnowledgeGraphQ and returns its
+        results. Parameters travel as bindings, so nothing needs escaping.
+        Pass `idempotent=True` for read-only templates to allow retries.
+        """
+        payload: Dict[str, Any] = {"params": params or {}}
+        if timeout is not None:
+            payload["timeout"] = timeout
+        try:
+            response = await self._service.request(
+                "POST", f"/api/v1/query/templates/{name}", endpoint="POST /api/v1/query/templates/{name}",
+                idempotent=idempotent, json=payload
+            )
+            response.raise_for_status()
+            return response.json()["result"]
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Error executing query template '{name}': {e.response.text}", exc_info=True)
+            raise
+        except Exception as e:
+            logger.error(f"An unexpected error occurred while querying KnowledgeGraphQ: {e}", exc_info=True)
+            raise
+
+    async def search_by_name(self, text: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Vertices whose name contains `text`, as element maps (`id`, `label` and properties)."""
+        return await self.execute_template("search_by_name", {"text": text, "max_results": limit}, idempotent=True)
+
+    async def neighborhood(
+        self,
+        node_id: Union[str, int],
+        hops: int = 1,
+        direction: str = "both",
+        edge_labels: Optional[List[str]] = None,
+        fan_out: Union[int, List[int]] = 25,
+        max_nodes: int = 200,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        The vertices and edges around a vertex, as `{"nodes", "edges",
+        "capped_nodes", "truncated", "next_cursor"}`. At most `fan_out` edges
+        are followed per vertex and hop, and at most `max_nodes` vertices
+        are returned. Pass `next_cursor` back as `cursor` for the next page.
+        """
+        payload = {
+            "node_id": node_id, "hops": hops, "direction": direction, "edge_labels": edge_labels or [],
+            "fan_out": fan_out, "max_nodes": max_nodes, "cursor": cursor
+        }
+        try:
+            response = await self._service.request("POST", "/api/v1/query/neighborhood", idempotent=True, json=payload)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Error exploring the neighborhood of '{node_id}': {e.response.text}", exc_info=True)
+            raise
+        except Exception as e:
+            logger.error(f"An unexpected error occurred while querying KnowledgeGraphQ: {e}", exc_info=True)
+            raise
+
+    async def insights_for_service(self, service_name: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Reports and RCA reports linked to a service, as element maps."""
+        return await self.execute_template("insights_for_service", {"service_name": service_name, "max_results": limit}, idempotent=True)
+
+    async def similar_insights(
+        self,
+        service: Optional[str] = None,
+        text: Optional[str] = None,
+        vector: Optional[List[float]] = None,
+        k: int = 5
+    ) -> List[Dict[str, Any]]:
+        """
+        The `k` insights (lessons learned) most similar to `text` or `vector`,
+        optionally only those affecting `service`. Each has `id`, `lesson`,
+        `workflow_id`, `services` and `score`.
+        """
+        payload = {"service": service, "text": text, "vector": vector, "k": k}
+        try:
+            response = await self._service.request("POST", "/api/v1/insights/similar", idempotent=True, json=payload)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Error searching insights: {e.response.text}", exc_info=True)
+            raise
+        except Exception as e:
+            logger.error(f"An unexpected error occurred while querying KnowledgeGraphQ: {e}", exc_info=True)
+            raise
+
+    async def record_insight(
+        self,
+        workflow_id: str,
+        lesson: str,
+        original_prompt: str = "",
+        final_status: str = "",
+        services: Optional[List[str]] = None
+    ) -> Any:
+        """Stores a workflow's lesson learned and indexes it for similarity search. Returns the Insight's vertex ID."""
+        payload = {
+            "workflow_id": workflow_id, "lesson": lesson, "original_prompt": original_prompt,
+            "final_status": final_status, "services": services or []
+        }
+        try:
+            # One Insight per workflow, so a retried call updates the same one
+            response = await self._service.request("POST", "/api/v1/insights", idempotent=True, json=payload)
+            response.raise_for_status()
+            return response.json()["id"]
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Error recording insight: {e.response.text}", exc_info=True)
+            raise
+        except Exception as e:
+            logger.error(f"An unexpected error occurred while ingesting to KnowledgeGraphQ: {e}", exc_info=True)
+            raise
+
     async def ingest_operations(self, operations: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Sends a list of ingestion operations to the KnowledgeGraphQ API.
         """
         try:
-            response = await self._client.post("/api/v1/ingest", json={"operations": operations})
+            response = await self._service.request("POST", "/api/v1/ingest", json={"operations": operations})
             response.raise_for_status()
             return response.json()
         except httpx.HTTPStatusError as e:
@@ -50,8 +172,8 @@ class KnowledgeGraphClient:
             raise
 
     async def close(self):
-        """Closes the async client."""
-        await self._client.aclose()
+        """Kept for compatibility: connections are pooled and shared across clients."""
+        await self._service.close()
 
 # A default instance for convenience
 KGQ_API_URL = os.getenv("KGQ_API_URL", "http://knowledgegraphq:8000")
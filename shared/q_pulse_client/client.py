@@ -3,7 +3,8 @@ import logging
 import asyncio
 from typing import AsyncGenerator
 
-from .models import InferenceRequest, QPChatRequest, QPChatResponse
+from shared.q_service_client import ServiceClient
+from .models import InferenceRequest, InferenceResult, QPChatRequest, QPChatResponse
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -23,15 +24,10 @@ class QuantumPulseClient:
             timeout: The timeout for HTTP requests.
         """
         self.base_url = base_url
-        self._client: httpx.AsyncClient | None = None
         self.timeout = timeout
+        # Connections are pooled per base URL and shared by every client instance
+        self._service = ServiceClient(base_url, service_name="quantumpulse", timeout=timeout)
         logger.info(f"QuantumPulseClient initialized for base URL: {base_url}")
-    
-    async def _get_client(self) -> httpx.AsyncClient:
-        """Initializes the async client on first use."""
-        if self._client is None or self._client.is_closed:
-            self._client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout)
-        return self._client
 
     async def submit_inference(self, request: InferenceRequest) -> str:
         """
@@ -45,9 +41,8 @@ class QuantumPulseClient:
         Returns:
             The request_id for tracking.
         """
-        client = await self._get_client()
         try:
-            response = await client.post("/v1/inference", json=request.dict())
+            response = await self._service.request("POST", "/v1/inference", json=request.dict())
             response.raise_for_status()
             response_data = response.json()
             request_id = response_data.get("request_id")
@@ -60,6 +55,36 @@ class QuantumPulseClient:
             logger.error(f"An error occurred while requesting {e.request.url!r}.")
             raise
 
+    async def get_inference_result(self, request_id: str, wait: float = 30.0) -> InferenceResult:
+        """
+        Fetches the result of a submitted inference request, long-polling for up
+        to `wait` seconds. Check `status` on the result: it is 'pending' if the
+        request did not complete in time.
+
+        Args:
+            request_id: The ID returned by submit_inference.
+            wait: Seconds the server should hold the request open (max 60).
+
+        Returns:
+            An InferenceResult object.
+        """
+        try:
+            response = await self._service.request(
+                "GET",
+                f"/v1/results/{request_id}",
+                endpoint="GET /v1/results/{request_id}",
+                params={"wait": wait},
+                timeout=max(self.timeout, wait + 5)
+            )
+            response.raise_for_status()
+            return InferenceResult(**response.json())
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Error fetching inference result: {e.response.status_code} - {e.response.text}")
+            raise
+        except httpx.RequestError as e:
+            logger.error(f"An error occurred while requesting {e.request.url!r}.")
+            raise
+
     async def get_chat_completion(self, request: QPChatRequest) -> QPChatResponse:
         """
         Gets a synchronous chat completion from the QuantumPulse service.
@@ -70,10 +95,9 @@ class QuantumPulseClient:
         Returns:
             A QPChatResponse object containing the completion.
         """
-        client = await self._get_client()
         try:
             # Note the different endpoint path
-            response = await client.post("/v1/chat/completions", json=request.dict())
+            response = await self._service.request("POST", "/v1/chat/completions", json=request.dict())
             response.raise_for_status()
             response_data = response.json()
             return QPChatResponse(**response_data)
@@ -94,9 +118,8 @@ class QuantumPulseClient:
         Yields:
             Server-Sent Events chunks as strings.
         """
-        client = await self._get_client()
         try:
-            async with client.stream("POST", "/v1/chat/completions", json=request.dict()) as response:
+            async with self._service.stream("POST", "/v1/chat/completions", json=request.dict()) as response:
                 response.raise_for_status()
                 async for chunk in response.aiter_bytes():
                     yield chunk.decode('utf-8')
@@ -109,8 +132,7 @@ class QuantumPulseClient:
 
     async def close(self):
         """
-        Closes the underlying HTTP client.
+        Kept for compatibility: connections are pooled and shared, and closed
+        by `shared.q_service_client.close_pooled_clients()` on shutdown.
         """
-        if self._client:
-            await self._client.aclose()
-            logger.info("QuantumPulseClient closed.") 
\ No newline at end of file
+        await self._service.close() 
\ No newline at end of file
@@ -12,7 +12,7 @@ class InferenceRequest(BaseModel):
     stream: bool = False
     conversation_id: Optional[str] = None
     metadata: Dict[str, Any] = Field(default_factory=dict)
-    # The async endpoint needs a reply topic
+    # Optional: without a reply topic, fetch the result with get_inference_result
     reply_to_topic: Optional[str] = None
 
 
@@ -30,6 +30,19 @@ class InferenceResponse(BaseModel):
     conversation_id: Optional[str] = None
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
+class InferenceResult(BaseModel):
+    """
+    The assembled result returned by the QuantumPulse results endpoint.
+    """
+    request_id: str
+    status: str # 'pending' or 'completed'
+    model: Optional[str] = None
+    text: str = ""
+    chunks_received: int = 0
+    conversation_id: Optional[str] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+
 # --- Models for Synchronous Chat Completion Endpoint ---
 
 class QPChatMessage(BaseModel):
@@ -0,0 +1,13 @@
+from .client import ServiceClient, get_http_client, aclose_all, close_pooled_clients, run_and_close, mount_transport, unmount_transport
+from .deadline import deadline, remaining, DeadlineMiddleware, DEADLINE_HEADER
+from .resilience import (
+    RetryPolicy, CircuitBreaker, CircuitState, Bulkhead,
+    ServiceCallRejectedError, CircuitOpenError, BulkheadFullError, DeadlineExceededError
+)
+
+__all__ = [
+    "ServiceClient", "get_http_client", "aclose_all", "close_pooled_clients", "run_and_close", "mount_transport", "unmount_transport",
+    "deadline", "remaining", "DeadlineMiddleware", "DEADLINE_HEADER",
+    "RetryPolicy", "CircuitBreaker", "CircuitState", "Bulkhead",
+    "ServiceCallRejectedError", "CircuitOpenError", "BulkheadFullError", "DeadlineExceededError",
+]
@@ -0,0 +1,339 @@
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Dict, Optional, Tuple, TypeVar
+from urllib.parse import urlsplit
+
+import httpx
+
+from .deadline import DEADLINE_HEADER, remaining
+from .resilience import (
+    Bulkhead, BulkheadFullError, CircuitBreaker, CircuitOpenError, CircuitState,
+    DeadlineExceededError, NO_RETRY, RetryPolicy
+)
+from shared.observability.metrics import (
+    SERVICE_CLIENT_REQUESTS,
+    SERVICE_CLIENT_LATENCY,
+    SERVICE_CLIENT_RETRIES,
+    SERVICE_CLIENT_CIRCUIT_STATE,
+    SERVICE_CLIENT_IN_FLIGHT,
+)
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+DEFAULT_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0)
+
+T = TypeVar("T")
+
+_CIRCUIT_STATE_VALUES = {CircuitState.CLOSED: 0, CircuitState.HALF_OPEN: 1, CircuitState.OPEN: 2}
+
+# --- Process-wide state ---
+# httpx clients belong to the event loop they were first used on, so pools are kept per loop
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = weakref.WeakKeyDictionary()
+_transports: Dict[str, httpx.AsyncBaseTransport] = {}
+_breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+_bulkheads: Dict[Tuple[str, str], Bulkhead] = {}
+_lock = threading.Lock()
+
+
+def _normalize(base_url: str) -> str:
+    return base_url.rstrip("/")
+
+def mount_transport(base_url: str, transport: httpx.AsyncBaseTransport):
+    """
+    Routes every pooled client for `base_url` through `transport`, e.g. an
+    `httpx.ASGITransport` wrapping a local stub app in tests.
+    """
+    base_url = _normalize(base_url)
+    with _lock:
+        _transports[base_url] = transport
+        for pool in _pools.values():
+            pool.pop(base_url, None)
+
+def unmount_transport(base_url: str):
+    base_url = _normalize(base_url)
+    with _lock:
+        _transports.pop(base_url, None)
+        for pool in _pools.values():
+            pool.pop(base_url, None)
+
+def get_http_client(base_url: str, limits: httpx.Limits = DEFAULT_LIMITS) -> httpx.AsyncClient:
+    """Returns the pooled client for `base_url` on the running event loop, creating it on first use."""
+    base_url = _normalize(base_url)
+    loop = asyncio.get_running_loop()
+    with _lock:
+        pool = _pools.setdefault(loop, {})
+        client = pool.get(base_url)
+        if client is None or client.is_closed:
+            client = pool[base_url] = httpx.AsyncClient(
+                base_url=base_url, limits=limits, transport=_transports.get(base_url)
+            )
+            logger.info(f"Created pooled HTTP client for {base_url}.")
+        return client
+
+async def aclose_all():
+    """
+    Closes every pooled client of the running event loop. Call it before the
+    loop ends: on application shutdown, or at the end of the coroutine given
+    to `asyncio.run()` (see `run_and_close()`), since a loop's clients cannot
+    be closed once it has stopped and their connections would leak.
+    """
+    with _lock:
+        pool = _pools.pop(asyncio.get_running_loop(), {})
+    for client in pool.values():
+        await client.aclose()
+
+# The name application lifespans use
+close_pooled_clients = aclose_all
+
+def run_and_close(coro: Awaitable[T]) -> T:
+    """
+    `asyncio.run(coro)` for synchronous callers (scripts, agent tools) that
+    use service clients: the pooled clients the coroutine opened on the new
+    loop are closed before the loop ends.
+    """
+    async def main() -> T:
+        try:
+            return await coro
+        finally:
+            await aclose_all()
+    return asyncio.run(main())
+
+def reset_resilience_state():
+    """Forgets all circuit breakers and bulkheads. For tests."""
+    with _lock:
+        _breakers.clear()
+        _bulkheads.clear()
+
+
+class ServiceClient:
+    """
+    A resilient HTTP client for one downstream service.
+
+    All instances for a base URL share one pooled `httpx.AsyncClient` per
+    event loop, so constructing a ServiceClient (or a client built on it) per
+    call is cheap. Every call gets these protections:
+
+    *   **Deadlines**: the call's timeout is capped by the deadline in context
+        (see `deadline()`). The remaining budget is sent in the
+        `x-q-deadline-ms` header, so the downstream can adopt it.
+    *   **Retries**: idempotent calls are retried with jittered backoff
+        according to `retry`. Those are GET/HEAD/OPTIONS/PUT/DELETE, or any call
+        marked `idempotent=True`.
+    *   **Circuit breaker**: shared process-wide per (service, endpoint).
+    *   **Bulkhead**: also per (service, endpoint). A slow endpoint can hold
+        at most `max_concurrent` calls.
+
+    Rejected calls raise subclasses of `httpx.RequestError`. `endpoint`
+    names the operation for breakers and metrics, and defaults to
+    "METHOD path". Pass a template for paths with IDs in them, so each ID
+    doesn't get its own breaker.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        service_name: Optional[str] = None,
+        timeout: float = 30.0,
+        headers: Optional[Dict[str, str]] = None,
+        retry: RetryPolicy = RetryPolicy(),
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        max_concurrent: int = 32,
+        max_waiting: int = 64
+    ):
+        self.base_url = _normalize(base_url)
+        self.service_name = service_name or urlsplit(self.base_url).hostname or self.base_url
+        self.timeout = timeout
+        self.headers = dict(headers or {})
+        self.retry = retry
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+
+    def circuit_breaker(self, endpoint: str) -> CircuitBreaker:
+        key = (self.service_name, endpoint)
+        with _lock:
+            breaker = _breakers.get(key)
+            if breaker is None:
+                gauge = SERVICE_CLIENT_CIRCUIT_STATE.labels(service=self.service_name, endpoint=endpoint)
+                gauge.set(0)
+                breaker = _breakers[key] = CircuitBreaker(
+                    failure_threshold=self.failure_threshold,
+                    reset_timeout=self.reset_timeout,
+                    on_state_change=lambda state: self._log_state_change(endpoint, state, gauge)
+                )
+            return breaker
+
+    def bulkhead(self, endpoint: str) -> Bulkhead:
+        key = (self.service_name, endpoint)
+        with _lock:
+            bulkhead = _bulkheads.get(key)
+            if bulkhead is None:
+                bulkhead = _bulkheads[key] = Bulkhead(self.max_concurrent, self.max_waiting)
+            return bulkhead
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        endpoint: Optional[str] = None,
+        idempotent: Optional[bool] = None,
+        retry: Optional[RetryPolicy] = None,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Sends a request and returns the response, without raising for its
+        status. When retries run out on a retryable status, the last response
+        is returned.
+        """
+        method = method.upper()
+        endpoint = endpoint or f"{method} {path}"
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        policy = (retry or self.retry) if idempotent else NO_RETRY
+        client = get_http_client(self.base_url)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            request = self._build_request(client, method, path, endpoint, timeout, kwargs)
+            try:
+                response = await self._send(client, request, endpoint)
+            except httpx.TransportError:
+                if attempt >= policy.max_attempts:
+                    raise
+                delay = policy.backoff(attempt)
+                if not self._can_wait(delay):
+                    raise
+            else:
+                if response.status_code not in policy.retry_on_status or attempt >= policy.max_attempts:
+                    return response
+                delay = policy.backoff(attempt, _retry_after(response))
+                if not self._can_wait(delay):
+                    return response
+            SERVICE_CLIENT_RETRIES.labels(service=self.service_name, endpoint=endpoint).inc()
+            logger.warning(f"Retrying {endpoint} on {self.service_name} in {delay:.2f}s (attempt {attempt} of {policy.max_attempts}).")
+            await asyncio.sleep(delay)
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        path: str,
+        *,
+        endpoint: Optional[str] = None,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> AsyncIterator[httpx.Response]:
+        """Sends a request and yields the response with its body unread. Streams are never retried."""
+        method = method.upper()
+        endpoint = endpoint or f"{method} {path}"
+        client = get_http_client(self.base_url)
+        request = self._build_request(client, method, path, endpoint, timeout, kwargs)
+        response = await self._send(client, request, endpoint, stream=True)
+        try:
+            yield response
+        finally:
+            await response.aclose()
+            # Streams hold their bulkhead slot until the body is done
+            self.bulkhead(endpoint).release()
+
+    async def close(self):
+        """
+        Kept for compatibility; does nothing. Connections are pooled per base
+        URL and shared by every client, so they are closed per event loop by
+        `aclose_all()`, or by `run_and_close()` for `asyncio.run()` callers.
+        """
+        pass
+
+    def _build_request(self, client: httpx.AsyncClient, method: str, path: str, endpoint: str, timeout: Optional[float], kwargs) -> httpx.Request:
+        timeout = self.timeout if timeout is None else timeout
+        kwargs = dict(kwargs)
+        headers = {**self.headers, **(kwargs.pop("headers", None) or {})}
+        budget = remaining()
+        if budget is not None:
+            timeout = min(timeout, budget)
+            headers[DEADLINE_HEADER] = str(max(int(budget * 1000), 0))
+        request = client.build_request(method, path, headers=headers, timeout=max(timeout, 0.001), **kwargs)
+        if budget is not None and budget <= 0:
+            self._count(endpoint, "deadline_exceeded")
+            raise DeadlineExceededError(f"Deadline exceeded before calling {endpoint} on {self.service_name}.", request=request)
+        return request
+
+    async def _send(self, client: httpx.AsyncClient, request: httpx.Request, endpoint: str, stream: bool = False) -> httpx.Response:
+        breaker = self.circuit_breaker(endpoint)
+        if not breaker.allow():
+            self._count(endpoint, "circuit_open")
+            raise CircuitOpenError(f"Circuit open for {endpoint} on {self.service_name}.", request=request)
+        bulkhead = self.bulkhead(endpoint)
+        if not await bulkhead.acquire(timeout=request.extensions["timeout"].get("pool")):
+            breaker.release()
+            self._count(endpoint, "bulkhead_full")
+            raise BulkheadFullError(f"Too many concurrent calls to {endpoint} on {self.service_name}.", request=request)
+
+        in_flight = SERVICE_CLIENT_IN_FLIGHT.labels(service=self.service_name, endpoint=endpoint)
+        in_flight.inc()
+        start = time.monotonic()
+        holding_slot = False
+        try:
+            response = await self._send_within_deadline(client, request, stream)
+            holding_slot = stream
+        except httpx.TransportError as e:
+            breaker.record_failure()
+            self._count(endpoint, "timeout" if isinstance(e, httpx.TimeoutException) else "connection_error")
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        finally:
+            if not holding_slot:
+                bulkhead.release()
+            in_flight.dec()
+            SERVICE_CLIENT_LATENCY.labels(service=self.service_name, endpoint=endpoint).observe(time.monotonic() - start)
+
+        if response.status_code >= 500:
+            breaker.record_failure()
+            self._count(endpoint, "server_error")
+        else:
+            # A 4xx still means the endpoint is up
+            breaker.record_success()
+            self._count(endpoint, "ok" if response.status_code < 400 else "client_error")
+        return response
+
+    async def _send_within_deadline(self, client: httpx.AsyncClient, request: httpx.Request, stream: bool) -> httpx.Response:
+        # httpx timeouts apply per connect/read/write, so the deadline caps the whole exchange
+        budget = remaining()
+        if budget is None or stream:
+            return await client.send(request, stream=stream)
+        try:
+            return await asyncio.wait_for(client.send(request), max(budget, 0))
+        except asyncio.TimeoutError:
+            raise httpx.ReadTimeout(f"Deadline exceeded waiting for {request.method} {request.url}.", request=request) from None
+
+    def _can_wait(self, delay: float) -> bool:
+        budget = remaining()
+        return budget is None or delay < budget
+
+    def _count(self, endpoint: str, outcome: str):
+        SERVICE_CLIENT_REQUESTS.labels(service=self.service_name, endpoint=endpoint, outcome=outcome).inc()
+
+    def _log_state_change(self, endpoint: str, state: CircuitState, gauge):
+        gauge.set(_CIRCUIT_STATE_VALUES[state])
+        log = logger.warning if state == CircuitState.OPEN else logger.info
+        log(f"Circuit for {endpoint} on {self.service_name} is now {state.value}.")
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers["retry-after"])
+    except (KeyError, ValueError):
+        return None
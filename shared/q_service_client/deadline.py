@@ -0,0 +1,63 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+# Remaining time budget of the request, in milliseconds, sent with every outgoing call
+DEADLINE_HEADER = "x-q-deadline-ms"
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("q_deadline", default=None)
+
+
+def get_deadline() -> Optional[float]:
+    """The current deadline as a `time.monotonic()` timestamp, or None if there is none."""
+    return _deadline.get()
+
+def remaining() -> Optional[float]:
+    """Seconds left until the current deadline (possibly negative), or None if there is none."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+@contextmanager
+def deadline(seconds: float):
+    """
+    Bounds every service call made inside the block to finish within `seconds`.
+    A deadline nested inside another can only shorten it.
+    """
+    new_deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        new_deadline = min(new_deadline, current)
+    token = _deadline.set(new_deadline)
+    try:
+        yield new_deadline
+    finally:
+        _deadline.reset(token)
+
+
+class DeadlineMiddleware:
+    """
+    ASGI middleware that adopts the deadline of incoming requests, so calls a
+    service makes while handling a request share the caller's remaining budget.
+
+        app.add_middleware(DeadlineMiddleware)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        budget_ms = None
+        for name, value in scope.get("headers", []):
+            if name.decode("latin-1").lower() == DEADLINE_HEADER:
+                try:
+                    budget_ms = float(value.decode("latin-1"))
+                except ValueError:
+                    pass
+                break
+        if budget_ms is None:
+            return await self.app(scope, receive, send)
+        with deadline(budget_ms / 1000):
+            await self.app(scope, receive, send)
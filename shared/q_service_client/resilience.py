@@ -0,0 +1,165 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+from enum import Enum
+from typing import Callable, FrozenSet, Optional
+
+import httpx
+from pydantic import BaseModel
+
+
+class ServiceCallRejectedError(httpx.RequestError):
+    """
+    A call that was not sent. Subclasses httpx.RequestError so callers that
+    already handle connection errors handle these too.
+    """
+    pass
+
+class CircuitOpenError(ServiceCallRejectedError):
+    pass
+
+class BulkheadFullError(ServiceCallRejectedError):
+    pass
+
+class DeadlineExceededError(ServiceCallRejectedError):
+    pass
+
+
+class RetryPolicy(BaseModel):
+    """
+    How idempotent calls are retried: on connection errors, timeouts and
+    `retry_on_status`, with exponential backoff and full jitter.
+    """
+    max_attempts: int = 3
+    base_delay: float = 0.1
+    max_delay: float = 2.0
+    retry_on_status: FrozenSet[int] = frozenset({502, 503, 504})
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """The delay before retry number `attempt` (1-based). A server's Retry-After is honoured up to max_delay."""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Stops calls to an endpoint after `failure_threshold` consecutive failures.
+    After `reset_timeout` seconds, one trial call is let through: success
+    closes the circuit again, failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        on_state_change: Optional[Callable[[CircuitState], None]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._on_state_change = on_state_change
+        self._clock = clock
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead. In half-open state, only one trial call at a time may."""
+        with self._lock:
+            if self._state == CircuitState.OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._set_state(CircuitState.HALF_OPEN)
+            if self._state == CircuitState.HALF_OPEN:
+                if self._trial_in_flight:
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+            if self._state != CircuitState.CLOSED:
+                self._set_state(CircuitState.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == CircuitState.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+                if self._state != CircuitState.OPEN:
+                    self._set_state(CircuitState.OPEN)
+
+    def release(self):
+        """Ends a call that counted as neither success nor failure (e.g. it was cancelled)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def _set_state(self, state: CircuitState):
+        self._state = state
+        if self._on_state_change is not None:
+            self._on_state_change(state)
+
+
+class Bulkhead:
+    """
+    Limits concurrent calls to an endpoint to `max_concurrent`. Up to
+    `max_waiting` further calls wait for a slot; calls beyond that are rejected
+    with BulkheadFullError rather than queueing behind a slow downstream.
+    """
+
+    def __init__(self, max_concurrent: int = 32, max_waiting: int = 64):
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.in_flight = 0
+        self.waiting = 0
+        # asyncio primitives belong to one event loop; a process may run several (e.g. in tests)
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrent)
+        return semaphore
+
+    async def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Takes a slot, waiting at most `timeout` seconds. Returns False if none was free in time or too many are waiting."""
+        semaphore = self._semaphore()
+        if semaphore.locked():
+            if self.waiting >= self.max_waiting:
+                return False
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout)
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                self.waiting -= 1
+        else:
+            await semaphore.acquire()
+        self.in_flight += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore().release()
@@ -1,8 +1,13 @@
+import asyncio
 import httpx
 import logging
-from typing import List
+from typing import AsyncIterable, Iterable, List, Optional, Union
 
-from .models import SearchRequest, SearchResponse, UpsertRequest, Query
+from shared.q_service_client import ServiceClient, RetryPolicy
+from .models import (
+    SearchRequest, SearchResponse, UpsertRequest, DeleteRequest, Query, EmbedRequest, EmbedResponse,
+    Vector, BulkImportFormat, BulkImportJob, BulkImportJobRequest
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -22,20 +27,23 @@ class VectorStoreClient:
             timeout: The timeout for HTTP requests in seconds.
         """
         self.base_url = base_url
-        self.client = httpx.AsyncClient(base_url=base_url, timeout=timeout)
+        # Connections are pooled per base URL and shared by every client instance
+        self._service = ServiceClient(base_url, service_name="vectorstoreq", timeout=timeout)
         logger.info(f"VectorStoreClient initialized for base URL: {base_url}")
 
-    async def upsert(self, collection_name: str, vectors: List) -> None:
+    async def upsert(self, collection_name: str, vectors: List, read_your_writes: bool = False) -> None:
         """
         Upserts (inserts or updates) a batch of vectors into a collection.
 
         Args:
             collection_name: The name of the collection to upsert into.
             vectors: A list of Vector objects.
+            read_your_writes: Wait until the vectors are written instead of letting
+                the service buffer them, so an immediate read-your-writes search sees them.
         """
-        request_data = UpsertRequest(collection_name=collection_name, vectors=vectors)
+        request_data = UpsertRequest(collection_name=collection_name, vectors=vectors, read_your_writes=read_your_writes)
         try:
-            response = await self.client.post("/v1/ingest/upsert", json=request_data.dict())
+            response = await self._service.request("POST", "/v1/ingest/upsert", json=request_data.dict())
             response.raise_for_status()
             logger.info(f"Successfully upserted {len(vectors)} vectors into '{collection_name}'.")
         except httpx.HTTPStatusError as e:
@@ -45,20 +53,43 @@ class VectorStoreClient:
             logger.error(f"An error occurred while requesting {e.request.url!r}.")
             raise
 
-    async def search(self, collection_name: str, queries: List[Query]) -> SearchResponse:
+    async def delete(self, collection_name: str, ids: List[str]) -> int:
+        """
+        Deletes vectors from a collection by primary key, including upserts
+        the service has not written yet. Deleting is idempotent.
+
+        Returns:
+            The number of vectors Milvus reported deleted.
+        """
+        request_data = DeleteRequest(collection_name=collection_name, ids=ids)
+        try:
+            response = await self._service.request("POST", "/v1/ingest/delete", json=request_data.dict(), idempotent=True)
+            response.raise_for_status()
+            logger.info(f"Successfully deleted {len(ids)} vectors from '{collection_name}'.")
+            return response.json()["delete_count"]
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Error deleting vectors: {e.response.status_code} - {e.response.text}")
+            raise
+        except httpx.RequestError as e:
+            logger.error(f"An error occurred while requesting {e.request.url!r}.")
+            raise
+
+    async def search(self, collection_name: str, queries: List[Query], read_your_writes: bool = False) -> SearchResponse:
         """
         Performs a batch search for similar vectors in a collection.
 
         Args:
             collection_name: The name of the collection to search in.
             queries: A list of Query objects.
+            read_your_writes: Include upserts that are still buffered in the service.
 
         Returns:
             A SearchResponse object containing the search results.
         """
-        request_data = SearchRequest(collection_name=collection_name, queries=queries)
+        request_data = SearchRequest(collection_name=collection_name, queries=queries, read_your_writes=read_your_writes)
         try:
-            response = await self.client.post("/v1/search", json=request_data.dict())
+            # Searches are read-only, so they are retried like GETs
+            response = await self._service.request("POST", "/v1/search", json=request_data.dict(), idempotent=True)
             response.raise_for_status()
             logger.info(f"Successfully performed search on '{collection_name}' with {len(queries)} queries.")
             return SearchResponse(**response.json())
@@ -69,10 +100,146 @@ class VectorStoreClient:
             logger.error(f"An error occurred while requesting {e.request.url!r}.")
             raise
 
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeds texts with the service's shared embedding model, e.g. for callers
+        that need a vector for something other than a VectorStoreQ search.
+        Searches and upserts can pass `text` directly instead.
+
+        Args:
+            texts: The texts to embed.
+
+        Returns:
+            One embedding per text, in order.
+        """
+        request_data = EmbedRequest(texts=texts)
+        try:
+            response = await self._service.request("POST", "/v1/embed", json=request_data.dict(), idempotent=True)
+            response.raise_for_status()
+            return EmbedResponse(**response.json()).embeddings
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Error embedding texts: {e.response.status_code} - {e.response.text}")
+            raise
+        except httpx.RequestError as e:
+            logger.error(f"An error occurred while requesting {e.request.url!r}.")
+            raise
+
+    async def create_bulk_import_job(self, collection_name: str) -> BulkImportJob:
+        """Starts a resumable NDJSON bulk import into a collection."""
+        request_data = BulkImportJobRequest(collection_name=collection_name, format=BulkImportFormat.NDJSON)
+        response = await self._service.request("POST", "/v1/bulk/jobs", json=request_data.model_dump(mode="json"))
+        response.raise_for_status()
+        return BulkImportJob(**response.json())
+
+    async def get_bulk_import_job(self, job_id: str) -> BulkImportJob:
+        response = await self._service.request("GET", f"/v1/bulk/jobs/{job_id}", endpoint="GET /v1/bulk/jobs/{job_id}")
+        response.raise_for_status()
+        return BulkImportJob(**response.json())
+
+    async def bulk_import(
+        self,
+        collection_name: str,
+        vectors: Union[Iterable[Vector], AsyncIterable[Vector]],
+        job_id: Optional[str] = None,
+        chunk_size: int = 500,
+        max_concurrency: int = 4,
+        max_retries: int = 5
+    ) -> BulkImportJob:
+        """
+        Streams vectors into a collection through a bulk import job, without
+        holding more than `max_concurrency` chunks in memory.
+
+        Chunks of `chunk_size` vectors are uploaded as NDJSON, up to
+        `max_concurrency` at a time; chunks that fail with a server error or a
+        connection error are retried with jittered backoff. To resume an interrupted
+        import, pass its `job_id` and the same vectors in the same order:
+        everything the service has already written is skipped.
+
+        Args:
+            collection_name: The collection to import into.
+            vectors: The vectors to import, from a (sync or async) iterable such as a generator.
+            job_id: An existing job to resume; a new job is created if not given.
+            chunk_size: Vectors per uploaded chunk.
+            max_concurrency: Chunks uploaded at once.
+            max_retries: Attempts per chunk before the import fails.
+
+        Returns:
+            The completed job.
+        """
+        if job_id is None:
+            job = await self.create_bulk_import_job(collection_name)
+        else:
+            job = await self.get_bulk_import_job(job_id)
+        logger.info(f"Bulk importing into '{collection_name}' with job '{job.job_id}', starting at offset {job.offset}.")
+
+        slots = asyncio.Semaphore(max_concurrency)
+        uploads = set()
+
+        async def upload(offset: int, lines: List[str]):
+            try:
+                await self._upload_chunk(job.job_id, offset, "\n".join(lines).encode(), max_retries)
+            finally:
+                slots.release()
+
+        async def start_upload(offset: int, lines: List[str]):
+            await slots.acquire()
+            task = asyncio.create_task(upload(offset, lines))
+            uploads.add(task)
+            task.add_done_callback(uploads.discard)
+
+        try:
+            position, chunk_start, lines = 0, job.offset, []
+            async for vector in _aiter(vectors):
+                if position >= job.offset:
+                    lines.append(vector.model_dump_json(exclude_none=True))
+                    if len(lines) >= chunk_size:
+                        await start_upload(chunk_start, lines)
+                        chunk_start, lines = position + 1, []
+                position += 1
+                # Surface a failed upload instead of reading the rest of the source
+                for task in [t for t in uploads if t.done()]:
+                    task.result()
+            if lines:
+                await start_upload(chunk_start, lines)
+            await asyncio.gather(*uploads)
+        except BaseException:
+            for task in uploads:
+                task.cancel()
+            logger.error(f"Bulk import into '{collection_name}' failed; resume it with job_id='{job.job_id}'.")
+            raise
+
+        response = await self._service.request(
+            "POST", f"/v1/bulk/jobs/{job.job_id}/complete", endpoint="POST /v1/bulk/jobs/{job_id}/complete", idempotent=True
+        )
+        response.raise_for_status()
+        job = BulkImportJob(**response.json())
+        logger.info(f"Bulk import '{job.job_id}' into '{collection_name}' completed with {job.records_written} records written.")
+        return job
+
+    async def _upload_chunk(self, job_id: str, offset: int, data: bytes, max_retries: int):
+        # The service skips records it already wrote, so chunks can be retried on any server error
+        response = await self._service.request(
+            "PUT",
+            f"/v1/bulk/jobs/{job_id}/chunks",
+            endpoint="PUT /v1/bulk/jobs/{job_id}/chunks",
+            params={"offset": offset},
+            content=data,
+            headers={"Content-Type": "application/x-ndjson"},
+            retry=RetryPolicy(max_attempts=max_retries, base_delay=0.5, max_delay=10.0, retry_on_status=frozenset({500, 502, 503, 504}))
+        )
+        response.raise_for_status()
+
     async def close(self):
         """
-        Closes the underlying HTTP client.
-        Should be called when the client is no longer needed.
+        Kept for compatibility: connections are pooled and shared, and closed
+        by `shared.q_service_client.close_pooled_clients()` on shutdown.
         """
-        await self.client.aclose()
-        logger.info("VectorStoreClient closed.") 
\ No newline at end of file
+        await self._service.close()
+
+async def _aiter(items):
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
@@ -1,28 +1,72 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+import time
+from enum import Enum
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Dict, Any, Optional, Tuple
 
 class Vector(BaseModel):
     """
     Represents a single vector and its associated metadata.
+    Either `values` or `text` must be given; `text` is embedded by VectorStoreQ
+    (it is not stored unless also put in the metadata).
     """
     id: str
-    values: List[float]
+    values: Optional[List[float]] = None
+    text: Optional[str] = None
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
+    @model_validator(mode="after")
+    def _check_values_or_text(self):
+        if self.values is None and self.text is None:
+            raise ValueError("Either 'values' or 'text' is required.")
+        return self
+
 class UpsertRequest(BaseModel):
     """
     A request to insert or update vectors in a collection.
     """
     collection_name: str
     vectors: List[Vector]
+    # Write through to Milvus before responding instead of buffering
+    read_your_writes: bool = False
+
+class DeleteRequest(BaseModel):
+    """
+    A request to delete vectors from a collection by primary key.
+    """
+    collection_name: str
+    ids: List[str]
+
+class SearchMode(str, Enum):
+    DENSE = "dense"
+    # BM25 over the collection's configured text field; needs `text`
+    KEYWORD = "keyword"
+    # Dense and keyword results fused with reciprocal rank fusion; needs `text`
+    HYBRID = "hybrid"
 
 class Query(BaseModel):
     """
     Represents a single query vector for a search operation.
+    Either `values` or `text` must be given; `text` is embedded by VectorStoreQ.
     """
-    values: List[float]
+    values: Optional[List[float]] = None
+    text: Optional[str] = None
     top_k: int = 10
+    # Metadata filter, e.g. {"source_name": "runbook.md"} or {"agent_id": {"$in": ["a1", "a2"]}}
     filter: Optional[Dict[str, Any]] = None
+    # Overrides for the index's search params, e.g. {"ef": 128} or {"nprobe": 32}
+    search_params: Optional[Dict[str, Any]] = None
+    mode: SearchMode = SearchMode.DENSE
+    # Weights of the dense and keyword rankings in hybrid mode (service defaults if unset)
+    dense_weight: Optional[float] = None
+    keyword_weight: Optional[float] = None
+
+    @model_validator(mode="after")
+    def _check_values_or_text(self):
+        if self.values is None and self.text is None:
+            raise ValueError("Either 'values' or 'text' is required.")
+        if self.mode != SearchMode.DENSE and not self.text:
+            raise ValueError(f"'text' is required for {self.mode.value} search.")
+        return self
 
 class SearchRequest(BaseModel):
     """
@@ -30,6 +74,8 @@ class SearchRequest(BaseModel):
     """
     collection_name: str
     queries: List[Query]
+    # Write pending buffered upserts first and search with strong consistency
+    read_your_writes: bool = False
 
 class SearchHit(BaseModel):
     """
@@ -49,4 +95,53 @@ class SearchResponse(BaseModel):
     """
     The response from a search request, containing results for each query.
     """
-    results: List[QueryResult] 
\ No newline at end of file
+    results: List[QueryResult] 
+
+class EmbedRequest(BaseModel):
+    """
+    A request to embed texts with VectorStoreQ's shared embedding model.
+    """
+    texts: List[str]
+
+class EmbedResponse(BaseModel):
+    """
+    The embeddings for an EmbedRequest, in the same order as its texts.
+    """
+    model: str
+    dim: int
+    embeddings: List[List[float]]
+
+class BulkImportFormat(str, Enum):
+    NDJSON = "ndjson"
+    ARROW = "arrow"
+
+class BulkImportStatus(str, Enum):
+    ACTIVE = "active"
+    COMPLETED = "completed"
+    ABORTED = "aborted"
+
+class BulkImportJobRequest(BaseModel):
+    """Starts a bulk import into a collection."""
+    collection_name: str
+    format: BulkImportFormat = BulkImportFormat.NDJSON
+
+class BulkImportJob(BaseModel):
+    """
+    A resumable bulk import. Chunks are sent with the offset of their first
+    record; every record below `offset` has been written, so an interrupted
+    import resumes by sending records from `offset` on.
+    """
+    job_id: str
+    collection_name: str
+    format: BulkImportFormat
+    status: BulkImportStatus = BulkImportStatus.ACTIVE
+    offset: int = 0
+    # Written record ranges [start, end) above `offset`, from chunks that arrived out of order
+    written_ranges: List[Tuple[int, int]] = Field(default_factory=list)
+    records_written: int = 0
+    batches_written: int = 0
+    # The metadata fields records may carry, fixed when the job is created
+    schema_fields: List[str] = Field(default_factory=list)
+    arrow_schema: Optional[str] = None
+    created_at: float = Field(default_factory=time.time)
+    updated_at: float = Field(default_factory=time.time)
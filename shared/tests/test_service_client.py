@@ -0,0 +1,150 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request, Response
+
+from shared.q_service_client import (
+    BulkheadFullError, CircuitOpenError, CircuitState, DeadlineExceededError, DeadlineMiddleware,
+    RetryPolicy, ServiceClient, deadline, get_http_client, mount_transport, remaining, run_and_close,
+    unmount_transport
+)
+from shared.q_service_client.client import reset_resilience_state
+from shared.q_vectorstore_client.client import VectorStoreClient
+from shared.q_vectorstore_client.models import Query
+
+BASE_URL = "http://stub"
+FAST_RETRY = RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.005)
+
+def stub_app():
+    """A downstream that fails its first `failures` calls with a 503 and reports what it saw."""
+    app = FastAPI()
+    app.add_middleware(DeadlineMiddleware)
+    app.state.calls = 0
+    app.state.failures = 0
+
+    @app.api_route("/flaky", methods=["GET", "POST"])
+    async def flaky():
+        app.state.calls += 1
+        if app.state.calls <= app.state.failures:
+            return Response(status_code=503)
+        return {"calls": app.state.calls}
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(0.05)
+        return {}
+
+    @app.get("/budget")
+    async def budget(request: Request):
+        # The deadline the middleware adopted from the caller
+        return {"header": request.headers.get("x-q-deadline-ms"), "remaining": remaining()}
+
+    @app.post("/v1/search")
+    async def search(request: Request):
+        app.state.calls += 1
+        if app.state.calls <= app.state.failures:
+            return Response(status_code=503)
+        body = await request.json()
+        return {"results": [{"hits": [{"id": "a", "score": 0.9, "metadata": {}}]} for _ in body["queries"]]}
+
+    return app
+
+@pytest.fixture
+def app():
+    reset_resilience_state()
+    app = stub_app()
+    mount_transport(BASE_URL, httpx.ASGITransport(app=app))
+    yield app
+    unmount_transport(BASE_URL)
+
+def test_clients_share_one_pool_per_base_url(app):
+    async def scenario():
+        first = get_http_client(BASE_URL)
+        assert get_http_client(BASE_URL + "/") is first
+        assert get_http_client("http://other") is not first
+
+    asyncio.run(scenario())
+
+def test_run_and_close_closes_the_loops_pooled_clients(app):
+    async def call():
+        response = await ServiceClient(BASE_URL).request("GET", "/flaky")
+        return get_http_client(BASE_URL), response.json()
+
+    pooled, body = run_and_close(call())
+
+    assert body == {"calls": 1}
+    assert pooled.is_closed
+
+def test_only_idempotent_calls_are_retried(app):
+    client = ServiceClient(BASE_URL, retry=FAST_RETRY)
+
+    app.state.failures = 2
+    response = asyncio.run(client.request("GET", "/flaky"))
+    assert response.status_code == 200 and app.state.calls == 3
+
+    app.state.calls, app.state.failures = 0, 1
+    assert asyncio.run(client.request("POST", "/flaky")).status_code == 503
+    assert app.state.calls == 1
+
+    app.state.calls = 0
+    assert asyncio.run(client.request("POST", "/flaky", idempotent=True)).status_code == 200
+
+def test_circuit_opens_after_failures_and_recovers(app):
+    client = ServiceClient(BASE_URL, retry=RetryPolicy(max_attempts=1), failure_threshold=2, reset_timeout=0.05)
+    app.state.failures = 2
+
+    async def scenario():
+        for _ in range(2):
+            assert (await client.request("GET", "/flaky")).status_code == 503
+        with pytest.raises(CircuitOpenError):
+            await client.request("GET", "/flaky")
+        # Other clients for the same service see the same breaker
+        with pytest.raises(httpx.RequestError):
+            await ServiceClient(BASE_URL).request("GET", "/flaky")
+        await asyncio.sleep(0.06)
+        # One trial call is let through and closes the circuit
+        assert (await client.request("GET", "/flaky")).status_code == 200
+
+    asyncio.run(scenario())
+    assert client.circuit_breaker("GET /flaky").state == CircuitState.CLOSED
+    assert app.state.calls == 3
+
+def test_bulkhead_rejects_calls_beyond_its_limit(app):
+    client = ServiceClient(BASE_URL, max_concurrent=1, max_waiting=0)
+
+    async def scenario():
+        return await asyncio.gather(*(client.request("GET", "/slow") for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert sum(isinstance(r, httpx.Response) for r in results) == 1
+    assert sum(isinstance(r, BulkheadFullError) for r in results) == 2
+
+def test_deadline_is_propagated_and_enforced(app):
+    client = ServiceClient(BASE_URL, timeout=30.0)
+
+    async def scenario():
+        with deadline(2.0):
+            body = (await client.request("GET", "/budget")).json()
+        assert 0 < int(body["header"]) <= 2000
+        assert 0 < body["remaining"] <= 2.0
+
+        with deadline(0.01):
+            with pytest.raises(httpx.TimeoutException):
+                await client.request("GET", "/slow", retry=RetryPolicy(max_attempts=1))
+            await asyncio.sleep(0.02)
+            with pytest.raises(DeadlineExceededError):
+                await client.request("GET", "/budget")
+
+    asyncio.run(scenario())
+
+def test_vectorstore_client_runs_on_the_shared_runtime(app):
+    app.state.failures = 1
+
+    async def scenario():
+        client = VectorStoreClient(base_url=BASE_URL)
+        return await client.search("docs", [Query(values=[0.1, 0.2])])
+
+    response = asyncio.run(scenario())
+    assert response.results[0].hits[0].id == "a"
+    assert app.state.calls == 2  # searches are retried like GETs
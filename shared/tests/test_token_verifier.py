@@ -0,0 +1,211 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+from shared.q_auth_parser.models import UserClaims
+from shared.q_auth_parser.verifier import (
+    IntrospectionCache, JWKSCache, RevocationFeed, RevocationList, TokenVerificationError, TokenVerifier
+)
+
+def mint_key(kid):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    public_jwk = {**jwk.construct(public_pem, "RS256").to_dict(), "kid": kid, "use": "sig"}
+    return pem, public_jwk
+
+KEY_1 = mint_key("k1")
+KEY_2 = mint_key("k2")
+
+def claims(**overrides):
+    now = int(time.time())
+    return {
+        "exp": now + 300, "iat": now, "jti": "jti-1", "iss": "https://auth.q/realms/q", "aud": "q-platform",
+        "sub": "user-1", "typ": "Bearer", "azp": "q", "session_state": "s", "acr": "1",
+        "realm_access": {"roles": ["admin"]}, "scope": "openid", "sid": "sid-1", "email_verified": True,
+        "preferred_username": "alice", **overrides,
+    }
+
+def sign(key, **overrides):
+    pem, public_jwk = key
+    return jwt.encode(claims(**overrides), pem, algorithm="RS256", headers={"kid": public_jwk["kid"]})
+
+class FakeAuthQ:
+    def __init__(self, keys):
+        self.keys = keys
+        self.jwks_fetches = 0
+        self.introspections = 0
+        self.active = {}
+
+    async def fetch_jwks(self):
+        self.jwks_fetches += 1
+        return {"keys": [public_jwk for _, public_jwk in self.keys]}
+
+    async def introspect(self, token):
+        self.introspections += 1
+        return self.active.get(token)
+
+def verifier(authq, **kwargs):
+    return TokenVerifier(
+        authq.introspect,
+        jwks=JWKSCache(authq.fetch_jwks, min_refresh_interval=0),
+        issuer="https://auth.q/realms/q",
+        audience="q-platform",
+        **kwargs
+    )
+
+def test_jwts_are_verified_locally():
+    authq = FakeAuthQ([KEY_1])
+    token_verifier = verifier(authq)
+
+    for _ in range(3):
+        payload = asyncio.run(token_verifier.verify(sign(KEY_1)))
+
+    assert payload["sub"] == "user-1"
+    assert authq.introspections == 0 and authq.jwks_fetches == 1
+    user = UserClaims.from_token_payload(payload)
+    assert (user.username, user.roles, user.aud) == ("alice", ["admin"], ["q-platform"])
+
+def test_invalid_jwts_are_rejected():
+    token_verifier = verifier(FakeAuthQ([KEY_1]))
+    forged = sign(KEY_2)[:-10] + "A" * 10
+
+    for token in (
+        sign(KEY_1, exp=int(time.time()) - 600), sign(KEY_1, aud="other"), sign(KEY_1, iss="https://other"),
+        sign(KEY_2), forged
+    ):
+        with pytest.raises(TokenVerificationError):
+            asyncio.run(token_verifier.verify(token))
+
+def test_local_verification_needs_the_expected_issuer_and_audience():
+    authq = FakeAuthQ([KEY_1])
+    with pytest.raises(ValueError):
+        TokenVerifier(authq.introspect, jwks=JWKSCache(authq.fetch_jwks), issuer="https://auth.q/realms/q")
+    with pytest.raises(ValueError):
+        TokenVerifier(authq.introspect, jwks=JWKSCache(authq.fetch_jwks), audience="q-platform")
+
+def test_rotated_keys_are_fetched_on_demand():
+    authq = FakeAuthQ([KEY_1])
+    token_verifier = verifier(authq)
+    asyncio.run(token_verifier.verify(sign(KEY_1)))
+
+    authq.keys = [KEY_1, KEY_2]
+    assert asyncio.run(token_verifier.verify(sign(KEY_2)))["sub"] == "user-1"
+    assert authq.jwks_fetches == 2
+
+def test_opaque_tokens_are_introspected_once_per_max_age():
+    now = [1000.0]
+    authq = FakeAuthQ([KEY_1])
+    authq.active["opaque"] = claims(exp=2000)
+    token_verifier = verifier(authq, cache=IntrospectionCache(max_age=30, clock=lambda: now[0]))
+
+    for _ in range(3):
+        asyncio.run(token_verifier.verify("opaque"))
+    assert authq.introspections == 1
+
+    # Revoked in AuthQ: trusted for at most max_age
+    del authq.active["opaque"]
+    now[0] += 31
+    with pytest.raises(TokenVerificationError):
+        asyncio.run(token_verifier.verify("opaque"))
+
+def test_introspection_cache_is_bounded_and_keyed_by_hash():
+    cache = IntrospectionCache(max_entries=2)
+    for token in ("a", "b", "c"):
+        cache.put(token, {"sub": token})
+
+    assert len(cache) == 2
+    assert cache.get("a") is None and cache.get("c") == {"sub": "c"}
+    assert "c" not in cache._entries
+
+def test_revocation_events_reject_cached_and_local_tokens():
+    authq = FakeAuthQ([KEY_1])
+    authq.active["opaque"] = claims(jti="jti-2", sid="sid-2")
+    token_verifier = verifier(authq)
+    asyncio.run(token_verifier.verify("opaque"))
+
+    token_verifier.revocations.handle_event({"event_type": "auth.token_revoked", "payload": {"sid": "sid-2"}})
+    token_verifier.revocations.handle_event({"jti": "jti-1"})
+
+    with pytest.raises(TokenVerificationError, match="revoked"):
+        asyncio.run(token_verifier.verify("opaque"))
+    with pytest.raises(TokenVerificationError, match="revoked"):
+        asyncio.run(token_verifier.verify(sign(KEY_1)))
+    assert asyncio.run(token_verifier.verify(sign(KEY_1, jti="jti-3")))["jti"] == "jti-3"
+
+def test_user_wide_revocation_only_hits_older_tokens():
+    revocations = RevocationList(clock=lambda: 1000.0)
+    revocations.revoke(sub="user-1")
+
+    assert revocations.is_revoked({"sub": "user-1", "iat": 999})
+    assert not revocations.is_revoked({"sub": "user-1", "iat": 1001})
+
+def test_revocation_feed_reconnects_with_a_non_durable_reader(monkeypatch):
+    pulsar = pytest.importorskip("pulsar")
+    applied = threading.Event()
+    readers = []
+
+    class Message:
+        def data(self):
+            return json.dumps({"jti": "jti-9"}).encode()
+
+    class FakeReader:
+        def __init__(self):
+            self.messages = [Message()]
+
+        def read_next(self, timeout_millis):
+            if self.messages:
+                return self.messages.pop()
+            applied.set()
+            raise pulsar.Timeout()
+
+        def close(self):
+            pass
+
+    class FakeClient:
+        attempts = 0
+
+        def __init__(self, service_url):
+            FakeClient.attempts += 1
+
+        def create_reader(self, topic, start_message_id):
+            if FakeClient.attempts == 1:
+                raise ConnectionError("pulsar unavailable")
+            assert start_message_id == pulsar.MessageId.latest
+            readers.append(FakeReader())
+            return readers[-1]
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(pulsar, "Client", FakeClient)
+    revocations = RevocationList()
+    feed = RevocationFeed(revocations, "pulsar://stub", "revocations", retry_delay=0.01)
+    feed.start()
+    feed.start()
+    try:
+        assert applied.wait(timeout=5)
+    finally:
+        feed.stop()
+
+    assert FakeClient.attempts == 2 and len(readers) == 1
+    assert revocations.is_revoked({"jti": "jti-9"})
+
+def test_old_jwts_are_introspected():
+    authq = FakeAuthQ([KEY_1])
+    old_token = sign(KEY_1, iat=int(time.time()) - 3600)
+    token_verifier = verifier(authq, max_token_age=600)
+
+    with pytest.raises(TokenVerificationError, match="not active"):
+        asyncio.run(token_verifier.verify(old_token))
+    assert authq.introspections == 1